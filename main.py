@@ -44,7 +44,7 @@ from modules import module_5_patrones_anomalias
 from modules import module_6_clustering
 from modules import module_7_mapa_geografico
 from modules import module_8_info_empresas
-from utils import data_loader
+from utils import data_loader, figure_cache
 
 def main():
     # Título principal
@@ -222,7 +222,9 @@ def main():
                 [
                     "6.1 Configuración y Exploración",
                     "6.2 Análisis de Clusters",
-                    "6.3 Perfiles y Patrones"
+                    "6.3 Perfiles y Patrones",
+                    "6.4 Registro de Modelos",
+                    "6.5 Comparación de Algoritmos"
                 ],
                 key="submodulo_6"
             )
@@ -278,6 +280,9 @@ def main():
     # Mostrar información del filtro
     st.info(f"📅 Período seleccionado: {año_inicio}-T{trimestre_inicio} a {año_fin}-T{trimestre_fin} | 📊 Registros: {len(df_filtrado):,}")
     
+    # Las figuras cacheadas de la página se indexan por submódulo y periodo
+    figure_cache.fijar_pagina(submodulo or modulo_seleccionado, df_filtrado)
+    
     # Renderizar módulo seleccionado
     if modulo_seleccionado == "🏠 Inicio":
         show_home(df_filtrado)
@@ -333,6 +338,10 @@ def main():
             module_6_clustering.show_analisis_clusters(df_filtrado)
         elif submodulo == "6.3 Perfiles y Patrones":
             module_6_clustering.show_perfiles_patrones(df_filtrado)
+        elif submodulo == "6.4 Registro de Modelos":
+            module_6_clustering.show_registro_modelos(df_filtrado)
+        elif submodulo == "6.5 Comparación de Algoritmos":
+            module_6_clustering.show_comparacion_algoritmos(df_filtrado)
     
     elif modulo_seleccionado == "7️⃣ Mapa Geográfico":
         if submodulo == "7.1 Mapa de Cobertura":
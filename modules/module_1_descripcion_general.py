@@ -6,6 +6,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from utils import figure_cache
 
 def show_registros_por_año(df):
     """1.1 Número total de registros por año"""
@@ -39,32 +40,38 @@ def show_registros_por_año(df):
     
     with col1:
         # Gráfico de barras por año
-        fig1 = px.bar(
-            x=registros_por_ano.index,
-            y=registros_por_ano.values,
-            labels={'x': 'Año', 'y': 'Número de Registros'},
-            title='Registros por Año',
-            color=registros_por_ano.index,
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig1.update_layout(showlegend=False, height=400)
+        fig1 = figure_cache.obtener('fig1')
+        if fig1 is None:
+            fig1 = px.bar(
+                x=registros_por_ano.index,
+                y=registros_por_ano.values,
+                labels={'x': 'Año', 'y': 'Número de Registros'},
+                title='Registros por Año',
+                color=registros_por_ano.index,
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig1.update_layout(showlegend=False, height=400)
+            fig1 = figure_cache.guardar('fig1', fig1)
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Gráfico por trimestre
         trim_ano = df.groupby(['ANNO', 'TRIMESTRE']).size().reset_index(name='count')
-        fig2 = px.line(
-            trim_ano,
-            x='TRIMESTRE',
-            y='count',
-            color='ANNO',
-            markers=True,
-            title='Registros por Trimestre',
-            labels={'count': 'Número de Registros', 'TRIMESTRE': 'Trimestre'},
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig2.update_layout(height=400)
-        fig2.update_xaxes(tickvals=[1, 2, 3, 4])
+        fig2 = figure_cache.obtener('fig2')
+        if fig2 is None:
+            fig2 = px.line(
+                trim_ano,
+                x='TRIMESTRE',
+                y='count',
+                color='ANNO',
+                markers=True,
+                title='Registros por Trimestre',
+                labels={'count': 'Número de Registros', 'TRIMESTRE': 'Trimestre'},
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig2.update_layout(height=400)
+            fig2.update_xaxes(tickvals=[1, 2, 3, 4])
+            fig2 = figure_cache.guardar('fig2', fig2)
         st.plotly_chart(fig2, use_container_width=True)
     
     # Tabla detallada
@@ -99,39 +106,44 @@ def show_operadores(df):
     
     with col1:
         # Top 10 operadores
-        top_10_ops = df['EMPRESA'].value_counts().head(10)
-        fig1 = px.bar(
-            x=top_10_ops.values,
-            y=[op[:30] for op in top_10_ops.index],
-            orientation='h',
-            title='Top 10 Operadores por Número de Registros',
-            labels={'x': 'Número de Registros', 'y': 'Operador'},
-            color=top_10_ops.values,
-            color_continuous_scale='Blues'
-        )
-        fig1.update_layout(showlegend=False, height=500)
+        fig1 = figure_cache.obtener('fig1')
+        if fig1 is None:
+            top_10_ops = df['EMPRESA'].value_counts().head(10)
+            fig1 = px.bar(
+                x=top_10_ops.values,
+                y=[op[:30] for op in top_10_ops.index],
+                orientation='h',
+                title='Top 10 Operadores por Número de Registros',
+                labels={'x': 'Número de Registros', 'y': 'Operador'},
+                color=top_10_ops.values,
+                color_continuous_scale='Blues'
+            )
+            fig1.update_layout(showlegend=False, height=500)
+            fig1 = figure_cache.guardar('fig1', fig1)
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Comparación 2023 vs 2024
-        top_10_empresas = df['EMPRESA'].value_counts().head(10).index
-        df_top_10 = df[df['EMPRESA'].isin(top_10_empresas)]
-        valor_ops_ano = df_top_10.groupby(['EMPRESA', 'ANNO']).size().reset_index(name='count')
-        
-        fig2 = px.bar(
-            valor_ops_ano,
-            x='count',
-            y='EMPRESA',
-            color='ANNO',
-            orientation='h',
-            barmode='group',
-            title='Top 10 Operadores: 2023 vs 2024',
-            labels={'count': 'Número de Registros', 'EMPRESA': 'Operador'},
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig2.update_layout(height=500)
-        fig2.update_yaxes(ticktext=[op[:25] for op in top_10_empresas], 
-                          tickvals=list(top_10_empresas))
+        fig2 = figure_cache.obtener('fig2')
+        if fig2 is None:
+            top_10_empresas = df['EMPRESA'].value_counts().head(10).index
+            df_top_10 = df[df['EMPRESA'].isin(top_10_empresas)]
+            valor_ops_ano = df_top_10.groupby(['EMPRESA', 'ANNO']).size().reset_index(name='count')
+            fig2 = px.bar(
+                valor_ops_ano,
+                x='count',
+                y='EMPRESA',
+                color='ANNO',
+                orientation='h',
+                barmode='group',
+                title='Top 10 Operadores: 2023 vs 2024',
+                labels={'count': 'Número de Registros', 'EMPRESA': 'Operador'},
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig2.update_layout(height=500)
+            fig2.update_yaxes(ticktext=[op[:25] for op in top_10_empresas], 
+                              tickvals=list(top_10_empresas))
+            fig2 = figure_cache.guardar('fig2', fig2)
         st.plotly_chart(fig2, use_container_width=True)
     
     # Tabla detallada
@@ -174,36 +186,41 @@ def show_cobertura_geografica(df):
         
         with col1:
             # Top 15 departamentos
-            top_15_deptos = df['DEPARTAMENTO'].value_counts().head(15)
-            fig1 = px.bar(
-                x=top_15_deptos.values,
-                y=top_15_deptos.index,
-                orientation='h',
-                title='Top 15 Departamentos por Registros',
-                labels={'x': 'Número de Registros', 'y': 'Departamento'},
-                color=top_15_deptos.values,
-                color_continuous_scale='Viridis'
-            )
-            fig1.update_layout(showlegend=False, height=600)
+            fig1 = figure_cache.obtener('fig1')
+            if fig1 is None:
+                top_15_deptos = df['DEPARTAMENTO'].value_counts().head(15)
+                fig1 = px.bar(
+                    x=top_15_deptos.values,
+                    y=top_15_deptos.index,
+                    orientation='h',
+                    title='Top 15 Departamentos por Registros',
+                    labels={'x': 'Número de Registros', 'y': 'Departamento'},
+                    color=top_15_deptos.values,
+                    color_continuous_scale='Viridis'
+                )
+                fig1.update_layout(showlegend=False, height=600)
+                fig1 = figure_cache.guardar('fig1', fig1)
             st.plotly_chart(fig1, use_container_width=True)
         
         with col2:
             # Comparación 2023 vs 2024
-            top_10_deptos = df['DEPARTAMENTO'].value_counts().head(10).index
-            df_top_deptos = df[df['DEPARTAMENTO'].isin(top_10_deptos)]
-            deptos_ano = df_top_deptos.groupby(['DEPARTAMENTO', 'ANNO']).size().reset_index(name='count')
-            
-            fig2 = px.bar(
-                deptos_ano,
-                x='count',
-                y='DEPARTAMENTO',
-                color='ANNO',
-                orientation='h',
-                barmode='group',
-                title='Top 10 Departamentos: 2023 vs 2024',
-                color_discrete_sequence=['#2E86AB', '#A23B72']
-            )
-            fig2.update_layout(height=600)
+            fig2 = figure_cache.obtener('fig2')
+            if fig2 is None:
+                top_10_deptos = df['DEPARTAMENTO'].value_counts().head(10).index
+                df_top_deptos = df[df['DEPARTAMENTO'].isin(top_10_deptos)]
+                deptos_ano = df_top_deptos.groupby(['DEPARTAMENTO', 'ANNO']).size().reset_index(name='count')
+                fig2 = px.bar(
+                    deptos_ano,
+                    x='count',
+                    y='DEPARTAMENTO',
+                    color='ANNO',
+                    orientation='h',
+                    barmode='group',
+                    title='Top 10 Departamentos: 2023 vs 2024',
+                    color_discrete_sequence=['#2E86AB', '#A23B72']
+                )
+                fig2.update_layout(height=600)
+                fig2 = figure_cache.guardar('fig2', fig2)
             st.plotly_chart(fig2, use_container_width=True)
     
     with tab2:
@@ -211,30 +228,36 @@ def show_cobertura_geografica(df):
         
         with col1:
             # Top 15 municipios
-            top_15_mun = df['MUNICIPIO'].value_counts().head(15)
-            fig3 = px.bar(
-                x=top_15_mun.values,
-                y=top_15_mun.index,
-                orientation='h',
-                title='Top 15 Municipios por Registros',
-                labels={'x': 'Número de Registros', 'y': 'Municipio'},
-                color=top_15_mun.values,
-                color_continuous_scale='Oranges'
-            )
-            fig3.update_layout(showlegend=False, height=600)
+            fig3 = figure_cache.obtener('fig3')
+            if fig3 is None:
+                top_15_mun = df['MUNICIPIO'].value_counts().head(15)
+                fig3 = px.bar(
+                    x=top_15_mun.values,
+                    y=top_15_mun.index,
+                    orientation='h',
+                    title='Top 15 Municipios por Registros',
+                    labels={'x': 'Número de Registros', 'y': 'Municipio'},
+                    color=top_15_mun.values,
+                    color_continuous_scale='Oranges'
+                )
+                fig3.update_layout(showlegend=False, height=600)
+                fig3 = figure_cache.guardar('fig3', fig3)
             st.plotly_chart(fig3, use_container_width=True)
         
         with col2:
             # Municipios por departamento
-            mun_por_depto = df.groupby('DEPARTAMENTO')['MUNICIPIO'].nunique().sort_values(ascending=False).head(10)
-            fig4 = px.bar(
-                x=mun_por_depto.values,
-                y=mun_por_depto.index,
-                orientation='h',
-                title='Departamentos con Más Municipios',
-                labels={'x': 'Número de Municipios', 'y': 'Departamento'}
-            )
-            fig4.update_layout(height=600)
+            fig4 = figure_cache.obtener('fig4')
+            if fig4 is None:
+                mun_por_depto = df.groupby('DEPARTAMENTO')['MUNICIPIO'].nunique().sort_values(ascending=False).head(10)
+                fig4 = px.bar(
+                    x=mun_por_depto.values,
+                    y=mun_por_depto.index,
+                    orientation='h',
+                    title='Departamentos con Más Municipios',
+                    labels={'x': 'Número de Municipios', 'y': 'Departamento'}
+                )
+                fig4.update_layout(height=600)
+                fig4 = figure_cache.guardar('fig4', fig4)
             st.plotly_chart(fig4, use_container_width=True)
     
     with tab3:
@@ -242,29 +265,35 @@ def show_cobertura_geografica(df):
         
         with col1:
             # Distribución por región
-            region_counts = df['REGION'].value_counts()
-            fig5 = px.pie(
-                values=region_counts.values,
-                names=region_counts.index,
-                title='Distribución de Registros por Región',
-                color_discrete_sequence=px.colors.qualitative.Set3
-            )
-            fig5.update_layout(height=500)
+            fig5 = figure_cache.obtener('fig5')
+            if fig5 is None:
+                region_counts = df['REGION'].value_counts()
+                fig5 = px.pie(
+                    values=region_counts.values,
+                    names=region_counts.index,
+                    title='Distribución de Registros por Región',
+                    color_discrete_sequence=px.colors.qualitative.Set3
+                )
+                fig5.update_layout(height=500)
+                fig5 = figure_cache.guardar('fig5', fig5)
             st.plotly_chart(fig5, use_container_width=True)
         
         with col2:
             # Registros por región y año
-            region_ano = df.groupby(['REGION', 'ANNO']).size().reset_index(name='count')
-            fig6 = px.bar(
-                region_ano,
-                x='REGION',
-                y='count',
-                color='ANNO',
-                barmode='group',
-                title='Registros por Región y Año',
-                color_discrete_sequence=['#2E86AB', '#A23B72']
-            )
-            fig6.update_layout(height=500)
+            fig6 = figure_cache.obtener('fig6')
+            if fig6 is None:
+                region_ano = df.groupby(['REGION', 'ANNO']).size().reset_index(name='count')
+                fig6 = px.bar(
+                    region_ano,
+                    x='REGION',
+                    y='count',
+                    color='ANNO',
+                    barmode='group',
+                    title='Registros por Región y Año',
+                    color_discrete_sequence=['#2E86AB', '#A23B72']
+                )
+                fig6.update_layout(height=500)
+                fig6 = figure_cache.guardar('fig6', fig6)
             st.plotly_chart(fig6, use_container_width=True)
 
 def show_servicios_individual_vs_empaquetado(df):
@@ -293,28 +322,34 @@ def show_servicios_individual_vs_empaquetado(df):
     
     with col1:
         # Pie chart general
-        fig1 = px.pie(
-            values=tipo_servicio_count.values,
-            names=tipo_servicio_count.index,
-            title='Distribución: Individual vs Empaquetado',
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig1.update_layout(height=400)
+        fig1 = figure_cache.obtener('fig1')
+        if fig1 is None:
+            fig1 = px.pie(
+                values=tipo_servicio_count.values,
+                names=tipo_servicio_count.index,
+                title='Distribución: Individual vs Empaquetado',
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig1.update_layout(height=400)
+            fig1 = figure_cache.guardar('fig1', fig1)
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Comparación por año
-        tipo_ano = df.groupby(['TIPO_SERVICIO', 'ANNO']).size().reset_index(name='count')
-        fig2 = px.bar(
-            tipo_ano,
-            x='TIPO_SERVICIO',
-            y='count',
-            color='ANNO',
-            barmode='group',
-            title='Individual vs Empaquetado: 2023 vs 2024',
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig2.update_layout(height=400)
+        fig2 = figure_cache.obtener('fig2')
+        if fig2 is None:
+            tipo_ano = df.groupby(['TIPO_SERVICIO', 'ANNO']).size().reset_index(name='count')
+            fig2 = px.bar(
+                tipo_ano,
+                x='TIPO_SERVICIO',
+                y='count',
+                color='ANNO',
+                barmode='group',
+                title='Individual vs Empaquetado: 2023 vs 2024',
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig2.update_layout(height=400)
+            fig2 = figure_cache.guardar('fig2', fig2)
         st.plotly_chart(fig2, use_container_width=True)
     
     # Detalle por servicio
@@ -324,35 +359,40 @@ def show_servicios_individual_vs_empaquetado(df):
     servicio_detail['Porcentaje'] = (servicio_detail['count'] / len(df) * 100).round(2)
     servicio_detail = servicio_detail.sort_values('count', ascending=False)
     
-    fig3 = px.bar(
-        servicio_detail,
-        x='count',
-        y='SERVICIO_PAQUETE',
-        orientation='h',
-        color='TIPO_SERVICIO',
-        title='Registros por Tipo de Servicio/Paquete',
-        labels={'count': 'Número de Registros', 'SERVICIO_PAQUETE': 'Servicio/Paquete'},
-        color_discrete_sequence=['#2E86AB', '#A23B72']
-    )
-    fig3.update_layout(height=500)
+    fig3 = figure_cache.obtener('fig3')
+    if fig3 is None:
+        fig3 = px.bar(
+            servicio_detail,
+            x='count',
+            y='SERVICIO_PAQUETE',
+            orientation='h',
+            color='TIPO_SERVICIO',
+            title='Registros por Tipo de Servicio/Paquete',
+            labels={'count': 'Número de Registros', 'SERVICIO_PAQUETE': 'Servicio/Paquete'},
+            color_discrete_sequence=['#2E86AB', '#A23B72']
+        )
+        fig3.update_layout(height=500)
+        fig3 = figure_cache.guardar('fig3', fig3)
     st.plotly_chart(fig3, use_container_width=True)
     
     # Evolución trimestral
     st.markdown("### 📈 Evolución Trimestral")
     
-    trim_tipo = df.groupby(['ANNO', 'TRIMESTRE', 'TIPO_SERVICIO']).size().reset_index(name='count')
-    
-    fig4 = px.line(
-        trim_tipo,
-        x='TRIMESTRE',
-        y='count',
-        color='TIPO_SERVICIO',
-        line_dash='ANNO',
-        markers=True,
-        title='Evolución Trimestral por Tipo de Servicio',
-        labels={'count': 'Número de Registros', 'TRIMESTRE': 'Trimestre'}
-    )
-    fig4.update_xaxes(tickvals=[1, 2, 3, 4])
+    fig4 = figure_cache.obtener('fig4')
+    if fig4 is None:
+        trim_tipo = df.groupby(['ANNO', 'TRIMESTRE', 'TIPO_SERVICIO']).size().reset_index(name='count')
+        fig4 = px.line(
+            trim_tipo,
+            x='TRIMESTRE',
+            y='count',
+            color='TIPO_SERVICIO',
+            line_dash='ANNO',
+            markers=True,
+            title='Evolución Trimestral por Tipo de Servicio',
+            labels={'count': 'Número de Registros', 'TRIMESTRE': 'Trimestre'}
+        )
+        fig4.update_xaxes(tickvals=[1, 2, 3, 4])
+        fig4 = figure_cache.guardar('fig4', fig4)
     st.plotly_chart(fig4, use_container_width=True)
     
     # Tabla resumen
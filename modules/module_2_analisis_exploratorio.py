@@ -6,6 +6,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from utils import figure_cache
 
 def show_tipos_paquetes(df):
     """2.1 Tipos de paquetes más comunes"""
@@ -37,29 +38,35 @@ def show_tipos_paquetes(df):
     
     with col1:
         # Pie chart Duo vs Triple
-        tipo_paquete_count = df_empaquetados['TIPO_PAQUETE'].value_counts()
-        fig1 = px.pie(
-            values=tipo_paquete_count.values,
-            names=tipo_paquete_count.index,
-            title='Duo Play vs Triple Play',
-            color_discrete_sequence=['#FF6B6B', '#4ECDC4']
-        )
-        fig1.update_traces(textposition='inside', textinfo='percent+label')
+        fig1 = figure_cache.obtener('fig1')
+        if fig1 is None:
+            tipo_paquete_count = df_empaquetados['TIPO_PAQUETE'].value_counts()
+            fig1 = px.pie(
+                values=tipo_paquete_count.values,
+                names=tipo_paquete_count.index,
+                title='Duo Play vs Triple Play',
+                color_discrete_sequence=['#FF6B6B', '#4ECDC4']
+            )
+            fig1.update_traces(textposition='inside', textinfo='percent+label')
+            fig1 = figure_cache.guardar('fig1', fig1)
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Detalle de Duo Play
-        duo_detail = df_empaquetados[df_empaquetados['TIPO_PAQUETE'] == 'Duo Play']['SERVICIO_PAQUETE'].value_counts()
-        fig2 = px.bar(
-            x=duo_detail.values,
-            y=duo_detail.index,
-            orientation='h',
-            title='Detalle de Duo Play',
-            labels={'x': 'Número de Registros', 'y': 'Tipo de Duo Play'},
-            color=duo_detail.values,
-            color_continuous_scale='Reds'
-        )
-        fig2.update_layout(showlegend=False)
+        fig2 = figure_cache.obtener('fig2')
+        if fig2 is None:
+            duo_detail = df_empaquetados[df_empaquetados['TIPO_PAQUETE'] == 'Duo Play']['SERVICIO_PAQUETE'].value_counts()
+            fig2 = px.bar(
+                x=duo_detail.values,
+                y=duo_detail.index,
+                orientation='h',
+                title='Detalle de Duo Play',
+                labels={'x': 'Número de Registros', 'y': 'Tipo de Duo Play'},
+                color=duo_detail.values,
+                color_continuous_scale='Reds'
+            )
+            fig2.update_layout(showlegend=False)
+            fig2 = figure_cache.guardar('fig2', fig2)
         st.plotly_chart(fig2, use_container_width=True)
     
     # Comparación por año
@@ -68,48 +75,57 @@ def show_tipos_paquetes(df):
     col1, col2 = st.columns(2)
     
     with col1:
-        tipo_ano = df_empaquetados.groupby(['TIPO_PAQUETE', 'ANNO']).size().reset_index(name='count')
-        fig3 = px.bar(
-            tipo_ano,
-            x='TIPO_PAQUETE',
-            y='count',
-            color='ANNO',
-            barmode='group',
-            title='Paquetes por Año: 2023 vs 2024',
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
+        fig3 = figure_cache.obtener('fig3')
+        if fig3 is None:
+            tipo_ano = df_empaquetados.groupby(['TIPO_PAQUETE', 'ANNO']).size().reset_index(name='count')
+            fig3 = px.bar(
+                tipo_ano,
+                x='TIPO_PAQUETE',
+                y='count',
+                color='ANNO',
+                barmode='group',
+                title='Paquetes por Año: 2023 vs 2024',
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig3 = figure_cache.guardar('fig3', fig3)
         st.plotly_chart(fig3, use_container_width=True)
     
     with col2:
         # Evolución trimestral
-        trim_paquete = df_empaquetados.groupby(['ANNO', 'TRIMESTRE', 'TIPO_PAQUETE']).size().reset_index(name='count')
-        fig4 = px.line(
-            trim_paquete,
-            x='TRIMESTRE',
-            y='count',
-            color='TIPO_PAQUETE',
-            line_dash='ANNO',
-            markers=True,
-            title='Evolución Trimestral de Paquetes',
-            labels={'count': 'Número de Registros'}
-        )
-        fig4.update_xaxes(tickvals=[1, 2, 3, 4])
+        fig4 = figure_cache.obtener('fig4')
+        if fig4 is None:
+            trim_paquete = df_empaquetados.groupby(['ANNO', 'TRIMESTRE', 'TIPO_PAQUETE']).size().reset_index(name='count')
+            fig4 = px.line(
+                trim_paquete,
+                x='TRIMESTRE',
+                y='count',
+                color='TIPO_PAQUETE',
+                line_dash='ANNO',
+                markers=True,
+                title='Evolución Trimestral de Paquetes',
+                labels={'count': 'Número de Registros'}
+            )
+            fig4.update_xaxes(tickvals=[1, 2, 3, 4])
+            fig4 = figure_cache.guardar('fig4', fig4)
         st.plotly_chart(fig4, use_container_width=True)
     
     # Análisis por servicio específico
     st.markdown("### 🔍 Análisis Detallado por Servicio")
     
-    servicio_counts = df_empaquetados['SERVICIO_PAQUETE'].value_counts()
-    fig5 = px.bar(
-        x=servicio_counts.values,
-        y=servicio_counts.index,
-        orientation='h',
-        title='Distribución por Tipo Específico de Paquete',
-        labels={'x': 'Número de Registros', 'y': 'Servicio/Paquete'},
-        color=servicio_counts.values,
-        color_continuous_scale='Viridis'
-    )
-    fig5.update_layout(height=400, showlegend=False)
+    fig5 = figure_cache.obtener('fig5')
+    if fig5 is None:
+        servicio_counts = df_empaquetados['SERVICIO_PAQUETE'].value_counts()
+        fig5 = px.bar(
+            x=servicio_counts.values,
+            y=servicio_counts.index,
+            orientation='h',
+            title='Distribución por Tipo Específico de Paquete',
+            labels={'x': 'Número de Registros', 'y': 'Servicio/Paquete'},
+            color=servicio_counts.values,
+            color_continuous_scale='Viridis'
+        )
+        fig5.update_layout(height=400, showlegend=False)
+        fig5 = figure_cache.guardar('fig5', fig5)
     st.plotly_chart(fig5, use_container_width=True)
     
     # Tabla resumen
@@ -150,32 +166,38 @@ def show_frecuencia_tecnologia(df):
         
         with col1:
             # Top 10 tecnologías
-            top_10_tech = df_con_tech['TECNOLOGIA'].value_counts().head(10)
-            fig1 = px.bar(
-                x=top_10_tech.values,
-                y=top_10_tech.index,
-                orientation='h',
-                title='Top 10 Tecnologías',
-                labels={'x': 'Número de Registros', 'y': 'Tecnología'},
-                color=top_10_tech.values,
-                color_continuous_scale='Blues'
-            )
-            fig1.update_layout(showlegend=False, height=500)
+            fig1 = figure_cache.obtener('fig1')
+            if fig1 is None:
+                top_10_tech = df_con_tech['TECNOLOGIA'].value_counts().head(10)
+                fig1 = px.bar(
+                    x=top_10_tech.values,
+                    y=top_10_tech.index,
+                    orientation='h',
+                    title='Top 10 Tecnologías',
+                    labels={'x': 'Número de Registros', 'y': 'Tecnología'},
+                    color=top_10_tech.values,
+                    color_continuous_scale='Blues'
+                )
+                fig1.update_layout(showlegend=False, height=500)
+                fig1 = figure_cache.guardar('fig1', fig1)
             st.plotly_chart(fig1, use_container_width=True)
         
         with col2:
             # Distribución porcentual
-            tech_pct = (df_con_tech['TECNOLOGIA'].value_counts().head(10) / len(df_con_tech) * 100)
-            fig2 = px.bar(
-                x=tech_pct.index,
-                y=tech_pct.values,
-                title='Distribución Porcentual - Top 10',
-                labels={'y': 'Porcentaje (%)', 'x': 'Tecnología'},
-                color=tech_pct.values,
-                color_continuous_scale='Oranges'
-            )
-            fig2.update_layout(showlegend=False, height=500)
-            fig2.update_xaxes(tickangle=45)
+            fig2 = figure_cache.obtener('fig2')
+            if fig2 is None:
+                tech_pct = (df_con_tech['TECNOLOGIA'].value_counts().head(10) / len(df_con_tech) * 100)
+                fig2 = px.bar(
+                    x=tech_pct.index,
+                    y=tech_pct.values,
+                    title='Distribución Porcentual - Top 10',
+                    labels={'y': 'Porcentaje (%)', 'x': 'Tecnología'},
+                    color=tech_pct.values,
+                    color_continuous_scale='Oranges'
+                )
+                fig2.update_layout(showlegend=False, height=500)
+                fig2.update_xaxes(tickangle=45)
+                fig2 = figure_cache.guardar('fig2', fig2)
             st.plotly_chart(fig2, use_container_width=True)
     
     with tab2:
@@ -183,84 +205,93 @@ def show_frecuencia_tecnologia(df):
         
         with col1:
             # Comparación 2023 vs 2024
-            top_10_tech_names = df_con_tech['TECNOLOGIA'].value_counts().head(10).index
-            df_top_tech = df_con_tech[df_con_tech['TECNOLOGIA'].isin(top_10_tech_names)]
-            tech_ano = df_top_tech.groupby(['TECNOLOGIA', 'ANNO']).size().reset_index(name='count')
-            
-            fig3 = px.bar(
-                tech_ano,
-                x='count',
-                y='TECNOLOGIA',
-                color='ANNO',
-                orientation='h',
-                barmode='group',
-                title='Top 10 Tecnologías: 2023 vs 2024',
-                color_discrete_sequence=['#2E86AB', '#A23B72']
-            )
-            fig3.update_layout(height=500)
+            fig3 = figure_cache.obtener('fig3')
+            if fig3 is None:
+                top_10_tech_names = df_con_tech['TECNOLOGIA'].value_counts().head(10).index
+                df_top_tech = df_con_tech[df_con_tech['TECNOLOGIA'].isin(top_10_tech_names)]
+                tech_ano = df_top_tech.groupby(['TECNOLOGIA', 'ANNO']).size().reset_index(name='count')
+                fig3 = px.bar(
+                    tech_ano,
+                    x='count',
+                    y='TECNOLOGIA',
+                    color='ANNO',
+                    orientation='h',
+                    barmode='group',
+                    title='Top 10 Tecnologías: 2023 vs 2024',
+                    color_discrete_sequence=['#2E86AB', '#A23B72']
+                )
+                fig3.update_layout(height=500)
+                fig3 = figure_cache.guardar('fig3', fig3)
             st.plotly_chart(fig3, use_container_width=True)
         
         with col2:
             # Evolución trimestral Top 5
-            top_5_tech = df_con_tech['TECNOLOGIA'].value_counts().head(5).index
-            trim_tech = df_con_tech[df_con_tech['TECNOLOGIA'].isin(top_5_tech)].groupby(
-                ['ANNO', 'TRIMESTRE', 'TECNOLOGIA']
-            ).size().reset_index(name='count')
-            
-            fig4 = px.line(
-                trim_tech,
-                x='TRIMESTRE',
-                y='count',
-                color='TECNOLOGIA',
-                line_dash='ANNO',
-                markers=True,
-                title='Evolución Trimestral - Top 5 Tecnologías',
-                labels={'count': 'Número de Registros'}
-            )
-            fig4.update_xaxes(tickvals=[1, 2, 3, 4])
-            fig4.update_layout(height=500)
+            fig4 = figure_cache.obtener('fig4')
+            if fig4 is None:
+                top_5_tech = df_con_tech['TECNOLOGIA'].value_counts().head(5).index
+                trim_tech = df_con_tech[df_con_tech['TECNOLOGIA'].isin(top_5_tech)].groupby(
+                    ['ANNO', 'TRIMESTRE', 'TECNOLOGIA']
+                ).size().reset_index(name='count')
+                fig4 = px.line(
+                    trim_tech,
+                    x='TRIMESTRE',
+                    y='count',
+                    color='TECNOLOGIA',
+                    line_dash='ANNO',
+                    markers=True,
+                    title='Evolución Trimestral - Top 5 Tecnologías',
+                    labels={'count': 'Número de Registros'}
+                )
+                fig4.update_xaxes(tickvals=[1, 2, 3, 4])
+                fig4.update_layout(height=500)
+                fig4 = figure_cache.guardar('fig4', fig4)
             st.plotly_chart(fig4, use_container_width=True)
     
     with tab3:
-        # Tecnologías por región
-        region_tech = df_con_tech.groupby(['REGION', 'TECNOLOGIA']).size().reset_index(name='count')
-        
-        # Top 3 tecnologías por región
-        top_tech_por_region = []
-        for region in df_con_tech['REGION'].unique():
-            top_3 = region_tech[region_tech['REGION'] == region].nlargest(3, 'count')
-            top_tech_por_region.append(top_3)
-        
-        top_tech_df = pd.concat(top_tech_por_region)
-        
-        fig5 = px.bar(
-            top_tech_df,
-            x='count',
-            y='REGION',
-            color='TECNOLOGIA',
-            orientation='h',
-            title='Top 3 Tecnologías por Región',
-            labels={'count': 'Número de Registros'},
-            barmode='group'
-        )
-        fig5.update_layout(height=500)
+        fig5 = figure_cache.obtener('fig5')
+        if fig5 is None:
+            # Tecnologías por región
+            region_tech = df_con_tech.groupby(['REGION', 'TECNOLOGIA']).size().reset_index(name='count')
+            
+            # Top 3 tecnologías por región
+            top_tech_por_region = []
+            for region in df_con_tech['REGION'].unique():
+                top_3 = region_tech[region_tech['REGION'] == region].nlargest(3, 'count')
+                top_tech_por_region.append(top_3)
+            
+            top_tech_df = pd.concat(top_tech_por_region)
+            fig5 = px.bar(
+                top_tech_df,
+                x='count',
+                y='REGION',
+                color='TECNOLOGIA',
+                orientation='h',
+                title='Top 3 Tecnologías por Región',
+                labels={'count': 'Número de Registros'},
+                barmode='group'
+            )
+            fig5.update_layout(height=500)
+            fig5 = figure_cache.guardar('fig5', fig5)
         st.plotly_chart(fig5, use_container_width=True)
         
         # Heatmap región-tecnología
         st.markdown("#### 🔥 Heatmap: Región vs Tecnología (Top 5)")
-        top_5_tech_names = df_con_tech['TECNOLOGIA'].value_counts().head(5).index
-        heatmap_data = pd.crosstab(
-            df_con_tech[df_con_tech['TECNOLOGIA'].isin(top_5_tech_names)]['REGION'],
-            df_con_tech[df_con_tech['TECNOLOGIA'].isin(top_5_tech_names)]['TECNOLOGIA']
-        )
         
-        fig6 = px.imshow(
-            heatmap_data,
-            labels=dict(x="Tecnología", y="Región", color="Registros"),
-            title="Distribución de Tecnologías por Región",
-            color_continuous_scale='YlOrRd',
-            aspect='auto'
-        )
+        fig6 = figure_cache.obtener('fig6')
+        if fig6 is None:
+            top_5_tech_names = df_con_tech['TECNOLOGIA'].value_counts().head(5).index
+            heatmap_data = pd.crosstab(
+                df_con_tech[df_con_tech['TECNOLOGIA'].isin(top_5_tech_names)]['REGION'],
+                df_con_tech[df_con_tech['TECNOLOGIA'].isin(top_5_tech_names)]['TECNOLOGIA']
+            )
+            fig6 = px.imshow(
+                heatmap_data,
+                labels=dict(x="Tecnología", y="Región", color="Registros"),
+                title="Distribución de Tecnologías por Región",
+                color_continuous_scale='YlOrRd',
+                aspect='auto'
+            )
+            fig6 = figure_cache.guardar('fig6', fig6)
         st.plotly_chart(fig6, use_container_width=True)
 
 def show_comparacion_años(df):
@@ -352,127 +383,145 @@ def show_comparacion_años(df):
     with col1:
         # Gráfico de barras métricas generales
         if len(metricas) >= 2:
-            metricas_viz = ['registros', 'operadores', 'departamentos', 'municipios']
-            nombres_viz = ['Registros', 'Operadores', 'Departamentos', 'Municipios']
-            
-            fig1 = go.Figure()
-            fig1.add_trace(go.Bar(
-                name='2023',
-                x=nombres_viz,
-                y=[metricas.get(2023, {}).get(m, 0) for m in metricas_viz],
-                marker_color='#2E86AB'
-            ))
-            fig1.add_trace(go.Bar(
-                name='2024',
-                x=nombres_viz,
-                y=[metricas.get(2024, {}).get(m, 0) for m in metricas_viz],
-                marker_color='#A23B72'
-            ))
-            fig1.update_layout(
-                title='Métricas Generales: 2023 vs 2024',
-                barmode='group',
-                height=400
-            )
+            fig1 = figure_cache.obtener('fig1')
+            if fig1 is None:
+                metricas_viz = ['registros', 'operadores', 'departamentos', 'municipios']
+                nombres_viz = ['Registros', 'Operadores', 'Departamentos', 'Municipios']
+                fig1 = go.Figure()
+                fig1.add_trace(go.Bar(
+                    name='2023',
+                    x=nombres_viz,
+                    y=[metricas.get(2023, {}).get(m, 0) for m in metricas_viz],
+                    marker_color='#2E86AB'
+                ))
+                fig1.add_trace(go.Bar(
+                    name='2024',
+                    x=nombres_viz,
+                    y=[metricas.get(2024, {}).get(m, 0) for m in metricas_viz],
+                    marker_color='#A23B72'
+                ))
+                fig1.update_layout(
+                    title='Métricas Generales: 2023 vs 2024',
+                    barmode='group',
+                    height=400
+                )
+                fig1 = figure_cache.guardar('fig1', fig1)
             st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Líneas por año
         if len(metricas) >= 2:
-            fig2 = go.Figure()
-            fig2.add_trace(go.Bar(
-                x=[2023, 2024],
-                y=[metricas.get(2023, {}).get('lineas', 0), metricas.get(2024, {}).get('lineas', 0)],
-                marker_color=['#2E86AB', '#A23B72'],
-                text=[f"{metricas.get(2023, {}).get('lineas', 0):,.0f}", 
-                      f"{metricas.get(2024, {}).get('lineas', 0):,.0f}"],
-                textposition='outside'
-            ))
-            fig2.update_layout(
-                title='Líneas Totales por Año',
-                height=400,
-                showlegend=False
-            )
+            fig2 = figure_cache.obtener('fig2')
+            if fig2 is None:
+                fig2 = go.Figure()
+                fig2.add_trace(go.Bar(
+                    x=[2023, 2024],
+                    y=[metricas.get(2023, {}).get('lineas', 0), metricas.get(2024, {}).get('lineas', 0)],
+                    marker_color=['#2E86AB', '#A23B72'],
+                    text=[f"{metricas.get(2023, {}).get('lineas', 0):,.0f}", 
+                          f"{metricas.get(2024, {}).get('lineas', 0):,.0f}"],
+                    textposition='outside'
+                ))
+                fig2.update_layout(
+                    title='Líneas Totales por Año',
+                    height=400,
+                    showlegend=False
+                )
+                fig2 = figure_cache.guardar('fig2', fig2)
             st.plotly_chart(fig2, use_container_width=True)
     
     # Análisis por segmento
     st.markdown("### 🎯 Comparación por Segmento")
     
-    segmento_comp = df.groupby(['ANNO', 'SEGMENTO']).agg({
-        'CANTIDAD_LINEAS_ACCESOS': 'sum',
-        'VALOR_FACTURADO_O_COBRADO': 'sum'
-    }).reset_index()
+    # Las dos figuras comparten la agregación: solo se calcula si falta alguna
+    fig3 = figure_cache.obtener('fig3')
+    fig4 = figure_cache.obtener('fig4')
+    if fig3 is None or fig4 is None:
+        segmento_comp = df.groupby(['ANNO', 'SEGMENTO']).agg({
+            'CANTIDAD_LINEAS_ACCESOS': 'sum',
+            'VALOR_FACTURADO_O_COBRADO': 'sum'
+        }).reset_index()
+        top_8_seg = df.groupby('SEGMENTO')['CANTIDAD_LINEAS_ACCESOS'].sum().nlargest(8).index
     
     col1, col2 = st.columns(2)
     
     with col1:
         # Top 8 segmentos por líneas
-        top_8_seg = df.groupby('SEGMENTO')['CANTIDAD_LINEAS_ACCESOS'].sum().nlargest(8).index
-        seg_lineas = segmento_comp[segmento_comp['SEGMENTO'].isin(top_8_seg)]
-        
-        fig3 = px.bar(
-            seg_lineas,
-            x='CANTIDAD_LINEAS_ACCESOS',
-            y='SEGMENTO',
-            color='ANNO',
-            orientation='h',
-            barmode='group',
-            title='Líneas por Segmento (Top 8): 2023 vs 2024',
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig3.update_layout(height=500)
+        if fig3 is None:
+            seg_lineas = segmento_comp[segmento_comp['SEGMENTO'].isin(top_8_seg)]
+            fig3 = px.bar(
+                seg_lineas,
+                x='CANTIDAD_LINEAS_ACCESOS',
+                y='SEGMENTO',
+                color='ANNO',
+                orientation='h',
+                barmode='group',
+                title='Líneas por Segmento (Top 8): 2023 vs 2024',
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig3.update_layout(height=500)
+            fig3 = figure_cache.guardar('fig3', fig3)
         st.plotly_chart(fig3, use_container_width=True)
     
     with col2:
         # Top 8 segmentos por valor
-        seg_valor = segmento_comp[segmento_comp['SEGMENTO'].isin(top_8_seg)]
-        
-        fig4 = px.bar(
-            seg_valor,
-            x='VALOR_FACTURADO_O_COBRADO',
-            y='SEGMENTO',
-            color='ANNO',
-            orientation='h',
-            barmode='group',
-            title='Valor Facturado por Segmento (Top 8): 2023 vs 2024',
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig4.update_layout(height=500)
+        if fig4 is None:
+            seg_valor = segmento_comp[segmento_comp['SEGMENTO'].isin(top_8_seg)]
+            fig4 = px.bar(
+                seg_valor,
+                x='VALOR_FACTURADO_O_COBRADO',
+                y='SEGMENTO',
+                color='ANNO',
+                orientation='h',
+                barmode='group',
+                title='Valor Facturado por Segmento (Top 8): 2023 vs 2024',
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig4.update_layout(height=500)
+            fig4 = figure_cache.guardar('fig4', fig4)
         st.plotly_chart(fig4, use_container_width=True)
     
     # Evolución mensual
     st.markdown("### 📅 Evolución Trimestral Detallada")
     
-    trim_comp = df.groupby(['ANNO', 'TRIMESTRE']).agg({
-        'CANTIDAD_LINEAS_ACCESOS': 'sum',
-        'VALOR_FACTURADO_O_COBRADO': 'sum'
-    }).reset_index()
+    fig5 = figure_cache.obtener('fig5')
+    fig6 = figure_cache.obtener('fig6')
+    if fig5 is None or fig6 is None:
+        trim_comp = df.groupby(['ANNO', 'TRIMESTRE']).agg({
+            'CANTIDAD_LINEAS_ACCESOS': 'sum',
+            'VALOR_FACTURADO_O_COBRADO': 'sum'
+        }).reset_index()
     
     col1, col2 = st.columns(2)
     
     with col1:
-        fig5 = px.line(
-            trim_comp,
-            x='TRIMESTRE',
-            y='CANTIDAD_LINEAS_ACCESOS',
-            color='ANNO',
-            markers=True,
-            title='Evolución Trimestral de Líneas',
-            labels={'CANTIDAD_LINEAS_ACCESOS': 'Total de Líneas'},
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig5.update_xaxes(tickvals=[1, 2, 3, 4])
+        if fig5 is None:
+            fig5 = px.line(
+                trim_comp,
+                x='TRIMESTRE',
+                y='CANTIDAD_LINEAS_ACCESOS',
+                color='ANNO',
+                markers=True,
+                title='Evolución Trimestral de Líneas',
+                labels={'CANTIDAD_LINEAS_ACCESOS': 'Total de Líneas'},
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig5.update_xaxes(tickvals=[1, 2, 3, 4])
+            fig5 = figure_cache.guardar('fig5', fig5)
         st.plotly_chart(fig5, use_container_width=True)
     
     with col2:
-        fig6 = px.line(
-            trim_comp,
-            x='TRIMESTRE',
-            y='VALOR_FACTURADO_O_COBRADO',
-            color='ANNO',
-            markers=True,
-            title='Evolución Trimestral de Valor Facturado',
-            labels={'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado'},
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig6.update_xaxes(tickvals=[1, 2, 3, 4])
+        if fig6 is None:
+            fig6 = px.line(
+                trim_comp,
+                x='TRIMESTRE',
+                y='VALOR_FACTURADO_O_COBRADO',
+                color='ANNO',
+                markers=True,
+                title='Evolución Trimestral de Valor Facturado',
+                labels={'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado'},
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig6.update_xaxes(tickvals=[1, 2, 3, 4])
+            fig6 = figure_cache.guardar('fig6', fig6)
         st.plotly_chart(fig6, use_container_width=True)
\ No newline at end of file
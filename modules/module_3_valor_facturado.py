@@ -6,6 +6,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
+from utils import figure_cache
 
 def show_distribucion_por_paquete(df):
     """3.1 Distribución del valor facturado por paquete"""
@@ -40,54 +41,63 @@ def show_distribucion_por_paquete(df):
     
     with col1:
         # Valor total por servicio
-        fig1 = px.bar(
-            x=valor_por_servicio['Total'],
-            y=valor_por_servicio.index,
-            orientation='h',
-            title='Valor Total Facturado por Servicio/Paquete',
-            labels={'x': 'Valor Total (COP)', 'y': 'Servicio/Paquete'},
-            color=valor_por_servicio['Total'],
-            color_continuous_scale='Blues'
-        )
-        fig1.update_layout(showlegend=False, height=500)
+        fig1 = figure_cache.obtener('fig1')
+        if fig1 is None:
+            fig1 = px.bar(
+                x=valor_por_servicio['Total'],
+                y=valor_por_servicio.index,
+                orientation='h',
+                title='Valor Total Facturado por Servicio/Paquete',
+                labels={'x': 'Valor Total (COP)', 'y': 'Servicio/Paquete'},
+                color=valor_por_servicio['Total'],
+                color_continuous_scale='Blues'
+            )
+            fig1.update_layout(showlegend=False, height=500)
+            fig1 = figure_cache.guardar('fig1', fig1)
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Participación en pie chart
-        participacion = (valor_por_servicio['Total'] / total_facturado * 100).sort_values(ascending=False)
-        fig2 = px.pie(
-            values=participacion.values,
-            names=[s[:25] for s in participacion.index],
-            title='Participación en Valor Total',
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        fig2.update_traces(textposition='inside', textinfo='percent+label')
-        fig2.update_layout(height=500)
+        fig2 = figure_cache.obtener('fig2')
+        if fig2 is None:
+            participacion = (valor_por_servicio['Total'] / total_facturado * 100).sort_values(ascending=False)
+            fig2 = px.pie(
+                values=participacion.values,
+                names=[s[:25] for s in participacion.index],
+                title='Participación en Valor Total',
+                color_discrete_sequence=px.colors.qualitative.Set3
+            )
+            fig2.update_traces(textposition='inside', textinfo='percent+label')
+            fig2.update_layout(height=500)
+            fig2 = figure_cache.guardar('fig2', fig2)
         st.plotly_chart(fig2, use_container_width=True)
     
     # Media vs Mediana
     st.markdown("### 📊 Media vs Mediana por Servicio")
     
-    fig3 = go.Figure()
-    fig3.add_trace(go.Bar(
-        name='Media',
-        y=valor_por_servicio.index,
-        x=valor_por_servicio['Media'],
-        orientation='h',
-        marker_color='#2E86AB'
-    ))
-    fig3.add_trace(go.Bar(
-        name='Mediana',
-        y=valor_por_servicio.index,
-        x=valor_por_servicio['Mediana'],
-        orientation='h',
-        marker_color='#A23B72'
-    ))
-    fig3.update_layout(
-        title='Media vs Mediana del Valor Facturado',
-        barmode='group',
-        height=500
-    )
+    fig3 = figure_cache.obtener('fig3')
+    if fig3 is None:
+        fig3 = go.Figure()
+        fig3.add_trace(go.Bar(
+            name='Media',
+            y=valor_por_servicio.index,
+            x=valor_por_servicio['Media'],
+            orientation='h',
+            marker_color='#2E86AB'
+        ))
+        fig3.add_trace(go.Bar(
+            name='Mediana',
+            y=valor_por_servicio.index,
+            x=valor_por_servicio['Mediana'],
+            orientation='h',
+            marker_color='#A23B72'
+        ))
+        fig3.update_layout(
+            title='Media vs Mediana del Valor Facturado',
+            barmode='group',
+            height=500
+        )
+        fig3 = figure_cache.guardar('fig3', fig3)
     st.plotly_chart(fig3, use_container_width=True)
     
     # Tabla detallada
@@ -136,60 +146,67 @@ def show_distribucion_por_operador(df):
     
     with col1:
         # Top 15 operadores
-        top_15 = valor_por_operador.head(15)
-        fig1 = px.bar(
-            x=top_15['Total'],
-            y=[op[:35] for op in top_15.index],
-            orientation='h',
-            title='Top 15 Operadores por Valor Facturado',
-            labels={'x': 'Valor Total (COP)', 'y': 'Operador'},
-            color=top_15['Total'],
-            color_continuous_scale='Viridis'
-        )
-        fig1.update_layout(showlegend=False, height=600)
+        fig1 = figure_cache.obtener('fig1')
+        if fig1 is None:
+            top_15 = valor_por_operador.head(15)
+            fig1 = px.bar(
+                x=top_15['Total'],
+                y=[op[:35] for op in top_15.index],
+                orientation='h',
+                title='Top 15 Operadores por Valor Facturado',
+                labels={'x': 'Valor Total (COP)', 'y': 'Operador'},
+                color=top_15['Total'],
+                color_continuous_scale='Viridis'
+            )
+            fig1.update_layout(showlegend=False, height=600)
+            fig1 = figure_cache.guardar('fig1', fig1)
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Pie chart Top 10 + Otros
-        top_10 = valor_por_operador.head(10)
-        otros_valor = total_facturado - top_10['Total'].sum()
-        
-        pie_data = pd.DataFrame({
-            'Operador': list(top_10.index[:10]) + ['Otros'],
-            'Valor': list(top_10['Total'].values) + [otros_valor]
-        })
-        
-        fig2 = px.pie(
-            pie_data,
-            values='Valor',
-            names=['Op' + str(i+1) if i < 10 else 'Otros' for i in range(11)],
-            title='Participación: Top 10 + Otros',
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        fig2.update_traces(textposition='inside', textinfo='percent')
-        fig2.update_layout(height=600)
+        fig2 = figure_cache.obtener('fig2')
+        if fig2 is None:
+            top_10 = valor_por_operador.head(10)
+            otros_valor = total_facturado - top_10['Total'].sum()
+            
+            pie_data = pd.DataFrame({
+                'Operador': list(top_10.index[:10]) + ['Otros'],
+                'Valor': list(top_10['Total'].values) + [otros_valor]
+            })
+            fig2 = px.pie(
+                pie_data,
+                values='Valor',
+                names=['Op' + str(i+1) if i < 10 else 'Otros' for i in range(11)],
+                title='Participación: Top 10 + Otros',
+                color_discrete_sequence=px.colors.qualitative.Set3
+            )
+            fig2.update_traces(textposition='inside', textinfo='percent')
+            fig2.update_layout(height=600)
+            fig2 = figure_cache.guardar('fig2', fig2)
         st.plotly_chart(fig2, use_container_width=True)
     
     # Comparación 2023 vs 2024
     st.markdown("### 📊 Comparación por Año")
     
-    top_10_empresas = valor_por_operador.head(10).index
-    df_top_10 = df[df['EMPRESA'].isin(top_10_empresas)]
-    valor_ops_ano = df_top_10.groupby(['EMPRESA', 'ANNO'])['VALOR_FACTURADO_O_COBRADO'].sum().reset_index()
-    
-    fig3 = px.bar(
-        valor_ops_ano,
-        x='VALOR_FACTURADO_O_COBRADO',
-        y='EMPRESA',
-        color='ANNO',
-        orientation='h',
-        barmode='group',
-        title='Top 10 Operadores: 2023 vs 2024',
-        labels={'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado'},
-        color_discrete_sequence=['#2E86AB', '#A23B72']
-    )
-    fig3.update_layout(height=500)
-    fig3.update_yaxes(ticktext=[op[:25] for op in top_10_empresas], tickvals=list(top_10_empresas))
+    fig3 = figure_cache.obtener('fig3')
+    if fig3 is None:
+        top_10_empresas = valor_por_operador.head(10).index
+        df_top_10 = df[df['EMPRESA'].isin(top_10_empresas)]
+        valor_ops_ano = df_top_10.groupby(['EMPRESA', 'ANNO'])['VALOR_FACTURADO_O_COBRADO'].sum().reset_index()
+        fig3 = px.bar(
+            valor_ops_ano,
+            x='VALOR_FACTURADO_O_COBRADO',
+            y='EMPRESA',
+            color='ANNO',
+            orientation='h',
+            barmode='group',
+            title='Top 10 Operadores: 2023 vs 2024',
+            labels={'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado'},
+            color_discrete_sequence=['#2E86AB', '#A23B72']
+        )
+        fig3.update_layout(height=500)
+        fig3.update_yaxes(ticktext=[op[:25] for op in top_10_empresas], tickvals=list(top_10_empresas))
+        fig3 = figure_cache.guardar('fig3', fig3)
     st.plotly_chart(fig3, use_container_width=True)
     
     # Tabla completa
@@ -232,30 +249,36 @@ def show_comparacion_regiones(df):
     
     with col1:
         # Valor por región
-        fig1 = px.bar(
-            x=valor_por_region['VALOR_FACTURADO_O_COBRADO'],
-            y=valor_por_region.index,
-            orientation='h',
-            title='Valor Facturado por Región',
-            labels={'x': 'Valor Total (COP)', 'y': 'Región'},
-            color=valor_por_region['VALOR_FACTURADO_O_COBRADO'],
-            color_continuous_scale='Greens'
-        )
-        fig1.update_layout(showlegend=False, height=400)
+        fig1 = figure_cache.obtener('fig1')
+        if fig1 is None:
+            fig1 = px.bar(
+                x=valor_por_region['VALOR_FACTURADO_O_COBRADO'],
+                y=valor_por_region.index,
+                orientation='h',
+                title='Valor Facturado por Región',
+                labels={'x': 'Valor Total (COP)', 'y': 'Región'},
+                color=valor_por_region['VALOR_FACTURADO_O_COBRADO'],
+                color_continuous_scale='Greens'
+            )
+            fig1.update_layout(showlegend=False, height=400)
+            fig1 = figure_cache.guardar('fig1', fig1)
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Valor por línea
-        fig2 = px.bar(
-            x=valor_por_region['Valor_por_linea'],
-            y=valor_por_region.index,
-            orientation='h',
-            title='Valor Promedio por Línea por Región',
-            labels={'x': 'Valor por Línea (COP)', 'y': 'Región'},
-            color=valor_por_region['Valor_por_linea'],
-            color_continuous_scale='Oranges'
-        )
-        fig2.update_layout(showlegend=False, height=400)
+        fig2 = figure_cache.obtener('fig2')
+        if fig2 is None:
+            fig2 = px.bar(
+                x=valor_por_region['Valor_por_linea'],
+                y=valor_por_region.index,
+                orientation='h',
+                title='Valor Promedio por Línea por Región',
+                labels={'x': 'Valor por Línea (COP)', 'y': 'Región'},
+                color=valor_por_region['Valor_por_linea'],
+                color_continuous_scale='Oranges'
+            )
+            fig2.update_layout(showlegend=False, height=400)
+            fig2 = figure_cache.guardar('fig2', fig2)
         st.plotly_chart(fig2, use_container_width=True)
     
     # Departamentos por región
@@ -266,53 +289,62 @@ def show_comparacion_regiones(df):
         valor_por_region.index.tolist()
     )
     
-    df_region = df[df['REGION'] == region_seleccionada]
-    valor_deptos_region = df_region.groupby('DEPARTAMENTO')['VALOR_FACTURADO_O_COBRADO'].sum().sort_values(ascending=False)
+    fig3 = figure_cache.obtener('fig3', region_seleccionada)
+    fig4 = figure_cache.obtener('fig4', region_seleccionada)
+    if fig3 is None or fig4 is None:
+        df_region = df[df['REGION'] == region_seleccionada]
     
     col1, col2 = st.columns(2)
     
     with col1:
-        fig3 = px.bar(
-            x=valor_deptos_region.values,
-            y=valor_deptos_region.index,
-            orientation='h',
-            title=f'Valor por Departamento - {region_seleccionada}',
-            labels={'x': 'Valor Facturado', 'y': 'Departamento'},
-            color=valor_deptos_region.values,
-            color_continuous_scale='Blues'
-        )
-        fig3.update_layout(showlegend=False, height=400)
+        if fig3 is None:
+            valor_deptos_region = df_region.groupby('DEPARTAMENTO')['VALOR_FACTURADO_O_COBRADO'].sum().sort_values(ascending=False)
+            fig3 = px.bar(
+                x=valor_deptos_region.values,
+                y=valor_deptos_region.index,
+                orientation='h',
+                title=f'Valor por Departamento - {region_seleccionada}',
+                labels={'x': 'Valor Facturado', 'y': 'Departamento'},
+                color=valor_deptos_region.values,
+                color_continuous_scale='Blues'
+            )
+            fig3.update_layout(showlegend=False, height=400)
+            fig3 = figure_cache.guardar('fig3', fig3, region_seleccionada)
         st.plotly_chart(fig3, use_container_width=True)
     
     with col2:
         # Top operadores en la región
-        top_ops_region = df_region.groupby('EMPRESA')['VALOR_FACTURADO_O_COBRADO'].sum().sort_values(ascending=False).head(10)
-        fig4 = px.bar(
-            x=top_ops_region.values,
-            y=[op[:25] for op in top_ops_region.index],
-            orientation='h',
-            title=f'Top 10 Operadores - {region_seleccionada}',
-            labels={'x': 'Valor Facturado', 'y': 'Operador'},
-            color=top_ops_region.values,
-            color_continuous_scale='Reds'
-        )
-        fig4.update_layout(showlegend=False, height=400)
+        if fig4 is None:
+            top_ops_region = df_region.groupby('EMPRESA')['VALOR_FACTURADO_O_COBRADO'].sum().sort_values(ascending=False).head(10)
+            fig4 = px.bar(
+                x=top_ops_region.values,
+                y=[op[:25] for op in top_ops_region.index],
+                orientation='h',
+                title=f'Top 10 Operadores - {region_seleccionada}',
+                labels={'x': 'Valor Facturado', 'y': 'Operador'},
+                color=top_ops_region.values,
+                color_continuous_scale='Reds'
+            )
+            fig4.update_layout(showlegend=False, height=400)
+            fig4 = figure_cache.guardar('fig4', fig4, region_seleccionada)
         st.plotly_chart(fig4, use_container_width=True)
     
     # Comparación anual por región
     st.markdown("### 📅 Evolución por Región")
     
-    valor_region_ano = df.groupby(['REGION', 'ANNO'])['VALOR_FACTURADO_O_COBRADO'].sum().reset_index()
-    
-    fig5 = px.bar(
-        valor_region_ano,
-        x='REGION',
-        y='VALOR_FACTURADO_O_COBRADO',
-        color='ANNO',
-        barmode='group',
-        title='Valor Facturado por Región y Año',
-        color_discrete_sequence=['#2E86AB', '#A23B72']
-    )
+    fig5 = figure_cache.obtener('fig5')
+    if fig5 is None:
+        valor_region_ano = df.groupby(['REGION', 'ANNO'])['VALOR_FACTURADO_O_COBRADO'].sum().reset_index()
+        fig5 = px.bar(
+            valor_region_ano,
+            x='REGION',
+            y='VALOR_FACTURADO_O_COBRADO',
+            color='ANNO',
+            barmode='group',
+            title='Valor Facturado por Región y Año',
+            color_discrete_sequence=['#2E86AB', '#A23B72']
+        )
+        fig5 = figure_cache.guardar('fig5', fig5)
     st.plotly_chart(fig5, use_container_width=True)
 
 def show_evolucion_trimestral(df):
@@ -344,54 +376,62 @@ def show_evolucion_trimestral(df):
     
     with col1:
         # Evolución del valor
-        fig1 = px.line(
-            valor_trimestral,
-            x='TRIMESTRE',
-            y='VALOR_FACTURADO_O_COBRADO',
-            color='ANNO',
-            markers=True,
-            title='Evolución Trimestral del Valor Facturado',
-            labels={'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado'},
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig1.update_xaxes(tickvals=[1, 2, 3, 4])
-        fig1.update_layout(height=400)
+        fig1 = figure_cache.obtener('fig1')
+        if fig1 is None:
+            fig1 = px.line(
+                valor_trimestral,
+                x='TRIMESTRE',
+                y='VALOR_FACTURADO_O_COBRADO',
+                color='ANNO',
+                markers=True,
+                title='Evolución Trimestral del Valor Facturado',
+                labels={'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado'},
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig1.update_xaxes(tickvals=[1, 2, 3, 4])
+            fig1.update_layout(height=400)
+            fig1 = figure_cache.guardar('fig1', fig1)
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Evolución del valor por línea
-        fig2 = px.line(
-            valor_trimestral,
-            x='TRIMESTRE',
-            y='Valor_por_linea',
-            color='ANNO',
-            markers=True,
-            title='Evolución del Valor por Línea',
-            labels={'Valor_por_linea': 'Valor por Línea (COP)'},
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig2.update_xaxes(tickvals=[1, 2, 3, 4])
-        fig2.update_layout(height=400)
+        fig2 = figure_cache.obtener('fig2')
+        if fig2 is None:
+            fig2 = px.line(
+                valor_trimestral,
+                x='TRIMESTRE',
+                y='Valor_por_linea',
+                color='ANNO',
+                markers=True,
+                title='Evolución del Valor por Línea',
+                labels={'Valor_por_linea': 'Valor por Línea (COP)'},
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig2.update_xaxes(tickvals=[1, 2, 3, 4])
+            fig2.update_layout(height=400)
+            fig2 = figure_cache.guardar('fig2', fig2)
         st.plotly_chart(fig2, use_container_width=True)
     
     # Valor por servicio - evolución trimestral
     st.markdown("### 📦 Evolución por Servicio (Top 5)")
     
-    top_5_servicios = df.groupby('SERVICIO_PAQUETE')['VALOR_FACTURADO_O_COBRADO'].sum().nlargest(5).index
-    df_top_5 = df[df['SERVICIO_PAQUETE'].isin(top_5_servicios)]
-    valor_serv_trim = df_top_5.groupby(['ANNO', 'TRIMESTRE', 'SERVICIO_PAQUETE'])['VALOR_FACTURADO_O_COBRADO'].sum().reset_index()
-    
-    fig3 = px.line(
-        valor_serv_trim,
-        x='TRIMESTRE',
-        y='VALOR_FACTURADO_O_COBRADO',
-        color='SERVICIO_PAQUETE',
-        line_dash='ANNO',
-        markers=True,
-        title='Evolución por Servicio (Top 5)',
-        labels={'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado'}
-    )
-    fig3.update_xaxes(tickvals=[1, 2, 3, 4])
+    fig3 = figure_cache.obtener('fig3')
+    if fig3 is None:
+        top_5_servicios = df.groupby('SERVICIO_PAQUETE')['VALOR_FACTURADO_O_COBRADO'].sum().nlargest(5).index
+        df_top_5 = df[df['SERVICIO_PAQUETE'].isin(top_5_servicios)]
+        valor_serv_trim = df_top_5.groupby(['ANNO', 'TRIMESTRE', 'SERVICIO_PAQUETE'])['VALOR_FACTURADO_O_COBRADO'].sum().reset_index()
+        fig3 = px.line(
+            valor_serv_trim,
+            x='TRIMESTRE',
+            y='VALOR_FACTURADO_O_COBRADO',
+            color='SERVICIO_PAQUETE',
+            line_dash='ANNO',
+            markers=True,
+            title='Evolución por Servicio (Top 5)',
+            labels={'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado'}
+        )
+        fig3.update_xaxes(tickvals=[1, 2, 3, 4])
+        fig3 = figure_cache.guardar('fig3', fig3)
     st.plotly_chart(fig3, use_container_width=True)
     
     # Composición trimestral
@@ -399,23 +439,25 @@ def show_evolucion_trimestral(df):
     
     año_analisis = st.radio("Seleccione año:", df['ANNO'].unique().tolist(), horizontal=True)
     
-    valor_trim_comp = df[df['ANNO'] == año_analisis].groupby(
-        ['TRIMESTRE', 'SERVICIO_PAQUETE']
-    )['VALOR_FACTURADO_O_COBRADO'].sum().reset_index()
-    
-    top_5_servicios_año = df[df['ANNO'] == año_analisis].groupby('SERVICIO_PAQUETE')['VALOR_FACTURADO_O_COBRADO'].sum().nlargest(5).index
-    valor_trim_comp_top5 = valor_trim_comp[valor_trim_comp['SERVICIO_PAQUETE'].isin(top_5_servicios_año)]
-    
-    fig4 = px.bar(
-        valor_trim_comp_top5,
-        x='TRIMESTRE',
-        y='VALOR_FACTURADO_O_COBRADO',
-        color='SERVICIO_PAQUETE',
-        title=f'Composición Trimestral {año_analisis} (Top 5 Servicios)',
-        labels={'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado'},
-        barmode='stack'
-    )
-    fig4.update_xaxes(tickvals=[1, 2, 3, 4])
+    fig4 = figure_cache.obtener('fig4', año_analisis)
+    if fig4 is None:
+        valor_trim_comp = df[df['ANNO'] == año_analisis].groupby(
+            ['TRIMESTRE', 'SERVICIO_PAQUETE']
+        )['VALOR_FACTURADO_O_COBRADO'].sum().reset_index()
+        
+        top_5_servicios_año = df[df['ANNO'] == año_analisis].groupby('SERVICIO_PAQUETE')['VALOR_FACTURADO_O_COBRADO'].sum().nlargest(5).index
+        valor_trim_comp_top5 = valor_trim_comp[valor_trim_comp['SERVICIO_PAQUETE'].isin(top_5_servicios_año)]
+        fig4 = px.bar(
+            valor_trim_comp_top5,
+            x='TRIMESTRE',
+            y='VALOR_FACTURADO_O_COBRADO',
+            color='SERVICIO_PAQUETE',
+            title=f'Composición Trimestral {año_analisis} (Top 5 Servicios)',
+            labels={'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado'},
+            barmode='stack'
+        )
+        fig4.update_xaxes(tickvals=[1, 2, 3, 4])
+        fig4 = figure_cache.guardar('fig4', fig4, año_analisis)
     st.plotly_chart(fig4, use_container_width=True)
     
     # Tabla de datos
@@ -7,6 +7,8 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from utils import figure_cache
+from utils.downsampling import downsample_scatter
 
 def show_distribucion_por_segmento(df):
     """4.1 Distribución por segmento"""
@@ -49,36 +51,42 @@ def show_distribucion_por_segmento(df):
     
     with col1:
         # Top 10 segmentos por líneas
-        top_10_seg = lineas_por_segmento.head(10)
-        fig1 = px.bar(
-            x=top_10_seg['CANTIDAD_LINEAS_ACCESOS'],
-            y=top_10_seg.index,
-            orientation='h',
-            title='Top 10 Segmentos por Número de Líneas',
-            labels={'x': 'Número de Líneas', 'y': 'Segmento'},
-            color=top_10_seg['CANTIDAD_LINEAS_ACCESOS'],
-            color_continuous_scale='Blues',
-            text=top_10_seg['CANTIDAD_LINEAS_ACCESOS']
-        )
-        fig1.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
-        fig1.update_layout(showlegend=False, height=500)
+        fig1 = figure_cache.obtener('fig1')
+        if fig1 is None:
+            top_10_seg = lineas_por_segmento.head(10)
+            fig1 = px.bar(
+                x=top_10_seg['CANTIDAD_LINEAS_ACCESOS'],
+                y=top_10_seg.index,
+                orientation='h',
+                title='Top 10 Segmentos por Número de Líneas',
+                labels={'x': 'Número de Líneas', 'y': 'Segmento'},
+                color=top_10_seg['CANTIDAD_LINEAS_ACCESOS'],
+                color_continuous_scale='Blues',
+                text=top_10_seg['CANTIDAD_LINEAS_ACCESOS']
+            )
+            fig1.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+            fig1.update_layout(showlegend=False, height=500)
+            fig1 = figure_cache.guardar('fig1', fig1)
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Valor por línea
-        top_10_valor = lineas_por_segmento.head(10).sort_values('Valor_por_linea', ascending=True)
-        fig2 = px.bar(
-            x=top_10_valor['Valor_por_linea'],
-            y=top_10_valor.index,
-            orientation='h',
-            title='Valor por Línea - Top 10 Segmentos',
-            labels={'x': 'Valor por Línea (COP)', 'y': 'Segmento'},
-            color=top_10_valor['Valor_por_linea'],
-            color_continuous_scale='Oranges',
-            text=top_10_valor['Valor_por_linea']
-        )
-        fig2.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
-        fig2.update_layout(showlegend=False, height=500)
+        fig2 = figure_cache.obtener('fig2')
+        if fig2 is None:
+            top_10_valor = lineas_por_segmento.head(10).sort_values('Valor_por_linea', ascending=True)
+            fig2 = px.bar(
+                x=top_10_valor['Valor_por_linea'],
+                y=top_10_valor.index,
+                orientation='h',
+                title='Valor por Línea - Top 10 Segmentos',
+                labels={'x': 'Valor por Línea (COP)', 'y': 'Segmento'},
+                color=top_10_valor['Valor_por_linea'],
+                color_continuous_scale='Oranges',
+                text=top_10_valor['Valor_por_linea']
+            )
+            fig2.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
+            fig2.update_layout(showlegend=False, height=500)
+            fig2 = figure_cache.guardar('fig2', fig2)
         st.plotly_chart(fig2, use_container_width=True)
     
     # Residencial vs Corporativo
@@ -96,29 +104,35 @@ def show_distribucion_por_segmento(df):
     
     with col1:
         # Pie chart líneas
-        fig3 = px.pie(
-            values=tipo_cliente_lineas['CANTIDAD_LINEAS_ACCESOS'],
-            names=tipo_cliente_lineas.index,
-            title='Distribución de Líneas por Tipo de Cliente',
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig3.update_traces(textposition='inside', textinfo='percent+label')
+        fig3 = figure_cache.obtener('fig3')
+        if fig3 is None:
+            fig3 = px.pie(
+                values=tipo_cliente_lineas['CANTIDAD_LINEAS_ACCESOS'],
+                names=tipo_cliente_lineas.index,
+                title='Distribución de Líneas por Tipo de Cliente',
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig3.update_traces(textposition='inside', textinfo='percent+label')
+            fig3 = figure_cache.guardar('fig3', fig3)
         st.plotly_chart(fig3, use_container_width=True)
     
     with col2:
         # Comparación 2023 vs 2024
-        lineas_tipo_ano = df.groupby(['TIPO_CLIENTE', 'ANNO'])['CANTIDAD_LINEAS_ACCESOS'].sum().reset_index()
-        fig4 = px.bar(
-            lineas_tipo_ano,
-            x='TIPO_CLIENTE',
-            y='CANTIDAD_LINEAS_ACCESOS',
-            color='ANNO',
-            barmode='group',
-            title='Líneas por Tipo de Cliente: 2023 vs 2024',
-            color_discrete_sequence=['#2E86AB', '#A23B72'],
-            text='CANTIDAD_LINEAS_ACCESOS'
-        )
-        fig4.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+        fig4 = figure_cache.obtener('fig4')
+        if fig4 is None:
+            lineas_tipo_ano = df.groupby(['TIPO_CLIENTE', 'ANNO'])['CANTIDAD_LINEAS_ACCESOS'].sum().reset_index()
+            fig4 = px.bar(
+                lineas_tipo_ano,
+                x='TIPO_CLIENTE',
+                y='CANTIDAD_LINEAS_ACCESOS',
+                color='ANNO',
+                barmode='group',
+                title='Líneas por Tipo de Cliente: 2023 vs 2024',
+                color_discrete_sequence=['#2E86AB', '#A23B72'],
+                text='CANTIDAD_LINEAS_ACCESOS'
+            )
+            fig4.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+            fig4 = figure_cache.guardar('fig4', fig4)
         st.plotly_chart(fig4, use_container_width=True)
     
     # Métricas detalladas por tipo de cliente
@@ -156,30 +170,36 @@ def show_distribucion_por_segmento(df):
         
         with col1:
             # Distribución por estrato
-            fig5 = px.bar(
-                estratos_data,
-                x='Estrato',
-                y='CANTIDAD_LINEAS_ACCESOS',
-                title='Líneas por Estrato Socioeconómico',
-                color='CANTIDAD_LINEAS_ACCESOS',
-                color_continuous_scale='Viridis',
-                text='CANTIDAD_LINEAS_ACCESOS'
-            )
-            fig5.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
-            fig5.update_layout(showlegend=False)
+            fig5 = figure_cache.obtener('fig5')
+            if fig5 is None:
+                fig5 = px.bar(
+                    estratos_data,
+                    x='Estrato',
+                    y='CANTIDAD_LINEAS_ACCESOS',
+                    title='Líneas por Estrato Socioeconómico',
+                    color='CANTIDAD_LINEAS_ACCESOS',
+                    color_continuous_scale='Viridis',
+                    text='CANTIDAD_LINEAS_ACCESOS'
+                )
+                fig5.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+                fig5.update_layout(showlegend=False)
+                fig5 = figure_cache.guardar('fig5', fig5)
             st.plotly_chart(fig5, use_container_width=True)
         
         with col2:
             # Valor por línea por estrato
-            fig6 = px.line(
-                estratos_data,
-                x='Estrato',
-                y='Valor_por_linea',
-                title='Evolución del Valor por Línea según Estrato',
-                markers=True,
-                color_discrete_sequence=['#A23B72']
-            )
-            fig6.update_traces(marker=dict(size=12), line=dict(width=3))
+            fig6 = figure_cache.obtener('fig6')
+            if fig6 is None:
+                fig6 = px.line(
+                    estratos_data,
+                    x='Estrato',
+                    y='Valor_por_linea',
+                    title='Evolución del Valor por Línea según Estrato',
+                    markers=True,
+                    color_discrete_sequence=['#A23B72']
+                )
+                fig6.update_traces(marker=dict(size=12), line=dict(width=3))
+                fig6 = figure_cache.guardar('fig6', fig6)
             st.plotly_chart(fig6, use_container_width=True)
     
     # Tabla resumen completa
@@ -233,34 +253,40 @@ def show_relacion_lineas_paquete(df):
     
     with col1:
         # Líneas por servicio
-        fig1 = px.bar(
-            x=lineas_por_servicio['CANTIDAD_LINEAS_ACCESOS'],
-            y=lineas_por_servicio.index,
-            orientation='h',
-            title='Líneas por Servicio/Paquete',
-            labels={'x': 'Número de Líneas', 'y': 'Servicio/Paquete'},
-            color=lineas_por_servicio['CANTIDAD_LINEAS_ACCESOS'],
-            color_continuous_scale='Greens',
-            text=lineas_por_servicio['CANTIDAD_LINEAS_ACCESOS']
-        )
-        fig1.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
-        fig1.update_layout(showlegend=False, height=500)
+        fig1 = figure_cache.obtener('fig1')
+        if fig1 is None:
+            fig1 = px.bar(
+                x=lineas_por_servicio['CANTIDAD_LINEAS_ACCESOS'],
+                y=lineas_por_servicio.index,
+                orientation='h',
+                title='Líneas por Servicio/Paquete',
+                labels={'x': 'Número de Líneas', 'y': 'Servicio/Paquete'},
+                color=lineas_por_servicio['CANTIDAD_LINEAS_ACCESOS'],
+                color_continuous_scale='Greens',
+                text=lineas_por_servicio['CANTIDAD_LINEAS_ACCESOS']
+            )
+            fig1.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+            fig1.update_layout(showlegend=False, height=500)
+            fig1 = figure_cache.guardar('fig1', fig1)
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Valor por línea
-        fig2 = px.bar(
-            x=lineas_por_servicio['Valor_por_linea'],
-            y=lineas_por_servicio.index,
-            orientation='h',
-            title='Valor por Línea por Servicio',
-            labels={'x': 'Valor por Línea (COP)', 'y': 'Servicio/Paquete'},
-            color=lineas_por_servicio['Valor_por_linea'],
-            color_continuous_scale='Reds',
-            text=lineas_por_servicio['Valor_por_linea']
-        )
-        fig2.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
-        fig2.update_layout(showlegend=False, height=500)
+        fig2 = figure_cache.obtener('fig2')
+        if fig2 is None:
+            fig2 = px.bar(
+                x=lineas_por_servicio['Valor_por_linea'],
+                y=lineas_por_servicio.index,
+                orientation='h',
+                title='Valor por Línea por Servicio',
+                labels={'x': 'Valor por Línea (COP)', 'y': 'Servicio/Paquete'},
+                color=lineas_por_servicio['Valor_por_linea'],
+                color_continuous_scale='Reds',
+                text=lineas_por_servicio['Valor_por_linea']
+            )
+            fig2.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
+            fig2.update_layout(showlegend=False, height=500)
+            fig2 = figure_cache.guardar('fig2', fig2)
         st.plotly_chart(fig2, use_container_width=True)
     
     # Individual vs Empaquetado
@@ -290,74 +316,84 @@ def show_relacion_lineas_paquete(df):
     
     with col1:
         # Pie chart distribución
-        fig3 = px.pie(
-            values=lineas_tipo_serv['CANTIDAD_LINEAS_ACCESOS'],
-            names=lineas_tipo_serv.index,
-            title='Distribución: Individual vs Empaquetado',
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig3.update_traces(textposition='inside', textinfo='percent+label+value')
+        fig3 = figure_cache.obtener('fig3')
+        if fig3 is None:
+            fig3 = px.pie(
+                values=lineas_tipo_serv['CANTIDAD_LINEAS_ACCESOS'],
+                names=lineas_tipo_serv.index,
+                title='Distribución: Individual vs Empaquetado',
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig3.update_traces(textposition='inside', textinfo='percent+label+value')
+            fig3 = figure_cache.guardar('fig3', fig3)
         st.plotly_chart(fig3, use_container_width=True)
     
     with col2:
         # Comparación de valor por línea
-        fig4 = px.bar(
-            lineas_tipo_serv,
-            y=lineas_tipo_serv.index,
-            x='Valor_por_linea',
-            orientation='h',
-            title='Comparación de Valor por Línea',
-            color='Valor_por_linea',
-            color_continuous_scale='Plasma',
-            text='Valor_por_linea'
-        )
-        fig4.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
-        fig4.update_layout(showlegend=False)
+        fig4 = figure_cache.obtener('fig4')
+        if fig4 is None:
+            fig4 = px.bar(
+                lineas_tipo_serv,
+                y=lineas_tipo_serv.index,
+                x='Valor_por_linea',
+                orientation='h',
+                title='Comparación de Valor por Línea',
+                color='Valor_por_linea',
+                color_continuous_scale='Plasma',
+                text='Valor_por_linea'
+            )
+            fig4.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
+            fig4.update_layout(showlegend=False)
+            fig4 = figure_cache.guardar('fig4', fig4)
         st.plotly_chart(fig4, use_container_width=True)
     
     # Scatter plot: Líneas vs Valor
     st.markdown("### 📈 Análisis de Correlación: Líneas vs Valor")
     
-    scatter_data = df.groupby('SERVICIO_PAQUETE').agg({
-        'CANTIDAD_LINEAS_ACCESOS': 'sum',
-        'VALOR_FACTURADO_O_COBRADO': 'sum'
-    }).reset_index()
-    scatter_data['Valor_por_linea'] = (
-        scatter_data['VALOR_FACTURADO_O_COBRADO'] / scatter_data['CANTIDAD_LINEAS_ACCESOS']
-    )
-    
-    fig5 = px.scatter(
-        scatter_data,
-        x='CANTIDAD_LINEAS_ACCESOS',
-        y='VALOR_FACTURADO_O_COBRADO',
-        size='CANTIDAD_LINEAS_ACCESOS',
-        hover_data=['SERVICIO_PAQUETE', 'Valor_por_linea'],
-        title='Correlación: Líneas vs Valor Facturado por Servicio',
-        labels={
-            'CANTIDAD_LINEAS_ACCESOS': 'Número de Líneas',
-            'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado (COP)'
-        },
-        color='Valor_por_linea',
-        color_continuous_scale='Turbo'
-    )
-    fig5.update_traces(marker=dict(line=dict(width=2, color='DarkSlateGrey')))
+    fig5 = figure_cache.obtener('fig5')
+    if fig5 is None:
+        scatter_data = df.groupby('SERVICIO_PAQUETE').agg({
+            'CANTIDAD_LINEAS_ACCESOS': 'sum',
+            'VALOR_FACTURADO_O_COBRADO': 'sum'
+        }).reset_index()
+        scatter_data['Valor_por_linea'] = (
+            scatter_data['VALOR_FACTURADO_O_COBRADO'] / scatter_data['CANTIDAD_LINEAS_ACCESOS']
+        )
+        fig5 = px.scatter(
+            downsample_scatter(scatter_data, ['CANTIDAD_LINEAS_ACCESOS', 'VALOR_FACTURADO_O_COBRADO']),
+            x='CANTIDAD_LINEAS_ACCESOS',
+            y='VALOR_FACTURADO_O_COBRADO',
+            size='CANTIDAD_LINEAS_ACCESOS',
+            hover_data=['SERVICIO_PAQUETE', 'Valor_por_linea'],
+            title='Correlación: Líneas vs Valor Facturado por Servicio',
+            labels={
+                'CANTIDAD_LINEAS_ACCESOS': 'Número de Líneas',
+                'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado (COP)'
+            },
+            color='Valor_por_linea',
+            color_continuous_scale='Turbo'
+        )
+        fig5.update_traces(marker=dict(line=dict(width=2, color='DarkSlateGrey')))
+        fig5 = figure_cache.guardar('fig5', fig5)
     st.plotly_chart(fig5, use_container_width=True)
     
     # Análisis por año
     st.markdown("### 📅 Evolución 2023 vs 2024")
     
-    lineas_serv_ano = df.groupby(['SERVICIO_PAQUETE', 'ANNO'])['CANTIDAD_LINEAS_ACCESOS'].sum().reset_index()
-    
-    fig6 = px.bar(
-        lineas_serv_ano,
-        x='CANTIDAD_LINEAS_ACCESOS',
-        y='SERVICIO_PAQUETE',
-        color='ANNO',
-        orientation='h',
-        barmode='group',
-        title='Líneas por Servicio: Comparación 2023-2024',
-        color_discrete_sequence=['#2E86AB', '#A23B72']
-    )
+    fig6 = figure_cache.obtener('fig6')
+    if fig6 is None:
+        lineas_serv_ano = df.groupby(['SERVICIO_PAQUETE', 'ANNO'])['CANTIDAD_LINEAS_ACCESOS'].sum().reset_index()
+        fig6 = px.bar(
+            lineas_serv_ano,
+            x='CANTIDAD_LINEAS_ACCESOS',
+            y='SERVICIO_PAQUETE',
+            color='ANNO',
+            orientation='h',
+            barmode='group',
+            title='Líneas por Servicio: Comparación 2023-2024',
+            color_discrete_sequence=['#2E86AB', '#A23B72']
+        )
+        fig6 = figure_cache.guardar('fig6', fig6)
     st.plotly_chart(fig6, use_container_width=True)
     
     # Tabla comparativa detallada
@@ -412,36 +448,42 @@ def show_analisis_por_tecnologia(df):
     
     with col1:
         # Top 10 tecnologías
-        top_10_tech = lineas_por_tech.head(10)
-        fig1 = px.bar(
-            x=top_10_tech['CANTIDAD_LINEAS_ACCESOS'],
-            y=top_10_tech.index,
-            orientation='h',
-            title='Top 10 Tecnologías por Número de Líneas',
-            labels={'x': 'Número de Líneas', 'y': 'Tecnología'},
-            color=top_10_tech['CANTIDAD_LINEAS_ACCESOS'],
-            color_continuous_scale='Blues',
-            text=top_10_tech['CANTIDAD_LINEAS_ACCESOS']
-        )
-        fig1.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
-        fig1.update_layout(showlegend=False, height=500)
+        fig1 = figure_cache.obtener('fig1')
+        if fig1 is None:
+            top_10_tech = lineas_por_tech.head(10)
+            fig1 = px.bar(
+                x=top_10_tech['CANTIDAD_LINEAS_ACCESOS'],
+                y=top_10_tech.index,
+                orientation='h',
+                title='Top 10 Tecnologías por Número de Líneas',
+                labels={'x': 'Número de Líneas', 'y': 'Tecnología'},
+                color=top_10_tech['CANTIDAD_LINEAS_ACCESOS'],
+                color_continuous_scale='Blues',
+                text=top_10_tech['CANTIDAD_LINEAS_ACCESOS']
+            )
+            fig1.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+            fig1.update_layout(showlegend=False, height=500)
+            fig1 = figure_cache.guardar('fig1', fig1)
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Valor por línea por tecnología
-        top_10_vpl_tech = lineas_por_tech.head(10).sort_values('Valor_por_linea', ascending=True)
-        fig2 = px.bar(
-            x=top_10_vpl_tech['Valor_por_linea'],
-            y=top_10_vpl_tech.index,
-            orientation='h',
-            title='Valor por Línea - Top 10 Tecnologías',
-            labels={'x': 'Valor por Línea (COP)', 'y': 'Tecnología'},
-            color=top_10_vpl_tech['Valor_por_linea'],
-            color_continuous_scale='Oranges',
-            text=top_10_vpl_tech['Valor_por_linea']
-        )
-        fig2.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
-        fig2.update_layout(showlegend=False, height=500)
+        fig2 = figure_cache.obtener('fig2')
+        if fig2 is None:
+            top_10_vpl_tech = lineas_por_tech.head(10).sort_values('Valor_por_linea', ascending=True)
+            fig2 = px.bar(
+                x=top_10_vpl_tech['Valor_por_linea'],
+                y=top_10_vpl_tech.index,
+                orientation='h',
+                title='Valor por Línea - Top 10 Tecnologías',
+                labels={'x': 'Valor por Línea (COP)', 'y': 'Tecnología'},
+                color=top_10_vpl_tech['Valor_por_linea'],
+                color_continuous_scale='Oranges',
+                text=top_10_vpl_tech['Valor_por_linea']
+            )
+            fig2.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
+            fig2.update_layout(showlegend=False, height=500)
+            fig2 = figure_cache.guardar('fig2', fig2)
         st.plotly_chart(fig2, use_container_width=True)
     
     # Distribución porcentual
@@ -451,56 +493,64 @@ def show_analisis_por_tecnologia(df):
     
     with col1:
         # Pie chart Top 5
-        top_5_tech = lineas_por_tech.head(5)
-        otros_tech = lineas_por_tech.iloc[5:]['CANTIDAD_LINEAS_ACCESOS'].sum()
-        
-        pie_data = pd.DataFrame({
-            'Tecnología': list(top_5_tech.index) + ['Otras'],
-            'Líneas': list(top_5_tech['CANTIDAD_LINEAS_ACCESOS']) + [otros_tech]
-        })
-        
-        fig3 = px.pie(
-            pie_data,
-            values='Líneas',
-            names='Tecnología',
-            title='Participación de Mercado (Top 5 + Otras)',
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        fig3.update_traces(textposition='inside', textinfo='percent+label')
+        fig3 = figure_cache.obtener('fig3')
+        if fig3 is None:
+            top_5_tech = lineas_por_tech.head(5)
+            otros_tech = lineas_por_tech.iloc[5:]['CANTIDAD_LINEAS_ACCESOS'].sum()
+            
+            pie_data = pd.DataFrame({
+                'Tecnología': list(top_5_tech.index) + ['Otras'],
+                'Líneas': list(top_5_tech['CANTIDAD_LINEAS_ACCESOS']) + [otros_tech]
+            })
+            fig3 = px.pie(
+                pie_data,
+                values='Líneas',
+                names='Tecnología',
+                title='Participación de Mercado (Top 5 + Otras)',
+                color_discrete_sequence=px.colors.qualitative.Set3
+            )
+            fig3.update_traces(textposition='inside', textinfo='percent+label')
+            fig3 = figure_cache.guardar('fig3', fig3)
         st.plotly_chart(fig3, use_container_width=True)
     
     with col2:
         # Treemap de tecnologías
-        treemap_data = lineas_por_tech.head(15).reset_index()
-        fig4 = px.treemap(
-            treemap_data,
-            path=['TECNOLOGIA'],
-            values='CANTIDAD_LINEAS_ACCESOS',
-            title='Jerarquía de Tecnologías (Top 15)',
-            color='Valor_por_linea',
-            color_continuous_scale='RdYlGn'
-        )
+        fig4 = figure_cache.obtener('fig4')
+        if fig4 is None:
+            treemap_data = lineas_por_tech.head(15).reset_index()
+            fig4 = px.treemap(
+                treemap_data,
+                path=['TECNOLOGIA'],
+                values='CANTIDAD_LINEAS_ACCESOS',
+                title='Jerarquía de Tecnologías (Top 15)',
+                color='Valor_por_linea',
+                color_continuous_scale='RdYlGn'
+            )
+            fig4 = figure_cache.guardar('fig4', fig4)
         st.plotly_chart(fig4, use_container_width=True)
     
     # Evolución por año
     st.markdown("### 📅 Evolución Tecnológica 2023-2024")
     
     tech_ano = df_tech.groupby(['TECNOLOGIA', 'ANNO'])['CANTIDAD_LINEAS_ACCESOS'].sum().reset_index()
-    top_5_tech_names = lineas_por_tech.head(5).index.tolist()
-    tech_ano_top5 = tech_ano[tech_ano['TECNOLOGIA'].isin(top_5_tech_names)]
-    
-    fig5 = px.bar(
-        tech_ano_top5,
-        x='CANTIDAD_LINEAS_ACCESOS',
-        y='TECNOLOGIA',
-        color='ANNO',
-        orientation='h',
-        barmode='group',
-        title='Evolución Top 5 Tecnologías: 2023 vs 2024',
-        color_discrete_sequence=['#2E86AB', '#A23B72'],
-        text='CANTIDAD_LINEAS_ACCESOS'
-    )
-    fig5.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+    
+    fig5 = figure_cache.obtener('fig5')
+    if fig5 is None:
+        top_5_tech_names = lineas_por_tech.head(5).index.tolist()
+        tech_ano_top5 = tech_ano[tech_ano['TECNOLOGIA'].isin(top_5_tech_names)]
+        fig5 = px.bar(
+            tech_ano_top5,
+            x='CANTIDAD_LINEAS_ACCESOS',
+            y='TECNOLOGIA',
+            color='ANNO',
+            orientation='h',
+            barmode='group',
+            title='Evolución Top 5 Tecnologías: 2023 vs 2024',
+            color_discrete_sequence=['#2E86AB', '#A23B72'],
+            text='CANTIDAD_LINEAS_ACCESOS'
+        )
+        fig5.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+        fig5 = figure_cache.guardar('fig5', fig5)
     st.plotly_chart(fig5, use_container_width=True)
     
     # Análisis de crecimiento
@@ -518,36 +568,42 @@ def show_analisis_por_tecnologia(df):
         
         with col1:
             # Top 10 con mayor crecimiento
-            top_10_crec = pivot_tech.head(10).sort_values('Var_pct', ascending=True)
-            fig6 = px.bar(
-                x=top_10_crec['Var_pct'],
-                y=top_10_crec.index,
-                orientation='h',
-                title='Top 10 Tecnologías con Mayor Crecimiento (%)',
-                labels={'x': 'Variación Porcentual (%)', 'y': 'Tecnología'},
-                color=top_10_crec['Var_pct'],
-                color_continuous_scale='Greens',
-                text=top_10_crec['Var_pct']
-            )
-            fig6.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-            fig6.update_layout(showlegend=False, height=500)
+            fig6 = figure_cache.obtener('fig6')
+            if fig6 is None:
+                top_10_crec = pivot_tech.head(10).sort_values('Var_pct', ascending=True)
+                fig6 = px.bar(
+                    x=top_10_crec['Var_pct'],
+                    y=top_10_crec.index,
+                    orientation='h',
+                    title='Top 10 Tecnologías con Mayor Crecimiento (%)',
+                    labels={'x': 'Variación Porcentual (%)', 'y': 'Tecnología'},
+                    color=top_10_crec['Var_pct'],
+                    color_continuous_scale='Greens',
+                    text=top_10_crec['Var_pct']
+                )
+                fig6.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+                fig6.update_layout(showlegend=False, height=500)
+                fig6 = figure_cache.guardar('fig6', fig6)
             st.plotly_chart(fig6, use_container_width=True)
         
         with col2:
             # Top 10 con mayor decrecimiento
-            top_10_decrec = pivot_tech.tail(10).sort_values('Var_pct', ascending=False)
-            fig7 = px.bar(
-                x=top_10_decrec['Var_pct'],
-                y=top_10_decrec.index,
-                orientation='h',
-                title='Top 10 Tecnologías con Mayor Decrecimiento (%)',
-                labels={'x': 'Variación Porcentual (%)', 'y': 'Tecnología'},
-                color=top_10_decrec['Var_pct'],
-                color_continuous_scale='Reds',
-                text=top_10_decrec['Var_pct']
-            )
-            fig7.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-            fig7.update_layout(showlegend=False, height=500)
+            fig7 = figure_cache.obtener('fig7')
+            if fig7 is None:
+                top_10_decrec = pivot_tech.tail(10).sort_values('Var_pct', ascending=False)
+                fig7 = px.bar(
+                    x=top_10_decrec['Var_pct'],
+                    y=top_10_decrec.index,
+                    orientation='h',
+                    title='Top 10 Tecnologías con Mayor Decrecimiento (%)',
+                    labels={'x': 'Variación Porcentual (%)', 'y': 'Tecnología'},
+                    color=top_10_decrec['Var_pct'],
+                    color_continuous_scale='Reds',
+                    text=top_10_decrec['Var_pct']
+                )
+                fig7.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+                fig7.update_layout(showlegend=False, height=500)
+                fig7 = figure_cache.guardar('fig7', fig7)
             st.plotly_chart(fig7, use_container_width=True)
     
     # Tabla detallada
@@ -600,36 +656,42 @@ def show_analisis_por_departamento(df):
     
     with col1:
         # Top 15 departamentos
-        top_15_depto = lineas_por_depto.head(15)
-        fig1 = px.bar(
-            x=top_15_depto['Lineas'],
-            y=top_15_depto.index,
-            orientation='h',
-            title='Top 15 Departamentos por Número de Líneas',
-            labels={'x': 'Número de Líneas', 'y': 'Departamento'},
-            color=top_15_depto['Lineas'],
-            color_continuous_scale='Blues',
-            text=top_15_depto['Lineas']
-        )
-        fig1.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
-        fig1.update_layout(showlegend=False, height=600)
+        fig1 = figure_cache.obtener('fig1')
+        if fig1 is None:
+            top_15_depto = lineas_por_depto.head(15)
+            fig1 = px.bar(
+                x=top_15_depto['Lineas'],
+                y=top_15_depto.index,
+                orientation='h',
+                title='Top 15 Departamentos por Número de Líneas',
+                labels={'x': 'Número de Líneas', 'y': 'Departamento'},
+                color=top_15_depto['Lineas'],
+                color_continuous_scale='Blues',
+                text=top_15_depto['Lineas']
+            )
+            fig1.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+            fig1.update_layout(showlegend=False, height=600)
+            fig1 = figure_cache.guardar('fig1', fig1)
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Valor por línea Top 15
-        top_15_vpl = lineas_por_depto.head(15).sort_values('Valor_por_linea', ascending=True)
-        fig2 = px.bar(
-            x=top_15_vpl['Valor_por_linea'],
-            y=top_15_vpl.index,
-            orientation='h',
-            title='Valor por Línea - Top 15 Departamentos',
-            labels={'x': 'Valor por Línea (COP)', 'y': 'Departamento'},
-            color=top_15_vpl['Valor_por_linea'],
-            color_continuous_scale='Oranges',
-            text=top_15_vpl['Valor_por_linea']
-        )
-        fig2.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
-        fig2.update_layout(showlegend=False, height=600)
+        fig2 = figure_cache.obtener('fig2')
+        if fig2 is None:
+            top_15_vpl = lineas_por_depto.head(15).sort_values('Valor_por_linea', ascending=True)
+            fig2 = px.bar(
+                x=top_15_vpl['Valor_por_linea'],
+                y=top_15_vpl.index,
+                orientation='h',
+                title='Valor por Línea - Top 15 Departamentos',
+                labels={'x': 'Valor por Línea (COP)', 'y': 'Departamento'},
+                color=top_15_vpl['Valor_por_linea'],
+                color_continuous_scale='Oranges',
+                text=top_15_vpl['Valor_por_linea']
+            )
+            fig2.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
+            fig2.update_layout(showlegend=False, height=600)
+            fig2 = figure_cache.guardar('fig2', fig2)
         st.plotly_chart(fig2, use_container_width=True)
     
     # Análisis de concentración
@@ -639,61 +701,69 @@ def show_analisis_por_departamento(df):
     
     with col1:
         # Concentración Top 10
-        top_10_lineas = lineas_por_depto.head(10)['Lineas'].sum()
-        pct_top10 = (top_10_lineas / total_lineas * 100)
-        
-        concentracion_data = pd.DataFrame({
-            'Categoría': ['Top 10', 'Resto'],
-            'Líneas': [top_10_lineas, total_lineas - top_10_lineas]
-        })
-        
-        fig3 = px.pie(
-            concentracion_data,
-            values='Líneas',
-            names='Categoría',
-            title=f'Concentración: Top 10 ({pct_top10:.1f}%)',
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig3.update_traces(textposition='inside', textinfo='percent+label+value')
+        fig3 = figure_cache.obtener('fig3')
+        if fig3 is None:
+            top_10_lineas = lineas_por_depto.head(10)['Lineas'].sum()
+            pct_top10 = (top_10_lineas / total_lineas * 100)
+            
+            concentracion_data = pd.DataFrame({
+                'Categoría': ['Top 10', 'Resto'],
+                'Líneas': [top_10_lineas, total_lineas - top_10_lineas]
+            })
+            fig3 = px.pie(
+                concentracion_data,
+                values='Líneas',
+                names='Categoría',
+                title=f'Concentración: Top 10 ({pct_top10:.1f}%)',
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig3.update_traces(textposition='inside', textinfo='percent+label+value')
+            fig3 = figure_cache.guardar('fig3', fig3)
         st.plotly_chart(fig3, use_container_width=True)
     
     with col2:
         # Municipios por departamento
-        top_10_mun = lineas_por_depto.head(10).sort_values('Municipios', ascending=True)
-        fig4 = px.bar(
-            x=top_10_mun['Municipios'],
-            y=top_10_mun.index,
-            orientation='h',
-            title='Número de Municipios con Servicio (Top 10)',
-            labels={'x': 'Número de Municipios', 'y': 'Departamento'},
-            color=top_10_mun['Municipios'],
-            color_continuous_scale='Greens',
-            text=top_10_mun['Municipios']
-        )
-        fig4.update_traces(texttemplate='%{text}', textposition='outside')
-        fig4.update_layout(showlegend=False)
+        fig4 = figure_cache.obtener('fig4')
+        if fig4 is None:
+            top_10_mun = lineas_por_depto.head(10).sort_values('Municipios', ascending=True)
+            fig4 = px.bar(
+                x=top_10_mun['Municipios'],
+                y=top_10_mun.index,
+                orientation='h',
+                title='Número de Municipios con Servicio (Top 10)',
+                labels={'x': 'Número de Municipios', 'y': 'Departamento'},
+                color=top_10_mun['Municipios'],
+                color_continuous_scale='Greens',
+                text=top_10_mun['Municipios']
+            )
+            fig4.update_traces(texttemplate='%{text}', textposition='outside')
+            fig4.update_layout(showlegend=False)
+            fig4 = figure_cache.guardar('fig4', fig4)
         st.plotly_chart(fig4, use_container_width=True)
     
     # Evolución por año
     st.markdown("### 📅 Evolución Departamental 2023-2024")
     
     depto_ano = df.groupby(['DEPARTAMENTO', 'ANNO'])['CANTIDAD_LINEAS_ACCESOS'].sum().reset_index()
-    top_10_depto_names = lineas_por_depto.head(10).index.tolist()
-    depto_ano_top10 = depto_ano[depto_ano['DEPARTAMENTO'].isin(top_10_depto_names)]
-    
-    fig5 = px.bar(
-        depto_ano_top10,
-        x='CANTIDAD_LINEAS_ACCESOS',
-        y='DEPARTAMENTO',
-        color='ANNO',
-        orientation='h',
-        barmode='group',
-        title='Top 10 Departamentos: 2023 vs 2024',
-        color_discrete_sequence=['#2E86AB', '#A23B72'],
-        text='CANTIDAD_LINEAS_ACCESOS'
-    )
-    fig5.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
-    fig5.update_layout(height=500)
+    
+    fig5 = figure_cache.obtener('fig5')
+    if fig5 is None:
+        top_10_depto_names = lineas_por_depto.head(10).index.tolist()
+        depto_ano_top10 = depto_ano[depto_ano['DEPARTAMENTO'].isin(top_10_depto_names)]
+        fig5 = px.bar(
+            depto_ano_top10,
+            x='CANTIDAD_LINEAS_ACCESOS',
+            y='DEPARTAMENTO',
+            color='ANNO',
+            orientation='h',
+            barmode='group',
+            title='Top 10 Departamentos: 2023 vs 2024',
+            color_discrete_sequence=['#2E86AB', '#A23B72'],
+            text='CANTIDAD_LINEAS_ACCESOS'
+        )
+        fig5.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+        fig5.update_layout(height=500)
+        fig5 = figure_cache.guardar('fig5', fig5)
     st.plotly_chart(fig5, use_container_width=True)
     
     # Análisis de crecimiento
@@ -714,83 +784,94 @@ def show_analisis_por_departamento(df):
         
         with col1:
             # Top 10 con mayor crecimiento
-            top_10_crec = pivot_depto_filtrado.head(10).sort_values('Var_pct', ascending=True)
-            fig6 = px.bar(
-                x=top_10_crec['Var_pct'],
-                y=top_10_crec.index,
-                orientation='h',
-                title='Departamentos con Mayor Crecimiento (%)',
-                labels={'x': 'Variación Porcentual (%)', 'y': 'Departamento'},
-                color=top_10_crec['Var_pct'],
-                color_continuous_scale='Greens',
-                text=top_10_crec['Var_pct']
-            )
-            fig6.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-            fig6.update_layout(showlegend=False, height=500)
+            fig6 = figure_cache.obtener('fig6')
+            if fig6 is None:
+                top_10_crec = pivot_depto_filtrado.head(10).sort_values('Var_pct', ascending=True)
+                fig6 = px.bar(
+                    x=top_10_crec['Var_pct'],
+                    y=top_10_crec.index,
+                    orientation='h',
+                    title='Departamentos con Mayor Crecimiento (%)',
+                    labels={'x': 'Variación Porcentual (%)', 'y': 'Departamento'},
+                    color=top_10_crec['Var_pct'],
+                    color_continuous_scale='Greens',
+                    text=top_10_crec['Var_pct']
+                )
+                fig6.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+                fig6.update_layout(showlegend=False, height=500)
+                fig6 = figure_cache.guardar('fig6', fig6)
             st.plotly_chart(fig6, use_container_width=True)
         
         with col2:
             # Top 10 con mayor decrecimiento
-            top_10_decrec = pivot_depto_filtrado.tail(10).sort_values('Var_pct', ascending=False)
-            fig7 = px.bar(
-                x=top_10_decrec['Var_pct'],
-                y=top_10_decrec.index,
-                orientation='h',
-                title='Departamentos con Mayor Decrecimiento (%)',
-                labels={'x': 'Variación Porcentual (%)', 'y': 'Departamento'},
-                color=top_10_decrec['Var_pct'],
-                color_continuous_scale='Reds',
-                text=top_10_decrec['Var_pct']
-            )
-            fig7.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-            fig7.update_layout(showlegend=False, height=500)
+            fig7 = figure_cache.obtener('fig7')
+            if fig7 is None:
+                top_10_decrec = pivot_depto_filtrado.tail(10).sort_values('Var_pct', ascending=False)
+                fig7 = px.bar(
+                    x=top_10_decrec['Var_pct'],
+                    y=top_10_decrec.index,
+                    orientation='h',
+                    title='Departamentos con Mayor Decrecimiento (%)',
+                    labels={'x': 'Variación Porcentual (%)', 'y': 'Departamento'},
+                    color=top_10_decrec['Var_pct'],
+                    color_continuous_scale='Reds',
+                    text=top_10_decrec['Var_pct']
+                )
+                fig7.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+                fig7.update_layout(showlegend=False, height=500)
+                fig7 = figure_cache.guardar('fig7', fig7)
             st.plotly_chart(fig7, use_container_width=True)
     
     # Scatter plot: Líneas vs Operadores
     st.markdown("### 🔍 Relación Líneas - Competencia")
     
-    scatter_data = lineas_por_depto.head(20).reset_index()
-    fig8 = px.scatter(
-        scatter_data,
-        x='Operadores',
-        y='Lineas',
-        size='Valor',
-        hover_data=['DEPARTAMENTO', 'Valor_por_linea'],
-        title='Líneas vs Número de Operadores (Top 20)',
-        labels={
-            'Operadores': 'Número de Operadores',
-            'Lineas': 'Número de Líneas'
-        },
-        color='Valor_por_linea',
-        color_continuous_scale='Viridis'
-    )
-    fig8.update_traces(marker=dict(line=dict(width=2, color='DarkSlateGrey')))
+    fig8 = figure_cache.obtener('fig8')
+    if fig8 is None:
+        scatter_data = lineas_por_depto.head(20).reset_index()
+        fig8 = px.scatter(
+            downsample_scatter(scatter_data, ['Operadores', 'Lineas']),
+            x='Operadores',
+            y='Lineas',
+            size='Valor',
+            hover_data=['DEPARTAMENTO', 'Valor_por_linea'],
+            title='Líneas vs Número de Operadores (Top 20)',
+            labels={
+                'Operadores': 'Número de Operadores',
+                'Lineas': 'Número de Líneas'
+            },
+            color='Valor_por_linea',
+            color_continuous_scale='Viridis'
+        )
+        fig8.update_traces(marker=dict(line=dict(width=2, color='DarkSlateGrey')))
+        fig8 = figure_cache.guardar('fig8', fig8)
     st.plotly_chart(fig8, use_container_width=True)
     
     # Mapa de calor: Top departamentos vs métricas
     st.markdown("### 🔥 Mapa de Calor: Indicadores Clave")
     
-    top_15_heatmap = lineas_por_depto.head(15).copy()
-    # Normalizar valores para comparación
-    for col in ['Lineas', 'Valor', 'Operadores', 'Valor_por_linea']:
-        top_15_heatmap[f'{col}_norm'] = (
-            (top_15_heatmap[col] - top_15_heatmap[col].min()) / 
-            (top_15_heatmap[col].max() - top_15_heatmap[col].min())
+    fig9 = figure_cache.obtener('fig9')
+    if fig9 is None:
+        top_15_heatmap = lineas_por_depto.head(15).copy()
+        # Normalizar valores para comparación
+        for col in ['Lineas', 'Valor', 'Operadores', 'Valor_por_linea']:
+            top_15_heatmap[f'{col}_norm'] = (
+                (top_15_heatmap[col] - top_15_heatmap[col].min()) / 
+                (top_15_heatmap[col].max() - top_15_heatmap[col].min())
+            )
+        
+        heatmap_data = top_15_heatmap[['Lineas_norm', 'Valor_norm', 'Operadores_norm', 'Valor_por_linea_norm']]
+        heatmap_data.columns = ['Líneas', 'Valor Total', 'Operadores', 'ARPU']
+        fig9 = px.imshow(
+            heatmap_data.T,
+            labels=dict(x="Departamento", y="Métrica", color="Valor Normalizado"),
+            x=heatmap_data.index,
+            y=heatmap_data.columns,
+            title='Comparación de Indicadores Normalizados (Top 15)',
+            color_continuous_scale='RdYlGn',
+            aspect='auto'
         )
-    
-    heatmap_data = top_15_heatmap[['Lineas_norm', 'Valor_norm', 'Operadores_norm', 'Valor_por_linea_norm']]
-    heatmap_data.columns = ['Líneas', 'Valor Total', 'Operadores', 'ARPU']
-    
-    fig9 = px.imshow(
-        heatmap_data.T,
-        labels=dict(x="Departamento", y="Métrica", color="Valor Normalizado"),
-        x=heatmap_data.index,
-        y=heatmap_data.columns,
-        title='Comparación de Indicadores Normalizados (Top 15)',
-        color_continuous_scale='RdYlGn',
-        aspect='auto'
-    )
-    fig9.update_xaxes(side="bottom", tickangle=45)
+        fig9.update_xaxes(side="bottom", tickangle=45)
+        fig9 = figure_cache.guardar('fig9', fig9)
     st.plotly_chart(fig9, use_container_width=True)
     
     # Análisis de principales municipios
@@ -816,18 +897,21 @@ def show_analisis_por_departamento(df):
         col1, col2 = st.columns(2)
         
         with col1:
-            fig10 = px.bar(
-                x=mun_depto['Lineas'],
-                y=mun_depto.index,
-                orientation='h',
-                title=f'Top 10 Municipios en {selected_depto}',
-                labels={'x': 'Número de Líneas', 'y': 'Municipio'},
-                color=mun_depto['Lineas'],
-                color_continuous_scale='Blues',
-                text=mun_depto['Lineas']
-            )
-            fig10.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
-            fig10.update_layout(showlegend=False, height=500)
+            fig10 = figure_cache.obtener('fig10', selected_depto)
+            if fig10 is None:
+                fig10 = px.bar(
+                    x=mun_depto['Lineas'],
+                    y=mun_depto.index,
+                    orientation='h',
+                    title=f'Top 10 Municipios en {selected_depto}',
+                    labels={'x': 'Número de Líneas', 'y': 'Municipio'},
+                    color=mun_depto['Lineas'],
+                    color_continuous_scale='Blues',
+                    text=mun_depto['Lineas']
+                )
+                fig10.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+                fig10.update_layout(showlegend=False, height=500)
+                fig10 = figure_cache.guardar('fig10', fig10, selected_depto)
             st.plotly_chart(fig10, use_container_width=True)
         
         with col2:
@@ -908,41 +992,46 @@ def show_tendencias_años(df):
     
     with col1:
         # Evolución trimestral de líneas
-        lineas_trim = df.groupby(['ANNO', 'TRIMESTRE'])['CANTIDAD_LINEAS_ACCESOS'].sum().reset_index()
-        fig1 = px.line(
-            lineas_trim,
-            x='TRIMESTRE',
-            y='CANTIDAD_LINEAS_ACCESOS',
-            color='ANNO',
-            markers=True,
-            title='Evolución Trimestral de Líneas',
-            labels={'CANTIDAD_LINEAS_ACCESOS': 'Número de Líneas'},
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig1.update_traces(marker=dict(size=10), line=dict(width=3))
-        fig1.update_xaxes(tickvals=[1, 2, 3, 4])
+        fig1 = figure_cache.obtener('fig1')
+        if fig1 is None:
+            lineas_trim = df.groupby(['ANNO', 'TRIMESTRE'])['CANTIDAD_LINEAS_ACCESOS'].sum().reset_index()
+            fig1 = px.line(
+                lineas_trim,
+                x='TRIMESTRE',
+                y='CANTIDAD_LINEAS_ACCESOS',
+                color='ANNO',
+                markers=True,
+                title='Evolución Trimestral de Líneas',
+                labels={'CANTIDAD_LINEAS_ACCESOS': 'Número de Líneas'},
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig1.update_traces(marker=dict(size=10), line=dict(width=3))
+            fig1.update_xaxes(tickvals=[1, 2, 3, 4])
+            fig1 = figure_cache.guardar('fig1', fig1)
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Evolución del valor por línea
-        valor_linea_trim = df.groupby(['ANNO', 'TRIMESTRE']).agg({
-            'VALOR_FACTURADO_O_COBRADO': 'sum',
-            'CANTIDAD_LINEAS_ACCESOS': 'sum'
-        }).reset_index()
-        valor_linea_trim['VPL'] = valor_linea_trim['VALOR_FACTURADO_O_COBRADO'] / valor_linea_trim['CANTIDAD_LINEAS_ACCESOS']
-        
-        fig2 = px.line(
-            valor_linea_trim,
-            x='TRIMESTRE',
-            y='VPL',
-            color='ANNO',
-            markers=True,
-            title='Evolución del ARPU Trimestral',
-            labels={'VPL': 'Valor por Línea (COP)'},
-            color_discrete_sequence=['#2E86AB', '#A23B72']
-        )
-        fig2.update_traces(marker=dict(size=10), line=dict(width=3))
-        fig2.update_xaxes(tickvals=[1, 2, 3, 4])
+        fig2 = figure_cache.obtener('fig2')
+        if fig2 is None:
+            valor_linea_trim = df.groupby(['ANNO', 'TRIMESTRE']).agg({
+                'VALOR_FACTURADO_O_COBRADO': 'sum',
+                'CANTIDAD_LINEAS_ACCESOS': 'sum'
+            }).reset_index()
+            valor_linea_trim['VPL'] = valor_linea_trim['VALOR_FACTURADO_O_COBRADO'] / valor_linea_trim['CANTIDAD_LINEAS_ACCESOS']
+            fig2 = px.line(
+                valor_linea_trim,
+                x='TRIMESTRE',
+                y='VPL',
+                color='ANNO',
+                markers=True,
+                title='Evolución del ARPU Trimestral',
+                labels={'VPL': 'Valor por Línea (COP)'},
+                color_discrete_sequence=['#2E86AB', '#A23B72']
+            )
+            fig2.update_traces(marker=dict(size=10), line=dict(width=3))
+            fig2.update_xaxes(tickvals=[1, 2, 3, 4])
+            fig2 = figure_cache.guardar('fig2', fig2)
         st.plotly_chart(fig2, use_container_width=True)
     
     # Análisis por segmento
@@ -961,81 +1050,90 @@ def show_tendencias_años(df):
         
         with col1:
             # Top 10 con mayor crecimiento absoluto
-            top_10_crec = pivot_seg.head(10).sort_values('Variacion', ascending=True)
-            fig3 = px.bar(
-                x=top_10_crec['Variacion'],
-                y=top_10_crec.index,
-                orientation='h',
-                title='Segmentos con Mayor Crecimiento Absoluto',
-                labels={'x': 'Variación de Líneas', 'y': 'Segmento'},
-                color=top_10_crec['Variacion'],
-                color_continuous_scale='Greens',
-                text=top_10_crec['Variacion']
-            )
-            fig3.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
-            fig3.update_layout(showlegend=False, height=500)
+            fig3 = figure_cache.obtener('fig3')
+            if fig3 is None:
+                top_10_crec = pivot_seg.head(10).sort_values('Variacion', ascending=True)
+                fig3 = px.bar(
+                    x=top_10_crec['Variacion'],
+                    y=top_10_crec.index,
+                    orientation='h',
+                    title='Segmentos con Mayor Crecimiento Absoluto',
+                    labels={'x': 'Variación de Líneas', 'y': 'Segmento'},
+                    color=top_10_crec['Variacion'],
+                    color_continuous_scale='Greens',
+                    text=top_10_crec['Variacion']
+                )
+                fig3.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+                fig3.update_layout(showlegend=False, height=500)
+                fig3 = figure_cache.guardar('fig3', fig3)
             st.plotly_chart(fig3, use_container_width=True)
         
         with col2:
             # Comparación 2023 vs 2024
-            top_10_seg_names = pivot_seg.head(10).index
-            seg_comp = lineas_seg_ano[lineas_seg_ano['SEGMENTO'].isin(top_10_seg_names)]
-            
-            fig4 = px.bar(
-                seg_comp,
-                x='CANTIDAD_LINEAS_ACCESOS',
-                y='SEGMENTO',
-                color='ANNO',
-                orientation='h',
-                barmode='group',
-                title='Top 10 Segmentos: 2023 vs 2024',
-                color_discrete_sequence=['#2E86AB', '#A23B72'],
-                text='CANTIDAD_LINEAS_ACCESOS'
-            )
-            fig4.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
-            fig4.update_layout(height=500)
+            fig4 = figure_cache.obtener('fig4')
+            if fig4 is None:
+                top_10_seg_names = pivot_seg.head(10).index
+                seg_comp = lineas_seg_ano[lineas_seg_ano['SEGMENTO'].isin(top_10_seg_names)]
+                fig4 = px.bar(
+                    seg_comp,
+                    x='CANTIDAD_LINEAS_ACCESOS',
+                    y='SEGMENTO',
+                    color='ANNO',
+                    orientation='h',
+                    barmode='group',
+                    title='Top 10 Segmentos: 2023 vs 2024',
+                    color_discrete_sequence=['#2E86AB', '#A23B72'],
+                    text='CANTIDAD_LINEAS_ACCESOS'
+                )
+                fig4.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+                fig4.update_layout(height=500)
+                fig4 = figure_cache.guardar('fig4', fig4)
             st.plotly_chart(fig4, use_container_width=True)
     
     # Evolución por tipo de servicio
     st.markdown("### 📦 Evolución por Tipo de Servicio")
     
-    lineas_tipo_trim = df.groupby(['ANNO', 'TRIMESTRE', 'TIPO_SERVICIO'])['CANTIDAD_LINEAS_ACCESOS'].sum().reset_index()
-    
-    fig5 = px.line(
-        lineas_tipo_trim,
-        x='TRIMESTRE',
-        y='CANTIDAD_LINEAS_ACCESOS',
-        color='TIPO_SERVICIO',
-        line_dash='ANNO',
-        markers=True,
-        title='Evolución por Tipo de Servicio (Individual vs Empaquetado)',
-        labels={'CANTIDAD_LINEAS_ACCESOS': 'Número de Líneas'}
-    )
-    fig5.update_traces(marker=dict(size=8), line=dict(width=2.5))
-    fig5.update_xaxes(tickvals=[1, 2, 3, 4])
+    fig5 = figure_cache.obtener('fig5')
+    if fig5 is None:
+        lineas_tipo_trim = df.groupby(['ANNO', 'TRIMESTRE', 'TIPO_SERVICIO'])['CANTIDAD_LINEAS_ACCESOS'].sum().reset_index()
+        fig5 = px.line(
+            lineas_tipo_trim,
+            x='TRIMESTRE',
+            y='CANTIDAD_LINEAS_ACCESOS',
+            color='TIPO_SERVICIO',
+            line_dash='ANNO',
+            markers=True,
+            title='Evolución por Tipo de Servicio (Individual vs Empaquetado)',
+            labels={'CANTIDAD_LINEAS_ACCESOS': 'Número de Líneas'}
+        )
+        fig5.update_traces(marker=dict(size=8), line=dict(width=2.5))
+        fig5.update_xaxes(tickvals=[1, 2, 3, 4])
+        fig5 = figure_cache.guardar('fig5', fig5)
     st.plotly_chart(fig5, use_container_width=True)
     
     # Evolución por tecnología (Top 5)
     st.markdown("### 🔧 Evolución por Tecnología")
     
-    df_tech = df[df['TECNOLOGIA'] != 'NA'].copy()
-    top_5_tech = df_tech.groupby('TECNOLOGIA')['CANTIDAD_LINEAS_ACCESOS'].sum().nlargest(5).index
-    lineas_tech_trim = df_tech[df_tech['TECNOLOGIA'].isin(top_5_tech)].groupby(
-        ['ANNO', 'TRIMESTRE', 'TECNOLOGIA']
-    )['CANTIDAD_LINEAS_ACCESOS'].sum().reset_index()
-    
-    fig6 = px.line(
-        lineas_tech_trim,
-        x='TRIMESTRE',
-        y='CANTIDAD_LINEAS_ACCESOS',
-        color='TECNOLOGIA',
-        line_dash='ANNO',
-        markers=True,
-        title='Evolución Top 5 Tecnologías',
-        labels={'CANTIDAD_LINEAS_ACCESOS': 'Número de Líneas'}
-    )
-    fig6.update_traces(marker=dict(size=7), line=dict(width=2))
-    fig6.update_xaxes(tickvals=[1, 2, 3, 4])
+    fig6 = figure_cache.obtener('fig6')
+    if fig6 is None:
+        df_tech = df[df['TECNOLOGIA'] != 'NA'].copy()
+        top_5_tech = df_tech.groupby('TECNOLOGIA')['CANTIDAD_LINEAS_ACCESOS'].sum().nlargest(5).index
+        lineas_tech_trim = df_tech[df_tech['TECNOLOGIA'].isin(top_5_tech)].groupby(
+            ['ANNO', 'TRIMESTRE', 'TECNOLOGIA']
+        )['CANTIDAD_LINEAS_ACCESOS'].sum().reset_index()
+        fig6 = px.line(
+            lineas_tech_trim,
+            x='TRIMESTRE',
+            y='CANTIDAD_LINEAS_ACCESOS',
+            color='TECNOLOGIA',
+            line_dash='ANNO',
+            markers=True,
+            title='Evolución Top 5 Tecnologías',
+            labels={'CANTIDAD_LINEAS_ACCESOS': 'Número de Líneas'}
+        )
+        fig6.update_traces(marker=dict(size=7), line=dict(width=2))
+        fig6.update_xaxes(tickvals=[1, 2, 3, 4])
+        fig6 = figure_cache.guardar('fig6', fig6)
     st.plotly_chart(fig6, use_container_width=True)
     
     # Análisis de crecimiento por departamento (Top 10)
@@ -1057,82 +1155,90 @@ def show_tendencias_años(df):
         
         with col1:
             # Top 10 con mayor crecimiento
-            top_10_depto_crec = pivot_depto_sig.head(10).sort_values('Var_pct', ascending=True)
-            fig7 = px.bar(
-                x=top_10_depto_crec['Var_pct'],
-                y=top_10_depto_crec.index,
-                orientation='h',
-                title='Departamentos con Mayor Crecimiento (%)',
-                labels={'x': 'Variación Porcentual (%)', 'y': 'Departamento'},
-                color=top_10_depto_crec['Var_pct'],
-                color_continuous_scale='Greens',
-                text=top_10_depto_crec['Var_pct']
-            )
-            fig7.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-            fig7.update_layout(showlegend=False, height=500)
+            fig7 = figure_cache.obtener('fig7')
+            if fig7 is None:
+                top_10_depto_crec = pivot_depto_sig.head(10).sort_values('Var_pct', ascending=True)
+                fig7 = px.bar(
+                    x=top_10_depto_crec['Var_pct'],
+                    y=top_10_depto_crec.index,
+                    orientation='h',
+                    title='Departamentos con Mayor Crecimiento (%)',
+                    labels={'x': 'Variación Porcentual (%)', 'y': 'Departamento'},
+                    color=top_10_depto_crec['Var_pct'],
+                    color_continuous_scale='Greens',
+                    text=top_10_depto_crec['Var_pct']
+                )
+                fig7.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+                fig7.update_layout(showlegend=False, height=500)
+                fig7 = figure_cache.guardar('fig7', fig7)
             st.plotly_chart(fig7, use_container_width=True)
         
         with col2:
             # Top 10 con mayor decrecimiento
-            top_10_depto_decrec = pivot_depto_sig.tail(10).sort_values('Var_pct', ascending=False)
-            fig8 = px.bar(
-                x=top_10_depto_decrec['Var_pct'],
-                y=top_10_depto_decrec.index,
-                orientation='h',
-                title='Departamentos con Mayor Decrecimiento (%)',
-                labels={'x': 'Variación Porcentual (%)', 'y': 'Departamento'},
-                color=top_10_depto_decrec['Var_pct'],
-                color_continuous_scale='Reds',
-                text=top_10_depto_decrec['Var_pct']
-            )
-            fig8.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-            fig8.update_layout(showlegend=False, height=500)
+            fig8 = figure_cache.obtener('fig8')
+            if fig8 is None:
+                top_10_depto_decrec = pivot_depto_sig.tail(10).sort_values('Var_pct', ascending=False)
+                fig8 = px.bar(
+                    x=top_10_depto_decrec['Var_pct'],
+                    y=top_10_depto_decrec.index,
+                    orientation='h',
+                    title='Departamentos con Mayor Decrecimiento (%)',
+                    labels={'x': 'Variación Porcentual (%)', 'y': 'Departamento'},
+                    color=top_10_depto_decrec['Var_pct'],
+                    color_continuous_scale='Reds',
+                    text=top_10_depto_decrec['Var_pct']
+                )
+                fig8.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+                fig8.update_layout(showlegend=False, height=500)
+                fig8 = figure_cache.guardar('fig8', fig8)
             st.plotly_chart(fig8, use_container_width=True)
     
     # Análisis combinado
     st.markdown("### 🔄 Análisis Combinado: Líneas vs Valor")
     
-    combined_ano = df.groupby('ANNO').agg({
-        'CANTIDAD_LINEAS_ACCESOS': 'sum',
-        'VALOR_FACTURADO_O_COBRADO': 'sum'
-    }).reset_index()
-    
-    # Gráfico de doble eje
-    fig9 = make_subplots(specs=[[{"secondary_y": True}]])
-    
-    fig9.add_trace(
-        go.Bar(
-            x=combined_ano['ANNO'],
-            y=combined_ano['CANTIDAD_LINEAS_ACCESOS'],
-            name="Líneas",
-            marker_color='#2E86AB',
-            text=combined_ano['CANTIDAD_LINEAS_ACCESOS'],
-            texttemplate='%{text:,.0f}',
-            textposition='outside'
-        ),
-        secondary_y=False
-    )
-    
-    fig9.add_trace(
-        go.Scatter(
-            x=combined_ano['ANNO'],
-            y=combined_ano['VALOR_FACTURADO_O_COBRADO'],
-            name="Valor Facturado",
-            mode='lines+markers',
-            marker=dict(size=15, color='#A23B72'),
-            line=dict(width=3, color='#A23B72')
-        ),
-        secondary_y=True
-    )
-    
-    fig9.update_xaxes(title_text="Año")
-    fig9.update_yaxes(title_text="<b>Número de Líneas</b>", secondary_y=False)
-    fig9.update_yaxes(title_text="<b>Valor Facturado (COP)</b>", secondary_y=True)
-    fig9.update_layout(
-        title_text="Evolución de Líneas vs Valor Facturado",
-        height=500
-    )
-    
+    fig9 = figure_cache.obtener('fig9')
+    if fig9 is None:
+        combined_ano = df.groupby('ANNO').agg({
+            'CANTIDAD_LINEAS_ACCESOS': 'sum',
+            'VALOR_FACTURADO_O_COBRADO': 'sum'
+        }).reset_index()
+        
+        # Gráfico de doble eje
+        fig9 = make_subplots(specs=[[{"secondary_y": True}]])
+        
+        fig9.add_trace(
+            go.Bar(
+                x=combined_ano['ANNO'],
+                y=combined_ano['CANTIDAD_LINEAS_ACCESOS'],
+                name="Líneas",
+                marker_color='#2E86AB',
+                text=combined_ano['CANTIDAD_LINEAS_ACCESOS'],
+                texttemplate='%{text:,.0f}',
+                textposition='outside'
+            ),
+            secondary_y=False
+        )
+        
+        fig9.add_trace(
+            go.Scatter(
+                x=combined_ano['ANNO'],
+                y=combined_ano['VALOR_FACTURADO_O_COBRADO'],
+                name="Valor Facturado",
+                mode='lines+markers',
+                marker=dict(size=15, color='#A23B72'),
+                line=dict(width=3, color='#A23B72')
+            ),
+            secondary_y=True
+        )
+        
+        fig9.update_xaxes(title_text="Año")
+        fig9.update_yaxes(title_text="<b>Número de Líneas</b>", secondary_y=False)
+        fig9.update_yaxes(title_text="<b>Valor Facturado (COP)</b>", secondary_y=True)
+        fig9.update_layout(
+            title_text="Evolución de Líneas vs Valor Facturado",
+            height=500
+        )
+        fig9 = figure_cache.guardar('fig9', fig9)
     st.plotly_chart(fig9, use_container_width=True)
     
     # Tabla de variaciones detalladas por segmento
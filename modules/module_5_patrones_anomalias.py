@@ -6,206 +6,430 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
+from utils import data_loader, figure_cache, quarter_alerts, downsampling, growth_metrics, anomaly_scores
+from utils.concentration import (
+    compute_concentration, NIVELES_CONCENTRACION, HHI_MODERADO, HHI_ALTO
+)
+
+# Criterios de outlier disponibles en el detalle de registros
+CRITERIOS_OUTLIER = {
+    'Valor facturado por servicio': 'ANOM_IQR_SERVICIO',
+    'Valor por línea (global)': 'ANOM_IQR_VPL',
+    'Valor por línea (por trimestre)': 'ANOM_IQR_VPL_PERIODO'
+}
+
+DIMENSIONES_DETALLE = {
+    'Servicio': 'ID_SERVICIO_PAQUETE',
+    'Trimestre': 'PERIODO',
+    'Municipio': 'ID_MUNICIPIO'
+}
+
+# Opciones de la vista de concentración
+NIVELES_CONCENTRACION_UI = {
+    'Departamento': 'departamento',
+    'Región': 'region',
+    'Municipio': 'municipio'
+}
+
+DIMENSIONES_CONCENTRACION_UI = {
+    'Tecnologías': 'tecnologia',
+    'Operadores': 'operador'
+}
+
+INDICADORES_CONCENTRACION = {
+    'HHI': 'HHI',
+    'Entropía normalizada': 'ENTROPIA_NORM',
+    'Participación top 3 (%)': 'TOP_K',
+    'N° de categorías': 'N_CATEGORIAS'
+}
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _calcular_crecimiento(_df, version, periodo_inicio, periodo_fin):
+    """Métricas de crecimiento municipal, en caché por versión del dataset y rango de periodos"""
+    return growth_metrics.compute_growth_metrics(_df)
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _indice_anomalias(_df, version, periodo_inicio, periodo_fin):
+    """Índice de registros atípicos y etiquetas de sus grupos, en caché por versión y rango"""
+    indice = anomaly_scores.build_anomaly_index(_df)
+    
+    servicios = _df.drop_duplicates('ID_SERVICIO_PAQUETE')
+    municipios = _df.drop_duplicates('ID_MUNICIPIO')
+    etiquetas = {
+        'ID_SERVICIO_PAQUETE': dict(zip(servicios['ID_SERVICIO_PAQUETE'], servicios['SERVICIO_PAQUETE'])),
+        'ID_MUNICIPIO': dict(zip(
+            municipios['ID_MUNICIPIO'],
+            municipios['MUNICIPIO'] + ' (' + municipios['DEPARTAMENTO'] + ')'
+        ))
+    }
+    
+    return indice, etiquetas
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _calcular_concentracion(_df, version, periodo_inicio, periodo_fin):
+    """Índices de concentración por zona, en caché por versión del dataset y rango de periodos"""
+    return compute_concentration(_df)
 
 def show_municipios_crecimiento(df):
     """5.1 Municipios con crecimiento inusualmente alto o bajo"""
     st.markdown("## 5.1 🏙️ Municipios con Crecimiento Inusual")
     
-    # Calcular crecimiento por municipio
-    lineas_mun_ano = df.groupby(['MUNICIPIO', 'DEPARTAMENTO', 'ANNO'])['CANTIDAD_LINEAS_ACCESOS'].sum().reset_index()
-    pivot_mun = lineas_mun_ano.pivot_table(
-        index=['MUNICIPIO', 'DEPARTAMENTO'], 
-        columns='ANNO', 
-        values='CANTIDAD_LINEAS_ACCESOS', 
-        fill_value=0
-    )
+    periodos = df['ANNO'] * 10 + df['TRIMESTRE']
+    periodo_inicio, periodo_fin = int(periodos.min()), int(periodos.max())
     
-    # Solo municipios con datos en ambos años
-    if 2023 in pivot_mun.columns and 2024 in pivot_mun.columns:
-        pivot_mun = pivot_mun[(pivot_mun[2023] > 0) & (pivot_mun[2024] > 0)]
-        pivot_mun['Variacion'] = pivot_mun[2024] - pivot_mun[2023]
-        pivot_mun['Var_pct'] = ((pivot_mun['Variacion'] / pivot_mun[2023]) * 100).round(2)
+    if periodo_inicio == periodo_fin:
+        st.info("ℹ️ Seleccione un rango de al menos dos trimestres para analizar el crecimiento")
+    else:
+        # Métricas de crecimiento de todos los municipios (caché por versión y rango)
+        metricas = _calcular_crecimiento(df, data_loader.get_dataset_version(), periodo_inicio, periodo_fin)
+        resumen = metricas['resumen']
+        etiqueta_inicio = f"{periodo_inicio // 10}-T{periodo_inicio % 10}"
+        etiqueta_fin = f"{periodo_fin // 10}-T{periodo_fin % 10}"
+        
+        # Solo municipios con datos al inicio y al final del rango
+        resumen = resumen[(resumen['LINEAS_INICIO'] > 0) & (resumen['LINEAS_FIN'] > 0)]
         
-        # Filtrar municipios significativos (top 50% en volumen 2023)
-        pivot_mun_filtrado = pivot_mun[pivot_mun[2023] >= pivot_mun[2023].quantile(0.5)]
+        # Filtrar municipios significativos (top 50% en volumen inicial)
+        resumen_filtrado = resumen[resumen['LINEAS_INICIO'] >= resumen['LINEAS_INICIO'].quantile(0.5)]
         
         # Métricas
-        st.markdown("### 📊 Estadísticas de Crecimiento")
+        st.markdown(f"### 📊 Estadísticas de Crecimiento ({etiqueta_inicio} a {etiqueta_fin})")
         
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            n_crecimiento = len(pivot_mun_filtrado[pivot_mun_filtrado['Var_pct'] > 0])
+            n_crecimiento = (resumen_filtrado['CAGR_PCT'] > 0).sum()
             st.metric("Municipios en Crecimiento", n_crecimiento)
         
         with col2:
-            n_decrecimiento = len(pivot_mun_filtrado[pivot_mun_filtrado['Var_pct'] < 0])
+            n_decrecimiento = (resumen_filtrado['CAGR_PCT'] < 0).sum()
             st.metric("Municipios en Decrecimiento", n_decrecimiento)
         
         with col3:
-            var_media = pivot_mun_filtrado['Var_pct'].mean()
-            st.metric("Variación Media", f"{var_media:+.2f}%")
+            cagr_mediana = resumen_filtrado['CAGR_PCT'].median()
+            st.metric("CAGR Mediano", f"{cagr_mediana:+.2f}%")
         
         with col4:
-            var_mediana = pivot_mun_filtrado['Var_pct'].median()
-            st.metric("Variación Mediana", f"{var_mediana:+.2f}%")
+            n_inusuales = (resumen_filtrado['ZSCORE_DEPTO'].abs() > growth_metrics.UMBRAL_ZSCORE_DEPTO).sum()
+            st.metric("Inusuales vs. su Departamento", n_inusuales)
         
         # Visualizaciones
         col1, col2 = st.columns(2)
         
         with col1:
             # Mayor crecimiento
-            top_crec = pivot_mun_filtrado.nlargest(10, 'Var_pct')
-            municipios_labels = [f"{m} ({d[:15]})" for m, d in top_crec.index]
-            
-            fig1 = px.bar(
-                x=top_crec['Var_pct'],
-                y=municipios_labels,
-                orientation='h',
-                title='Top 10 Municipios con Mayor Crecimiento',
-                labels={'x': 'Variación (%)', 'y': 'Municipio'},
-                color=top_crec['Var_pct'],
-                color_continuous_scale='Greens'
-            )
-            fig1.update_layout(showlegend=False, height=500)
+            fig1 = figure_cache.obtener('fig1')
+            if fig1 is None:
+                top_crec = resumen_filtrado.nlargest(10, 'CAGR_PCT')
+                municipios_labels = [f"{m} ({d[:15]})" for m, d in zip(top_crec['MUNICIPIO'], top_crec['DEPARTAMENTO'])]
+                fig1 = px.bar(
+                    x=top_crec['CAGR_PCT'],
+                    y=municipios_labels,
+                    orientation='h',
+                    title='Top 10 Municipios con Mayor Crecimiento (CAGR)',
+                    labels={'x': 'CAGR (%)', 'y': 'Municipio'},
+                    color=top_crec['CAGR_PCT'],
+                    color_continuous_scale='Greens'
+                )
+                fig1.update_layout(showlegend=False, height=500)
+                fig1 = figure_cache.guardar('fig1', fig1)
             st.plotly_chart(fig1, use_container_width=True)
         
         with col2:
             # Mayor decrecimiento
-            top_decrec = pivot_mun_filtrado.nsmallest(10, 'Var_pct')
-            municipios_labels_d = [f"{m} ({d[:15]})" for m, d in top_decrec.index]
-            
-            fig2 = px.bar(
-                x=top_decrec['Var_pct'],
-                y=municipios_labels_d,
-                orientation='h',
-                title='Top 10 Municipios con Mayor Decrecimiento',
-                labels={'x': 'Variación (%)', 'y': 'Municipio'},
-                color=top_decrec['Var_pct'],
-                color_continuous_scale='Reds'
-            )
-            fig2.update_layout(showlegend=False, height=500)
+            fig2 = figure_cache.obtener('fig2')
+            if fig2 is None:
+                top_decrec = resumen_filtrado.nsmallest(10, 'CAGR_PCT')
+                municipios_labels_d = [f"{m} ({d[:15]})" for m, d in zip(top_decrec['MUNICIPIO'], top_decrec['DEPARTAMENTO'])]
+                fig2 = px.bar(
+                    x=top_decrec['CAGR_PCT'],
+                    y=municipios_labels_d,
+                    orientation='h',
+                    title='Top 10 Municipios con Mayor Decrecimiento (CAGR)',
+                    labels={'x': 'CAGR (%)', 'y': 'Municipio'},
+                    color=top_decrec['CAGR_PCT'],
+                    color_continuous_scale='Reds'
+                )
+                fig2.update_layout(showlegend=False, height=500)
+                fig2 = figure_cache.guardar('fig2', fig2)
             st.plotly_chart(fig2, use_container_width=True)
         
-        # Distribución de variaciones
-        st.markdown("### 📈 Distribución de Variaciones")
-        
-        fig3 = px.histogram(
-            pivot_mun_filtrado,
-            x='Var_pct',
-            nbins=50,
-            title='Distribución de Variaciones Porcentuales',
-            labels={'Var_pct': 'Variación (%)'},
-            color_discrete_sequence=['#1D3557']
-        )
-        fig3.add_vline(x=0, line_dash="dash", line_color="red", annotation_text="Sin cambio")
-        fig3.add_vline(x=var_mediana, line_dash="dash", line_color="orange", 
-                      annotation_text=f"Mediana: {var_mediana:.1f}%")
+        # Distribución de tasas de crecimiento
+        st.markdown("### 📈 Distribución del Crecimiento Anual Compuesto")
+        
+        fig3 = figure_cache.obtener('fig3')
+        if fig3 is None:
+            fig3 = px.histogram(
+                resumen_filtrado,
+                x='CAGR_PCT',
+                nbins=50,
+                title='Distribución del CAGR por Municipio',
+                labels={'CAGR_PCT': 'CAGR (%)'},
+                color_discrete_sequence=['#1D3557']
+            )
+            fig3.add_vline(x=0, line_dash="dash", line_color="red", annotation_text="Sin cambio")
+            fig3.add_vline(x=cagr_mediana, line_dash="dash", line_color="orange", 
+                          annotation_text=f"Mediana: {cagr_mediana:.1f}%")
+            fig3 = figure_cache.guardar('fig3', fig3)
         st.plotly_chart(fig3, use_container_width=True)
         
+        # Rachas y desviación frente al departamento
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("### 🔁 Rachas de Crecimiento")
+            
+            fig4 = figure_cache.obtener('fig4')
+            if fig4 is None:
+                rachas = resumen_filtrado['RACHA_ACTUAL'].value_counts().sort_index().reset_index()
+                rachas.columns = ['Racha', 'Municipios']
+                fig4 = px.bar(
+                    rachas,
+                    x='Racha',
+                    y='Municipios',
+                    title='Trimestres Consecutivos al Final del Rango (+ crece, - decrece)',
+                    color='Racha',
+                    color_continuous_scale='RdYlGn',
+                    color_continuous_midpoint=0
+                )
+                fig4.update_layout(showlegend=False, height=450)
+                fig4 = figure_cache.guardar('fig4', fig4)
+            st.plotly_chart(fig4, use_container_width=True)
+        
+        with col2:
+            st.markdown("### 🧭 Desviación frente al Departamento")
+            
+            fig5 = figure_cache.obtener('fig5')
+            if fig5 is None:
+                fig5 = px.scatter(
+                    resumen_filtrado,
+                    x='CAGR_PCT',
+                    y='ZSCORE_DEPTO',
+                    hover_data=['MUNICIPIO', 'DEPARTAMENTO', 'RACHA_ACTUAL'],
+                    title='CAGR vs Z-score dentro del Departamento',
+                    labels={'CAGR_PCT': 'CAGR (%)', 'ZSCORE_DEPTO': 'Z-score vs. Departamento'},
+                    color='ZSCORE_DEPTO',
+                    color_continuous_scale='RdBu_r',
+                    color_continuous_midpoint=0
+                )
+                for umbral in [-growth_metrics.UMBRAL_ZSCORE_DEPTO, growth_metrics.UMBRAL_ZSCORE_DEPTO]:
+                    fig5.add_hline(y=umbral, line_dash="dash", line_color="gray")
+                fig5.update_layout(height=450)
+                fig5 = figure_cache.guardar('fig5', fig5)
+            st.plotly_chart(fig5, use_container_width=True)
+        
         # Top municipios por volumen - comparación
         st.markdown("### 🏆 Top 10 Municipios por Volumen")
         
-        top_10_vol = pivot_mun.nlargest(10, 2024)
-        municipios_vol_labels = [f"{m[:20]} ({d[:10]})" for m, d in top_10_vol.index]
-        
-        fig4 = go.Figure()
-        fig4.add_trace(go.Bar(
-            name='2023',
-            y=municipios_vol_labels,
-            x=top_10_vol[2023],
-            orientation='h',
-            marker_color='#2E86AB'
-        ))
-        fig4.add_trace(go.Bar(
-            name='2024',
-            y=municipios_vol_labels,
-            x=top_10_vol[2024],
-            orientation='h',
-            marker_color='#A23B72'
-        ))
-        fig4.update_layout(
-            title='Top 10 Municipios por Volumen: 2023 vs 2024',
-            barmode='group',
-            height=500
-        )
-        st.plotly_chart(fig4, use_container_width=True)
+        fig6 = figure_cache.obtener('fig6')
+        if fig6 is None:
+            top_10_vol = resumen.nlargest(10, 'LINEAS_FIN')
+            municipios_vol_labels = [f"{m[:20]} ({d[:10]})" for m, d in zip(top_10_vol['MUNICIPIO'], top_10_vol['DEPARTAMENTO'])]
+            fig6 = go.Figure()
+            fig6.add_trace(go.Bar(
+                name=etiqueta_inicio,
+                y=municipios_vol_labels,
+                x=top_10_vol['LINEAS_INICIO'],
+                orientation='h',
+                marker_color='#2E86AB'
+            ))
+            fig6.add_trace(go.Bar(
+                name=etiqueta_fin,
+                y=municipios_vol_labels,
+                x=top_10_vol['LINEAS_FIN'],
+                orientation='h',
+                marker_color='#A23B72'
+            ))
+            fig6.update_layout(
+                title=f'Top 10 Municipios por Volumen: {etiqueta_inicio} vs {etiqueta_fin}',
+                barmode='group',
+                height=500
+            )
+            fig6 = figure_cache.guardar('fig6', fig6)
+        st.plotly_chart(fig6, use_container_width=True)
         
         # Tabla detallada
         with st.expander("📋 Ver Lista Completa de Variaciones"):
-            display_df = pivot_mun_filtrado.reset_index()
-            display_df.columns = ['Municipio', 'Departamento', 'Líneas 2023', 'Líneas 2024', 'Variación', 'Variación %']
-            display_df = display_df.sort_values('Variación %', ascending=False)
-            st.dataframe(display_df, use_container_width=True, height=400)
+            display_df = resumen_filtrado[[
+                'MUNICIPIO', 'DEPARTAMENTO', 'LINEAS_INICIO', 'LINEAS_FIN', 'VAR_PCT',
+                'CAGR_PCT', 'QOQ_MEDIO_PCT', 'QOQ_ULTIMO_PCT', 'RACHA_ACTUAL', 'ZSCORE_DEPTO'
+            ]]
+            display_df.columns = [
+                'Municipio', 'Departamento', f'Líneas {etiqueta_inicio}', f'Líneas {etiqueta_fin}',
+                'Variación %', 'CAGR %', 'Crec. Trimestral Medio %', 'Crec. Último Trimestre %',
+                'Racha Actual', 'Z-score Depto'
+            ]
+            display_df = display_df.sort_values('CAGR %', ascending=False)
+            st.dataframe(display_df, use_container_width=True, height=400, hide_index=True)
+    
+    # Alertas generadas al ingerir trimestres nuevos
+    df_alertas = quarter_alerts.load_alerts()
+    
+    if df_alertas is not None and len(df_alertas) > 0:
+        st.markdown("### 🚨 Alertas del Último Trimestre Ingerido")
+        
+        ultimo_periodo = df_alertas['PERIODO'].max()
+        df_ultimo = df_alertas[df_alertas['PERIODO'] == ultimo_periodo]
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("Periodo", f"{ultimo_periodo // 10}-T{ultimo_periodo % 10}")
+        
+        with col2:
+            st.metric("Municipios con Alerta", (df_ultimo['NIVEL'] == 'MUNICIPIO').sum())
+        
+        with col3:
+            st.metric("Registros con Alerta", (df_ultimo['NIVEL'] == 'REGISTRO').sum())
+        
+        with st.expander("📋 Ver Tabla de Alertas"):
+            st.dataframe(
+                df_ultimo[['NIVEL', 'METRICA', 'EMPRESA', 'DEPARTAMENTO', 'MUNICIPIO',
+                           'ID_SERVICIO_PAQUETE', 'VALOR', 'ESPERADO', 'ZSCORE']],
+                use_container_width=True, hide_index=True, height=400
+            )
 
 def show_valores_anomalos(df):
     """5.2 Paquetes con valores facturados fuera de rangos normales"""
     st.markdown("## 5.2 🚨 Valores Facturados Anómalos")
     
-    st.info("💡 Se consideran outliers los valores fuera del rango [Q1 - 1.5×IQR, Q3 + 1.5×IQR]")
+    st.info("💡 Se consideran outliers los valores fuera del rango [Q1 - 1.5×IQR, Q3 + 1.5×IQR]. "
+            "Los puntajes se calculan sobre el histórico completo durante la preparación de datos.")
     
-    # Análisis de outliers por servicio
+    # Análisis de outliers por servicio (puntajes precalculados)
     st.markdown("### 📊 Outliers por Servicio/Paquete")
     
-    outliers_info = []
-    for servicio in sorted(df['ID_SERVICIO_PAQUETE'].unique()):
-        df_serv = df[(df['ID_SERVICIO_PAQUETE'] == servicio) & (df['VALOR_FACTURADO_O_COBRADO'] > 0)]
-        
-        if len(df_serv) > 0:
-            Q1 = df_serv['VALOR_FACTURADO_O_COBRADO'].quantile(0.25)
-            Q3 = df_serv['VALOR_FACTURADO_O_COBRADO'].quantile(0.75)
-            IQR = Q3 - Q1
-            limite_inf = Q1 - 1.5 * IQR
-            limite_sup = Q3 + 1.5 * IQR
-            
-            outliers = df_serv[
-                (df_serv['VALOR_FACTURADO_O_COBRADO'] < limite_inf) | 
-                (df_serv['VALOR_FACTURADO_O_COBRADO'] > limite_sup)
-            ]
-            pct_outliers = (len(outliers) / len(df_serv) * 100)
-            
-            nombre = df_serv['SERVICIO_PAQUETE'].iloc[0]
-            outliers_info.append({
-                'Servicio': nombre,
-                'Total Registros': len(df_serv),
-                'Outliers': len(outliers),
-                'Porcentaje': pct_outliers,
-                'Rango Normal': f"${limite_inf:,.0f} - ${limite_sup:,.0f}"
-            })
+    df_serv = df[df['VALOR_FACTURADO_O_COBRADO'] > 0]
+    df_normal = df_serv[~df_serv['ANOM_IQR_SERVICIO']]
     
-    outliers_df = pd.DataFrame(outliers_info).sort_values('Porcentaje', ascending=False)
+    outliers_df = df_serv.groupby('SERVICIO_PAQUETE').agg(
+        Total_Registros=('ANOM_IQR_SERVICIO', 'size'),
+        Outliers=('ANOM_IQR_SERVICIO', 'sum')
+    )
+    rango_normal = df_normal.groupby('SERVICIO_PAQUETE')['VALOR_FACTURADO_O_COBRADO'].agg(['min', 'max'])
+    outliers_df = outliers_df.join(rango_normal).reset_index()
+    outliers_df['Porcentaje'] = outliers_df['Outliers'] / outliers_df['Total_Registros'] * 100
+    outliers_df['Rango Normal'] = (
+        '$' + outliers_df['min'].map('{:,.0f}'.format) + ' - $' + outliers_df['max'].map('{:,.0f}'.format)
+    )
+    outliers_df = outliers_df.rename(columns={
+        'SERVICIO_PAQUETE': 'Servicio',
+        'Total_Registros': 'Total Registros'
+    })[['Servicio', 'Total Registros', 'Outliers', 'Porcentaje', 'Rango Normal']]
+    outliers_df = outliers_df.sort_values('Porcentaje', ascending=False)
     
     # Visualización de porcentaje de outliers
-    fig1 = px.bar(
-        outliers_df,
-        x='Porcentaje',
-        y='Servicio',
-        orientation='h',
-        title='Porcentaje de Outliers por Servicio',
-        labels={'Porcentaje': 'Porcentaje de Outliers (%)'},
-        color='Porcentaje',
-        color_continuous_scale='Reds'
+    fig1 = figure_cache.obtener('fig1')
+    if fig1 is None:
+        fig1 = px.bar(
+            outliers_df,
+            x='Porcentaje',
+            y='Servicio',
+            orientation='h',
+            title='Porcentaje de Outliers por Servicio',
+            labels={'Porcentaje': 'Porcentaje de Outliers (%)'},
+            color='Porcentaje',
+            color_continuous_scale='Reds'
+        )
+        fig1.update_layout(height=500, showlegend=False)
+        fig1 = figure_cache.guardar('fig1', fig1)
+    evento = st.plotly_chart(
+        fig1, use_container_width=True, on_select="rerun",
+        selection_mode="points", key="grafico_outliers_servicio"
+    )
+    
+    # Detalle de registros atípicos a partir del índice precalculado
+    st.markdown("### 🔎 Detalle de Registros Atípicos")
+    st.caption("Haga clic en una barra del gráfico anterior o elija un grupo para ver sus registros.")
+    
+    periodos = df['ANNO'] * 10 + df['TRIMESTRE']
+    indice, etiquetas = _indice_anomalias(
+        df, data_loader.get_dataset_version(), int(periodos.min()), int(periodos.max())
+    )
+    
+    # Un clic en una barra selecciona ese servicio (solo cuando cambia el clic)
+    puntos = evento.selection.points if evento else []
+    if puntos and st.session_state.get('detalle_ultimo_clic') != puntos[0]['y']:
+        servicio_clic = puntos[0]['y']
+        st.session_state['detalle_ultimo_clic'] = servicio_clic
+        st.session_state['detalle_criterio'] = 'Valor facturado por servicio'
+        st.session_state['detalle_dimension'] = 'Servicio'
+        st.session_state['detalle_valor'] = next(
+            (k for k, v in etiquetas['ID_SERVICIO_PAQUETE'].items() if v == servicio_clic), None
+        )
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        criterio = st.selectbox("Criterio de outlier:", list(CRITERIOS_OUTLIER.keys()), key='detalle_criterio')
+        flag = CRITERIOS_OUTLIER[criterio]
+    
+    with col2:
+        dimension_label = st.selectbox("Agrupar por:", list(DIMENSIONES_DETALLE.keys()), key='detalle_dimension')
+        dimension = DIMENSIONES_DETALLE[dimension_label]
+    
+    # Grupos con outliers, ordenados por cantidad de registros
+    conteos = {k[2]: len(v) for k, v in indice.items() if k[0] == flag and k[1] == dimension}
+    opciones = sorted(conteos, key=conteos.get, reverse=True)
+    
+    def etiqueta_grupo(valor):
+        if dimension == 'PERIODO':
+            nombre = f"{valor // 10}-T{valor % 10}"
+        else:
+            nombre = etiquetas[dimension].get(valor, str(valor))
+        return f"{nombre} ({conteos[valor]:,} outliers)"
+    
+    if st.session_state.get('detalle_valor') not in opciones:
+        st.session_state.pop('detalle_valor', None)
+    
+    with col3:
+        valor_grupo = st.selectbox(
+            f"{dimension_label}:", opciones, format_func=etiqueta_grupo, key='detalle_valor'
+        )
+    
+    columnas_detalle = [
+        'EMPRESA', 'DEPARTAMENTO', 'MUNICIPIO', 'SERVICIO_PAQUETE', 'ANNO', 'TRIMESTRE',
+        'CANTIDAD_LINEAS_ACCESOS', 'VALOR_FACTURADO_O_COBRADO', 'VALOR_POR_LINEA', 'ANOM_SCORE'
+    ]
+    
+    if valor_grupo is None:
+        st.info("ℹ️ No hay registros atípicos con este criterio en el período seleccionado")
+    else:
+        df_grupo = anomaly_scores.lookup_anomaly_rows(df, indice, flag, dimension, valor_grupo)
+        st.dataframe(
+            df_grupo[columnas_detalle].sort_values('ANOM_SCORE', ascending=False),
+            use_container_width=True, hide_index=True, height=350
+        )
+    
+    # Exportar todos los outliers del criterio sin recorrer el dataset completo
+    df_export = anomaly_scores.lookup_anomaly_rows(df, indice, flag)
+    csv = df_export.drop(columns=['PERIODO'], errors='ignore').to_csv(index=False).encode('utf-8')
+    st.download_button(
+        label=f"⬇️ Exportar Outliers CSV ({len(df_export):,} registros)",
+        data=csv,
+        file_name=f"outliers_{flag.lower()}.csv",
+        mime="text/csv"
     )
-    fig1.update_layout(height=500, showlegend=False)
-    st.plotly_chart(fig1, use_container_width=True)
     
     # Boxplots por servicio
     st.markdown("### 📦 Distribución de Valores por Servicio")
     
     # Filtrar valores para mejor visualización
-    df_plot = df[df['VALOR_FACTURADO_O_COBRADO'] > 0].copy()
-    df_plot = df_plot[df_plot['VALOR_FACTURADO_O_COBRADO'] < df_plot['VALOR_FACTURADO_O_COBRADO'].quantile(0.95)]
-    
-    fig2 = px.box(
-        df_plot,
-        x='SERVICIO_PAQUETE',
-        y='VALOR_FACTURADO_O_COBRADO',
-        title='Distribución de Valores Facturados (hasta P95)',
-        labels={'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado', 'SERVICIO_PAQUETE': 'Servicio'},
-        color='SERVICIO_PAQUETE'
-    )
-    fig2.update_xaxes(tickangle=45)
-    fig2.update_layout(showlegend=False, height=500)
+    fig2 = figure_cache.obtener('fig2')
+    if fig2 is None:
+        df_plot = df[df['VALOR_FACTURADO_O_COBRADO'] > 0].copy()
+        df_plot = df_plot[df_plot['VALOR_FACTURADO_O_COBRADO'] < df_plot['VALOR_FACTURADO_O_COBRADO'].quantile(0.95)]
+        fig2 = px.box(
+            df_plot,
+            x='SERVICIO_PAQUETE',
+            y='VALOR_FACTURADO_O_COBRADO',
+            title='Distribución de Valores Facturados (hasta P95)',
+            labels={'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado', 'SERVICIO_PAQUETE': 'Servicio'},
+            color='SERVICIO_PAQUETE'
+        )
+        fig2.update_xaxes(tickangle=45)
+        fig2.update_layout(showlegend=False, height=500)
+        fig2 = figure_cache.guardar('fig2', fig2)
     st.plotly_chart(fig2, use_container_width=True)
     
     # Top registros con valores extremos
@@ -222,83 +446,89 @@ def show_valores_anomalos(df):
     
     st.dataframe(top_valores, use_container_width=True, hide_index=True)
     
+    # Registros ordenados por puntaje de anomalía combinado
+    st.markdown("### 🧮 Registros con Mayor Puntaje de Anomalía")
+    
+    n_top_score = st.slider("Número de registros a mostrar:", 10, 500, 50, 10)
+    
+    top_score = df.nlargest(n_top_score, 'ANOM_SCORE')[
+        ['EMPRESA', 'DEPARTAMENTO', 'MUNICIPIO', 'SERVICIO_PAQUETE', 'CANTIDAD_LINEAS_ACCESOS',
+         'VALOR_FACTURADO_O_COBRADO', 'ANNO', 'TRIMESTRE', 'ANOM_ZSCORE_ROBUSTO', 'ANOM_ISOFOREST', 'ANOM_SCORE']
+    ]
+    
+    st.dataframe(top_score.style.format({
+        'CANTIDAD_LINEAS_ACCESOS': '{:,.0f}',
+        'VALOR_FACTURADO_O_COBRADO': '${:,.0f}',
+        'ANOM_ZSCORE_ROBUSTO': '{:+.2f}',
+        'ANOM_ISOFOREST': '{:.3f}',
+        'ANOM_SCORE': '{:.3f}'
+    }), use_container_width=True, hide_index=True, height=400)
+    
     # Scatter: Líneas vs Valor (con outliers marcados)
     st.markdown("### 📈 Identificación Visual de Outliers")
     
     df_scatter = df[(df['CANTIDAD_LINEAS_ACCESOS'] > 0) & (df['VALOR_FACTURADO_O_COBRADO'] > 0)].copy()
-    df_scatter['VALOR_POR_LINEA'] = df_scatter['VALOR_FACTURADO_O_COBRADO'] / df_scatter['CANTIDAD_LINEAS_ACCESOS']
-    
-    Q1_vpl = df_scatter['VALOR_POR_LINEA'].quantile(0.25)
-    Q3_vpl = df_scatter['VALOR_POR_LINEA'].quantile(0.75)
-    IQR_vpl = Q3_vpl - Q1_vpl
-    limite_inf_vpl = Q1_vpl - 1.5 * IQR_vpl
-    limite_sup_vpl = Q3_vpl + 1.5 * IQR_vpl
+    df_scatter['ES_OUTLIER'] = df_scatter['ANOM_IQR_VPL']
     
-    df_scatter['ES_OUTLIER'] = (
-        (df_scatter['VALOR_POR_LINEA'] < limite_inf_vpl) | 
-        (df_scatter['VALOR_POR_LINEA'] > limite_sup_vpl)
+    # Reducción de puntos conservando todos los outliers y los extremos
+    max_puntos = st.select_slider(
+        "Máximo de puntos en el gráfico:",
+        options=[2000, 5000, 10000, 20000],
+        value=downsampling.MAX_PUNTOS_SCATTER
     )
-    
-    # Muestra para visualización
-    sample_size = min(5000, len(df_scatter))
-    df_sample = df_scatter.sample(sample_size)
-    
-    fig3 = px.scatter(
-        df_sample,
-        x='CANTIDAD_LINEAS_ACCESOS',
-        y='VALOR_FACTURADO_O_COBRADO',
-        color='ES_OUTLIER',
-        title='Identificación de Outliers: Líneas vs Valor',
-        labels={
-            'CANTIDAD_LINEAS_ACCESOS': 'Cantidad de Líneas',
-            'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado',
-            'ES_OUTLIER': 'Es Outlier'
-        },
-        color_discrete_map={True: '#E63946', False: '#2E86AB'},
-        opacity=0.5
+    df_sample = downsampling.downsample_scatter(
+        df_scatter,
+        ['CANTIDAD_LINEAS_ACCESOS', 'VALOR_FACTURADO_O_COBRADO'],
+        flag='ES_OUTLIER',
+        max_points=max_puntos,
+        log=True
+    )
+    st.caption(
+        f"Mostrando {len(df_sample):,} de {len(df_scatter):,} registros "
+        f"(incluye los {int(df_sample['ES_OUTLIER'].sum()):,} outliers)"
     )
-    fig3.update_layout(height=500)
+    
+    fig3 = figure_cache.obtener('fig3', max_puntos)
+    if fig3 is None:
+        fig3 = px.scatter(
+            df_sample,
+            x='CANTIDAD_LINEAS_ACCESOS',
+            y='VALOR_FACTURADO_O_COBRADO',
+            color='ES_OUTLIER',
+            title='Identificación de Outliers: Líneas vs Valor',
+            labels={
+                'CANTIDAD_LINEAS_ACCESOS': 'Cantidad de Líneas',
+                'VALOR_FACTURADO_O_COBRADO': 'Valor Facturado',
+                'ES_OUTLIER': 'Es Outlier'
+            },
+            color_discrete_map={True: '#E63946', False: '#2E86AB'},
+            opacity=0.5
+        )
+        fig3.update_layout(height=500)
+        fig3 = figure_cache.guardar('fig3', fig3, max_puntos)
     st.plotly_chart(fig3, use_container_width=True)
     
     # Evolución temporal de outliers
     st.markdown("### 📅 Evolución Temporal de Outliers")
     
-    outliers_por_trim = []
-    for ano in df['ANNO'].unique():
-        for trim in [1, 2, 3, 4]:
-            df_periodo = df_scatter[(df_scatter['ANNO'] == ano) & (df_scatter['TRIMESTRE'] == trim)]
-            if len(df_periodo) > 0:
-                Q1 = df_periodo['VALOR_POR_LINEA'].quantile(0.25)
-                Q3 = df_periodo['VALOR_POR_LINEA'].quantile(0.75)
-                IQR = Q3 - Q1
-                limite_inf = Q1 - 1.5 * IQR
-                limite_sup = Q3 + 1.5 * IQR
-                
-                n_outliers = len(df_periodo[
-                    (df_periodo['VALOR_POR_LINEA'] < limite_inf) | 
-                    (df_periodo['VALOR_POR_LINEA'] > limite_sup)
-                ])
-                pct = (n_outliers / len(df_periodo) * 100)
-                
-                outliers_por_trim.append({
-                    'Año': ano,
-                    'Trimestre': trim,
-                    'Porcentaje': pct
-                })
-    
-    outliers_trim_df = pd.DataFrame(outliers_por_trim)
-    
-    fig4 = px.line(
-        outliers_trim_df,
-        x='Trimestre',
-        y='Porcentaje',
-        color='Año',
-        markers=True,
-        title='Evolución del Porcentaje de Outliers',
-        labels={'Porcentaje': 'Porcentaje de Outliers (%)'},
-        color_discrete_sequence=['#2E86AB', '#A23B72']
-    )
-    fig4.update_xaxes(tickvals=[1, 2, 3, 4])
+    fig4 = figure_cache.obtener('fig4')
+    if fig4 is None:
+        outliers_trim_df = (
+            df_scatter.groupby(['ANNO', 'TRIMESTRE'])['ANOM_IQR_VPL_PERIODO'].mean() * 100
+        ).reset_index()
+        outliers_trim_df.columns = ['Año', 'Trimestre', 'Porcentaje']
+        fig4 = px.line(
+            outliers_trim_df,
+            x='Trimestre',
+            y='Porcentaje',
+            color='Año',
+            markers=True,
+            title='Evolución del Porcentaje de Outliers',
+            labels={'Porcentaje': 'Porcentaje de Outliers (%)'},
+            color_discrete_sequence=['#2E86AB', '#A23B72']
+        )
+        fig4.update_xaxes(tickvals=[1, 2, 3, 4])
+        fig4 = figure_cache.guardar('fig4', fig4)
     st.plotly_chart(fig4, use_container_width=True)
     
     # Tabla resumen
@@ -324,8 +554,14 @@ def show_tecnologias_zona(df):
     with col3:
         st.metric("Regiones", df_con_tech['REGION'].nunique())
     
+    # Índices de concentración de todas las zonas (caché por versión y rango)
+    periodos = df['ANNO'] * 10 + df['TRIMESTRE']
+    concentracion = _calcular_concentracion(
+        df, data_loader.get_dataset_version(), int(periodos.min()), int(periodos.max())
+    )
+    
     # Tabs para análisis
-    tab1, tab2, tab3 = st.tabs(["🏛️ Por Departamento", "🌎 Por Región", "📊 Diversidad Tecnológica"])
+    tab1, tab2, tab3 = st.tabs(["🏛️ Por Departamento", "🌎 Por Región", "📊 Diversidad y Concentración"])
     
     with tab1:
         st.markdown("### Top 5 Tecnologías por Departamento")
@@ -337,189 +573,237 @@ def show_tecnologias_zona(df):
             top_10_deptos
         )
         
-        df_depto = df_con_tech[df_con_tech['DEPARTAMENTO'] == depto_seleccionado]
+        fig1 = figure_cache.obtener('fig1', depto_seleccionado)
+        fig2 = figure_cache.obtener('fig2', depto_seleccionado)
+        if fig1 is None or fig2 is None:
+            df_depto = df_con_tech[df_con_tech['DEPARTAMENTO'] == depto_seleccionado]
         
         col1, col2 = st.columns(2)
         
         with col1:
             # Top tecnologías en el departamento
-            top_tech_depto = df_depto['TECNOLOGIA'].value_counts().head(5)
-            fig1 = px.pie(
-                values=top_tech_depto.values,
-                names=top_tech_depto.index,
-                title=f'Top 5 Tecnologías en {depto_seleccionado}',
-                color_discrete_sequence=px.colors.qualitative.Set3
-            )
-            fig1.update_traces(textposition='inside', textinfo='percent+label')
+            if fig1 is None:
+                top_tech_depto = df_depto['TECNOLOGIA'].value_counts().head(5)
+                fig1 = px.pie(
+                    values=top_tech_depto.values,
+                    names=top_tech_depto.index,
+                    title=f'Top 5 Tecnologías en {depto_seleccionado}',
+                    color_discrete_sequence=px.colors.qualitative.Set3
+                )
+                fig1.update_traces(textposition='inside', textinfo='percent+label')
+                fig1 = figure_cache.guardar('fig1', fig1, depto_seleccionado)
             st.plotly_chart(fig1, use_container_width=True)
         
         with col2:
             # Comparación con nacional
-            tech_nacional = df_con_tech['TECNOLOGIA'].value_counts(normalize=True).head(5) * 100
-            tech_depto_pct = df_depto['TECNOLOGIA'].value_counts(normalize=True).head(5) * 100
-            
-            # Combinar datos
-            comp_data = pd.DataFrame({
-                'Nacional': tech_nacional,
-                depto_seleccionado: tech_depto_pct
-            }).fillna(0)
-            
-            fig2 = go.Figure()
-            fig2.add_trace(go.Bar(
-                name='Nacional',
-                x=comp_data.index,
-                y=comp_data['Nacional'],
-                marker_color='#2E86AB'
-            ))
-            fig2.add_trace(go.Bar(
-                name=depto_seleccionado,
-                x=comp_data.index,
-                y=comp_data[depto_seleccionado],
-                marker_color='#A23B72'
-            ))
-            fig2.update_layout(
-                title='Comparación con Promedio Nacional',
-                barmode='group',
-                xaxis_tickangle=45
-            )
+            if fig2 is None:
+                tech_nacional = df_con_tech['TECNOLOGIA'].value_counts(normalize=True).head(5) * 100
+                tech_depto_pct = df_depto['TECNOLOGIA'].value_counts(normalize=True).head(5) * 100
+                
+                # Combinar datos
+                comp_data = pd.DataFrame({
+                    'Nacional': tech_nacional,
+                    depto_seleccionado: tech_depto_pct
+                }).fillna(0)
+                fig2 = go.Figure()
+                fig2.add_trace(go.Bar(
+                    name='Nacional',
+                    x=comp_data.index,
+                    y=comp_data['Nacional'],
+                    marker_color='#2E86AB'
+                ))
+                fig2.add_trace(go.Bar(
+                    name=depto_seleccionado,
+                    x=comp_data.index,
+                    y=comp_data[depto_seleccionado],
+                    marker_color='#A23B72'
+                ))
+                fig2.update_layout(
+                    title='Comparación con Promedio Nacional',
+                    barmode='group',
+                    xaxis_tickangle=45
+                )
+                fig2 = figure_cache.guardar('fig2', fig2, depto_seleccionado)
             st.plotly_chart(fig2, use_container_width=True)
         
         # Heatmap Top 10 departamentos vs Top 5 tecnologías
         st.markdown("### 🔥 Heatmap: Departamentos vs Tecnologías")
         
-        top_5_tech = df_con_tech['TECNOLOGIA'].value_counts().head(5).index.tolist()
-        heatmap_data = pd.crosstab(
-            df_con_tech[df_con_tech['DEPARTAMENTO'].isin(top_10_deptos)]['DEPARTAMENTO'],
-            df_con_tech[df_con_tech['DEPARTAMENTO'].isin(top_10_deptos)]['TECNOLOGIA']
-        )
-        heatmap_data = heatmap_data[top_5_tech]
-        heatmap_data_norm = heatmap_data.div(heatmap_data.sum(axis=1), axis=0) * 100
-        
-        fig3 = px.imshow(
-            heatmap_data_norm,
-            labels=dict(x="Tecnología", y="Departamento", color="Porcentaje (%)"),
-            title="Distribución Tecnológica por Departamento",
-            color_continuous_scale='YlOrRd',
-            aspect='auto'
-        )
+        fig3 = figure_cache.obtener('fig3')
+        if fig3 is None:
+            top_5_tech = df_con_tech['TECNOLOGIA'].value_counts().head(5).index.tolist()
+            heatmap_data = pd.crosstab(
+                df_con_tech[df_con_tech['DEPARTAMENTO'].isin(top_10_deptos)]['DEPARTAMENTO'],
+                df_con_tech[df_con_tech['DEPARTAMENTO'].isin(top_10_deptos)]['TECNOLOGIA']
+            )
+            heatmap_data = heatmap_data[top_5_tech]
+            heatmap_data_norm = heatmap_data.div(heatmap_data.sum(axis=1), axis=0) * 100
+            fig3 = px.imshow(
+                heatmap_data_norm,
+                labels=dict(x="Tecnología", y="Departamento", color="Porcentaje (%)"),
+                title="Distribución Tecnológica por Departamento",
+                color_continuous_scale='YlOrRd',
+                aspect='auto'
+            )
+            fig3 = figure_cache.guardar('fig3', fig3)
         st.plotly_chart(fig3, use_container_width=True)
     
     with tab2:
         st.markdown("### Análisis por Región")
         
+        tech_region = concentracion[('tecnologia', 'region')]
+        
         # Top 3 tecnologías por región
         col1, col2 = st.columns(2)
         
         with col1:
             # Distribución de registros por región
-            region_counts = df_con_tech['REGION'].value_counts()
-            fig4 = px.pie(
-                values=region_counts.values,
-                names=region_counts.index,
-                title='Distribución de Registros por Región',
-                color_discrete_sequence=px.colors.qualitative.Set2
-            )
+            fig4 = figure_cache.obtener('fig4')
+            if fig4 is None:
+                region_counts = tech_region['resumen'].set_index('REGION')['N_REGISTROS'].sort_values(ascending=False)
+                fig4 = px.pie(
+                    values=region_counts.values,
+                    names=region_counts.index,
+                    title='Distribución de Registros por Región',
+                    color_discrete_sequence=px.colors.qualitative.Set2
+                )
+                fig4 = figure_cache.guardar('fig4', fig4)
             st.plotly_chart(fig4, use_container_width=True)
         
         with col2:
             # Top tecnología por región
-            top_tech_por_region = df_con_tech.groupby('REGION')['TECNOLOGIA'].agg(
-                lambda x: x.value_counts().index[0] if len(x) > 0 else 'N/A'
-            )
-            
-            fig5 = px.bar(
-                x=top_tech_por_region.index,
-                y=[1]*len(top_tech_por_region),
-                text=top_tech_por_region.values,
-                title='Tecnología Principal por Región',
-                labels={'x': 'Región', 'y': ''}
-            )
-            fig5.update_traces(textposition='inside')
-            fig5.update_yaxes(showticklabels=False)
+            fig5 = figure_cache.obtener('fig5')
+            if fig5 is None:
+                top_tech_por_region = tech_region['resumen'].set_index('REGION')['LIDER']
+                fig5 = px.bar(
+                    x=top_tech_por_region.index,
+                    y=[1]*len(top_tech_por_region),
+                    text=top_tech_por_region.values,
+                    title='Tecnología Principal por Región (por líneas)',
+                    labels={'x': 'Región', 'y': ''}
+                )
+                fig5.update_traces(textposition='inside')
+                fig5.update_yaxes(showticklabels=False)
+                fig5 = figure_cache.guardar('fig5', fig5)
             st.plotly_chart(fig5, use_container_width=True)
         
         # Top 3 por región - barras agrupadas
         st.markdown("#### Top 3 Tecnologías por Región")
         
-        top_tech_region_data = []
-        for region in df_con_tech['REGION'].unique():
-            df_region = df_con_tech[df_con_tech['REGION'] == region]
-            top_3 = df_region['TECNOLOGIA'].value_counts().head(3)
-            for tech, count in top_3.items():
-                pct = (count / len(df_region) * 100)
-                top_tech_region_data.append({
-                    'Región': region,
-                    'Tecnología': tech,
-                    'Porcentaje': pct
-                })
-        
-        top_tech_region_df = pd.DataFrame(top_tech_region_data)
-        
-        fig6 = px.bar(
-            top_tech_region_df,
-            x='Porcentaje',
-            y='Región',
-            color='Tecnología',
-            orientation='h',
-            title='Top 3 Tecnologías por Región',
-            barmode='group'
-        )
-        fig6.update_layout(height=500)
+        fig6 = figure_cache.obtener('fig6')
+        if fig6 is None:
+            top_tech_region_df = tech_region['participaciones']
+            top_tech_region_df = top_tech_region_df[top_tech_region_df['RANKING'] <= 3].copy()
+            top_tech_region_df['Porcentaje'] = top_tech_region_df['PARTICIPACION'] * 100
+            top_tech_region_df = top_tech_region_df.rename(columns={'REGION': 'Región', 'CATEGORIA': 'Tecnología'})
+            fig6 = px.bar(
+                top_tech_region_df,
+                x='Porcentaje',
+                y='Región',
+                color='Tecnología',
+                orientation='h',
+                title='Top 3 Tecnologías por Región (% de líneas)',
+                barmode='group'
+            )
+            fig6.update_layout(height=500)
+            fig6 = figure_cache.guardar('fig6', fig6)
         st.plotly_chart(fig6, use_container_width=True)
     
     with tab3:
-        st.markdown("### Diversidad Tecnológica")
+        st.markdown("### Diversidad y Concentración")
+        
+        st.info(f"💡 HHI (0 - 10.000) sobre la participación en líneas: menos de {HHI_MODERADO:,} "
+                f"es poco concentrado, entre {HHI_MODERADO:,} y {HHI_ALTO:,} moderado y más de "
+                f"{HHI_ALTO:,} altamente concentrado. La entropía normalizada va de 0 (una sola "
+                "categoría) a 1 (participaciones iguales).")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            nivel_label = st.selectbox("Nivel geográfico:", list(NIVELES_CONCENTRACION_UI.keys()))
+            nivel = NIVELES_CONCENTRACION_UI[nivel_label]
+        
+        with col2:
+            dimension_label = st.selectbox("Concentración de:", list(DIMENSIONES_CONCENTRACION_UI.keys()))
+            dimension = DIMENSIONES_CONCENTRACION_UI[dimension_label]
         
-        # Diversidad por departamento
-        diversidad = df_con_tech.groupby('DEPARTAMENTO')['TECNOLOGIA'].nunique().sort_values(ascending=False)
+        with col3:
+            indicador_label = st.selectbox("Indicador:", list(INDICADORES_CONCENTRACION.keys()))
+            indicador = INDICADORES_CONCENTRACION[indicador_label]
+        
+        resumen = concentracion[(dimension, nivel)]['resumen'].copy()
+        nombre_zona = {'departamento': 'DEPARTAMENTO', 'region': 'REGION', 'municipio': 'MUNICIPIO'}[nivel]
+        if nivel == 'municipio':
+            resumen['ZONA'] = resumen['MUNICIPIO'] + ' (' + resumen['DEPARTAMENTO'].str[:15] + ')'
+        else:
+            resumen['ZONA'] = resumen[nombre_zona]
         
         col1, col2 = st.columns(2)
         
         with col1:
-            # Top 15 departamentos con mayor diversidad
-            top_15_div = diversidad.head(15)
-            fig7 = px.bar(
-                x=top_15_div.values,
-                y=top_15_div.index,
-                orientation='h',
-                title='Top 15 Departamentos - Diversidad Tecnológica',
-                labels={'x': 'Número de Tecnologías Diferentes', 'y': 'Departamento'},
-                color=top_15_div.values,
-                color_continuous_scale='Viridis'
-            )
-            fig7.update_layout(showlegend=False, height=600)
+            # Top 15 zonas según el indicador
+            fig7 = figure_cache.obtener('fig7', nivel, dimension, indicador)
+            if fig7 is None:
+                top_15 = resumen.nlargest(15, indicador)
+                fig7 = px.bar(
+                    top_15,
+                    x=indicador,
+                    y='ZONA',
+                    orientation='h',
+                    title=f'Top 15 - {indicador_label} de {dimension_label}',
+                    labels={indicador: indicador_label, 'ZONA': nivel_label},
+                    color=indicador,
+                    color_continuous_scale='Viridis',
+                    hover_data=['LIDER', 'PARTICIPACION_LIDER']
+                )
+                fig7.update_layout(showlegend=False, height=600, yaxis={'categoryorder': 'total ascending'})
+                fig7 = figure_cache.guardar('fig7', fig7, nivel, dimension, indicador)
             st.plotly_chart(fig7, use_container_width=True)
         
         with col2:
-            # Correlación: registros vs diversidad
-            div_registros = df_con_tech.groupby('DEPARTAMENTO').agg({
-                'TECNOLOGIA': 'nunique',
-                'MUNICIPIO': 'size'
-            }).reset_index()
-            div_registros.columns = ['Departamento', 'N_Tecnologias', 'N_Registros']
-            
-            fig8 = px.scatter(
-                div_registros,
-                x='N_Registros',
-                y='N_Tecnologias',
-                hover_data=['Departamento'],
-                title='Registros vs Diversidad Tecnológica',
-                labels={
-                    'N_Registros': 'Número de Registros',
-                    'N_Tecnologias': 'Número de Tecnologías'
-                },
-                trendline='ols'
-            )
-            fig8.update_layout(height=600)
+            # Volumen vs concentración
+            fig8 = figure_cache.obtener('fig8', nivel, dimension)
+            if fig8 is None:
+                fig8 = px.scatter(
+                    resumen,
+                    x='TOTAL_LINEAS',
+                    y='HHI',
+                    color='ENTROPIA_NORM',
+                    hover_data=['ZONA', 'N_CATEGORIAS', 'LIDER', 'PARTICIPACION_LIDER'],
+                    title=f'Volumen vs Concentración de {dimension_label}',
+                    labels={
+                        'TOTAL_LINEAS': 'Total de Líneas',
+                        'HHI': 'HHI',
+                        'ENTROPIA_NORM': 'Entropía Norm.'
+                    },
+                    log_x=True,
+                    color_continuous_scale='Viridis'
+                )
+                fig8.add_hline(y=HHI_MODERADO, line_dash="dash", line_color="orange")
+                fig8.add_hline(y=HHI_ALTO, line_dash="dash", line_color="red")
+                fig8.update_layout(height=600)
+                fig8 = figure_cache.guardar('fig8', fig8, nivel, dimension)
             st.plotly_chart(fig8, use_container_width=True)
         
-        # Tabla de diversidad
-        with st.expander("📋 Ver Ranking Completo de Diversidad"):
-            div_completa = df_con_tech.groupby('DEPARTAMENTO').agg({
-                'TECNOLOGIA': 'nunique',
-                'MUNICIPIO': 'nunique',
-                'CANTIDAD_LINEAS_ACCESOS': 'sum'
-            }).reset_index()
-            div_completa.columns = ['Departamento', 'N° Tecnologías', 'N° Municipios', 'Total Líneas']
-            div_completa = div_completa.sort_values('N° Tecnologías', ascending=False)
-            st.dataframe(div_completa, use_container_width=True, hide_index=True, height=400)
\ No newline at end of file
+        # Tabla de concentración (con IDs para cruzar con mapas)
+        with st.expander("📋 Ver Ranking Completo de Concentración"):
+            columnas = NIVELES_CONCENTRACION[nivel] + [
+                'TOTAL_LINEAS', 'N_CATEGORIAS', 'HHI', 'ENTROPIA_NORM', 'TOP_K', 'LIDER', 'PARTICIPACION_LIDER'
+            ]
+            tabla = resumen[columnas].sort_values('HHI', ascending=False)
+            st.dataframe(tabla.rename(columns={
+                'TOTAL_LINEAS': 'Total Líneas',
+                'N_CATEGORIAS': 'N° Categorías',
+                'ENTROPIA_NORM': 'Entropía Norm.',
+                'TOP_K': 'Top 3 (%)',
+                'LIDER': 'Líder',
+                'PARTICIPACION_LIDER': 'Participación Líder (%)'
+            }), use_container_width=True, hide_index=True, height=400)
+            
+            csv = tabla.to_csv(index=False).encode('utf-8')
+            st.download_button(
+                label="⬇️ Descargar Concentración CSV",
+                data=csv,
+                file_name=f"concentracion_{dimension}_{nivel}.csv",
+                mime="text/csv"
+            )
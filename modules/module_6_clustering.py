@@ -1,45 +1,71 @@
 """
 Módulo 6: Análisis de Clustering con Machine Learning
 """
+import os
+import time
+import tracemalloc
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
 from sklearn.metrics import silhouette_score, calinski_harabasz_score, davies_bouldin_score
+from threadpoolctl import threadpool_limits
+from utils import data_loader, result_cache, model_registry, streaming_clustering, clustering_engines
+from utils import background_jobs, figure_cache, lazy_tabs
+from utils.downsampling import downsample_scatter
 
-def preparar_datos_clustering(df):
-    """Prepara los datos para clustering"""
-    
-    # Agregar características de agregación por operador-tecnología-servicio
-    df_agg = df.groupby(['EMPRESA', 'TECNOLOGIA', 'SERVICIO_PAQUETE']).agg({
-        'CANTIDAD_LINEAS_ACCESOS': 'sum',
-        'VALOR_FACTURADO_O_COBRADO': 'sum',
-        'VELOCIDAD_EFECTIVA_DOWNSTREAM': 'mean',
-        'VELOCIDAD_EFECTIVA_UPSTREAM': 'mean',
-        'DEPARTAMENTO': 'nunique',  # Cobertura geográfica (conteo)
-        'MUNICIPIO': 'nunique'       # Cobertura geográfica (conteo)
-    }).reset_index()
-    
-    # Renombrar para claridad
-    df_agg.rename(columns={
-        'DEPARTAMENTO': 'N_DEPARTAMENTOS',
-        'MUNICIPIO': 'N_MUNICIPIOS'
-    }, inplace=True)
-    
-    # Calcular métricas derivadas
-    df_agg['VALOR_POR_LINEA'] = df_agg['VALOR_FACTURADO_O_COBRADO'] / df_agg['CANTIDAD_LINEAS_ACCESOS']
-    df_agg['RATIO_VELOCIDAD'] = df_agg['VELOCIDAD_EFECTIVA_DOWNSTREAM'] / (df_agg['VELOCIDAD_EFECTIVA_UPSTREAM'] + 1)
-    
-    # Reemplazar valores infinitos
-    df_agg.replace([np.inf, -np.inf], np.nan, inplace=True)
-    df_agg.fillna(0, inplace=True)
-    
-    return df_agg
+# Semilla de todos los ajustes (forma parte de la clave de caché)
+RANDOM_STATE = 42
+
+# A partir de este número de filas se usa MiniBatch K-means y silhouette muestreado
+UMBRAL_MODO_ESCALABLE = 10000
+
+# Silhouette aproximado: tamaño de cada muestra y número de repeticiones
+MUESTRA_SILHOUETTE = 2000
+REPETICIONES_SILHOUETTE = 5
+
+# Barrido incremental: se detiene si la inercia baja menos de esta fracción y el
+# silhouette no mejora durante PACIENCIA_MESETA valores de k seguidos
+TOLERANCIA_MESETA = 0.02
+PACIENCIA_MESETA = 2
+
+# Barrido incremental: clusters de mayor SSE que se prueban a dividir en cada k,
+# además de una inicialización k-means++ independiente
+CANDIDATOS_DIVISION = 2
+
+# A partir de este número de filas (o a nivel registro) el ajuste se hace por bloques con
+# partial_fit y el barrido de k se evalúa sobre una muestra de MUESTRA_BARRIDO filas
+UMBRAL_POR_BLOQUES = 200000
+MUESTRA_BARRIDO = 50000
+
+# Estabilidad por bootstrap: remuestreos por defecto, filas analizadas como máximo y
+# filas de la matriz de co-asignación que se grafican
+REPETICIONES_BOOTSTRAP = 20
+MUESTRA_ESTABILIDAD = 5000
+MUESTRA_CONSENSO = 500
+
+# Umbrales usuales del Jaccard medio por cluster (Hennig, 2007)
+JACCARD_ESTABLE = 0.75
+JACCARD_DISUELTO = 0.5
+
+# Trabajos en segundo plano: ejecutados a la vez y segundos entre refrescos del progreso
+TRABAJOS_SIMULTANEOS = 2
+INTERVALO_PROGRESO = 1.0
+
+# Tamaños de muestra evaluados en la comparación de algoritmos
+TAMANOS_COMPARACION = [1000, 5000, 20000, 50000]
+
+def preparar_datos_clustering(df, granularidad='operador_tecnologia_servicio'):
+    """Prepara los datos para clustering al nivel de agregación indicado"""
+    return streaming_clustering.preparar_granularidad(df, granularidad)
 
 def show_configuracion_exploración(df):
     """6.1 Configuración y exploración de datos para clustering"""
@@ -50,17 +76,27 @@ def show_configuracion_exploración(df):
     
     El clustering permite identificar **grupos naturales** de operadores con características similares
     en términos de tecnología, servicios ofrecidos, cobertura y valores facturados.
+    También puede agruparse por municipio, por operador en cada municipio o registro a registro.
     """)
     
+    granularidades = streaming_clustering.GRANULARIDADES
+    granularidad = st.selectbox(
+        "Nivel de agregación:",
+        list(granularidades.keys()),
+        format_func=lambda g: granularidades[g]['nombre'],
+        help="A nivel de registro individual el ajuste se hace por bloques (partial_fit), "
+             "sin construir la matriz escalada completa."
+    )
+    
     # Preparar datos
     with st.spinner("Preparando datos para clustering..."):
-        df_cluster = preparar_datos_clustering(df)
+        df_cluster = preparar_datos_clustering(df, granularidad)
     
     # Información del dataset preparado
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Registros Agregados", f"{len(df_cluster):,}")
+        st.metric("Unidades a Agrupar", f"{len(df_cluster):,}")
     
     with col2:
         st.metric("Operadores Únicos", df['EMPRESA'].nunique())
@@ -79,22 +115,14 @@ def show_configuracion_exploración(df):
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        variables_disponibles = [
-            'CANTIDAD_LINEAS_ACCESOS',
-            'VALOR_FACTURADO_O_COBRADO',
-            'VELOCIDAD_EFECTIVA_DOWNSTREAM',
-            'VELOCIDAD_EFECTIVA_UPSTREAM',
-            'N_DEPARTAMENTOS',  # Número de departamentos (cobertura)
-            'N_MUNICIPIOS',     # Número de municipios (cobertura)
-            'VALOR_POR_LINEA',
-            'RATIO_VELOCIDAD'
-        ]
+        # Volumen, valor y velocidad, más los conteos de cobertura del nivel elegido
+        variables_disponibles = streaming_clustering.variables_granularidad(granularidad)
         
         variables_seleccionadas = st.multiselect(
             "Seleccione las variables para el análisis:",
             variables_disponibles,
             default=['CANTIDAD_LINEAS_ACCESOS', 'VALOR_FACTURADO_O_COBRADO', 
-                     'VELOCIDAD_EFECTIVA_DOWNSTREAM', 'N_DEPARTAMENTOS']
+                     'VELOCIDAD_EFECTIVA_DOWNSTREAM', variables_disponibles[4]]
         )
     
     with col2:
@@ -123,6 +151,8 @@ def show_configuracion_exploración(df):
         **Variables de Cobertura (agregadas):**
         - `N_DEPARTAMENTOS`: Número de departamentos donde opera (diversificación geográfica)
         - `N_MUNICIPIOS`: Número de municipios donde opera (alcance territorial)
+        - `N_OPERADORES`: Número de operadores presentes en el municipio (competencia)
+        - `N_TECNOLOGIAS` / `N_SERVICIOS`: Tecnologías y servicios distintos ofrecidos
         
         **Variables Derivadas:**
         - `VALOR_POR_LINEA`: Ingreso promedio por línea (rentabilidad)
@@ -136,6 +166,14 @@ def show_configuracion_exploración(df):
     
     st.session_state.cluster_config['variables'] = variables_seleccionadas
     st.session_state.cluster_config['df_cluster'] = df_cluster
+    st.session_state.cluster_config['granularidad'] = granularidad
+    st.session_state.cluster_config['columnas_id'] = granularidades[granularidad]['claves']
+    
+    # Datos de origen de df_cluster: las claves de caché de 6.2 se construyen con estos
+    # valores y no con el filtro de periodo vigente
+    periodos = df['ANNO'] * 10 + df['TRIMESTRE']
+    st.session_state.cluster_config['periodos_datos'] = (int(periodos.min()), int(periodos.max()))
+    st.session_state.cluster_config['version_datos'] = data_loader.get_dataset_version()
     
     # Estadísticas de las variables seleccionadas
     st.markdown("### 📈 Estadísticas de Variables Seleccionadas")
@@ -148,78 +186,572 @@ def show_configuracion_exploración(df):
     # Distribuciones
     st.markdown("### 📊 Distribución de Variables")
     
-    n_vars = len(variables_seleccionadas)
-    n_cols = min(2, n_vars)
-    n_rows = (n_vars + 1) // 2
-    
-    fig = make_subplots(
-        rows=n_rows,
-        cols=n_cols,
-        subplot_titles=variables_seleccionadas
-    )
-    
-    for idx, var in enumerate(variables_seleccionadas):
-        row = idx // 2 + 1
-        col = idx % 2 + 1
+    # A nivel registro los histogramas usan una muestra para no enviar millones de puntos
+    fig = figure_cache.obtener('fig', granularidad, variables_seleccionadas)
+    if fig is None:
+        df_muestra = df_cluster
+        if len(df_cluster) > MUESTRA_BARRIDO:
+            df_muestra = df_cluster.sample(MUESTRA_BARRIDO, random_state=RANDOM_STATE)
         
-        fig.add_trace(
-            go.Histogram(x=df_cluster[var], name=var, showlegend=False),
-            row=row,
-            col=col
+        n_vars = len(variables_seleccionadas)
+        n_cols = min(2, n_vars)
+        n_rows = (n_vars + 1) // 2
+        
+        fig = make_subplots(
+            rows=n_rows,
+            cols=n_cols,
+            subplot_titles=variables_seleccionadas
         )
-    
-    fig.update_layout(height=300 * n_rows, title_text="Distribuciones de Variables")
+        
+        for idx, var in enumerate(variables_seleccionadas):
+            row = idx // 2 + 1
+            col = idx % 2 + 1
+            
+            fig.add_trace(
+                go.Histogram(x=df_muestra[var], name=var, showlegend=False),
+                row=row,
+                col=col
+            )
+        
+        fig.update_layout(height=300 * n_rows, title_text="Distribuciones de Variables")
+        fig = figure_cache.guardar('fig', fig, granularidad, variables_seleccionadas)
     st.plotly_chart(fig, use_container_width=True)
     
     # Matriz de correlación
     st.markdown("### 🔗 Matriz de Correlación")
     
-    corr_matrix = df_cluster[variables_seleccionadas].corr()
-    
-    fig_corr = go.Figure(data=go.Heatmap(
-        z=corr_matrix.values,
-        x=corr_matrix.columns,
-        y=corr_matrix.columns,
-        colorscale='RdBu',
-        zmid=0,
-        text=corr_matrix.values.round(2),
-        texttemplate='%{text}',
-        textfont={"size": 10}
-    ))
-    
-    fig_corr.update_layout(
-        title="Matriz de Correlación de Variables",
-        height=500
-    )
-    
+    fig_corr = figure_cache.obtener('fig_corr', granularidad, variables_seleccionadas)
+    if fig_corr is None:
+        corr_matrix = df_cluster[variables_seleccionadas].corr()
+        
+        fig_corr = go.Figure(data=go.Heatmap(
+            z=corr_matrix.values,
+            x=corr_matrix.columns,
+            y=corr_matrix.columns,
+            colorscale='RdBu',
+            zmid=0,
+            text=corr_matrix.values.round(2),
+            texttemplate='%{text}',
+            textfont={"size": 10}
+        ))
+        
+        fig_corr.update_layout(
+            title="Matriz de Correlación de Variables",
+            height=500
+        )
+        fig_corr = figure_cache.guardar('fig_corr', fig_corr, granularidad, variables_seleccionadas)
     st.plotly_chart(fig_corr, use_container_width=True)
 
-def calcular_elbow_silhouette(X, max_k=10):
-    """Calcula métricas para método del codo y silhouette"""
-    inertias = []
-    silhouettes = []
-    calinski = []
-    davies = []
+def usar_modo_escalable(n_filas):
+    """Indica si el volumen de datos requiere el modo escalable"""
+    return n_filas > UMBRAL_MODO_ESCALABLE
+
+def crear_kmeans(k, escalable=False):
+    """K-means completo (n_init=10) o MiniBatch K-means para datos grandes"""
+    motor = 'minibatch_kmeans' if escalable else 'kmeans'
+    return clustering_engines.crear_motor(motor, k, random_state=RANDOM_STATE)
+
+def calcular_silhouette(X, labels, escalable=False):
+    """
+    Silhouette exacto, o promedio de varias muestras en modo escalable.
+    
+    Returns:
+        tuple: (silhouette, error, tiempo_ahorrado_s). En modo escalable el error es
+               la desviación estándar entre muestras y el tiempo ahorrado se estima
+               extrapolando cuadráticamente el tiempo de una muestra a n filas.
+    """
+    if not escalable or len(X) <= MUESTRA_SILHOUETTE:
+        return silhouette_score(X, labels), 0.0, 0.0
+    
+    inicio = time.perf_counter()
+    valores = [
+        silhouette_score(X, labels, sample_size=MUESTRA_SILHOUETTE, random_state=semilla)
+        for semilla in range(REPETICIONES_SILHOUETTE)
+    ]
+    tiempo = time.perf_counter() - inicio
+    
+    tiempo_exacto = tiempo / REPETICIONES_SILHOUETTE * (len(X) / MUESTRA_SILHOUETTE) ** 2
+    
+    return float(np.mean(valores)), float(np.std(valores, ddof=1)), max(tiempo_exacto - tiempo, 0.0)
+
+def _metricas_k(X, kmeans, labels, escalable):
+    """Métricas de evaluación de un ajuste de K-means"""
+    silhouette, error, ahorro = calcular_silhouette(X, labels, escalable)
     
+    return {
+        'inertia': kmeans.inertia_,
+        'silhouette': silhouette,
+        'silhouette_error': error,
+        'tiempo_ahorrado': ahorro,
+        'calinski': calinski_harabasz_score(X, labels),
+        'davies': davies_bouldin_score(X, labels)
+    }
+
+def _resultado_barrido(resultados, escalable, **extra):
+    """Convierte las métricas por k en el diccionario de listas usado por la interfaz"""
+    K_evaluados = sorted(resultados)
+    
+    resultado = {'K': K_evaluados}
+    for metrica in ['inertia', 'silhouette', 'silhouette_error', 'calinski', 'davies']:
+        resultado[metrica] = [resultados[k][metrica] for k in K_evaluados]
+    resultado['escalable'] = escalable
+    resultado['tiempo_ahorrado'] = sum(resultados[k]['tiempo_ahorrado'] for k in K_evaluados)
+    resultado.update(extra)
+    
+    return resultado
+
+def _evaluar_k(X, k, escalable=False):
+    """Ajusta KMeans para un valor de k y calcula sus métricas (se ejecuta en un proceso del pool)"""
+    # Un hilo por proceso: el paralelismo lo da el pool, no OpenMP/BLAS
+    with threadpool_limits(limits=1):
+        kmeans = crear_kmeans(k, escalable)
+        labels = kmeans.fit_predict(X)
+        return _metricas_k(X, kmeans, labels, escalable)
+
+def calcular_elbow_silhouette(X, max_k=10, n_workers=None, on_progress=None, escalable=None, on_result=None):
+    """
+    Calcula métricas para método del codo y silhouette.
+    
+    Cada k se evalúa en un proceso distinto y los resultados se reciben a
+    medida que terminan; on_result(k, metricas) y on_progress(completados, total, k)
+    se llaman con cada uno. Con escalable=None el modo se elige según el número de filas.
+    """
     K_range = range(2, max_k + 1)
+    if escalable is None:
+        escalable = usar_modo_escalable(len(X))
+    if n_workers is None:
+        n_workers = min(len(K_range), os.cpu_count() or 1)
+    
+    resultados = {}
+    
+    def registrar(k, metricas):
+        resultados[k] = metricas
+        if on_result is not None:
+            on_result(k, metricas)
+        if on_progress is not None:
+            on_progress(len(resultados), len(K_range), k)
+    
+    if n_workers > 1:
+        try:
+            contexto = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=contexto) as pool:
+                futuros = {pool.submit(_evaluar_k, X, k, escalable): k for k in K_range}
+                try:
+                    for futuro in as_completed(futuros):
+                        registrar(futuros[futuro], futuro.result())
+                except BaseException:
+                    # Cancelación desde on_progress: no se esperan los k que no empezaron
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+        except (OSError, BrokenProcessPool):
+            # Entornos sin soporte para procesos: se completa de forma secuencial
+            pass
     
     for k in K_range:
-        kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-        labels = kmeans.fit_predict(X)
+        if k not in resultados:
+            registrar(k, _evaluar_k(X, k, escalable))
+    
+    return _resultado_barrido(resultados, escalable)
+
+def _dividir_cluster(X, labels, centroides, posicion=0):
+    """
+    Centroides iniciales para k+1: divide en dos, a lo largo de su componente
+    principal, el cluster que ocupa la posición indicada al ordenar por SSE
+    (0 = el de mayor SSE).
+    """
+    sse = np.bincount(labels, weights=((X - centroides[labels]) ** 2).sum(axis=1), minlength=len(centroides))
+    peor = int(np.argsort(sse)[::-1][posicion])
+    miembros = X[labels == peor]
+    
+    if len(miembros) < 2:
+        direccion = np.zeros(X.shape[1])
+        direccion[0] = 1e-3
+    else:
+        centrados = miembros - centroides[peor]
+        _, valores_s, vt = np.linalg.svd(centrados, full_matrices=False)
+        direccion = vt[0] * valores_s[0] / np.sqrt(len(miembros))
+    
+    nuevos = centroides.copy()
+    nuevos[peor] = centroides[peor] - direccion
+    return np.vstack([nuevos, centroides[peor] + direccion])
+
+def _refinar(X, k, init, escalable):
+    """Un único ajuste de K-means (n_init=1) desde la inicialización dada"""
+    if escalable:
+        modelo = MiniBatchKMeans(n_clusters=k, init=init, n_init=1,
+                                 random_state=RANDOM_STATE, batch_size=4096)
+    else:
+        modelo = KMeans(n_clusters=k, init=init, n_init=1, random_state=RANDOM_STATE)
+    return modelo.fit(X)
+
+def calcular_barrido_incremental(X, max_k=10, on_progress=None, escalable=None, on_result=None):
+    """
+    Barrido de k con warm start: la solución de k+1 parte de la de k. Se refinan
+    con un único ajuste (n_init=1) varios candidatos, la división de cada uno de
+    los CANDIDATOS_DIVISION clusters de mayor SSE y una inicialización k-means++,
+    y se conserva el de menor inercia, para no arrastrar una mala división.
+    
+    Se detiene antes de max_k cuando la inercia deja de bajar de forma
+    apreciable y el silhouette no mejora (meseta). Devuelve el mismo formato
+    que calcular_elbow_silhouette, con 'detenido_en' si hubo parada temprana.
+    """
+    if escalable is None:
+        escalable = usar_modo_escalable(len(X))
+    
+    K_range = range(2, max_k + 1)
+    resultados = {}
+    detenido_en = None
+    sin_mejora = 0
+    
+    for k in K_range:
+        if k == 2:
+            kmeans = crear_kmeans(k, escalable).fit(X)
+        else:
+            iniciales = [
+                _dividir_cluster(X, labels, kmeans.cluster_centers_, posicion)
+                for posicion in range(min(CANDIDATOS_DIVISION, k - 1))
+            ] + ['k-means++']
+            kmeans = min((_refinar(X, k, init, escalable) for init in iniciales),
+                         key=lambda modelo: modelo.inertia_)
+        labels = kmeans.labels_
+        
+        resultados[k] = _metricas_k(X, kmeans, labels, escalable)
+        if on_result is not None:
+            on_result(k, resultados[k])
+        if on_progress is not None:
+            on_progress(len(resultados), len(K_range), k)
+        
+        # Detección de meseta
+        if k > 2:
+            anterior = resultados[k - 1]
+            caida = (anterior['inertia'] - kmeans.inertia_) / anterior['inertia'] if anterior['inertia'] > 0 else 0
+            mejor_silhouette = max(r['silhouette'] for kk, r in resultados.items() if kk < k)
+            if caida < TOLERANCIA_MESETA and resultados[k]['silhouette'] <= mejor_silhouette:
+                sin_mejora += 1
+            else:
+                sin_mejora = 0
+            
+            if sin_mejora >= PACIENCIA_MESETA and k < max_k:
+                detenido_en = k
+                break
+    
+    return _resultado_barrido(resultados, escalable, detenido_en=detenido_en)
+
+def ajustar_pca(X):
+    """
+    Ajusta una sola PCA de 3 componentes para las vistas 2D y 3D (la 2D usa las
+    dos primeras componentes, que coinciden con las de una PCA de 2 componentes).
+    
+    Con pocas variables y muchas filas el solver automático usa la matriz de
+    covarianza (costo lineal en filas); por encima de UMBRAL_POR_BLOQUES filas
+    se usa IncrementalPCA por bloques (ver ajustar_clusters_por_bloques).
+    
+    Returns:
+        tuple: (pca, proyecciones n × 3 en float32)
+    """
+    pca = PCA(n_components=3)
+    return pca, pca.fit_transform(X).astype(np.float32)
+
+def ajustar_clusters(X, n_clusters, escalable=False, motor=None):
+    """
+    Ajuste final del motor de clustering con sus proyecciones PCA y métricas.
+    Con motor=None se usa K-means (MiniBatch en modo escalable).
+    
+    Returns:
+        dict: labels, modelo ajustado (clave 'kmeans'), PCA con sus proyecciones y
+              varianza explicada y métricas finales
+    """
+    if motor is None:
+        motor = 'minibatch_kmeans' if escalable else 'kmeans'
+    kmeans, labels = clustering_engines.ajustar_motor(motor, X, n_clusters, RANDOM_STATE)
+    
+    # PCA para visualización
+    pca, X_pca = ajustar_pca(X)
+    
+    silhouette, error, _ = calcular_silhouette(X, labels, escalable)
+    
+    return {
+        'labels': labels,
+        'kmeans': kmeans,
+        'pca': pca,
+        'X_pca_3d': X_pca,
+        'pca_3d_var': pca.explained_variance_ratio_,
+        'silhouette': silhouette,
+        'silhouette_error': error,
+        'calinski': calinski_harabasz_score(X, labels),
+        'davies': davies_bouldin_score(X, labels)
+    }
+
+def ajustar_clusters_por_bloques(df_cluster, variables, n_clusters, scaler):
+    """
+    Ajuste final por bloques con partial_fit (MiniBatch K-means e IncrementalPCA),
+    sin construir la matriz escalada completa. Las métricas se calculan sobre una
+    muestra de MUESTRA_BARRIDO filas.
+    
+    Returns:
+        dict: Mismas claves que ajustar_clusters
+    """
+    fabrica = streaming_clustering.bloques_de_dataframe(df_cluster)
+    _, kmeans, pca = streaming_clustering.ajustar_por_bloques(
+        fabrica, variables, n_clusters, random_state=RANDOM_STATE, scaler=scaler
+    )
+    labels, X_pca_3d = streaming_clustering.predecir_por_bloques(fabrica, variables, scaler, kmeans, pca)
+    
+    rng = np.random.default_rng(RANDOM_STATE)
+    muestra = np.sort(rng.choice(len(df_cluster), min(len(df_cluster), MUESTRA_BARRIDO), replace=False))
+    X_muestra = scaler.transform(df_cluster[variables].iloc[muestra].to_numpy(dtype=float))
+    labels_muestra = labels[muestra]
+    
+    silhouette, error, _ = calcular_silhouette(X_muestra, labels_muestra, escalable=True)
+    
+    return {
+        'labels': labels,
+        'kmeans': kmeans,
+        'pca': pca,
+        'X_pca_3d': X_pca_3d,
+        'pca_3d_var': pca.explained_variance_ratio_,
+        'silhouette': silhouette,
+        'silhouette_error': error,
+        'calinski': calinski_harabasz_score(X_muestra, labels_muestra),
+        'davies': davies_bouldin_score(X_muestra, labels_muestra)
+    }
+
+def _ajuste_bootstrap(X, labels, n_clusters, semilla, motor='kmeans'):
+    """
+    Reajusta el motor de clustering sobre un remuestreo bootstrap (se ejecuta en un
+    proceso del pool).
+    
+    Returns:
+        tuple: (cluster asignado a cada fila, Jaccard de cada cluster original con el
+               cluster más parecido del remuestreo, medido sobre las filas remuestreadas)
+    """
+    with threadpool_limits(limits=1):
+        rng = np.random.default_rng(semilla)
+        indices = rng.integers(0, len(X), len(X))
         
-        inertias.append(kmeans.inertia_)
-        silhouettes.append(silhouette_score(X, labels))
-        calinski.append(calinski_harabasz_score(X, labels))
-        davies.append(davies_bouldin_score(X, labels))
+        modelo = clustering_engines.crear_motor(motor, n_clusters, X[indices], random_state=semilla)
+        modelo.fit(X[indices])
+        asignados = modelo.predict(X)
+    
+    # Tabla cluster original × cluster del remuestreo sobre las filas remuestreadas
+    en_muestra = np.unique(indices)
+    conteos = np.bincount(
+        labels[en_muestra] * n_clusters + asignados[en_muestra], minlength=n_clusters ** 2
+    ).reshape(n_clusters, n_clusters)
+    union = conteos.sum(axis=1)[:, None] + conteos.sum(axis=0)[None, :] - conteos
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        jaccard = np.where(union > 0, conteos / union, 0.0).max(axis=1)
+    
+    return asignados.astype(np.int16), jaccard
+
+def _coasignacion_por_bloques(asignaciones, bloque=128):
+    """
+    Matriz de consenso: fracción de remuestreos en que cada par de filas comparte
+    cluster, construida por bloques de filas para acotar la memoria intermedia.
+    
+    Args:
+        asignaciones: Array (remuestreos × filas) de clusters asignados
+    """
+    n_filas = asignaciones.shape[1]
+    consenso = np.empty((n_filas, n_filas), dtype=np.float32)
+    
+    for inicio in range(0, n_filas, bloque):
+        fin = min(inicio + bloque, n_filas)
+        consenso[inicio:fin] = (asignaciones[:, inicio:fin, None] == asignaciones[:, None, :]).mean(axis=0)
+    
+    return consenso
+
+def calcular_estabilidad(X, labels, n_clusters, repeticiones=REPETICIONES_BOOTSTRAP, n_workers=None,
+                         on_progress=None, escalable=False, motor=None):
+    """
+    Estabilidad del clustering por bootstrap: reajusta el motor del ajuste original
+    (con motor=None, K-means; MiniBatch en modo escalable) sobre `repeticiones`
+    remuestreos en un pool de procesos y compara cada ajuste con el original.
+    
+    La co-asignación se acumula por cluster (tabla cluster original × cluster del
+    remuestreo), sin matriz de filas × filas; solo la matriz de consenso que se
+    grafica (a lo más MUESTRA_CONSENSO filas) se construye, por bloques.
+    
+    Returns:
+        dict: jaccard (remuestreos × k), consenso_clusters (k × k, fracción de pares
+              co-asignados entre clusters originales), estabilidad_filas (fracción media
+              de su cluster original con la que cada fila sigue agrupada), consenso
+              (matriz de la muestra graficada) y labels_consenso
+    """
+    n = len(X)
+    tamanos = np.bincount(labels, minlength=n_clusters).astype(float)
+    if motor is None:
+        motor = 'minibatch_kmeans' if escalable else 'kmeans'
+    if n_workers is None:
+        n_workers = min(repeticiones, os.cpu_count() or 1)
+    
+    # Filas de la matriz de consenso graficada, ordenadas por cluster
+    rng = np.random.default_rng(RANDOM_STATE)
+    muestra = rng.choice(n, min(n, MUESTRA_CONSENSO), replace=False)
+    muestra = muestra[np.argsort(labels[muestra], kind='stable')]
+    
+    jaccard = []
+    pares = np.zeros((n_clusters, n_clusters))
+    estabilidad_filas = np.zeros(n)
+    asignaciones_muestra = []
+    
+    def registrar(semilla, resultado):
+        asignados, jaccard_b = resultado
+        jaccard.append(jaccard_b)
+        
+        conteos = np.bincount(
+            labels * n_clusters + asignados, minlength=n_clusters ** 2
+        ).reshape(n_clusters, n_clusters).astype(float)
+        
+        # Pares co-asignados entre clusters originales (sin contar cada fila consigo misma)
+        pares_b = conteos @ conteos.T
+        pares_b[np.diag_indices(n_clusters)] -= tamanos
+        pares[:] += pares_b
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            estabilidad_filas[:] += np.nan_to_num(
+                (conteos[labels, asignados] - 1) / (tamanos[labels] - 1), nan=1.0
+            )
+        asignaciones_muestra.append(asignados[muestra])
+        
+        if on_progress is not None:
+            on_progress(len(jaccard), repeticiones, semilla)
+    
+    semillas = list(range(repeticiones))
+    completadas = set()
+    
+    if n_workers > 1:
+        try:
+            contexto = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=contexto) as pool:
+                futuros = {
+                    pool.submit(_ajuste_bootstrap, X, labels, n_clusters, semilla, motor): semilla
+                    for semilla in semillas
+                }
+                for futuro in as_completed(futuros):
+                    registrar(futuros[futuro], futuro.result())
+                    completadas.add(futuros[futuro])
+        except (OSError, BrokenProcessPool):
+            # Entornos sin soporte para procesos: se completa de forma secuencial
+            pass
+    
+    for semilla in semillas:
+        if semilla not in completadas:
+            registrar(semilla, _ajuste_bootstrap(X, labels, n_clusters, semilla, motor))
+    
+    total_pares = np.outer(tamanos, tamanos)
+    total_pares[np.diag_indices(n_clusters)] -= tamanos
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        consenso_clusters = pares / (total_pares * repeticiones)
     
     return {
-        'K': list(K_range),
-        'inertia': inertias,
-        'silhouette': silhouettes,
-        'calinski': calinski,
-        'davies': davies
+        'jaccard': np.array(jaccard),
+        'consenso_clusters': np.nan_to_num(consenso_clusters, nan=1.0),
+        'estabilidad_filas': estabilidad_filas / repeticiones,
+        'consenso': _coasignacion_por_bloques(np.array(asignaciones_muestra)),
+        'labels_consenso': labels[muestra]
     }
 
+def comparar_motores(X, n_clusters, motores, tamanos, on_progress=None):
+    """
+    Ajusta cada motor de clustering sobre muestras anidadas de distintos tamaños y
+    mide tiempo de ajuste, memoria pico (tracemalloc) y las métricas de calidad.
+    
+    Args:
+        X: Matriz escalada
+        n_clusters: Número de clusters (los motores que no lo usan lo ignoran)
+        motores: Claves de clustering_engines.MOTORES
+        tamanos: Tamaños de muestra (se recortan a len(X))
+        on_progress: Callable(completados, total, motor)
+    
+    Returns:
+        pd.DataFrame: Una fila por motor y tamaño
+    """
+    orden = np.random.default_rng(RANDOM_STATE).permutation(len(X))
+    tamanos = sorted({min(t, len(X)) for t in tamanos})
+    filas = []
+    
+    for tamano in tamanos:
+        X_muestra = X[orden[:tamano]]
+        escalable = usar_modo_escalable(tamano)
+        
+        for motor in motores:
+            config = clustering_engines.MOTORES[motor]
+            fila = {'Algoritmo': config['nombre'], 'Filas': tamano}
+            
+            if config['max_filas'] is not None and tamano > config['max_filas']:
+                fila['Estado'] = f"Omitido (> {config['max_filas']:,} filas)"
+                filas.append(fila)
+                continue
+            
+            inicio = time.perf_counter()
+            _, labels = clustering_engines.ajustar_motor(motor, X_muestra, n_clusters, RANDOM_STATE)
+            tiempo = time.perf_counter() - inicio
+            
+            # La memoria se mide en un segundo ajuste: tracemalloc encarece el ajuste medido
+            tracemalloc.start()
+            try:
+                clustering_engines.ajustar_motor(motor, X_muestra, n_clusters, RANDOM_STATE)
+                _, pico = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            
+            # El ruido de DBSCAN (label -1) no cuenta para las métricas
+            validos = labels >= 0
+            n_encontrados = len(np.unique(labels[validos]))
+            
+            fila.update({
+                'Estado': 'OK',
+                'Tiempo (s)': tiempo,
+                'Memoria Pico (MB)': pico / 1024 ** 2,
+                'Clusters': n_encontrados,
+                'Ruido (%)': (~validos).mean() * 100
+            })
+            
+            try:
+                silhouette, _, _ = calcular_silhouette(X_muestra[validos], labels[validos], escalable)
+                fila.update({
+                    'Silhouette': silhouette,
+                    'Calinski-Harabasz': calinski_harabasz_score(X_muestra[validos], labels[validos]),
+                    'Davies-Bouldin': davies_bouldin_score(X_muestra[validos], labels[validos])
+                })
+            except ValueError:
+                # Un solo cluster (o uno solo en la muestra del silhouette): métricas no definidas
+                pass
+            
+            filas.append(fila)
+            if on_progress is not None:
+                on_progress(len(filas), len(tamanos) * len(motores), config['nombre'])
+    
+    return pd.DataFrame(filas)
+
+@st.cache_resource(show_spinner=False)
+def _gestor_trabajos():
+    """Pool de trabajos en segundo plano, compartido por todas las sesiones"""
+    return background_jobs.GestorTrabajos(max_workers=TRABAJOS_SIMULTANEOS)
+
+@st.fragment(run_every=INTERVALO_PROGRESO)
+def _seguir_trabajo(id_trabajo, titulo):
+    """Progreso de un trabajo en segundo plano; se refresca solo y recarga la página al terminar"""
+    trabajo = _gestor_trabajos().obtener(id_trabajo)
+    if trabajo is None or not trabajo.activo:
+        st.rerun()
+    
+    st.progress(trabajo.progreso, text=f"{titulo}: {trabajo.mensaje}")
+    st.caption(f"Trabajo `{trabajo.id}` en segundo plano: puede cambiar de sección y volver para recoger el resultado.")
+    
+    # Resultados parciales (métricas de cada k a medida que terminan)
+    parciales = dict(trabajo.parciales)
+    if parciales:
+        tabla = pd.DataFrame(parciales).T.sort_index()[['inertia', 'silhouette', 'calinski', 'davies']]
+        tabla.columns = ['Inercia', 'Silhouette', 'Calinski-Harabasz', 'Davies-Bouldin']
+        st.dataframe(tabla.rename_axis('k').style.format('{:.3f}'), use_container_width=True)
+    
+    if st.button("⏹️ Cancelar", key=f"cancelar_{id_trabajo}"):
+        _gestor_trabajos().cancelar(id_trabajo)
+
 def show_analisis_clusters(df):
     """6.2 Análisis y determinación del número óptimo de clusters"""
     st.markdown("## 6.2 🎯 Análisis de Clusters")
@@ -231,11 +763,38 @@ def show_analisis_clusters(df):
     
     df_cluster = st.session_state.cluster_config['df_cluster']
     variables = st.session_state.cluster_config['variables']
+    granularidad = st.session_state.cluster_config.get('granularidad', 'operador_tecnologia_servicio')
+    periodos_datos = st.session_state.cluster_config['periodos_datos']
+    version_datos = st.session_state.cluster_config['version_datos']
+    
+    periodos = df['ANNO'] * 10 + df['TRIMESTRE']
+    if (int(periodos.min()), int(periodos.max())) != periodos_datos:
+        st.info(
+            f"ℹ️ Los datos de clustering corresponden al periodo {periodos_datos[0] // 10}-T{periodos_datos[0] % 10} "
+            f"a {periodos_datos[1] // 10}-T{periodos_datos[1] % 10}. Vuelva a la sección 6.1 para usar el periodo actual."
+        )
     
     # Preparar datos
-    X = df_cluster[variables].values
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    por_bloques = granularidad == 'registro' or len(df_cluster) > UMBRAL_POR_BLOQUES
+    if por_bloques:
+        # Escalado por bloques; el barrido de k se evalúa sobre una muestra escalada
+        scaler = streaming_clustering.ajustar_scaler_por_bloques(
+            streaming_clustering.bloques_de_dataframe(df_cluster), variables
+        )
+        muestra = df_cluster[variables].sample(min(len(df_cluster), MUESTRA_BARRIDO), random_state=RANDOM_STATE)
+        X_scaled = scaler.transform(muestra.to_numpy(dtype=float))
+    else:
+        X = df_cluster[variables].values
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+    
+    # Clave de caché: versión del dataset y rango de periodos de df_cluster, variables,
+    # semilla, modo y nivel
+    escalable = usar_modo_escalable(len(df_cluster))
+    clave_base = (
+        version_datos, *periodos_datos,
+        list(variables), RANDOM_STATE, escalable, granularidad
+    )
     
     # Configuración
     col1, col2 = st.columns([1, 3])
@@ -251,107 +810,186 @@ def show_analisis_clusters(df):
         
         st.markdown("---")
         
+        estrategia = st.radio(
+            "Estrategia del barrido:",
+            ["Independiente (paralelo)", "Incremental (warm start)"],
+            help="Incremental: cada k parte de la solución anterior dividiendo el cluster de mayor "
+                 "SSE y se detiene al llegar a una meseta. Más rápido, curvas comparables."
+        )
+        
+        st.markdown("---")
+        
         metodo_seleccionado = st.radio(
             "Método de visualización:",
             ["Método del Codo", "Silhouette Score", "Calinski-Harabasz", "Davies-Bouldin", "Todos"]
         )
     
     with col2:
-        with st.spinner("Calculando métricas de clustering..."):
-            metrics = calcular_elbow_silhouette(X_scaled, max_clusters)
+        # Barrido en caché de disco: se reutiliza entre reruns, sesiones y reinicios
+        clave_barrido = result_cache.clave_cache(*clave_base, max_clusters, estrategia)
+        metrics = result_cache.cargar('barrido_k', clave_barrido)
         
-        # Crear gráficos según selección
-        if metodo_seleccionado == "Todos":
-            fig = make_subplots(
-                rows=2, cols=2,
-                subplot_titles=[
-                    'Método del Codo (Inercia)',
-                    'Silhouette Score',
-                    'Calinski-Harabasz Index',
-                    'Davies-Bouldin Index'
-                ]
-            )
+        def trabajo_barrido(trabajo):
+            def actualizar_progreso(completados, total, k):
+                trabajo.reportar(completados / total, f"k = {k} listo ({completados}/{total})")
             
-            # Inercia
-            fig.add_trace(
-                go.Scatter(
-                    x=metrics['K'],
-                    y=metrics['inertia'],
-                    mode='lines+markers',
-                    name='Inercia',
-                    line=dict(color='#2E86AB', width=3)
-                ),
-                row=1, col=1
-            )
+            def registrar_parcial(k, metricas):
+                trabajo.parciales[k] = metricas
             
-            # Silhouette
-            fig.add_trace(
-                go.Scatter(
-                    x=metrics['K'],
-                    y=metrics['silhouette'],
-                    mode='lines+markers',
-                    name='Silhouette',
-                    line=dict(color='#A23B72', width=3)
-                ),
-                row=1, col=2
-            )
-            
-            # Calinski
-            fig.add_trace(
-                go.Scatter(
-                    x=metrics['K'],
-                    y=metrics['calinski'],
-                    mode='lines+markers',
-                    name='Calinski-Harabasz',
-                    line=dict(color='#2CA02C', width=3)
-                ),
-                row=2, col=1
-            )
+            if estrategia == "Incremental (warm start)":
+                barrido = calcular_barrido_incremental
+            else:
+                barrido = calcular_elbow_silhouette
             
-            # Davies-Bouldin
-            fig.add_trace(
-                go.Scatter(
-                    x=metrics['K'],
-                    y=metrics['davies'],
-                    mode='lines+markers',
-                    name='Davies-Bouldin',
-                    line=dict(color='#D62728', width=3)
-                ),
-                row=2, col=2
+            trabajo.reportar(0.0, "Calculando métricas de clustering...")
+            resultado = barrido(
+                X_scaled, max_clusters, on_progress=actualizar_progreso,
+                escalable=escalable, on_result=registrar_parcial
             )
+            result_cache.guardar('barrido_k', clave_barrido, resultado)
+            return resultado
+        
+        # Si no está en caché, el barrido corre como trabajo en segundo plano
+        if metrics is None:
+            gestor = _gestor_trabajos()
+            trabajo = gestor.buscar(clave_barrido)
+            if trabajo is None:
+                trabajo = gestor.obtener(gestor.enviar('barrido_k', trabajo_barrido, clave=clave_barrido))
             
-            fig.update_layout(height=700, showlegend=False, title_text="Métricas de Evaluación de Clusters")
-            
-        else:
-            # Gráfico individual según selección
-            metric_map = {
-                "Método del Codo": ('inertia', 'Inercia', '#2E86AB'),
-                "Silhouette Score": ('silhouette', 'Silhouette Score', '#A23B72'),
-                "Calinski-Harabasz": ('calinski', 'Calinski-Harabasz', '#2CA02C'),
-                "Davies-Bouldin": ('davies', 'Davies-Bouldin', '#D62728')
-            }
-            
-            metric_key, metric_label, color = metric_map[metodo_seleccionado]
-            
-            fig = go.Figure()
-            fig.add_trace(
-                go.Scatter(
-                    x=metrics['K'],
-                    y=metrics[metric_key],
-                    mode='lines+markers',
-                    name=metric_label,
-                    line=dict(color=color, width=3),
-                    marker=dict(size=10)
-                )
+            if trabajo.estado == 'terminado':
+                metrics = trabajo.resultado
+            elif trabajo.activo:
+                _seguir_trabajo(trabajo.id, "Barrido de k")
+                return
+            else:
+                if trabajo.estado == 'cancelado':
+                    st.warning("⏹️ Barrido cancelado")
+                else:
+                    st.error(f"❌ Error en el barrido: {trabajo.error}")
+                
+                if st.button("🔄 Volver a Calcular"):
+                    gestor.enviar('barrido_k', trabajo_barrido, clave=clave_barrido)
+                    st.rerun()
+                return
+        
+        if metrics.get('detenido_en'):
+            st.caption(f"⏹️ Barrido detenido en k = {metrics['detenido_en']}: las métricas llegaron a una meseta.")
+        
+        if por_bloques:
+            st.info(
+                f"🧱 **Ajuste por bloques** ({len(df_cluster):,} unidades): el barrido se evalúa sobre una "
+                f"muestra de {len(X_scaled):,} filas y el modelo final se ajusta con partial_fit en bloques "
+                f"de {streaming_clustering.TAMANO_BLOQUE:,} filas, sin construir la matriz escalada completa."
             )
-            
-            fig.update_layout(
-                title=f"{metodo_seleccionado}",
-                xaxis_title="Número de Clusters",
-                yaxis_title=metric_label,
-                height=500
+        elif metrics['escalable']:
+            st.info(
+                f"⚡ **Modo de datos grandes** ({len(X_scaled):,} filas > {UMBRAL_MODO_ESCALABLE:,}): "
+                f"MiniBatch K-means y silhouette promedio de {REPETICIONES_SILHOUETTE} muestras de "
+                f"{MUESTRA_SILHOUETTE:,} filas. Error máximo del silhouette (desv. estándar): "
+                f"±{max(metrics['silhouette_error']):.4f}. Tiempo ahorrado estimado en silhouette: "
+                f"~{metrics['tiempo_ahorrado']:,.0f} s."
             )
         
+        # Crear gráficos según selección
+        fig = figure_cache.obtener('fig', clave_barrido, metodo_seleccionado)
+        if fig is None:
+            if metodo_seleccionado == "Todos":
+                fig = make_subplots(
+                    rows=2, cols=2,
+                    subplot_titles=[
+                        'Método del Codo (Inercia)',
+                        'Silhouette Score',
+                        'Calinski-Harabasz Index',
+                        'Davies-Bouldin Index'
+                    ]
+                )
+                
+                # Inercia
+                fig.add_trace(
+                    go.Scatter(
+                        x=metrics['K'],
+                        y=metrics['inertia'],
+                        mode='lines+markers',
+                        name='Inercia',
+                        line=dict(color='#2E86AB', width=3)
+                    ),
+                    row=1, col=1
+                )
+                
+                # Silhouette
+                fig.add_trace(
+                    go.Scatter(
+                        x=metrics['K'],
+                        y=metrics['silhouette'],
+                        error_y=dict(type='data', array=metrics['silhouette_error'], visible=metrics['escalable']),
+                        mode='lines+markers',
+                        name='Silhouette',
+                        line=dict(color='#A23B72', width=3)
+                    ),
+                    row=1, col=2
+                )
+                
+                # Calinski
+                fig.add_trace(
+                    go.Scatter(
+                        x=metrics['K'],
+                        y=metrics['calinski'],
+                        mode='lines+markers',
+                        name='Calinski-Harabasz',
+                        line=dict(color='#2CA02C', width=3)
+                    ),
+                    row=2, col=1
+                )
+                
+                # Davies-Bouldin
+                fig.add_trace(
+                    go.Scatter(
+                        x=metrics['K'],
+                        y=metrics['davies'],
+                        mode='lines+markers',
+                        name='Davies-Bouldin',
+                        line=dict(color='#D62728', width=3)
+                    ),
+                    row=2, col=2
+                )
+                
+                fig.update_layout(height=700, showlegend=False, title_text="Métricas de Evaluación de Clusters")
+            
+            else:
+                # Gráfico individual según selección
+                metric_map = {
+                    "Método del Codo": ('inertia', 'Inercia', '#2E86AB'),
+                    "Silhouette Score": ('silhouette', 'Silhouette Score', '#A23B72'),
+                    "Calinski-Harabasz": ('calinski', 'Calinski-Harabasz', '#2CA02C'),
+                    "Davies-Bouldin": ('davies', 'Davies-Bouldin', '#D62728')
+                }
+                
+                metric_key, metric_label, color = metric_map[metodo_seleccionado]
+                
+                fig = go.Figure()
+                fig.add_trace(
+                    go.Scatter(
+                        x=metrics['K'],
+                        y=metrics[metric_key],
+                        error_y=dict(
+                            type='data',
+                            array=metrics['silhouette_error'],
+                            visible=metrics['escalable'] and metric_key == 'silhouette'
+                        ),
+                        mode='lines+markers',
+                        name=metric_label,
+                        line=dict(color=color, width=3),
+                        marker=dict(size=10)
+                    )
+                )
+                
+                fig.update_layout(
+                    title=f"{metodo_seleccionado}",
+                    xaxis_title="Número de Clusters",
+                    yaxis_title=metric_label,
+                    height=500
+                )
+            fig = figure_cache.guardar('fig', fig, clave_barrido, metodo_seleccionado)
         st.plotly_chart(fig, use_container_width=True)
     
     # Recomendaciones
@@ -386,60 +1024,170 @@ def show_analisis_clusters(df):
     st.markdown("---")
     st.markdown("### 🎯 Aplicar Clustering")
     
-    n_clusters_final = st.slider(
-        "Seleccione el número de clusters a generar:",
-        min_value=2,
-        max_value=max_clusters,
-        value=best_silhouette_k,
-        step=1
-    )
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        n_clusters_final = st.slider(
+            "Seleccione el número de clusters a generar:",
+            min_value=2,
+            max_value=max_clusters,
+            value=best_silhouette_k,
+            step=1
+        )
+    
+    with col2:
+        # Solo motores que asignan clusters a datos nuevos; por bloques, MiniBatch (partial_fit)
+        motores = clustering_engines.MOTORES
+        if por_bloques:
+            motores_ajuste = ['minibatch_kmeans']
+        else:
+            motores_ajuste = [m for m, c in motores.items() if c['predice']]
+        
+        motor = st.selectbox(
+            "Algoritmo:",
+            motores_ajuste,
+            index=motores_ajuste.index('minibatch_kmeans' if escalable or por_bloques else 'kmeans'),
+            format_func=lambda m: motores[m]['nombre'],
+            help="Compare tiempo, memoria y calidad de los algoritmos en la sección 6.5"
+        )
     
     if st.button("🚀 Generar Clusters", type="primary"):
-        with st.spinner(f"Generando {n_clusters_final} clusters..."):
-            # Aplicar K-means
-            kmeans = KMeans(n_clusters=n_clusters_final, random_state=42, n_init=10)
-            labels = kmeans.fit_predict(X_scaled)
-            
-            # Agregar labels al dataframe
-            df_cluster['Cluster'] = labels
-            
-            # PCA para visualización
-            pca_2d = PCA(n_components=2)
-            pca_3d = PCA(n_components=3)
-            
-            X_pca_2d = pca_2d.fit_transform(X_scaled)
-            X_pca_3d = pca_3d.fit_transform(X_scaled)
-            
-            df_cluster['PCA1'] = X_pca_2d[:, 0]
-            df_cluster['PCA2'] = X_pca_2d[:, 1]
-            df_cluster['PCA3_1'] = X_pca_3d[:, 0]
-            df_cluster['PCA3_2'] = X_pca_3d[:, 1]
-            df_cluster['PCA3_3'] = X_pca_3d[:, 2]
-            
-            # Guardar en session_state
-            st.session_state.cluster_config['df_clustered'] = df_cluster
-            st.session_state.cluster_config['n_clusters'] = n_clusters_final
-            st.session_state.cluster_config['pca_2d_var'] = pca_2d.explained_variance_ratio_
-            st.session_state.cluster_config['pca_3d_var'] = pca_3d.explained_variance_ratio_
-            st.session_state.cluster_config['kmeans'] = kmeans
-            st.session_state.cluster_config['scaler'] = scaler
-            
-            # Métricas finales
-            silhouette_final = silhouette_score(X_scaled, labels)
-            calinski_final = calinski_harabasz_score(X_scaled, labels)
-            davies_final = davies_bouldin_score(X_scaled, labels)
-            
-            st.success(f"✅ {n_clusters_final} clusters generados exitosamente!")
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Silhouette Score", f"{silhouette_final:.3f}")
-            with col2:
-                st.metric("Calinski-Harabasz", f"{calinski_final:.1f}")
-            with col3:
-                st.metric("Davies-Bouldin", f"{davies_final:.3f}")
-            
-            st.info("📊 Vaya a la sección **6.3 Perfiles y Patrones** para explorar los clusters generados.")
+        # Aplicar el algoritmo elegido (por bloques a nivel registro), en caché de disco
+        if por_bloques:
+            ajustar = lambda: ajustar_clusters_por_bloques(df_cluster, variables, n_clusters_final, scaler)
+        else:
+            ajustar = lambda: ajustar_clusters(X_scaled, n_clusters_final, escalable, motor)
+        
+        id_ajuste = result_cache.clave_cache(*clave_base, n_clusters_final, motor)
+        
+        def trabajo_ajuste(trabajo):
+            trabajo.reportar(0.0, f"Generando {n_clusters_final} clusters...")
+            ajuste, _ = result_cache.memoizar('ajuste_kmeans', id_ajuste, ajustar)
+            return ajuste
+        
+        # El ajuste corre en segundo plano; el resultado se recoge en un rerun posterior
+        st.session_state.trabajo_ajuste = {
+            'id': _gestor_trabajos().enviar('ajuste_kmeans', trabajo_ajuste, clave=id_ajuste),
+            'id_ajuste': id_ajuste,
+            'n_clusters': n_clusters_final,
+            'motor': motor,
+            'granularidad': granularidad,
+            'variables': list(variables)
+        }
+    
+    pendiente = st.session_state.get('trabajo_ajuste')
+    trabajo = _gestor_trabajos().obtener(pendiente['id']) if pendiente is not None else None
+    
+    if pendiente is not None and (pendiente['granularidad'], pendiente['variables']) != (granularidad, list(variables)):
+        st.session_state.pop('trabajo_ajuste')
+        st.warning("⚠️ La configuración de 6.1 cambió; se descartó el ajuste en curso")
+    elif pendiente is not None and (trabajo is None or trabajo.estado in ('cancelado', 'error')):
+        st.session_state.pop('trabajo_ajuste')
+        if trabajo is not None and trabajo.estado == 'error':
+            st.error(f"❌ Error al generar los clusters: {trabajo.error}")
+        else:
+            st.warning("⏹️ Generación de clusters cancelada")
+    elif pendiente is not None and trabajo.activo:
+        _seguir_trabajo(trabajo.id, f"Generando {pendiente['n_clusters']} clusters")
+    elif pendiente is not None:
+        st.session_state.pop('trabajo_ajuste')
+        ajuste = trabajo.resultado
+        n_clusters_final = pendiente['n_clusters']
+        labels = ajuste['labels']
+        X_pca = ajuste['X_pca_3d']
+        
+        # Agregar labels al dataframe
+        df_cluster['Cluster'] = labels
+        
+        # Una sola proyección: PCA1-PCA2 para la vista 2D y PCA1-PCA3 para la 3D
+        df_cluster['PCA1'] = X_pca[:, 0]
+        df_cluster['PCA2'] = X_pca[:, 1]
+        df_cluster['PCA3'] = X_pca[:, 2]
+        
+        # Guardar en session_state
+        st.session_state.cluster_config['df_clustered'] = df_cluster
+        st.session_state.cluster_config['n_clusters'] = n_clusters_final
+        st.session_state.cluster_config['motor'] = pendiente['motor']
+        st.session_state.cluster_config['granularidad_clusters'] = granularidad
+        st.session_state.cluster_config['id_ajuste'] = pendiente['id_ajuste']
+        st.session_state.cluster_config['pca_var'] = ajuste['pca_3d_var']
+        st.session_state.cluster_config['kmeans'] = ajuste['kmeans']
+        st.session_state.cluster_config['scaler'] = scaler
+        st.session_state.cluster_config['pca'] = ajuste.get('pca')
+        st.session_state.cluster_config['periodos'] = periodos_datos
+        st.session_state.cluster_config['version_dataset'] = version_datos
+        
+        # Métricas finales
+        silhouette_final = ajuste['silhouette']
+        error_final = ajuste['silhouette_error']
+        calinski_final = ajuste['calinski']
+        davies_final = ajuste['davies']
+        st.session_state.cluster_config['metricas'] = {
+            'silhouette': silhouette_final,
+            'calinski': calinski_final,
+            'davies': davies_final
+        }
+        
+        st.success(f"✅ {n_clusters_final} clusters generados exitosamente!")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric(
+                "Silhouette Score", f"{silhouette_final:.3f}",
+                help=f"Aproximado: ±{error_final:.4f}" if metrics['escalable'] else None
+            )
+        with col2:
+            st.metric("Calinski-Harabasz", f"{calinski_final:.1f}")
+        with col3:
+            st.metric("Davies-Bouldin", f"{davies_final:.3f}")
+        
+        st.info("📊 Vaya a la sección **6.3 Perfiles y Patrones** para explorar los clusters generados.")
+    
+    # Guardar el modelo generado en el registro
+    config = st.session_state.cluster_config
+    if 'kmeans' in config and config.get('granularidad_clusters') == granularidad:
+        st.markdown("### 💾 Guardar Modelo")
+        
+        col1, col2 = st.columns([3, 1])
+        
+        with col1:
+            nombre_modelo = st.text_input(
+                "Nombre del modelo:",
+                value=f"{motores[config.get('motor', 'kmeans')]['nombre']} {config['n_clusters']} clusters"
+            )
+        
+        with col2:
+            st.markdown("<br>", unsafe_allow_html=True)
+            guardar = st.button("💾 Guardar en Registro")
+        
+        if guardar:
+            id_modelo = model_registry.save_model(
+                config['scaler'], config.get('pca'), config['kmeans'], variables,
+                *config['periodos'],
+                metricas=config.get('metricas'),
+                nombre=nombre_modelo,
+                granularidad=granularidad,
+                version_dataset=config['version_dataset']
+            )
+            st.success(f"✅ Modelo guardado con id `{id_modelo}`. Úselo en la sección **6.4 Registro de Modelos**.")
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _vistas_pca(_df_cluster, id_ajuste):
+    """Puntos a graficar de las vistas PCA 2D y 3D, en caché por ajuste"""
+    df_pca_2d = downsample_scatter(_df_cluster, ['PCA1', 'PCA2'])
+    df_pca_3d = downsample_scatter(_df_cluster, ['PCA1', 'PCA2', 'PCA3'])
+    return df_pca_2d, df_pca_3d
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _medias_por_cluster(_df_cluster, id_ajuste, variables):
+    """Promedio de las variables numéricas por cluster, en caché por ajuste"""
+    numeric_cols = _df_cluster[list(variables)].select_dtypes(include=[np.number]).columns
+    return _df_cluster.groupby('Cluster')[numeric_cols].mean()
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _csv_resultados(_df_cluster, id_ajuste, columnas):
+    """CSV de exportación de los resultados, en caché por ajuste"""
+    return _df_cluster[list(columnas)].to_csv(index=False, encoding='utf-8-sig')
 
 def show_perfiles_patrones(df):
     """6.3 Visualización y análisis de perfiles de clusters"""
@@ -453,19 +1201,21 @@ def show_perfiles_patrones(df):
     df_cluster = st.session_state.cluster_config['df_clustered']
     n_clusters = st.session_state.cluster_config['n_clusters']
     variables = st.session_state.cluster_config['variables']
-    pca_2d_var = st.session_state.cluster_config['pca_2d_var']
-    pca_3d_var = st.session_state.cluster_config['pca_3d_var']
+    pca_var = st.session_state.cluster_config['pca_var']
+    granularidad = st.session_state.cluster_config.get('granularidad_clusters', 'operador_tecnologia_servicio')
+    columnas_id = streaming_clustering.GRANULARIDADES[granularidad]['claves']
+    id_ajuste = st.session_state.cluster_config['id_ajuste']
     
     # Resumen de clusters
     st.markdown("### 📈 Resumen de Clusters")
     
     cluster_summary = df_cluster.groupby('Cluster').agg({
         'CANTIDAD_LINEAS_ACCESOS': ['sum', 'mean'],
-        'VALOR_FACTURADO_O_COBRADO': ['sum', 'mean'],
-        'EMPRESA': 'count'
+        'VALOR_FACTURADO_O_COBRADO': ['sum', 'mean']
     }).round(2)
     
-    cluster_summary.columns = ['Total Líneas', 'Prom Líneas', 'Total Valor', 'Prom Valor', 'N° Registros']
+    cluster_summary.columns = ['Total Líneas', 'Prom Líneas', 'Total Valor', 'Prom Valor']
+    cluster_summary['N° Registros'] = df_cluster.groupby('Cluster').size()
     
     st.dataframe(cluster_summary.style.format({
         'Total Líneas': '{:,.0f}',
@@ -476,187 +1226,746 @@ def show_perfiles_patrones(df):
     }), use_container_width=True)
     
     # Visualizaciones
-    tab1, tab2, tab3, tab4 = st.tabs(["🎨 Visualización PCA", "📊 Características", "🔍 Detalle por Cluster", "📥 Exportar"])
+    # Solo se calcula la pestaña abierta
+    tab1, tab2, tab3, tab4, tab5 = lazy_tabs.pestanas_diferidas([
+        "🎨 Visualización PCA", "📊 Características", "🔍 Detalle por Cluster", "🧪 Estabilidad", "📥 Exportar"
+    ], 'tabs_perfiles_patrones')
     
     with tab1:
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # PCA 2D
-            fig_2d = px.scatter(
-                df_cluster,
-                x='PCA1',
-                y='PCA2',
-                color='Cluster',
-                hover_data=['EMPRESA', 'TECNOLOGIA', 'SERVICIO_PAQUETE'],
-                title=f'Visualización PCA 2D - {n_clusters} Clusters',
-                labels={
-                    'PCA1': f'PC1 ({pca_2d_var[0]:.1%} var)',
-                    'PCA2': f'PC2 ({pca_2d_var[1]:.1%} var)'
-                },
-                color_continuous_scale='Viridis'
+        if tab1.open:
+            # Reducción de puntos por grilla (en caché por ajuste): se conservan los extremos
+            df_pca_2d, df_pca_3d = _vistas_pca(df_cluster, id_ajuste)
+            if len(df_pca_2d) < len(df_cluster):
+                st.caption(
+                    f"Mostrando {len(df_pca_2d):,} (2D) y {len(df_pca_3d):,} (3D) de "
+                    f"{len(df_cluster):,} registros; los puntos extremos se conservan"
+                )
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                # PCA 2D
+                fig_2d = figure_cache.obtener('fig_2d', id_ajuste)
+                if fig_2d is None:
+                    fig_2d = px.scatter(
+                        df_pca_2d,
+                        x='PCA1',
+                        y='PCA2',
+                        color='Cluster',
+                        hover_data=columnas_id,
+                        title=f'Visualización PCA 2D - {n_clusters} Clusters',
+                        labels={
+                            'PCA1': f'PC1 ({pca_var[0]:.1%} var)',
+                            'PCA2': f'PC2 ({pca_var[1]:.1%} var)'
+                        },
+                        color_continuous_scale='Viridis'
+                    )
+                    fig_2d.update_layout(height=500)
+                    fig_2d = figure_cache.guardar('fig_2d', fig_2d, id_ajuste)
+                st.plotly_chart(fig_2d, use_container_width=True)
+            
+            with col2:
+                # PCA 3D
+                fig_3d = figure_cache.obtener('fig_3d', id_ajuste)
+                if fig_3d is None:
+                    fig_3d = px.scatter_3d(
+                        df_pca_3d,
+                        x='PCA1',
+                        y='PCA2',
+                        z='PCA3',
+                        color='Cluster',
+                        hover_data=columnas_id[:2],
+                        title=f'Visualización PCA 3D - {n_clusters} Clusters',
+                        labels={
+                            'PCA1': f'PC1 ({pca_var[0]:.1%})',
+                            'PCA2': f'PC2 ({pca_var[1]:.1%})',
+                            'PCA3': f'PC3 ({pca_var[2]:.1%})'
+                        },
+                        color_continuous_scale='Viridis'
+                    )
+                    fig_3d.update_layout(height=500)
+                    fig_3d = figure_cache.guardar('fig_3d', fig_3d, id_ajuste)
+                st.plotly_chart(fig_3d, use_container_width=True)
+    
+    with tab2:
+        if tab2.open:
+            # Características promedio por cluster
+            st.markdown("### 📊 Características Promedio por Cluster")
+            
+            fig_radar = figure_cache.obtener('fig_radar', id_ajuste)
+            fig_heat = figure_cache.obtener('fig_heat', id_ajuste)
+            if fig_radar is None or fig_heat is None:
+                # Promedio de las variables numéricas (en caché por ajuste)
+                cluster_means = _medias_por_cluster(df_cluster, id_ajuste, tuple(variables))
+            
+            if fig_radar is None:
+                # Normalizar para comparación
+                cluster_means_norm = (cluster_means - cluster_means.min()) / (cluster_means.max() - cluster_means.min())
+                
+                # Gráfico de radar
+                fig_radar = go.Figure()
+                
+                for cluster_id in range(n_clusters):
+                    fig_radar.add_trace(go.Scatterpolar(
+                        r=cluster_means_norm.loc[cluster_id].values,
+                        theta=cluster_means_norm.columns,
+                        fill='toself',
+                        name=f'Cluster {cluster_id}'
+                    ))
+                
+                fig_radar.update_layout(
+                    polar=dict(radialaxis=dict(visible=True, range=[0, 1])),
+                    showlegend=True,
+                    title="Perfil de Características (Normalizado)",
+                    height=600
+                )
+                fig_radar = figure_cache.guardar('fig_radar', fig_radar, id_ajuste)
+            
+            st.plotly_chart(fig_radar, use_container_width=True)
+            
+            # Heatmap de características
+            if fig_heat is None:
+                fig_heat = go.Figure(data=go.Heatmap(
+                    z=cluster_means.T.values,
+                    x=[f'Cluster {i}' for i in range(n_clusters)],
+                    y=cluster_means.columns,
+                    colorscale='RdYlBu_r',
+                    text=cluster_means.T.values.round(2),
+                    texttemplate='%{text}',
+                    textfont={"size": 10}
+                ))
+                
+                fig_heat.update_layout(
+                    title="Heatmap de Características por Cluster",
+                    height=400
+                )
+                fig_heat = figure_cache.guardar('fig_heat', fig_heat, id_ajuste)
+            
+            st.plotly_chart(fig_heat, use_container_width=True)
+    
+    with tab3:
+        if tab3.open:
+            # Detalle por cluster seleccionado
+            st.markdown("### 🔍 Explorar Cluster Individual")
+            
+            cluster_selected = st.selectbox(
+                "Seleccione un cluster:",
+                range(n_clusters),
+                format_func=lambda x: f"Cluster {x}"
             )
-            fig_2d.update_layout(height=500)
-            st.plotly_chart(fig_2d, use_container_width=True)
-        
-        with col2:
-            # PCA 3D
-            fig_3d = px.scatter_3d(
-                df_cluster,
-                x='PCA3_1',
-                y='PCA3_2',
-                z='PCA3_3',
-                color='Cluster',
-                hover_data=['EMPRESA', 'TECNOLOGIA'],
-                title=f'Visualización PCA 3D - {n_clusters} Clusters',
-                labels={
-                    'PCA3_1': f'PC1 ({pca_3d_var[0]:.1%})',
-                    'PCA3_2': f'PC2 ({pca_3d_var[1]:.1%})',
-                    'PCA3_3': f'PC3 ({pca_3d_var[2]:.1%})'
-                },
+            
+            df_cluster_sel = df_cluster[df_cluster['Cluster'] == cluster_selected]
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                st.metric("Registros", len(df_cluster_sel))
+            
+            with col2:
+                st.metric("Total Líneas", f"{df_cluster_sel['CANTIDAD_LINEAS_ACCESOS'].sum():,.0f}")
+            
+            with col3:
+                st.metric("Total Valor", f"${df_cluster_sel['VALOR_FACTURADO_O_COBRADO'].sum():,.0f}")
+            
+            # Top operadores (o municipios, agrupando por municipio) en este cluster
+            if 'EMPRESA' in columnas_id:
+                columna_top, nombre_top = 'EMPRESA', 'Operadores'
+            else:
+                columna_top, nombre_top = 'MUNICIPIO', 'Municipios'
+            
+            st.markdown(f"#### 🏢 Top 10 {nombre_top}")
+            fig_ops = figure_cache.obtener('fig_ops', id_ajuste, cluster_selected)
+            if fig_ops is None:
+                top_ops = df_cluster_sel[columna_top].value_counts().head(10)
+                
+                fig_ops = px.bar(
+                    x=top_ops.values,
+                    y=[op[:40] for op in top_ops.index],
+                    orientation='h',
+                    title=f'Top 10 {nombre_top} en Cluster {cluster_selected}',
+                    labels={'x': 'Frecuencia', 'y': nombre_top[:-1]}
+                )
+                fig_ops.update_layout(height=400)
+                fig_ops = figure_cache.guardar('fig_ops', fig_ops, id_ajuste, cluster_selected)
+            st.plotly_chart(fig_ops, use_container_width=True)
+            
+            # Distribución de tecnologías y servicios (solo en los niveles que los incluyen)
+            if 'TECNOLOGIA' in columnas_id:
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.markdown("#### 📡 Tecnologías")
+                    fig_tech = figure_cache.obtener('fig_tech', id_ajuste, cluster_selected)
+                    if fig_tech is None:
+                        tech_dist = df_cluster_sel['TECNOLOGIA'].value_counts()
+                        fig_tech = px.pie(
+                            values=tech_dist.values,
+                            names=tech_dist.index,
+                            title='Distribución de Tecnologías'
+                        )
+                        fig_tech = figure_cache.guardar('fig_tech', fig_tech, id_ajuste, cluster_selected)
+                    st.plotly_chart(fig_tech, use_container_width=True)
+                
+                with col2:
+                    st.markdown("#### 📦 Servicios")
+                    fig_serv = figure_cache.obtener('fig_serv', id_ajuste, cluster_selected)
+                    if fig_serv is None:
+                        serv_dist = df_cluster_sel['SERVICIO_PAQUETE'].value_counts()
+                        fig_serv = px.pie(
+                            values=serv_dist.values,
+                            names=serv_dist.index,
+                            title='Distribución de Servicios'
+                        )
+                        fig_serv = figure_cache.guardar('fig_serv', fig_serv, id_ajuste, cluster_selected)
+                    st.plotly_chart(fig_serv, use_container_width=True)
+    
+    with tab4:
+        if tab4.open:
+            # Estabilidad por bootstrap
+            st.markdown("### 🧪 Estabilidad por Bootstrap")
+            
+            config = st.session_state.cluster_config
+            escalable = usar_modo_escalable(len(df_cluster))
+            motor = config.get('motor', 'minibatch_kmeans' if escalable else 'kmeans')
+            nombre_motor = clustering_engines.MOTORES[motor]['nombre']
+            
+            st.markdown(f"""
+            Se reajusta {nombre_motor} sobre remuestreos bootstrap de las unidades y se mide cuánto se conserva
+            cada cluster. **Jaccard medio** con el cluster más parecido del remuestreo: ≥ {JACCARD_ESTABLE}
+            estable, < {JACCARD_DISUELTO} el cluster se disuelve.
+            """)
+            
+            col1, col2 = st.columns([3, 1])
+            
+            with col1:
+                repeticiones = st.slider(
+                    "Número de remuestreos:",
+                    min_value=10,
+                    max_value=50,
+                    value=REPETICIONES_BOOTSTRAP,
+                    step=5
+                )
+            
+            # Con muchas unidades se analiza una muestra fija
+            filas = np.arange(len(df_cluster))
+            if len(filas) > MUESTRA_ESTABILIDAD:
+                rng = np.random.default_rng(RANDOM_STATE)
+                filas = np.sort(rng.choice(len(filas), MUESTRA_ESTABILIDAD, replace=False))
+            
+            clave_estabilidad = result_cache.clave_cache(config['id_ajuste'], motor, repeticiones, MUESTRA_ESTABILIDAD)
+            estabilidad = result_cache.cargar('estabilidad', clave_estabilidad)
+            
+            with col2:
+                st.markdown("<br>", unsafe_allow_html=True)
+                calcular = st.button("🧪 Calcular Estabilidad", disabled=estabilidad is not None)
+            
+            if estabilidad is None and calcular:
+                X = config['scaler'].transform(df_cluster[variables].iloc[filas].to_numpy(dtype=float))
+                labels = df_cluster['Cluster'].to_numpy()[filas]
+                
+                barra = st.progress(0, text=f"Reajustando {nombre_motor} sobre remuestreos...")
+                
+                def actualizar_progreso(completados, total, _):
+                    barra.progress(completados / total, text=f"Remuestreo {completados}/{total} listo")
+                
+                estabilidad = calcular_estabilidad(
+                    X, labels, n_clusters, repeticiones,
+                    on_progress=actualizar_progreso,
+                    motor=motor
+                )
+                barra.empty()
+                result_cache.guardar('estabilidad', clave_estabilidad, estabilidad)
+            
+            if estabilidad is None:
+                st.info(f"ℹ️ Presione **Calcular Estabilidad** para reajustar el modelo sobre {repeticiones} remuestreos "
+                        f"de {len(filas):,} unidades")
+            else:
+                jaccard_medio = estabilidad['jaccard'].mean(axis=0)
+                labels_filas = df_cluster['Cluster'].to_numpy()[filas]
+                
+                resumen_estabilidad = pd.DataFrame({
+                    'Cluster': range(n_clusters),
+                    'Unidades': np.bincount(labels_filas, minlength=n_clusters),
+                    'Jaccard Medio': jaccard_medio,
+                    'Jaccard Desv': estabilidad['jaccard'].std(axis=0),
+                    'Estabilidad Unidades': [
+                        estabilidad['estabilidad_filas'][labels_filas == c].mean() for c in range(n_clusters)
+                    ]
+                })
+                
+                col1, col2, col3, col4 = st.columns(4)
+                
+                with col1:
+                    st.metric("Jaccard Medio", f"{jaccard_medio.mean():.3f}")
+                
+                with col2:
+                    st.metric("Clusters Estables", f"{(jaccard_medio >= JACCARD_ESTABLE).sum()} de {n_clusters}")
+                
+                with col3:
+                    st.metric("Clusters Disueltos", int((jaccard_medio < JACCARD_DISUELTO).sum()))
+                
+                with col4:
+                    st.metric("Estabilidad de Unidades", f"{estabilidad['estabilidad_filas'].mean():.1%}")
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    fig_jac = figure_cache.obtener('fig_jac', clave_estabilidad)
+                    if fig_jac is None:
+                        fig_jac = px.bar(
+                            resumen_estabilidad,
+                            x=resumen_estabilidad['Cluster'].astype(str),
+                            y='Jaccard Medio',
+                            error_y='Jaccard Desv',
+                            color='Jaccard Medio',
+                            color_continuous_scale='RdYlGn',
+                            range_color=[0, 1],
+                            title='Jaccard Medio por Cluster',
+                            labels={'x': 'Cluster'}
+                        )
+                        fig_jac.add_hline(y=JACCARD_ESTABLE, line_dash="dash", line_color="green")
+                        fig_jac.add_hline(y=JACCARD_DISUELTO, line_dash="dash", line_color="red")
+                        fig_jac.update_layout(height=450, yaxis_range=[0, 1.05])
+                        fig_jac = figure_cache.guardar('fig_jac', fig_jac, clave_estabilidad)
+                    st.plotly_chart(fig_jac, use_container_width=True)
+                
+                with col2:
+                    fig_cons = figure_cache.obtener('fig_cons', clave_estabilidad)
+                    if fig_cons is None:
+                        fig_cons = px.imshow(
+                            estabilidad['consenso_clusters'],
+                            x=[f'C{i}' for i in range(n_clusters)],
+                            y=[f'C{i}' for i in range(n_clusters)],
+                            labels=dict(x="Cluster", y="Cluster", color="Co-asignación"),
+                            title='Co-asignación entre Clusters Originales',
+                            color_continuous_scale='Blues',
+                            zmin=0,
+                            zmax=1,
+                            text_auto='.2f'
+                        )
+                        fig_cons.update_layout(height=450)
+                        fig_cons = figure_cache.guardar('fig_cons', fig_cons, clave_estabilidad)
+                    st.plotly_chart(fig_cons, use_container_width=True)
+                
+                # Matriz de consenso de una muestra de unidades ordenadas por cluster
+                fig_matriz = figure_cache.obtener('fig_matriz', clave_estabilidad)
+                if fig_matriz is None:
+                    fig_matriz = px.imshow(
+                        estabilidad['consenso'],
+                        labels=dict(x="Unidad", y="Unidad", color="Co-asignación"),
+                        title=f"Matriz de Consenso ({len(estabilidad['consenso']):,} unidades ordenadas por cluster)",
+                        color_continuous_scale='Blues',
+                        zmin=0,
+                        zmax=1
+                    )
+                    fig_matriz.update_xaxes(showticklabels=False)
+                    fig_matriz.update_yaxes(showticklabels=False)
+                    fig_matriz.update_layout(height=550)
+                    fig_matriz = figure_cache.guardar('fig_matriz', fig_matriz, clave_estabilidad)
+                st.plotly_chart(fig_matriz, use_container_width=True)
+                
+                st.dataframe(resumen_estabilidad.style.format({
+                    'Unidades': '{:,.0f}',
+                    'Jaccard Medio': '{:.3f}',
+                    'Jaccard Desv': '{:.3f}',
+                    'Estabilidad Unidades': '{:.1%}'
+                }), use_container_width=True, hide_index=True)
+    
+    with tab5:
+        if tab5.open:
+            # Exportación
+            st.markdown("### 📥 Exportar Resultados")
+            
+            st.markdown("""
+            Descargue los resultados del clustering en formato CSV para análisis adicional.
+            """)
+            
+            # Preparar CSV (en caché por ajuste)
+            csv = _csv_resultados(df_cluster, id_ajuste, tuple(columnas_id + ['Cluster'] + variables))
+            
+            st.download_button(
+                label="⬇️ Descargar Resultados CSV",
+                data=csv,
+                file_name=f"clustering_resultados_{n_clusters}_clusters.csv",
+                mime="text/csv"
+            )
+            
+            # Resumen para exportar
+            summary_csv = cluster_summary.to_csv(encoding='utf-8-sig')
+            
+            st.download_button(
+                label="⬇️ Descargar Resumen de Clusters",
+                data=summary_csv,
+                file_name=f"clustering_resumen_{n_clusters}_clusters.csv",
+                mime="text/csv"
+            )
+            
+            st.success("✅ Archivos listos para descargar")
+
+def show_registro_modelos(df):
+    """6.4 Registro de modelos: asignación de clusters a datos nuevos y migración entre clusters"""
+    st.markdown("## 6.4 🗂️ Registro de Modelos")
+    
+    modelos = model_registry.list_models()
+    
+    if not modelos:
+        st.warning("⚠️ No hay modelos registrados. Genere y guarde un modelo en la sección 6.2")
+        return
+    
+    # Tabla de modelos registrados
+    st.markdown("### 📋 Modelos Registrados")
+    
+    tabla_modelos = pd.DataFrame([{
+        'Nombre': m['nombre'],
+        'Fecha': m['fecha'],
+        'Nivel': streaming_clustering.GRANULARIDADES[m.get('granularidad', 'operador_tecnologia_servicio')]['nombre'],
+        'Clusters': m['n_clusters'],
+        'Entrenamiento': f"{m['periodo_inicio'] // 10}-T{m['periodo_inicio'] % 10} a "
+                         f"{m['periodo_fin'] // 10}-T{m['periodo_fin'] % 10}",
+        'Variables': ', '.join(m['variables']),
+        'Silhouette': m['metricas'].get('silhouette')
+    } for m in modelos])
+    st.dataframe(tabla_modelos, use_container_width=True, hide_index=True)
+    
+    etiquetas = {m['id']: f"{m['nombre']} ({m['fecha']})" for m in modelos}
+    id_modelo = st.selectbox("Seleccione un modelo:", list(etiquetas.keys()), format_func=etiquetas.get)
+    bundle = model_registry.load_model(id_modelo)
+    granularidad = bundle['registro'].get('granularidad', 'operador_tecnologia_servicio')
+    clave = streaming_clustering.GRANULARIDADES[granularidad]['claves']
+    
+    def preparar(df_periodo):
+        return preparar_datos_clustering(df_periodo, granularidad)
+    
+    # Asignación de clusters al periodo seleccionado, sin reentrenar
+    st.markdown("### 🎯 Asignación de Clusters al Período Seleccionado")
+    
+    df_agg = preparar(df)
+    inicio = time.perf_counter()
+    df_scored = model_registry.score(bundle, df_agg)
+    duracion_ms = (time.perf_counter() - inicio) * 1000
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Unidades Asignadas", f"{len(df_scored):,}")
+    
+    with col2:
+        st.metric("Clusters", bundle['registro']['n_clusters'])
+    
+    with col3:
+        st.metric("Tiempo de Asignación", f"{duracion_ms:.1f} ms")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        fig1 = figure_cache.obtener('fig1', id_modelo)
+        if fig1 is None:
+            distribucion = df_scored['Cluster'].value_counts().sort_index()
+            fig1 = px.bar(
+                x=distribucion.index.astype(str),
+                y=distribucion.values,
+                title='Unidades por Cluster',
+                labels={'x': 'Cluster', 'y': 'Unidades'},
+                color=distribucion.values,
                 color_continuous_scale='Viridis'
             )
-            fig_3d.update_layout(height=500)
-            st.plotly_chart(fig_3d, use_container_width=True)
+            fig1.update_layout(showlegend=False, height=450)
+            fig1 = figure_cache.guardar('fig1', fig1, id_modelo)
+        st.plotly_chart(fig1, use_container_width=True)
     
-    with tab2:
-        # Características promedio por cluster
-        st.markdown("### 📊 Características Promedio por Cluster")
-        
-        # Seleccionar variables numéricas
-        numeric_cols = df_cluster[variables].select_dtypes(include=[np.number]).columns
-        
-        cluster_means = df_cluster.groupby('Cluster')[numeric_cols].mean()
-        
-        # Normalizar para comparación
-        cluster_means_norm = (cluster_means - cluster_means.min()) / (cluster_means.max() - cluster_means.min())
-        
-        # Gráfico de radar
-        fig_radar = go.Figure()
-        
-        for cluster_id in range(n_clusters):
-            fig_radar.add_trace(go.Scatterpolar(
-                r=cluster_means_norm.loc[cluster_id].values,
-                theta=cluster_means_norm.columns,
-                fill='toself',
-                name=f'Cluster {cluster_id}'
-            ))
-        
-        fig_radar.update_layout(
-            polar=dict(radialaxis=dict(visible=True, range=[0, 1])),
-            showlegend=True,
-            title="Perfil de Características (Normalizado)",
-            height=600
+    with col2:
+        if 'PCA1' in df_scored.columns:
+            fig2 = figure_cache.obtener('fig2', id_modelo)
+            if fig2 is None:
+                df_pca = downsample_scatter(df_scored, ['PCA1', 'PCA2'])
+                fig2 = px.scatter(
+                    df_pca.assign(Cluster=df_pca['Cluster'].astype(str)),
+                    x='PCA1',
+                    y='PCA2',
+                    color='Cluster',
+                    hover_data=clave,
+                    title='Proyección PCA del Modelo'
+                )
+                fig2.update_layout(height=450)
+                fig2 = figure_cache.guardar('fig2', fig2, id_modelo)
+            st.plotly_chart(fig2, use_container_width=True)
+    
+    # Migración entre clusters a lo largo del tiempo
+    st.markdown("### 🔀 Migración entre Clusters")
+    
+    if granularidad == 'registro':
+        st.info("ℹ️ Los registros individuales no se pueden seguir entre trimestres; la migración "
+                "entre clusters está disponible para los modelos agregados")
+        return
+    
+    asignaciones = model_registry.cluster_migration(bundle, df, preparar, clave=clave)
+    periodos = np.sort(asignaciones['PERIODO'].unique())
+    
+    if len(periodos) < 2:
+        st.info("ℹ️ Seleccione un rango de al menos dos trimestres para ver la migración entre clusters")
+        return
+    
+    etiqueta_periodo = {p: f"{p // 10}-T{p % 10}" for p in periodos}
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        periodo_origen = st.selectbox("Desde:", periodos[:-1], format_func=etiqueta_periodo.get)
+    
+    with col2:
+        # Por defecto el último trimestre del rango
+        periodo_destino = st.selectbox(
+            "Hasta:", periodos[periodos > periodo_origen][::-1], format_func=etiqueta_periodo.get
         )
-        
-        st.plotly_chart(fig_radar, use_container_width=True)
-        
-        # Heatmap de características
-        fig_heat = go.Figure(data=go.Heatmap(
-            z=cluster_means.T.values,
-            x=[f'Cluster {i}' for i in range(n_clusters)],
-            y=cluster_means.columns,
-            colorscale='RdYlBu_r',
-            text=cluster_means.T.values.round(2),
-            texttemplate='%{text}',
-            textfont={"size": 10}
-        ))
-        
-        fig_heat.update_layout(
-            title="Heatmap de Características por Cluster",
-            height=400
+    
+    origen = asignaciones[asignaciones['PERIODO'] == periodo_origen].set_index(clave)['Cluster']
+    destino = asignaciones[asignaciones['PERIODO'] == periodo_destino].set_index(clave)['Cluster']
+    transiciones = pd.concat([origen.rename('Origen'), destino.rename('Destino')], axis=1, join='inner')
+    
+    n_clusters = bundle['registro']['n_clusters']
+    fig3 = figure_cache.obtener('fig3', id_modelo, periodo_origen, periodo_destino)
+    fig4 = figure_cache.obtener('fig4', id_modelo, periodo_origen, periodo_destino)
+    if fig3 is None or fig4 is None:
+        matriz = pd.crosstab(transiciones['Origen'], transiciones['Destino']).reindex(
+            index=range(n_clusters), columns=range(n_clusters), fill_value=0
         )
-        
-        st.plotly_chart(fig_heat, use_container_width=True)
     
-    with tab3:
-        # Detalle por cluster seleccionado
-        st.markdown("### 🔍 Explorar Cluster Individual")
-        
-        cluster_selected = st.selectbox(
-            "Seleccione un cluster:",
-            range(n_clusters),
-            format_func=lambda x: f"Cluster {x}"
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Sankey de origen a destino
+        if fig3 is None:
+            fuentes, destinos, valores = [], [], []
+            for i in range(n_clusters):
+                for j in range(n_clusters):
+                    if matriz.iloc[i, j] > 0:
+                        fuentes.append(i)
+                        destinos.append(n_clusters + j)
+                        valores.append(int(matriz.iloc[i, j]))
+            
+            fig3 = go.Figure(go.Sankey(
+                node=dict(
+                    label=[f"C{i} {etiqueta_periodo[periodo_origen]}" for i in range(n_clusters)] +
+                          [f"C{j} {etiqueta_periodo[periodo_destino]}" for j in range(n_clusters)],
+                    pad=15
+                ),
+                link=dict(source=fuentes, target=destinos, value=valores)
+            ))
+            fig3.update_layout(title='Flujo de Unidades entre Clusters', height=500)
+            fig3 = figure_cache.guardar('fig3', fig3, id_modelo, periodo_origen, periodo_destino)
+        st.plotly_chart(fig3, use_container_width=True)
+    
+    with col2:
+        if fig4 is None:
+            fig4 = px.imshow(
+                matriz,
+                labels=dict(x="Cluster Destino", y="Cluster Origen", color="Unidades"),
+                title='Matriz de Transición',
+                color_continuous_scale='Blues',
+                text_auto=True,
+                aspect='auto'
+            )
+            fig4.update_layout(height=500)
+            fig4 = figure_cache.guardar('fig4', fig4, id_modelo, periodo_origen, periodo_destino)
+        st.plotly_chart(fig4, use_container_width=True)
+    
+    # Unidades que cambiaron de cluster
+    cambios = transiciones[transiciones['Origen'] != transiciones['Destino']].reset_index()
+    st.metric(
+        "Unidades que Cambiaron de Cluster",
+        f"{len(cambios):,} de {len(transiciones):,}",
+        f"{len(cambios) / len(transiciones) * 100:.1f}%" if len(transiciones) > 0 else None,
+        delta_color="off"
+    )
+    
+    with st.expander("📋 Ver Unidades que Cambiaron de Cluster"):
+        st.dataframe(cambios, use_container_width=True, hide_index=True, height=400)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _muestra_comparacion(_df_cluster, clave_configuracion, variables):
+    """
+    Muestra escalada de la comparación de algoritmos, en caché por configuración
+    de 6.1 (mismo preprocesamiento que 6.2: escalado por bloques en datos grandes)
+    """
+    filas_max = min(len(_df_cluster), max(TAMANOS_COMPARACION))
+    scaler = streaming_clustering.ajustar_scaler_por_bloques(
+        streaming_clustering.bloques_de_dataframe(_df_cluster), list(variables)
+    )
+    muestra = _df_cluster[list(variables)].sample(filas_max, random_state=RANDOM_STATE)
+    return scaler.transform(muestra.to_numpy(dtype=float))
+
+def show_comparacion_algoritmos(df):
+    """6.5 Comparación de algoritmos de clustering: tiempo, memoria y calidad"""
+    st.markdown("## 6.5 ⏱️ Comparación de Algoritmos")
+    
+    if 'cluster_config' not in st.session_state or 'variables' not in st.session_state.cluster_config:
+        st.warning("⚠️ Por favor, configure las variables en la sección 6.1 primero")
+        return
+    
+    st.markdown("""
+    Cada algoritmo se ajusta sobre **las mismas variables escaladas** de la sección 6.1, en muestras
+    de distintos tamaños, y se evalúa con las métricas de la sección 6.2. Sirve para elegir el algoritmo
+    más rápido con calidad adecuada según el volumen de datos.
+    """)
+    
+    config = st.session_state.cluster_config
+    df_cluster = config['df_cluster']
+    variables = config['variables']
+    motores = clustering_engines.MOTORES
+    
+    # Configuración de 6.1 (datos de origen, nivel y variables): identifica la muestra
+    # escalada y los resultados guardados, que se descartan si la configuración cambia
+    clave_configuracion = result_cache.clave_cache(
+        config['version_datos'], *config['periodos_datos'],
+        config.get('granularidad', 'operador_tecnologia_servicio'), list(variables), RANDOM_STATE
+    )
+    X = _muestra_comparacion(df_cluster, clave_configuracion, variables)
+    
+    col1, col2, col3 = st.columns([2, 2, 1])
+    
+    with col1:
+        motores_sel = st.multiselect(
+            "Algoritmos:",
+            list(motores.keys()),
+            default=list(motores.keys()),
+            format_func=lambda m: motores[m]['nombre']
         )
-        
-        df_cluster_sel = df_cluster[df_cluster['Cluster'] == cluster_selected]
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.metric("Registros", len(df_cluster_sel))
-        
-        with col2:
-            st.metric("Total Líneas", f"{df_cluster_sel['CANTIDAD_LINEAS_ACCESOS'].sum():,.0f}")
-        
-        with col3:
-            st.metric("Total Valor", f"${df_cluster_sel['VALOR_FACTURADO_O_COBRADO'].sum():,.0f}")
-        
-        # Top operadores en este cluster
-        st.markdown("#### 🏢 Top 10 Operadores")
-        top_ops = df_cluster_sel['EMPRESA'].value_counts().head(10)
-        
-        fig_ops = px.bar(
-            x=top_ops.values,
-            y=[op[:40] for op in top_ops.index],
-            orientation='h',
-            title=f'Top 10 Operadores en Cluster {cluster_selected}',
-            labels={'x': 'Frecuencia', 'y': 'Operador'}
+    
+    with col2:
+        tamanos_sel = st.multiselect(
+            "Tamaños de muestra (filas):",
+            TAMANOS_COMPARACION,
+            default=[t for t in TAMANOS_COMPARACION if t <= len(df_cluster)] or TAMANOS_COMPARACION[:1],
+            format_func=lambda t: f"{min(t, len(df_cluster)):,}"
+        )
+    
+    with col3:
+        n_clusters = st.number_input(
+            "Clusters (k):",
+            min_value=2,
+            max_value=15,
+            value=st.session_state.cluster_config.get('n_clusters', 4)
         )
-        fig_ops.update_layout(height=400)
-        st.plotly_chart(fig_ops, use_container_width=True)
+    
+    if not motores_sel or not tamanos_sel:
+        st.warning("⚠️ Seleccione al menos un algoritmo y un tamaño de muestra")
+        return
+    
+    if st.button("⏱️ Ejecutar Comparación", type="primary"):
+        barra = st.progress(0, text="Ajustando algoritmos...")
         
-        # Distribución de tecnologías
-        col1, col2 = st.columns(2)
+        def actualizar_progreso(completados, total, nombre):
+            barra.progress(completados / total, text=f"{nombre} listo ({completados}/{total})")
         
-        with col1:
-            st.markdown("#### 📡 Tecnologías")
-            tech_dist = df_cluster_sel['TECNOLOGIA'].value_counts()
-            fig_tech = px.pie(
-                values=tech_dist.values,
-                names=tech_dist.index,
-                title='Distribución de Tecnologías'
+        st.session_state.comparacion_algoritmos = {
+            'clave': clave_configuracion,
+            'ejecucion': time.time_ns(),
+            'resultados': comparar_motores(
+                X, n_clusters, motores_sel, tamanos_sel, on_progress=actualizar_progreso
             )
-            st.plotly_chart(fig_tech, use_container_width=True)
-        
-        with col2:
-            st.markdown("#### 📦 Servicios")
-            serv_dist = df_cluster_sel['SERVICIO_PAQUETE'].value_counts()
-            fig_serv = px.pie(
-                values=serv_dist.values,
-                names=serv_dist.index,
-                title='Distribución de Servicios'
+        }
+        barra.empty()
+    
+    comparacion = st.session_state.get('comparacion_algoritmos')
+    if comparacion is None or comparacion['clave'] != clave_configuracion:
+        st.info("ℹ️ Presione **Ejecutar Comparación** para medir los algoritmos seleccionados")
+        return
+    
+    resultados = comparacion['resultados']
+    ejecucion = comparacion['ejecucion']
+    
+    evaluados = resultados[resultados['Estado'] == 'OK']
+    if evaluados.empty:
+        st.info("ℹ️ Ningún algoritmo se pudo evaluar en los tamaños seleccionados. Elija tamaños menores o "
+                "agregue un algoritmo sin límite de filas.")
+        st.dataframe(resultados, use_container_width=True, hide_index=True)
+        return
+    
+    # Resultados del mayor tamaño evaluado
+    st.markdown("### 🏁 Resultados en la Muestra más Grande")
+    
+    mayor = evaluados[evaluados['Filas'] == evaluados['Filas'].max()]
+    mas_rapido = mayor.loc[mayor['Tiempo (s)'].idxmin()]
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Más Rápido", mas_rapido['Algoritmo'], f"{mas_rapido['Tiempo (s)']:.2f} s", delta_color="off")
+    
+    with col2:
+        menor_memoria = mayor.loc[mayor['Memoria Pico (MB)'].idxmin()]
+        st.metric("Menor Memoria", menor_memoria['Algoritmo'], f"{menor_memoria['Memoria Pico (MB)']:.1f} MB",
+                  delta_color="off")
+    
+    with col3:
+        if 'Silhouette' in mayor.columns and mayor['Silhouette'].notna().any():
+            mejor = mayor.loc[mayor['Silhouette'].idxmax()]
+            st.metric("Mejor Silhouette", mejor['Algoritmo'], f"{mejor['Silhouette']:.3f}", delta_color="off")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        fig1 = figure_cache.obtener('fig1', ejecucion)
+        if fig1 is None:
+            fig1 = px.line(
+                evaluados,
+                x='Filas',
+                y='Tiempo (s)',
+                color='Algoritmo',
+                markers=True,
+                log_y=True,
+                title='Tiempo de Ajuste por Tamaño de Muestra'
             )
-            st.plotly_chart(fig_serv, use_container_width=True)
+            fig1.update_layout(height=450)
+            fig1 = figure_cache.guardar('fig1', fig1, ejecucion)
+        st.plotly_chart(fig1, use_container_width=True)
     
-    with tab4:
-        # Exportación
-        st.markdown("### 📥 Exportar Resultados")
-        
-        st.markdown("""
-        Descargue los resultados del clustering en formato CSV para análisis adicional.
-        """)
-        
-        # Preparar CSV
-        df_export = df_cluster[['EMPRESA', 'TECNOLOGIA', 'SERVICIO_PAQUETE', 'Cluster'] + variables]
-        
-        csv = df_export.to_csv(index=False, encoding='utf-8-sig')
-        
-        st.download_button(
-            label="⬇️ Descargar Resultados CSV",
-            data=csv,
-            file_name=f"clustering_resultados_{n_clusters}_clusters.csv",
-            mime="text/csv"
-        )
-        
-        # Resumen para exportar
-        summary_csv = cluster_summary.to_csv(encoding='utf-8-sig')
-        
-        st.download_button(
-            label="⬇️ Descargar Resumen de Clusters",
-            data=summary_csv,
-            file_name=f"clustering_resumen_{n_clusters}_clusters.csv",
-            mime="text/csv"
-        )
-        
-        st.success("✅ Archivos listos para descargar")
\ No newline at end of file
+    with col2:
+        fig2 = figure_cache.obtener('fig2', ejecucion)
+        if fig2 is None:
+            fig2 = px.line(
+                evaluados,
+                x='Filas',
+                y='Memoria Pico (MB)',
+                color='Algoritmo',
+                markers=True,
+                title='Memoria Pico por Tamaño de Muestra'
+            )
+            fig2.update_layout(height=450)
+            fig2 = figure_cache.guardar('fig2', fig2, ejecucion)
+        st.plotly_chart(fig2, use_container_width=True)
+    
+    if 'Silhouette' in evaluados.columns:
+        fig3 = figure_cache.obtener('fig3', ejecucion)
+        if fig3 is None:
+            fig3 = px.bar(
+                evaluados,
+                x=evaluados['Filas'].map('{:,}'.format),
+                y='Silhouette',
+                color='Algoritmo',
+                barmode='group',
+                title='Silhouette por Algoritmo y Tamaño de Muestra',
+                labels={'x': 'Filas'}
+            )
+            fig3.update_layout(height=450)
+            fig3 = figure_cache.guardar('fig3', fig3, ejecucion)
+        st.plotly_chart(fig3, use_container_width=True)
+    
+    st.caption("La memoria pico es la asignada por Python/NumPy durante el ajuste (tracemalloc), medida en "
+               "un ajuste aparte para que no afecte el tiempo.")
+    
+    st.dataframe(resultados.style.format({
+        'Filas': '{:,.0f}',
+        'Tiempo (s)': '{:.3f}',
+        'Memoria Pico (MB)': '{:.1f}',
+        'Clusters': '{:.0f}',
+        'Ruido (%)': '{:.1f}',
+        'Silhouette': '{:.3f}',
+        'Calinski-Harabasz': '{:.1f}',
+        'Davies-Bouldin': '{:.3f}'
+    }, na_rep='-'), use_container_width=True, hide_index=True)
+    
+    st.download_button(
+        label="⬇️ Descargar Comparación CSV",
+        data=resultados.to_csv(index=False, encoding='utf-8-sig'),
+        file_name="comparacion_algoritmos_clustering.csv",
+        mime="text/csv"
+    )
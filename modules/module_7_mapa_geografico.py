@@ -6,59 +6,131 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+from utils import company_search, data_loader, figure_cache, geo_index, hex_bins, geo_boundaries
+from utils.geo_index import agregar_coordenadas
 
-# Coordenadas aproximadas de los departamentos de Colombia (centroides)
-COORDS_DEPARTAMENTOS = {
-    'AMAZONAS': {'lat': -1.44, 'lon': -71.94},
-    'ANTIOQUIA': {'lat': 6.25, 'lon': -75.56},
-    'ARAUCA': {'lat': 7.08, 'lon': -70.76},
-    'ARCHIPIÉLAGO DE SAN ANDRÉS, PROVIDENCIA Y SANTA CATALINA': {'lat': 12.58, 'lon': -81.70},
-    'ATLÁNTICO': {'lat': 10.70, 'lon': -74.92},
-    'BOGOTÁ D.C.': {'lat': 4.71, 'lon': -74.07},
-    'BOLÍVAR': {'lat': 8.67, 'lon': -74.03},
-    'BOYACÁ': {'lat': 5.45, 'lon': -73.36},
-    'CALDAS': {'lat': 5.29, 'lon': -75.25},
-    'CAQUETA': {'lat': 0.87, 'lon': -73.84},
-    'CASANARE': {'lat': 5.76, 'lon': -71.57},
-    'CAUCA': {'lat': 2.70, 'lon': -76.82},
-    'CESAR': {'lat': 9.33, 'lon': -73.65},
-    'CHOCÓ': {'lat': 5.25, 'lon': -76.82},
-    'CÓRDOBA': {'lat': 8.05, 'lon': -75.57},
-    'CUNDINAMARCA': {'lat': 5.02, 'lon': -74.03},
-    'GUAINÍA': {'lat': 2.58, 'lon': -68.52},
-    'GUAVIARE': {'lat': 1.91, 'lon': -72.64},
-    'HUILA': {'lat': 2.54, 'lon': -75.78},
-    'LA GUAJIRA': {'lat': 11.35, 'lon': -72.52},
-    'MAGDALENA': {'lat': 10.41, 'lon': -74.41},
-    'META': {'lat': 3.30, 'lon': -73.28},
-    'NARIÑO': {'lat': 1.29, 'lon': -77.35},
-    'NORTE DE SANTANDER': {'lat': 7.94, 'lon': -72.90},
-    'PUTUMAYO': {'lat': 0.49, 'lon': -75.52},
-    'QUINDÍO': {'lat': 4.46, 'lon': -75.67},
-    'RISARALDA': {'lat': 5.31, 'lon': -75.99},
-    'SANTANDER': {'lat': 6.64, 'lon': -73.65},
-    'SUCRE': {'lat': 8.81, 'lon': -74.72},
-    'TOLIMA': {'lat': 4.09, 'lon': -75.15},
-    'VALLE DEL CAUCA': {'lat': 3.80, 'lon': -76.64},
-    'VAUPÉS': {'lat': 0.85, 'lon': -70.81},
-    'VICHADA': {'lat': 4.42, 'lon': -69.29}
-}
+# Mapa base de los mapas municipales (trazas WebGL de MapLibre); con límites
+# locales de departamentos se usa un fondo blanco sin teselas de internet
+ESTILO_MAPA_MUNICIPAL = 'carto-positron'
+ESTILO_MAPA_LOCAL = 'white-bg'
 
-def agregar_coordenadas(df):
-    """Agrega coordenadas geográficas al dataframe"""
-    df_map = df.copy()
-    
-    # Normalizar nombres de departamentos
-    df_map['DEPARTAMENTO'] = df_map['DEPARTAMENTO'].str.upper().str.strip()
-    
-    # Agregar coordenadas
-    df_map['lat'] = df_map['DEPARTAMENTO'].map(lambda x: COORDS_DEPARTAMENTOS.get(x, {}).get('lat'))
-    df_map['lon'] = df_map['DEPARTAMENTO'].map(lambda x: COORDS_DEPARTAMENTOS.get(x, {}).get('lon'))
+OPCIONES_DETALLE = ['departamento'] + list(hex_bins.NIVELES_DETALLE)
+
+def _selector_detalle(clave):
+    """Selector del detalle del mapa: departamentos o celdas municipales"""
+    return st.select_slider(
+        "Detalle geográfico:",
+        options=OPCIONES_DETALLE,
+        format_func=lambda x: 'Departamentos' if x == 'departamento' else hex_bins.NIVELES_DETALLE[x]['nombre'],
+        key=clave
+    )
+
+@st.cache_data(show_spinner=False)
+def _celdas_municipios(version):
+    """Celdas de cada municipio en todos los niveles de detalle (una vez por versión del dataset)"""
+    indice = geo_index.construir_indice_municipios(data_loader.load_data())
+    return hex_bins.asignar_celdas(indice)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _agregado_celdas(_df, version, periodo_inicio, periodo_fin, filtro, nivel, agregaciones, nombres, dominante):
+    """Agregación por celda de un nivel de detalle, cacheada por periodo y filtro"""
+    df_celdas = hex_bins.agregar_por_celda(_df, _celdas_municipios(version)[nivel], agregaciones,
+                                           dominante=dominante)
+    return df_celdas.rename(columns=nombres)
+
+def preparar_mapa_municipal(df, nivel, agregaciones, nombres, filtro='', dominante=None):
+    """
+    Agrega los registros por celda hexagonal (o por municipio) para el mapa.
+    
+    Args:
+        df: Registros filtrados del periodo
+        nivel: Clave de hex_bins.NIVELES_DETALLE
+        agregaciones: Diccionario columna -> función para groupby.agg
+        nombres: Nombres de las columnas agregadas en el mapa
+        filtro: Descripción del filtro aplicado a df (parte de la clave de caché)
+        dominante: Columna categórica cuyo valor dominante se reporta por celda
+    
+    Returns:
+        pd.DataFrame: Una fila por celda con lat, lon y las métricas
+    """
+    periodos = df['ANNO'] * 10 + df['TRIMESTRE']
+    return _agregado_celdas(
+        df, data_loader.get_dataset_version(), int(periodos.min()), int(periodos.max()),
+        filtro, nivel, agregaciones, nombres, dominante
+    )
+
+def figura_coropleta(df_mapa, nivel, columna_codigo, color, hover_name, hover_data, titulo, **kwargs):
+    """
+    Mapa coroplético WebGL con los límites locales de las unidades de la vista,
+    en la resolución más detallada que permite su número de puntos.
+    
+    Args:
+        df_mapa: Una fila por unidad con su código DIVIPOLA
+        nivel: 'departamento' o 'municipio'
+        columna_codigo: Columna con el código DIVIPOLA
+        color: Columna que colorea los polígonos
+        hover_name: Columna con el nombre de la unidad
+        hover_data: Columnas (y formatos) del tooltip
+        titulo: Título del mapa
+    
+    Returns:
+        go.Figure: Mapa coroplético
+    """
+    limites = geo_boundaries.limites_vista(nivel, df_mapa[columna_codigo])
+    
+    fig = px.choropleth_map(
+        df_mapa,
+        geojson=limites,
+        locations=columna_codigo,
+        color=color,
+        hover_name=hover_name,
+        hover_data={**hover_data, columna_codigo: False},
+        zoom=4.3,
+        center=dict(lat=4.5, lon=-74),
+        map_style=ESTILO_MAPA_LOCAL,
+        opacity=0.85,
+        title=titulo,
+        **kwargs
+    )
+    fig.update_traces(marker_line_width=0.5, marker_line_color='white')
+    fig.update_layout(height=600, margin=dict(l=0, r=0, t=40, b=0))
+    return fig
+
+def figura_mapa_municipal(df_celdas, nivel, size, color, hover_data, titulo, **kwargs):
+    """
+    Mapa WebGL de celdas municipales con el zoom inicial del nivel de detalle.
+    Sin agrupar y con límites municipales locales se dibuja como coroplético.
+    """
+    if nivel == 'municipio' and geo_boundaries.disponible('municipio'):
+        return figura_coropleta(df_celdas, 'municipio', 'CELDA', color, 'Municipio_Principal',
+                                hover_data, titulo, **kwargs)
+    
+    fig = px.scatter_map(
+        df_celdas,
+        lat='lat',
+        lon='lon',
+        size=size,
+        color=color,
+        hover_name='Municipio_Principal',
+        hover_data={**hover_data, 'N_Municipios': True, 'lat': False, 'lon': False},
+        size_max=40,
+        zoom=hex_bins.NIVELES_DETALLE[nivel]['zoom'],
+        center=dict(lat=4.5, lon=-74),
+        map_style=ESTILO_MAPA_MUNICIPAL,
+        title=titulo,
+        **kwargs
+    )
     
-    # Filtrar registros sin coordenadas
-    df_map = df_map.dropna(subset=['lat', 'lon'])
+    if geo_boundaries.disponible('departamento'):
+        # Contorno de departamentos como fondo, sin teselas externas
+        limites, _ = geo_boundaries.cargar_limites('departamento', 'media')
+        fig.update_layout(
+            map_style=ESTILO_MAPA_LOCAL,
+            map_layers=[dict(source=limites, type='line', color='gray', line=dict(width=0.7), below='traces')]
+        )
     
-    return df_map
+    fig.update_layout(height=600, margin=dict(l=0, r=0, t=40, b=0))
+    return fig
 
 def show_mapa_cobertura(df):
     """7.1 Mapa de cobertura por departamento"""
@@ -70,22 +142,25 @@ def show_mapa_cobertura(df):
     """)
     
     # Preparar datos agregados por departamento
-    df_dept = df.groupby('DEPARTAMENTO').agg({
+    df_dept = df.groupby(['ID_DEPARTAMENTO', 'DEPARTAMENTO']).agg({
         'CANTIDAD_LINEAS_ACCESOS': 'sum',
         'VALOR_FACTURADO_O_COBRADO': 'sum',
         'EMPRESA': 'nunique',
         'MUNICIPIO': 'nunique'
     }).reset_index()
     
-    df_dept.columns = ['DEPARTAMENTO', 'Total_Lineas', 'Total_Valor', 'N_Operadores', 'N_Municipios']
+    df_dept.columns = ['ID_DEPARTAMENTO', 'DEPARTAMENTO', 'Total_Lineas', 'Total_Valor', 'N_Operadores', 'N_Municipios']
     
     # Agregar coordenadas
-    df_map = agregar_coordenadas(df_dept)
+    df_map, sin_coordenadas = agregar_coordenadas(df_dept)
     
     if len(df_map) == 0:
         st.error("❌ No se pudieron cargar las coordenadas de los departamentos")
         return
     
+    if sin_coordenadas:
+        st.caption(f"⚠️ {sin_coordenadas} departamento(s) sin código DIVIPOLA reconocido no se muestran en el mapa")
+    
     # Métricas generales
     col1, col2, col3, col4 = st.columns(4)
     
@@ -119,71 +194,99 @@ def show_mapa_cobertura(df):
         )
         
         escala_log = st.checkbox("Escala logarítmica", value=False)
+        
+        detalle = _selector_detalle('detalle_mapa_cobertura')
     
     with col1:
-        # Crear mapa
-        fig = px.scatter_geo(
-            df_map,
-            lat='lat',
-            lon='lon',
-            size='Total_Lineas',
-            color=metrica_color,
-            hover_name='DEPARTAMENTO',
-            hover_data={
-                'Total_Lineas': ':,.0f',
-                'Total_Valor': ':$,.0f',
-                'N_Operadores': True,
-                'N_Municipios': True,
-                'lat': False,
-                'lon': False
-            },
-            size_max=50,
-            color_continuous_scale='Viridis',
-            title='Mapa de Cobertura de Servicios Fijos - Colombia'
-        )
-        
-        # Configurar el mapa centrado en Colombia
-        fig.update_geos(
-            center=dict(lat=4.5, lon=-74),
-            projection_scale=4,
-            visible=True,
-            showcountries=True,
-            countrycolor="lightgray",
-            showcoastlines=True,
-            coastlinecolor="gray",
-            showland=True,
-            landcolor="rgb(243, 243, 243)",
-            showlakes=True,
-            lakecolor="rgb(204, 230, 255)"
-        )
-        
-        if escala_log:
-            fig.update_traces(marker=dict(sizemode='diameter'))
-        
-        fig.update_layout(
-            height=600,
-            margin=dict(l=0, r=0, t=40, b=0)
-        )
-        
+        fig = figure_cache.obtener('fig', metrica_color, escala_log, detalle)
+        if fig is None:
+            if detalle != 'departamento':
+                df_celdas = preparar_mapa_municipal(
+                    df, detalle,
+                    {'CANTIDAD_LINEAS_ACCESOS': 'sum', 'VALOR_FACTURADO_O_COBRADO': 'sum', 'EMPRESA': 'nunique'},
+                    {'CANTIDAD_LINEAS_ACCESOS': 'Total_Lineas', 'VALOR_FACTURADO_O_COBRADO': 'Total_Valor',
+                     'EMPRESA': 'N_Operadores'}
+                )
+                fig = figura_mapa_municipal(
+                    df_celdas, detalle, 'Total_Lineas', metrica_color,
+                    {'Total_Lineas': ':,.0f', 'Total_Valor': ':$,.0f', 'N_Operadores': True},
+                    'Mapa de Cobertura de Servicios Fijos por Municipio - Colombia',
+                    color_continuous_scale='Viridis'
+                )
+            elif geo_boundaries.disponible('departamento'):
+                fig = figura_coropleta(
+                    df_map, 'departamento', 'ID_DEPARTAMENTO', metrica_color, 'DEPARTAMENTO',
+                    {'Total_Lineas': ':,.0f', 'Total_Valor': ':$,.0f', 'N_Operadores': True, 'N_Municipios': True},
+                    'Mapa de Cobertura de Servicios Fijos - Colombia',
+                    color_continuous_scale='Viridis'
+                )
+            else:
+                # Crear mapa
+                fig = px.scatter_geo(
+                    df_map,
+                    lat='lat',
+                    lon='lon',
+                    size='Total_Lineas',
+                    color=metrica_color,
+                    hover_name='DEPARTAMENTO',
+                    hover_data={
+                        'Total_Lineas': ':,.0f',
+                        'Total_Valor': ':$,.0f',
+                        'N_Operadores': True,
+                        'N_Municipios': True,
+                        'lat': False,
+                        'lon': False
+                    },
+                    size_max=50,
+                    color_continuous_scale='Viridis',
+                    title='Mapa de Cobertura de Servicios Fijos - Colombia'
+                )
+                
+                # Configurar el mapa centrado en Colombia
+                fig.update_geos(
+                    center=dict(lat=4.5, lon=-74),
+                    projection_scale=4,
+                    visible=True,
+                    showcountries=True,
+                    countrycolor="lightgray",
+                    showcoastlines=True,
+                    coastlinecolor="gray",
+                    showland=True,
+                    landcolor="rgb(243, 243, 243)",
+                    showlakes=True,
+                    lakecolor="rgb(204, 230, 255)"
+                )
+                
+                if escala_log:
+                    fig.update_traces(marker=dict(sizemode='diameter'))
+                
+                fig.update_layout(
+                    height=600,
+                    margin=dict(l=0, r=0, t=40, b=0)
+                )
+            fig = figure_cache.guardar('fig', fig, metrica_color, escala_log, detalle)
         st.plotly_chart(fig, use_container_width=True)
     
     # Top 10 departamentos
     st.markdown("### 📊 Top 10 Departamentos por Número de Líneas")
     
-    top_10 = df_map.nlargest(10, 'Total_Lineas')[['DEPARTAMENTO', 'Total_Lineas', 'Total_Valor', 'N_Operadores', 'N_Municipios']]
-    
-    fig_bar = px.bar(
-        top_10,
-        x='Total_Lineas',
-        y='DEPARTAMENTO',
-        orientation='h',
-        title='Top 10 Departamentos',
-        color='Total_Lineas',
-        color_continuous_scale='Blues',
-        hover_data=['Total_Valor', 'N_Operadores']
-    )
-    
-    fig_bar.update_layout(showlegend=False, height=400)
+    fig_bar = figure_cache.obtener('fig_bar')
+    if fig_bar is None:
+        top_10 = df_map.nlargest(10, 'Total_Lineas')[['DEPARTAMENTO', 'Total_Lineas', 'Total_Valor', 'N_Operadores', 'N_Municipios']]
+        
+        fig_bar = px.bar(
+            top_10,
+            x='Total_Lineas',
+            y='DEPARTAMENTO',
+            orientation='h',
+            title='Top 10 Departamentos',
+            color='Total_Lineas',
+            color_continuous_scale='Blues',
+            hover_data=['Total_Valor', 'N_Operadores']
+        )
+        
+        fig_bar.update_layout(showlegend=False, height=400)
+        fig_bar = figure_cache.guardar('fig_bar', fig_bar)
     st.plotly_chart(fig_bar, use_container_width=True)
     
     # Tabla detallada
@@ -206,22 +309,25 @@ def show_mapa_valor(df):
     """)
     
     # Preparar datos
-    df_dept = df.groupby('DEPARTAMENTO').agg({
+    df_dept = df.groupby(['ID_DEPARTAMENTO', 'DEPARTAMENTO']).agg({
         'VALOR_FACTURADO_O_COBRADO': 'sum',
         'CANTIDAD_LINEAS_ACCESOS': 'sum',
         'EMPRESA': 'nunique'
     }).reset_index()
     
-    df_dept.columns = ['DEPARTAMENTO', 'Total_Valor', 'Total_Lineas', 'N_Operadores']
+    df_dept.columns = ['ID_DEPARTAMENTO', 'DEPARTAMENTO', 'Total_Valor', 'Total_Lineas', 'N_Operadores']
     df_dept['Valor_Por_Linea'] = df_dept['Total_Valor'] / df_dept['Total_Lineas']
     
     # Agregar coordenadas
-    df_map = agregar_coordenadas(df_dept)
+    df_map, sin_coordenadas = agregar_coordenadas(df_dept)
     
     if len(df_map) == 0:
         st.error("❌ No se pudieron cargar las coordenadas")
         return
     
+    if sin_coordenadas:
+        st.caption(f"⚠️ {sin_coordenadas} departamento(s) sin código DIVIPOLA reconocido no se muestran en el mapa")
+    
     # Métricas
     col1, col2, col3 = st.columns(3)
     
@@ -240,36 +346,63 @@ def show_mapa_valor(df):
     tab1, tab2, tab3 = st.tabs(["🗺️ Mapa", "📊 Gráficas", "📈 Comparación"])
     
     with tab1:
-        # Mapa de valor total
-        fig_map = px.scatter_geo(
-            df_map,
-            lat='lat',
-            lon='lon',
-            size='Total_Valor',
-            color='Valor_Por_Linea',
-            hover_name='DEPARTAMENTO',
-            hover_data={
-                'Total_Valor': ':$,.0f',
-                'Total_Lineas': ':,.0f',
-                'Valor_Por_Linea': ':$,.0f',
-                'N_Operadores': True,
-                'lat': False,
-                'lon': False
-            },
-            size_max=60,
-            color_continuous_scale='RdYlGn',
-            title='Valor Facturado por Departamento'
-        )
-        
-        fig_map.update_geos(
-            center=dict(lat=4.5, lon=-74),
-            projection_scale=4,
-            visible=True,
-            showcountries=True,
-            countrycolor="lightgray"
-        )
-        
-        fig_map.update_layout(height=600, margin=dict(l=0, r=0, t=40, b=0))
+        detalle = _selector_detalle('detalle_mapa_valor')
+        
+        fig_map = figure_cache.obtener('fig_map', detalle)
+        if fig_map is None:
+            if detalle != 'departamento':
+                df_celdas = preparar_mapa_municipal(
+                    df, detalle,
+                    {'VALOR_FACTURADO_O_COBRADO': 'sum', 'CANTIDAD_LINEAS_ACCESOS': 'sum', 'EMPRESA': 'nunique'},
+                    {'VALOR_FACTURADO_O_COBRADO': 'Total_Valor', 'CANTIDAD_LINEAS_ACCESOS': 'Total_Lineas',
+                     'EMPRESA': 'N_Operadores'}
+                )
+                df_celdas['Valor_Por_Linea'] = df_celdas['Total_Valor'] / df_celdas['Total_Lineas'].replace(0, np.nan)
+                fig_map = figura_mapa_municipal(
+                    df_celdas, detalle, 'Total_Valor', 'Valor_Por_Linea',
+                    {'Total_Valor': ':$,.0f', 'Total_Lineas': ':,.0f', 'Valor_Por_Linea': ':$,.0f', 'N_Operadores': True},
+                    'Valor Facturado por Municipio',
+                    color_continuous_scale='RdYlGn'
+                )
+            elif geo_boundaries.disponible('departamento'):
+                fig_map = figura_coropleta(
+                    df_map, 'departamento', 'ID_DEPARTAMENTO', 'Valor_Por_Linea', 'DEPARTAMENTO',
+                    {'Total_Valor': ':$,.0f', 'Total_Lineas': ':,.0f', 'Valor_Por_Linea': ':$,.0f', 'N_Operadores': True},
+                    'Valor Facturado por Departamento',
+                    color_continuous_scale='RdYlGn'
+                )
+            else:
+                # Mapa de valor total
+                fig_map = px.scatter_geo(
+                    df_map,
+                    lat='lat',
+                    lon='lon',
+                    size='Total_Valor',
+                    color='Valor_Por_Linea',
+                    hover_name='DEPARTAMENTO',
+                    hover_data={
+                        'Total_Valor': ':$,.0f',
+                        'Total_Lineas': ':,.0f',
+                        'Valor_Por_Linea': ':$,.0f',
+                        'N_Operadores': True,
+                        'lat': False,
+                        'lon': False
+                    },
+                    size_max=60,
+                    color_continuous_scale='RdYlGn',
+                    title='Valor Facturado por Departamento'
+                )
+                
+                fig_map.update_geos(
+                    center=dict(lat=4.5, lon=-74),
+                    projection_scale=4,
+                    visible=True,
+                    showcountries=True,
+                    countrycolor="lightgray"
+                )
+                
+                fig_map.update_layout(height=600, margin=dict(l=0, r=0, t=40, b=0))
+            fig_map = figure_cache.guardar('fig_map', fig_map, detalle)
         st.plotly_chart(fig_map, use_container_width=True)
     
     with tab2:
@@ -277,55 +410,62 @@ def show_mapa_valor(df):
         
         with col1:
             # Top 10 por valor total
-            top_10_valor = df_map.nlargest(10, 'Total_Valor')
-            
-            fig1 = px.bar(
-                top_10_valor,
-                x='Total_Valor',
-                y='DEPARTAMENTO',
-                orientation='h',
-                title='Top 10 por Valor Total Facturado',
-                color='Total_Valor',
-                color_continuous_scale='Blues'
-            )
-            fig1.update_layout(showlegend=False, height=400)
+            fig1 = figure_cache.obtener('fig1')
+            if fig1 is None:
+                top_10_valor = df_map.nlargest(10, 'Total_Valor')
+                fig1 = px.bar(
+                    top_10_valor,
+                    x='Total_Valor',
+                    y='DEPARTAMENTO',
+                    orientation='h',
+                    title='Top 10 por Valor Total Facturado',
+                    color='Total_Valor',
+                    color_continuous_scale='Blues'
+                )
+                fig1.update_layout(showlegend=False, height=400)
+                fig1 = figure_cache.guardar('fig1', fig1)
             st.plotly_chart(fig1, use_container_width=True)
         
         with col2:
             # Top 10 por valor por línea
-            top_10_vpl = df_map.nlargest(10, 'Valor_Por_Linea')
-            
-            fig2 = px.bar(
-                top_10_vpl,
-                x='Valor_Por_Linea',
-                y='DEPARTAMENTO',
-                orientation='h',
-                title='Top 10 por Valor Promedio por Línea',
-                color='Valor_Por_Linea',
-                color_continuous_scale='Greens'
-            )
-            fig2.update_layout(showlegend=False, height=400)
+            fig2 = figure_cache.obtener('fig2')
+            if fig2 is None:
+                top_10_vpl = df_map.nlargest(10, 'Valor_Por_Linea')
+                fig2 = px.bar(
+                    top_10_vpl,
+                    x='Valor_Por_Linea',
+                    y='DEPARTAMENTO',
+                    orientation='h',
+                    title='Top 10 por Valor Promedio por Línea',
+                    color='Valor_Por_Linea',
+                    color_continuous_scale='Greens'
+                )
+                fig2.update_layout(showlegend=False, height=400)
+                fig2 = figure_cache.guardar('fig2', fig2)
             st.plotly_chart(fig2, use_container_width=True)
     
     with tab3:
         # Scatter plot: Líneas vs Valor
-        fig_scatter = px.scatter(
-            df_map,
-            x='Total_Lineas',
-            y='Total_Valor',
-            size='N_Operadores',
-            color='Valor_Por_Linea',
-            hover_name='DEPARTAMENTO',
-            title='Relación entre Líneas y Valor Facturado',
-            labels={
-                'Total_Lineas': 'Total de Líneas',
-                'Total_Valor': 'Valor Facturado (COP)',
-                'Valor_Por_Linea': 'Valor por Línea'
-            },
-            color_continuous_scale='Viridis'
-        )
-        
-        fig_scatter.update_layout(height=500)
+        fig_scatter = figure_cache.obtener('fig_scatter')
+        if fig_scatter is None:
+            fig_scatter = px.scatter(
+                df_map,
+                x='Total_Lineas',
+                y='Total_Valor',
+                size='N_Operadores',
+                color='Valor_Por_Linea',
+                hover_name='DEPARTAMENTO',
+                title='Relación entre Líneas y Valor Facturado',
+                labels={
+                    'Total_Lineas': 'Total de Líneas',
+                    'Total_Valor': 'Valor Facturado (COP)',
+                    'Valor_Por_Linea': 'Valor por Línea'
+                },
+                color_continuous_scale='Viridis'
+            )
+            
+            fig_scatter.update_layout(height=500)
+            fig_scatter = figure_cache.guardar('fig_scatter', fig_scatter)
         st.plotly_chart(fig_scatter, use_container_width=True)
         
         st.info("""
@@ -364,14 +504,14 @@ def show_mapa_tecnologias(df):
     # Preparar datos
     if tecnologia_seleccionada == 'Todas':
         # Mostrar tecnología dominante por departamento
-        df_tech = df_filtered.groupby(['DEPARTAMENTO', 'TECNOLOGIA']).agg({
+        df_tech = df_filtered.groupby(['ID_DEPARTAMENTO', 'DEPARTAMENTO', 'TECNOLOGIA']).agg({
             'CANTIDAD_LINEAS_ACCESOS': 'sum'
         }).reset_index()
         
         # Encontrar tecnología dominante
         idx = df_tech.groupby('DEPARTAMENTO')['CANTIDAD_LINEAS_ACCESOS'].idxmax()
         df_dept = df_tech.loc[idx].reset_index(drop=True)
-        df_dept.columns = ['DEPARTAMENTO', 'Tecnologia_Dominante', 'Lineas_Tecnologia']
+        df_dept.columns = ['ID_DEPARTAMENTO', 'DEPARTAMENTO', 'Tecnologia_Dominante', 'Lineas_Tecnologia']
         
         # Agregar total de líneas por departamento
         df_total = df_filtered.groupby('DEPARTAMENTO')['CANTIDAD_LINEAS_ACCESOS'].sum().reset_index()
@@ -380,19 +520,22 @@ def show_mapa_tecnologias(df):
         df_dept = df_dept.merge(df_total, on='DEPARTAMENTO')
         df_dept['Porcentaje'] = (df_dept['Lineas_Tecnologia'] / df_dept['Total_Lineas'] * 100).round(2)
     else:
-        df_dept = df_filtered.groupby('DEPARTAMENTO').agg({
+        df_dept = df_filtered.groupby(['ID_DEPARTAMENTO', 'DEPARTAMENTO']).agg({
             'CANTIDAD_LINEAS_ACCESOS': 'sum',
             'EMPRESA': 'nunique'
         }).reset_index()
-        df_dept.columns = ['DEPARTAMENTO', 'Lineas_Tecnologia', 'N_Operadores']
+        df_dept.columns = ['ID_DEPARTAMENTO', 'DEPARTAMENTO', 'Lineas_Tecnologia', 'N_Operadores']
     
     # Agregar coordenadas
-    df_map = agregar_coordenadas(df_dept)
+    df_map, sin_coordenadas = agregar_coordenadas(df_dept)
     
     if len(df_map) == 0:
         st.error("❌ No hay datos disponibles para esta selección")
         return
     
+    if sin_coordenadas:
+        st.caption(f"⚠️ {sin_coordenadas} departamento(s) sin código DIVIPOLA reconocido no se muestran en el mapa")
+    
     # Métricas
     col1, col2, col3 = st.columns(3)
     
@@ -411,73 +554,120 @@ def show_mapa_tecnologias(df):
     st.markdown("---")
     
     # Mapa
+    detalle = _selector_detalle('detalle_mapa_tecnologias')
+    
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        if tecnologia_seleccionada == 'Todas':
-            # Mapa coloreado por tecnología dominante
-            fig_map = px.scatter_geo(
-                df_map,
-                lat='lat',
-                lon='lon',
-                size='Total_Lineas',
-                color='Tecnologia_Dominante',
-                hover_name='DEPARTAMENTO',
-                hover_data={
-                    'Tecnologia_Dominante': True,
-                    'Lineas_Tecnologia': ':,.0f',
-                    'Total_Lineas': ':,.0f',
-                    'Porcentaje': ':.1f%',
-                    'lat': False,
-                    'lon': False
-                },
-                size_max=50,
-                title='Tecnología Dominante por Departamento'
-            )
-        else:
-            # Mapa de líneas con la tecnología específica
-            fig_map = px.scatter_geo(
-                df_map,
-                lat='lat',
-                lon='lon',
-                size='Lineas_Tecnologia',
-                color='Lineas_Tecnologia',
-                hover_name='DEPARTAMENTO',
-                hover_data={
-                    'Lineas_Tecnologia': ':,.0f',
-                    'N_Operadores': True,
-                    'lat': False,
-                    'lon': False
-                },
-                size_max=50,
-                color_continuous_scale='Oranges',
-                title=f'Distribución de {tecnologia_seleccionada}'
-            )
-        
-        fig_map.update_geos(
-            center=dict(lat=4.5, lon=-74),
-            projection_scale=4,
-            visible=True,
-            showcountries=True,
-            countrycolor="lightgray"
-        )
-        
-        fig_map.update_layout(height=600, margin=dict(l=0, r=0, t=40, b=0))
+        fig_map = figure_cache.obtener('fig_map', tecnologia_seleccionada, detalle)
+        if fig_map is None:
+            if detalle != 'departamento':
+                if tecnologia_seleccionada == 'Todas':
+                    df_celdas = preparar_mapa_municipal(
+                        df_filtered, detalle,
+                        {'CANTIDAD_LINEAS_ACCESOS': 'sum'}, {'CANTIDAD_LINEAS_ACCESOS': 'Total_Lineas'},
+                        dominante='TECNOLOGIA'
+                    ).rename(columns={'Dominante': 'Tecnologia_Dominante', 'Porcentaje_Dominante': 'Porcentaje'})
+                    fig_map = figura_mapa_municipal(
+                        df_celdas, detalle, 'Total_Lineas', 'Tecnologia_Dominante',
+                        {'Tecnologia_Dominante': True, 'Total_Lineas': ':,.0f', 'Porcentaje': ':.1f'},
+                        'Tecnología Dominante por Municipio'
+                    )
+                else:
+                    df_celdas = preparar_mapa_municipal(
+                        df_filtered, detalle,
+                        {'CANTIDAD_LINEAS_ACCESOS': 'sum', 'EMPRESA': 'nunique'},
+                        {'CANTIDAD_LINEAS_ACCESOS': 'Lineas_Tecnologia', 'EMPRESA': 'N_Operadores'},
+                        filtro=f"tecnologia={tecnologia_seleccionada}"
+                    )
+                    fig_map = figura_mapa_municipal(
+                        df_celdas, detalle, 'Lineas_Tecnologia', 'Lineas_Tecnologia',
+                        {'Lineas_Tecnologia': ':,.0f', 'N_Operadores': True},
+                        f'Distribución de {tecnologia_seleccionada} por Municipio',
+                        color_continuous_scale='Oranges'
+                    )
+            elif geo_boundaries.disponible('departamento'):
+                if tecnologia_seleccionada == 'Todas':
+                    fig_map = figura_coropleta(
+                        df_map, 'departamento', 'ID_DEPARTAMENTO', 'Tecnologia_Dominante', 'DEPARTAMENTO',
+                        {'Lineas_Tecnologia': ':,.0f', 'Total_Lineas': ':,.0f', 'Porcentaje': ':.1f'},
+                        'Tecnología Dominante por Departamento'
+                    )
+                else:
+                    fig_map = figura_coropleta(
+                        df_map, 'departamento', 'ID_DEPARTAMENTO', 'Lineas_Tecnologia', 'DEPARTAMENTO',
+                        {'Lineas_Tecnologia': ':,.0f', 'N_Operadores': True},
+                        f'Distribución de {tecnologia_seleccionada}',
+                        color_continuous_scale='Oranges'
+                    )
+            else:
+                if tecnologia_seleccionada == 'Todas':
+                    # Mapa coloreado por tecnología dominante
+                    fig_map = px.scatter_geo(
+                        df_map,
+                        lat='lat',
+                        lon='lon',
+                        size='Total_Lineas',
+                        color='Tecnologia_Dominante',
+                        hover_name='DEPARTAMENTO',
+                        hover_data={
+                            'Tecnologia_Dominante': True,
+                            'Lineas_Tecnologia': ':,.0f',
+                            'Total_Lineas': ':,.0f',
+                            'Porcentaje': ':.1f%',
+                            'lat': False,
+                            'lon': False
+                        },
+                        size_max=50,
+                        title='Tecnología Dominante por Departamento'
+                    )
+                else:
+                    # Mapa de líneas con la tecnología específica
+                    fig_map = px.scatter_geo(
+                        df_map,
+                        lat='lat',
+                        lon='lon',
+                        size='Lineas_Tecnologia',
+                        color='Lineas_Tecnologia',
+                        hover_name='DEPARTAMENTO',
+                        hover_data={
+                            'Lineas_Tecnologia': ':,.0f',
+                            'N_Operadores': True,
+                            'lat': False,
+                            'lon': False
+                        },
+                        size_max=50,
+                        color_continuous_scale='Oranges',
+                        title=f'Distribución de {tecnologia_seleccionada}'
+                    )
+                
+                fig_map.update_geos(
+                    center=dict(lat=4.5, lon=-74),
+                    projection_scale=4,
+                    visible=True,
+                    showcountries=True,
+                    countrycolor="lightgray"
+                )
+                
+                fig_map.update_layout(height=600, margin=dict(l=0, r=0, t=40, b=0))
+            fig_map = figure_cache.guardar('fig_map', fig_map, tecnologia_seleccionada, detalle)
         st.plotly_chart(fig_map, use_container_width=True)
     
     with col2:
         st.markdown("### 📊 Resumen")
         
         if tecnologia_seleccionada == 'Todas':
-            tech_counts = df_map['Tecnologia_Dominante'].value_counts()
-            
-            fig_pie = px.pie(
-                values=tech_counts.values,
-                names=tech_counts.index,
-                title='Tecnologías Dominantes'
-            )
-            fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-            fig_pie.update_layout(height=300, showlegend=False)
+            fig_pie = figure_cache.obtener('fig_pie')
+            if fig_pie is None:
+                tech_counts = df_map['Tecnologia_Dominante'].value_counts()
+                fig_pie = px.pie(
+                    values=tech_counts.values,
+                    names=tech_counts.index,
+                    title='Tecnologías Dominantes'
+                )
+                fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+                fig_pie.update_layout(height=300, showlegend=False)
+                fig_pie = figure_cache.guardar('fig_pie', fig_pie)
             st.plotly_chart(fig_pie, use_container_width=True)
         else:
             st.info(f"""
@@ -491,30 +681,33 @@ def show_mapa_tecnologias(df):
     # Gráfico de barras
     st.markdown("### 📊 Top 15 Departamentos")
     
-    top_15 = df_map.nlargest(15, 'Lineas_Tecnologia')
-    
-    if tecnologia_seleccionada == 'Todas':
-        fig_bar = px.bar(
-            top_15,
-            x='Lineas_Tecnologia',
-            y='DEPARTAMENTO',
-            orientation='h',
-            color='Tecnologia_Dominante',
-            title='Top 15 Departamentos por Líneas',
-            hover_data=['Porcentaje']
-        )
-    else:
-        fig_bar = px.bar(
-            top_15,
-            x='Lineas_Tecnologia',
-            y='DEPARTAMENTO',
-            orientation='h',
-            color='Lineas_Tecnologia',
-            color_continuous_scale='Oranges',
-            title=f'Top 15 Departamentos - {tecnologia_seleccionada}'
-        )
-    
-    fig_bar.update_layout(height=500, showlegend=True if tecnologia_seleccionada == 'Todas' else False)
+    fig_bar = figure_cache.obtener('fig_bar', tecnologia_seleccionada)
+    if fig_bar is None:
+        top_15 = df_map.nlargest(15, 'Lineas_Tecnologia')
+        
+        if tecnologia_seleccionada == 'Todas':
+            fig_bar = px.bar(
+                top_15,
+                x='Lineas_Tecnologia',
+                y='DEPARTAMENTO',
+                orientation='h',
+                color='Tecnologia_Dominante',
+                title='Top 15 Departamentos por Líneas',
+                hover_data=['Porcentaje']
+            )
+        else:
+            fig_bar = px.bar(
+                top_15,
+                x='Lineas_Tecnologia',
+                y='DEPARTAMENTO',
+                orientation='h',
+                color='Lineas_Tecnologia',
+                color_continuous_scale='Oranges',
+                title=f'Top 15 Departamentos - {tecnologia_seleccionada}'
+            )
+        
+        fig_bar.update_layout(height=500, showlegend=True if tecnologia_seleccionada == 'Todas' else False)
+        fig_bar = figure_cache.guardar('fig_bar', fig_bar, tecnologia_seleccionada)
     st.plotly_chart(fig_bar, use_container_width=True)
     
     # Matriz de tecnologías por departamento
@@ -539,8 +732,8 @@ def show_mapa_empresas(df):
     Puede buscar por nombre o seleccionar de la lista.
     """)
     
-    # Obtener lista de empresas ordenada
-    empresas_disponibles = sorted(df['EMPRESA'].unique())
+    # Índice de búsqueda de empresas (ordenadas de mayor a menor valor facturado)
+    indice = company_search.obtener_indice(df)
     
     # Buscador de empresa
     col1, col2 = st.columns([3, 1])
@@ -549,23 +742,29 @@ def show_mapa_empresas(df):
         # Input de búsqueda
         busqueda = st.text_input(
             "🔍 Buscar empresa por nombre:",
-            placeholder="Ej: COMCEL, ETB, UNE, CLARO..."
+            placeholder="Ej: COMCEL, ETB, UNE, CLARO...",
+            help="No distingue mayúsculas ni tildes, tolera errores de escritura y acepta el ID de la empresa"
         )
         
         # Filtrar empresas según búsqueda
         if busqueda:
-            empresas_filtradas = [e for e in empresas_disponibles if busqueda.upper() in e.upper()]
+            empresas_filtradas = indice.buscar(busqueda)
+            
+            if len(empresas_filtradas) == 0:
+                st.warning(f"⚠️ No se encontraron empresas con '{busqueda}'")
+                st.info("💡 Intente con otro término o revise la ortografía")
+                return
         else:
-            empresas_filtradas = empresas_disponibles[:20]  # Mostrar solo las primeras 20
+            empresas_filtradas = indice.empresas[:20]  # Mostrar solo las 20 de mayor valor
         
         empresa_seleccionada = st.selectbox(
             "Seleccione una empresa:",
             empresas_filtradas,
-            help=f"Total de empresas disponibles: {len(empresas_disponibles)}"
+            help=f"Total de empresas disponibles: {len(indice)}"
         )
     
     with col2:
-        st.metric("Total Empresas", len(empresas_disponibles))
+        st.metric("Total Empresas", len(indice))
         if busqueda:
             st.metric("Resultados", len(empresas_filtradas))
     
@@ -581,22 +780,25 @@ def show_mapa_empresas(df):
         return
     
     # Preparar datos por departamento
-    df_dept = df_empresa.groupby('DEPARTAMENTO').agg({
+    df_dept = df_empresa.groupby(['ID_DEPARTAMENTO', 'DEPARTAMENTO']).agg({
         'CANTIDAD_LINEAS_ACCESOS': 'sum',
         'VALOR_FACTURADO_O_COBRADO': 'sum',
         'MUNICIPIO': 'nunique',
         'TECNOLOGIA': lambda x: ', '.join(x.unique()[:3])  # Top 3 tecnologías
     }).reset_index()
     
-    df_dept.columns = ['DEPARTAMENTO', 'Total_Lineas', 'Total_Valor', 'N_Municipios', 'Tecnologias']
+    df_dept.columns = ['ID_DEPARTAMENTO', 'DEPARTAMENTO', 'Total_Lineas', 'Total_Valor', 'N_Municipios', 'Tecnologias']
     
     # Agregar coordenadas
-    df_map = agregar_coordenadas(df_dept)
+    df_map, sin_coordenadas = agregar_coordenadas(df_dept)
     
     if len(df_map) == 0:
         st.error("❌ No se pudieron cargar las coordenadas")
         return
     
+    if sin_coordenadas:
+        st.caption(f"⚠️ {sin_coordenadas} departamento(s) sin código DIVIPOLA reconocido no se muestran en el mapa")
+    
     st.markdown("---")
     
     # Métricas de la empresa
@@ -622,41 +824,67 @@ def show_mapa_empresas(df):
     tab1, tab2, tab3 = st.tabs(["🗺️ Mapa de Presencia", "📊 Análisis por Región", "📈 Detalles"])
     
     with tab1:
+        detalle = _selector_detalle('detalle_mapa_empresas')
+        
         col1, col2 = st.columns([3, 1])
         
         with col1:
-            # Mapa de presencia
-            fig_map = px.scatter_geo(
-                df_map,
-                lat='lat',
-                lon='lon',
-                size='Total_Lineas',
-                color='Total_Valor',
-                hover_name='DEPARTAMENTO',
-                hover_data={
-                    'Total_Lineas': ':,.0f',
-                    'Total_Valor': ':$,.0f',
-                    'N_Municipios': True,
-                    'Tecnologias': True,
-                    'lat': False,
-                    'lon': False
-                },
-                size_max=60,
-                color_continuous_scale='Reds',
-                title=f'Presencia de {empresa_seleccionada[:40]} en Colombia'
-            )
-            
-            fig_map.update_geos(
-                center=dict(lat=4.5, lon=-74),
-                projection_scale=4,
-                visible=True,
-                showcountries=True,
-                countrycolor="lightgray",
-                showland=True,
-                landcolor="rgb(250, 250, 250)"
-            )
-            
-            fig_map.update_layout(height=600, margin=dict(l=0, r=0, t=40, b=0))
+            fig_map = figure_cache.obtener('fig_map', empresa_seleccionada, detalle)
+            if fig_map is None:
+                if detalle != 'departamento':
+                    df_celdas = preparar_mapa_municipal(
+                        df_empresa, detalle,
+                        {'CANTIDAD_LINEAS_ACCESOS': 'sum', 'VALOR_FACTURADO_O_COBRADO': 'sum'},
+                        {'CANTIDAD_LINEAS_ACCESOS': 'Total_Lineas', 'VALOR_FACTURADO_O_COBRADO': 'Total_Valor'},
+                        filtro=f"empresa={empresa_seleccionada}"
+                    )
+                    fig_map = figura_mapa_municipal(
+                        df_celdas, detalle, 'Total_Lineas', 'Total_Valor',
+                        {'Total_Lineas': ':,.0f', 'Total_Valor': ':$,.0f'},
+                        f'Presencia de {empresa_seleccionada[:40]} por Municipio',
+                        color_continuous_scale='Reds'
+                    )
+                elif geo_boundaries.disponible('departamento'):
+                    fig_map = figura_coropleta(
+                        df_map, 'departamento', 'ID_DEPARTAMENTO', 'Total_Lineas', 'DEPARTAMENTO',
+                        {'Total_Lineas': ':,.0f', 'Total_Valor': ':$,.0f', 'N_Municipios': True, 'Tecnologias': True},
+                        f'Presencia de {empresa_seleccionada[:40]} en Colombia',
+                        color_continuous_scale='Reds'
+                    )
+                else:
+                    # Mapa de presencia
+                    fig_map = px.scatter_geo(
+                        df_map,
+                        lat='lat',
+                        lon='lon',
+                        size='Total_Lineas',
+                        color='Total_Valor',
+                        hover_name='DEPARTAMENTO',
+                        hover_data={
+                            'Total_Lineas': ':,.0f',
+                            'Total_Valor': ':$,.0f',
+                            'N_Municipios': True,
+                            'Tecnologias': True,
+                            'lat': False,
+                            'lon': False
+                        },
+                        size_max=60,
+                        color_continuous_scale='Reds',
+                        title=f'Presencia de {empresa_seleccionada[:40]} en Colombia'
+                    )
+                    
+                    fig_map.update_geos(
+                        center=dict(lat=4.5, lon=-74),
+                        projection_scale=4,
+                        visible=True,
+                        showcountries=True,
+                        countrycolor="lightgray",
+                        showland=True,
+                        landcolor="rgb(250, 250, 250)"
+                    )
+                    
+                    fig_map.update_layout(height=600, margin=dict(l=0, r=0, t=40, b=0))
+                fig_map = figure_cache.guardar('fig_map', fig_map, empresa_seleccionada, detalle)
             st.plotly_chart(fig_map, use_container_width=True)
         
         with col2:
@@ -680,46 +908,54 @@ def show_mapa_empresas(df):
         
         with col1:
             # Gráfico de barras: Líneas por departamento
-            fig_bar1 = px.bar(
-                df_map.nlargest(15, 'Total_Lineas'),
-                x='Total_Lineas',
-                y='DEPARTAMENTO',
-                orientation='h',
-                title='Top 15 Departamentos por Líneas',
-                color='Total_Lineas',
-                color_continuous_scale='Blues'
-            )
-            fig_bar1.update_layout(showlegend=False, height=500)
+            fig_bar1 = figure_cache.obtener('fig_bar1', empresa_seleccionada)
+            if fig_bar1 is None:
+                fig_bar1 = px.bar(
+                    df_map.nlargest(15, 'Total_Lineas'),
+                    x='Total_Lineas',
+                    y='DEPARTAMENTO',
+                    orientation='h',
+                    title='Top 15 Departamentos por Líneas',
+                    color='Total_Lineas',
+                    color_continuous_scale='Blues'
+                )
+                fig_bar1.update_layout(showlegend=False, height=500)
+                fig_bar1 = figure_cache.guardar('fig_bar1', fig_bar1, empresa_seleccionada)
             st.plotly_chart(fig_bar1, use_container_width=True)
         
         with col2:
             # Gráfico de barras: Valor por departamento
-            fig_bar2 = px.bar(
-                df_map.nlargest(15, 'Total_Valor'),
-                x='Total_Valor',
-                y='DEPARTAMENTO',
-                orientation='h',
-                title='Top 15 Departamentos por Valor',
-                color='Total_Valor',
-                color_continuous_scale='Greens'
-            )
-            fig_bar2.update_layout(showlegend=False, height=500)
+            fig_bar2 = figure_cache.obtener('fig_bar2', empresa_seleccionada)
+            if fig_bar2 is None:
+                fig_bar2 = px.bar(
+                    df_map.nlargest(15, 'Total_Valor'),
+                    x='Total_Valor',
+                    y='DEPARTAMENTO',
+                    orientation='h',
+                    title='Top 15 Departamentos por Valor',
+                    color='Total_Valor',
+                    color_continuous_scale='Greens'
+                )
+                fig_bar2.update_layout(showlegend=False, height=500)
+                fig_bar2 = figure_cache.guardar('fig_bar2', fig_bar2, empresa_seleccionada)
             st.plotly_chart(fig_bar2, use_container_width=True)
         
         # Distribución de tecnologías
         st.markdown("### 📡 Tecnologías Utilizadas")
         
-        tech_dist = df_empresa['TECNOLOGIA'].value_counts().head(10)
-        
-        fig_tech = px.bar(
-            x=tech_dist.values,
-            y=tech_dist.index,
-            orientation='h',
-            title='Top 10 Tecnologías',
-            color=tech_dist.values,
-            color_continuous_scale='Oranges'
-        )
-        fig_tech.update_layout(showlegend=False, height=400)
+        fig_tech = figure_cache.obtener('fig_tech', empresa_seleccionada)
+        if fig_tech is None:
+            tech_dist = df_empresa['TECNOLOGIA'].value_counts().head(10)
+            fig_tech = px.bar(
+                x=tech_dist.values,
+                y=tech_dist.index,
+                orientation='h',
+                title='Top 10 Tecnologías',
+                color=tech_dist.values,
+                color_continuous_scale='Oranges'
+            )
+            fig_tech.update_layout(showlegend=False, height=400)
+            fig_tech = figure_cache.guardar('fig_tech', fig_tech, empresa_seleccionada)
         st.plotly_chart(fig_tech, use_container_width=True)
     
     with tab3:
@@ -746,12 +982,14 @@ def show_mapa_empresas(df):
         # Análisis de servicios
         st.markdown("### 📦 Distribución de Servicios")
         
-        serv_dist = df_empresa['SERVICIO_PAQUETE'].value_counts()
-        
-        fig_serv = px.pie(
-            values=serv_dist.values,
-            names=serv_dist.index,
-            title='Servicios Ofrecidos'
-        )
-        fig_serv.update_traces(textposition='inside', textinfo='percent+label')
+        fig_serv = figure_cache.obtener('fig_serv', empresa_seleccionada)
+        if fig_serv is None:
+            serv_dist = df_empresa['SERVICIO_PAQUETE'].value_counts()
+            fig_serv = px.pie(
+                values=serv_dist.values,
+                names=serv_dist.index,
+                title='Servicios Ofrecidos'
+            )
+            fig_serv.update_traces(textposition='inside', textinfo='percent+label')
+            fig_serv = figure_cache.guardar('fig_serv', fig_serv, empresa_seleccionada)
         st.plotly_chart(fig_serv, use_container_width=True)
\ No newline at end of file
@@ -7,52 +7,9 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-
-# Coordenadas de departamentos (copiadas del módulo 7)
-COORDS_DEPARTAMENTOS = {
-    'AMAZONAS': {'lat': -1.44, 'lon': -71.94},
-    'ANTIOQUIA': {'lat': 6.25, 'lon': -75.56},
-    'ARAUCA': {'lat': 7.08, 'lon': -70.76},
-    'ARCHIPIÉLAGO DE SAN ANDRÉS, PROVIDENCIA Y SANTA CATALINA': {'lat': 12.58, 'lon': -81.70},
-    'ATLÁNTICO': {'lat': 10.70, 'lon': -74.92},
-    'BOGOTÁ D.C.': {'lat': 4.71, 'lon': -74.07},
-    'BOLÍVAR': {'lat': 8.67, 'lon': -74.03},
-    'BOYACÁ': {'lat': 5.45, 'lon': -73.36},
-    'CALDAS': {'lat': 5.29, 'lon': -75.25},
-    'CAQUETA': {'lat': 0.87, 'lon': -73.84},
-    'CASANARE': {'lat': 5.76, 'lon': -71.57},
-    'CAUCA': {'lat': 2.70, 'lon': -76.82},
-    'CESAR': {'lat': 9.33, 'lon': -73.65},
-    'CHOCÓ': {'lat': 5.25, 'lon': -76.82},
-    'CÓRDOBA': {'lat': 8.05, 'lon': -75.57},
-    'CUNDINAMARCA': {'lat': 5.02, 'lon': -74.03},
-    'GUAINÍA': {'lat': 2.58, 'lon': -68.52},
-    'GUAVIARE': {'lat': 1.91, 'lon': -72.64},
-    'HUILA': {'lat': 2.54, 'lon': -75.78},
-    'LA GUAJIRA': {'lat': 11.35, 'lon': -72.52},
-    'MAGDALENA': {'lat': 10.41, 'lon': -74.41},
-    'META': {'lat': 3.30, 'lon': -73.28},
-    'NARIÑO': {'lat': 1.29, 'lon': -77.35},
-    'NORTE DE SANTANDER': {'lat': 7.94, 'lon': -72.90},
-    'PUTUMAYO': {'lat': 0.49, 'lon': -75.52},
-    'QUINDÍO': {'lat': 4.46, 'lon': -75.67},
-    'RISARALDA': {'lat': 5.31, 'lon': -75.99},
-    'SANTANDER': {'lat': 6.64, 'lon': -73.65},
-    'SUCRE': {'lat': 8.81, 'lon': -74.72},
-    'TOLIMA': {'lat': 4.09, 'lon': -75.15},
-    'VALLE DEL CAUCA': {'lat': 3.80, 'lon': -76.64},
-    'VAUPÉS': {'lat': 0.85, 'lon': -70.81},
-    'VICHADA': {'lat': 4.42, 'lon': -69.29}
-}
-
-def agregar_coordenadas(df):
-    """Agrega coordenadas geográficas al dataframe"""
-    df_map = df.copy()
-    df_map['DEPARTAMENTO'] = df_map['DEPARTAMENTO'].str.upper().str.strip()
-    df_map['lat'] = df_map['DEPARTAMENTO'].map(lambda x: COORDS_DEPARTAMENTOS.get(x, {}).get('lat'))
-    df_map['lon'] = df_map['DEPARTAMENTO'].map(lambda x: COORDS_DEPARTAMENTOS.get(x, {}).get('lon'))
-    df_map = df_map.dropna(subset=['lat', 'lon'])
-    return df_map
+from utils import company_profiles, company_ranks, company_search, company_similarity, figure_cache, geo_boundaries, lazy_tabs
+from utils.geo_index import agregar_coordenadas
+from modules.module_7_mapa_geografico import figura_coropleta
 
 def show_busqueda_empresa(df):
     """8.1 Búsqueda y análisis detallado de una empresa"""
@@ -67,27 +24,24 @@ def show_busqueda_empresa(df):
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        # Obtener top 100 empresas por valor facturado (ordenadas de mayor a menor)
-        top_empresas_por_valor = df.groupby('EMPRESA')['VALOR_FACTURADO_O_COBRADO'].sum().nlargest(100)
-        empresas_top_100 = top_empresas_por_valor.index.tolist()  # Ya vienen ordenadas
-        
-        # Todas las empresas disponibles (para referencia)
-        total_empresas = df['EMPRESA'].nunique()
+        # Índice de búsqueda de todas las empresas (ordenadas de mayor a menor valor facturado)
+        indice = company_search.obtener_indice(df)
+        empresas_top_100 = indice.empresas[:100]
+        total_empresas = len(indice)
         
         # Buscador mejorado
         busqueda = st.text_input(
             "🔍 Buscar empresa:",
-            placeholder="Escriba el nombre de la empresa (ej: COMCEL, UNE, CLARO, ETB)...",
-            help="La búsqueda no distingue mayúsculas/minúsculas"
+            placeholder="Escriba el nombre o el ID de la empresa (ej: COMCEL, UNE, CLARO, ETB)...",
+            help="La búsqueda incluye todas las empresas, no distingue mayúsculas ni tildes y tolera errores de escritura"
         )
         
         # Filtrar empresas
         if busqueda and len(busqueda) >= 2:
-            busqueda_upper = busqueda.upper()
-            empresas_filtradas = [e for e in empresas_top_100 if busqueda_upper in str(e).upper()]
+            empresas_filtradas = indice.buscar(busqueda)
             
             if len(empresas_filtradas) == 0:
-                st.warning(f"⚠️ No se encontraron empresas con '{busqueda}' en el Top 100 por valor facturado")
+                st.warning(f"⚠️ No se encontraron empresas con '{busqueda}'")
                 st.info("💡 Intente con términos más cortos o revise la ortografía")
                 return
         else:
@@ -113,8 +67,9 @@ def show_busqueda_empresa(df):
     if not empresa_seleccionada:
         return
     
-    # Filtrar datos de la empresa
-    df_empresa = df[df['EMPRESA'] == empresa_seleccionada]
+    # Perfil precalculado de la empresa
+    perfil = company_profiles.obtener_perfiles(df).perfil_por_nombre(empresa_seleccionada)
+    metricas = perfil['metricas']
     
     st.markdown("---")
     st.markdown(f"## 📊 {empresa_seleccionada}")
@@ -123,352 +78,374 @@ def show_busqueda_empresa(df):
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
-        st.metric("Departamentos", df_empresa['DEPARTAMENTO'].nunique())
+        st.metric("Departamentos", metricas['departamentos'])
     
     with col2:
-        st.metric("Municipios", df_empresa['MUNICIPIO'].nunique())
+        st.metric("Municipios", metricas['municipios'])
     
     with col3:
-        total_lineas = df_empresa['CANTIDAD_LINEAS_ACCESOS'].sum()
-        st.metric("Total Líneas", f"{total_lineas:,.0f}")
+        st.metric("Total Líneas", f"{metricas['total_lineas']:,.0f}")
     
     with col4:
-        total_valor = df_empresa['VALOR_FACTURADO_O_COBRADO'].sum()
-        st.metric("Valor Total", f"${total_valor/1e9:.2f}B")
+        st.metric("Valor Total", f"${metricas['total_valor']/1e9:.2f}B")
     
     with col5:
-        valor_promedio = total_valor / total_lineas if total_lineas > 0 else 0
-        st.metric("$/Línea Prom", f"${valor_promedio:,.0f}")
+        st.metric("$/Línea Prom", f"${metricas['valor_por_linea']:,.0f}")
     
     st.markdown("---")
     
-    # Tabs de información
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["🗺️ Mapa", "📍 Cobertura", "📡 Tecnologías", "📦 Servicios", "📈 Evolución"])
+    # Tabs de información (solo se calcula la pestaña abierta)
+    tab1, tab2, tab3, tab4, tab5 = lazy_tabs.pestanas_diferidas(
+        ["🗺️ Mapa", "📍 Cobertura", "📡 Tecnologías", "📦 Servicios", "📈 Evolución"], 'tabs_busqueda_empresa'
+    )
     
     with tab1:
-        # Mapa geográfico de presencia
-        st.markdown("### 🗺️ Presencia Geográfica")
-        
-        # Preparar datos por departamento
-        df_dept = df_empresa.groupby('DEPARTAMENTO').agg({
-            'CANTIDAD_LINEAS_ACCESOS': 'sum',
-            'VALOR_FACTURADO_O_COBRADO': 'sum',
-            'MUNICIPIO': 'nunique'
-        }).reset_index()
-        
-        df_dept.columns = ['DEPARTAMENTO', 'Total_Lineas', 'Total_Valor', 'N_Municipios']
-        
-        # Agregar coordenadas
-        df_map = agregar_coordenadas(df_dept)
-        
-        if len(df_map) > 0:
-            col1, col2 = st.columns([3, 1])
+        if tab1.open:
+            # Mapa geográfico de presencia
+            st.markdown("### 🗺️ Presencia Geográfica")
             
-            with col1:
-                # Mapa
-                fig_map = px.scatter_geo(
-                    df_map,
-                    lat='lat',
-                    lon='lon',
-                    size='Total_Lineas',
-                    color='Total_Valor',
-                    hover_name='DEPARTAMENTO',
-                    hover_data={
-                        'Total_Lineas': ':,.0f',
-                        'Total_Valor': ':$,.0f',
-                        'N_Municipios': True,
-                        'lat': False,
-                        'lon': False
-                    },
-                    size_max=60,
-                    color_continuous_scale='Reds',
-                    title=f'Presencia de {empresa_seleccionada[:50]}'
-                )
-                
-                fig_map.update_geos(
-                    center=dict(lat=4.5, lon=-74),
-                    projection_scale=4,
-                    visible=True,
-                    showcountries=True,
-                    countrycolor="lightgray"
-                )
-                
-                fig_map.update_layout(height=600, margin=dict(l=0, r=0, t=40, b=0))
-                st.plotly_chart(fig_map, use_container_width=True)
+            # Datos por departamento
+            df_dept = perfil['departamento'].copy()
+            df_dept.columns = ['ID_DEPARTAMENTO', 'DEPARTAMENTO', 'Total_Lineas', 'Total_Valor', 'N_Municipios']
             
-            with col2:
-                st.markdown("### 🎯 Cobertura")
-                cobertura_pct = (len(df_map) / 33) * 100
-                st.metric("% Deptos", f"{cobertura_pct:.1f}%")
+            # Agregar coordenadas
+            df_map, sin_coordenadas = agregar_coordenadas(df_dept)
+            
+            if len(df_map) > 0:
+                col1, col2 = st.columns([3, 1])
                 
-                st.markdown("#### Top 5")
-                top_5 = df_map.nlargest(5, 'Total_Lineas')
-                for idx, (i, row) in enumerate(top_5.iterrows(), 1):
-                    st.write(f"**{idx}. {row['DEPARTAMENTO']}**")
-                    st.write(f"   {row['Total_Lineas']:,.0f} líneas")
-        else:
-            st.warning("⚠️ No se pudieron cargar coordenadas geográficas")
+                with col1:
+                    fig_map = figure_cache.obtener('fig_map', empresa_seleccionada)
+                    if fig_map is None:
+                        if geo_boundaries.disponible('departamento'):
+                            fig_map = figura_coropleta(
+                                df_map, 'departamento', 'ID_DEPARTAMENTO', 'Total_Valor', 'DEPARTAMENTO',
+                                {'Total_Lineas': ':,.0f', 'Total_Valor': ':$,.0f', 'N_Municipios': True},
+                                f'Presencia de {empresa_seleccionada[:50]}',
+                                color_continuous_scale='Reds'
+                            )
+                        else:
+                            # Mapa
+                            fig_map = px.scatter_geo(
+                                df_map,
+                                lat='lat',
+                                lon='lon',
+                                size='Total_Lineas',
+                                color='Total_Valor',
+                                hover_name='DEPARTAMENTO',
+                                hover_data={
+                                    'Total_Lineas': ':,.0f',
+                                    'Total_Valor': ':$,.0f',
+                                    'N_Municipios': True,
+                                    'lat': False,
+                                    'lon': False
+                                },
+                                size_max=60,
+                                color_continuous_scale='Reds',
+                                title=f'Presencia de {empresa_seleccionada[:50]}'
+                            )
+                            
+                            fig_map.update_geos(
+                                center=dict(lat=4.5, lon=-74),
+                                projection_scale=4,
+                                visible=True,
+                                showcountries=True,
+                                countrycolor="lightgray"
+                            )
+                            
+                            fig_map.update_layout(height=600, margin=dict(l=0, r=0, t=40, b=0))
+                        fig_map = figure_cache.guardar('fig_map', fig_map, empresa_seleccionada)
+                    st.plotly_chart(fig_map, use_container_width=True)
+                    
+                    if sin_coordenadas:
+                        st.caption(f"⚠️ {sin_coordenadas} departamento(s) sin código DIVIPOLA reconocido no se muestran en el mapa")
+                
+                with col2:
+                    st.markdown("### 🎯 Cobertura")
+                    cobertura_pct = (len(df_map) / 33) * 100
+                    st.metric("% Deptos", f"{cobertura_pct:.1f}%")
+                    
+                    st.markdown("#### Top 5")
+                    top_5 = df_map.nlargest(5, 'Total_Lineas')
+                    for idx, (i, row) in enumerate(top_5.iterrows(), 1):
+                        st.write(f"**{idx}. {row['DEPARTAMENTO']}**")
+                        st.write(f"   {row['Total_Lineas']:,.0f} líneas")
+            else:
+                st.warning("⚠️ No se pudieron cargar coordenadas geográficas")
     
     with tab2:
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Top departamentos
-            dept_data = df_empresa.groupby('DEPARTAMENTO').agg({
-                'CANTIDAD_LINEAS_ACCESOS': 'sum',
-                'VALOR_FACTURADO_O_COBRADO': 'sum'
-            }).reset_index().sort_values('CANTIDAD_LINEAS_ACCESOS', ascending=False).head(15)
+        if tab2.open:
+            col1, col2 = st.columns(2)
             
-            fig1 = px.bar(
-                dept_data,
-                x='CANTIDAD_LINEAS_ACCESOS',
-                y='DEPARTAMENTO',
-                orientation='h',
-                title='Top 15 Departamentos por Líneas',
-                color='CANTIDAD_LINEAS_ACCESOS',
-                color_continuous_scale='Blues'
-            )
-            fig1.update_layout(showlegend=False, height=500)
-            st.plotly_chart(fig1, use_container_width=True)
-        
-        with col2:
-            # Top municipios
-            mun_data = df_empresa.groupby('MUNICIPIO').agg({
-                'CANTIDAD_LINEAS_ACCESOS': 'sum'
-            }).reset_index().sort_values('CANTIDAD_LINEAS_ACCESOS', ascending=False).head(15)
+            with col1:
+                # Top departamentos
+                fig1 = figure_cache.obtener('fig1', empresa_seleccionada)
+                if fig1 is None:
+                    dept_data = perfil['departamento'].sort_values('CANTIDAD_LINEAS_ACCESOS', ascending=False).head(15)
+                    fig1 = px.bar(
+                        dept_data,
+                        x='CANTIDAD_LINEAS_ACCESOS',
+                        y='DEPARTAMENTO',
+                        orientation='h',
+                        title='Top 15 Departamentos por Líneas',
+                        color='CANTIDAD_LINEAS_ACCESOS',
+                        color_continuous_scale='Blues'
+                    )
+                    fig1.update_layout(showlegend=False, height=500)
+                    fig1 = figure_cache.guardar('fig1', fig1, empresa_seleccionada)
+                st.plotly_chart(fig1, use_container_width=True)
             
-            fig2 = px.bar(
-                mun_data,
-                x='CANTIDAD_LINEAS_ACCESOS',
-                y='MUNICIPIO',
-                orientation='h',
-                title='Top 15 Municipios por Líneas',
-                color='CANTIDAD_LINEAS_ACCESOS',
-                color_continuous_scale='Greens'
-            )
-            fig2.update_layout(showlegend=False, height=500)
-            st.plotly_chart(fig2, use_container_width=True)
-        
-        # Mapa de regiones
-        st.markdown("### 🗺️ Distribución por Región")
-        region_data = df_empresa.groupby('REGION').agg({
-            'CANTIDAD_LINEAS_ACCESOS': 'sum',
-            'VALOR_FACTURADO_O_COBRADO': 'sum'
-        }).reset_index()
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig_region1 = px.pie(
-                region_data,
-                values='CANTIDAD_LINEAS_ACCESOS',
-                names='REGION',
-                title='Distribución de Líneas por Región'
-            )
-            st.plotly_chart(fig_region1, use_container_width=True)
-        
-        with col2:
-            fig_region2 = px.pie(
-                region_data,
-                values='VALOR_FACTURADO_O_COBRADO',
-                names='REGION',
-                title='Distribución de Valor por Región'
-            )
-            st.plotly_chart(fig_region2, use_container_width=True)
+            with col2:
+                # Top municipios
+                fig2 = figure_cache.obtener('fig2', empresa_seleccionada)
+                if fig2 is None:
+                    mun_data = perfil['municipio'].sort_values('CANTIDAD_LINEAS_ACCESOS', ascending=False).head(15)
+                    fig2 = px.bar(
+                        mun_data,
+                        x='CANTIDAD_LINEAS_ACCESOS',
+                        y='MUNICIPIO',
+                        orientation='h',
+                        title='Top 15 Municipios por Líneas',
+                        color='CANTIDAD_LINEAS_ACCESOS',
+                        color_continuous_scale='Greens'
+                    )
+                    fig2.update_layout(showlegend=False, height=500)
+                    fig2 = figure_cache.guardar('fig2', fig2, empresa_seleccionada)
+                st.plotly_chart(fig2, use_container_width=True)
+            
+            # Mapa de regiones
+            st.markdown("### 🗺️ Distribución por Región")
+            region_data = perfil['region']
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                fig_region1 = figure_cache.obtener('fig_region1', empresa_seleccionada)
+                if fig_region1 is None:
+                    fig_region1 = px.pie(
+                        region_data,
+                        values='CANTIDAD_LINEAS_ACCESOS',
+                        names='REGION',
+                        title='Distribución de Líneas por Región'
+                    )
+                    fig_region1 = figure_cache.guardar('fig_region1', fig_region1, empresa_seleccionada)
+                st.plotly_chart(fig_region1, use_container_width=True)
+            
+            with col2:
+                fig_region2 = figure_cache.obtener('fig_region2', empresa_seleccionada)
+                if fig_region2 is None:
+                    fig_region2 = px.pie(
+                        region_data,
+                        values='VALOR_FACTURADO_O_COBRADO',
+                        names='REGION',
+                        title='Distribución de Valor por Región'
+                    )
+                    fig_region2 = figure_cache.guardar('fig_region2', fig_region2, empresa_seleccionada)
+                st.plotly_chart(fig_region2, use_container_width=True)
     
     with tab3:
-        # Análisis de tecnologías
-        tech_data = df_empresa.groupby('TECNOLOGIA').agg({
-            'CANTIDAD_LINEAS_ACCESOS': 'sum',
-            'VELOCIDAD_EFECTIVA_DOWNSTREAM': 'mean',
-            'VELOCIDAD_EFECTIVA_UPSTREAM': 'mean'
-        }).reset_index().sort_values('CANTIDAD_LINEAS_ACCESOS', ascending=False)
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Gráfico de barras de tecnologías
-            fig_tech1 = px.bar(
-                tech_data.head(10),
-                x='CANTIDAD_LINEAS_ACCESOS',
-                y='TECNOLOGIA',
-                orientation='h',
-                title='Top 10 Tecnologías por Líneas',
-                color='CANTIDAD_LINEAS_ACCESOS',
-                color_continuous_scale='Oranges'
-            )
-            fig_tech1.update_layout(showlegend=False, height=500)
-            st.plotly_chart(fig_tech1, use_container_width=True)
-        
-        with col2:
-            # Pie chart de tecnologías
-            fig_tech2 = px.pie(
-                tech_data.head(8),
-                values='CANTIDAD_LINEAS_ACCESOS',
-                names='TECNOLOGIA',
-                title='Distribución Top 8 Tecnologías'
-            )
-            fig_tech2.update_traces(textposition='inside', textinfo='percent+label')
-            st.plotly_chart(fig_tech2, use_container_width=True)
-        
-        # Tabla de velocidades por tecnología
-        st.markdown("### 📊 Velocidades Promedio por Tecnología")
-        
-        tech_display = tech_data[['TECNOLOGIA', 'CANTIDAD_LINEAS_ACCESOS', 
-                                   'VELOCIDAD_EFECTIVA_DOWNSTREAM', 'VELOCIDAD_EFECTIVA_UPSTREAM']].copy()
-        tech_display.columns = ['Tecnología', 'Líneas', 'Vel. Bajada (Mbps)', 'Vel. Subida (Mbps)']
-        
-        st.dataframe(tech_display.style.format({
-            'Líneas': '{:,.0f}',
-            'Vel. Bajada (Mbps)': '{:.2f}',
-            'Vel. Subida (Mbps)': '{:.2f}'
-        }), use_container_width=True, height=300)
+        if tab3.open:
+            # Análisis de tecnologías
+            tech_data = perfil['tecnologia'].sort_values('CANTIDAD_LINEAS_ACCESOS', ascending=False)
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                # Gráfico de barras de tecnologías
+                fig_tech1 = figure_cache.obtener('fig_tech1', empresa_seleccionada)
+                if fig_tech1 is None:
+                    fig_tech1 = px.bar(
+                        tech_data.head(10),
+                        x='CANTIDAD_LINEAS_ACCESOS',
+                        y='TECNOLOGIA',
+                        orientation='h',
+                        title='Top 10 Tecnologías por Líneas',
+                        color='CANTIDAD_LINEAS_ACCESOS',
+                        color_continuous_scale='Oranges'
+                    )
+                    fig_tech1.update_layout(showlegend=False, height=500)
+                    fig_tech1 = figure_cache.guardar('fig_tech1', fig_tech1, empresa_seleccionada)
+                st.plotly_chart(fig_tech1, use_container_width=True)
+            
+            with col2:
+                # Pie chart de tecnologías
+                fig_tech2 = figure_cache.obtener('fig_tech2', empresa_seleccionada)
+                if fig_tech2 is None:
+                    fig_tech2 = px.pie(
+                        tech_data.head(8),
+                        values='CANTIDAD_LINEAS_ACCESOS',
+                        names='TECNOLOGIA',
+                        title='Distribución Top 8 Tecnologías'
+                    )
+                    fig_tech2.update_traces(textposition='inside', textinfo='percent+label')
+                    fig_tech2 = figure_cache.guardar('fig_tech2', fig_tech2, empresa_seleccionada)
+                st.plotly_chart(fig_tech2, use_container_width=True)
+            
+            # Tabla de velocidades por tecnología
+            st.markdown("### 📊 Velocidades Promedio por Tecnología")
+            
+            tech_display = tech_data[['TECNOLOGIA', 'CANTIDAD_LINEAS_ACCESOS', 
+                                       'VELOCIDAD_EFECTIVA_DOWNSTREAM', 'VELOCIDAD_EFECTIVA_UPSTREAM']].copy()
+            tech_display.columns = ['Tecnología', 'Líneas', 'Vel. Bajada (Mbps)', 'Vel. Subida (Mbps)']
+            
+            st.dataframe(tech_display.style.format({
+                'Líneas': '{:,.0f}',
+                'Vel. Bajada (Mbps)': '{:.2f}',
+                'Vel. Subida (Mbps)': '{:.2f}'
+            }), use_container_width=True, height=300)
     
     with tab4:
-        # Análisis de servicios
-        serv_data = df_empresa.groupby('SERVICIO_PAQUETE').agg({
-            'CANTIDAD_LINEAS_ACCESOS': 'sum',
-            'VALOR_FACTURADO_O_COBRADO': 'sum'
-        }).reset_index()
-        
-        serv_data['Valor_Por_Linea'] = serv_data['VALOR_FACTURADO_O_COBRADO'] / serv_data['CANTIDAD_LINEAS_ACCESOS']
-        serv_data = serv_data.sort_values('CANTIDAD_LINEAS_ACCESOS', ascending=False)
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Distribución de servicios
-            fig_serv1 = px.pie(
-                serv_data,
-                values='CANTIDAD_LINEAS_ACCESOS',
-                names='SERVICIO_PAQUETE',
-                title='Distribución por Tipo de Servicio/Paquete'
-            )
-            fig_serv1.update_traces(textposition='inside', textinfo='percent')
-            st.plotly_chart(fig_serv1, use_container_width=True)
-        
-        with col2:
-            # Valor por línea por servicio
-            fig_serv2 = px.bar(
-                serv_data,
-                x='Valor_Por_Linea',
-                y='SERVICIO_PAQUETE',
-                orientation='h',
-                title='Valor Promedio por Línea según Servicio',
-                color='Valor_Por_Linea',
-                color_continuous_scale='RdYlGn'
-            )
-            fig_serv2.update_layout(showlegend=False)
-            st.plotly_chart(fig_serv2, use_container_width=True)
-        
-        # Análisis individual vs empaquetado
-        st.markdown("### 📦 Individual vs Empaquetado")
-        
-        tipo_serv = df_empresa.groupby('TIPO_SERVICIO').agg({
-            'CANTIDAD_LINEAS_ACCESOS': 'sum',
-            'VALOR_FACTURADO_O_COBRADO': 'sum'
-        }).reset_index()
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig_tipo1 = px.bar(
-                tipo_serv,
-                x='TIPO_SERVICIO',
-                y='CANTIDAD_LINEAS_ACCESOS',
-                title='Líneas: Individual vs Empaquetado',
-                color='TIPO_SERVICIO',
-                color_discrete_map={'Individual': '#2E86AB', 'Empaquetado': '#A23B72'}
-            )
-            st.plotly_chart(fig_tipo1, use_container_width=True)
-        
-        with col2:
-            fig_tipo2 = px.bar(
-                tipo_serv,
-                x='TIPO_SERVICIO',
-                y='VALOR_FACTURADO_O_COBRADO',
-                title='Valor: Individual vs Empaquetado',
-                color='TIPO_SERVICIO',
-                color_discrete_map={'Individual': '#2E86AB', 'Empaquetado': '#A23B72'}
-            )
-            st.plotly_chart(fig_tipo2, use_container_width=True)
+        if tab4.open:
+            # Análisis de servicios
+            serv_data = perfil['servicio'].copy()
+            serv_data['Valor_Por_Linea'] = serv_data['VALOR_FACTURADO_O_COBRADO'] / serv_data['CANTIDAD_LINEAS_ACCESOS']
+            serv_data = serv_data.sort_values('CANTIDAD_LINEAS_ACCESOS', ascending=False)
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                # Distribución de servicios
+                fig_serv1 = figure_cache.obtener('fig_serv1', empresa_seleccionada)
+                if fig_serv1 is None:
+                    fig_serv1 = px.pie(
+                        serv_data,
+                        values='CANTIDAD_LINEAS_ACCESOS',
+                        names='SERVICIO_PAQUETE',
+                        title='Distribución por Tipo de Servicio/Paquete'
+                    )
+                    fig_serv1.update_traces(textposition='inside', textinfo='percent')
+                    fig_serv1 = figure_cache.guardar('fig_serv1', fig_serv1, empresa_seleccionada)
+                st.plotly_chart(fig_serv1, use_container_width=True)
+            
+            with col2:
+                # Valor por línea por servicio
+                fig_serv2 = figure_cache.obtener('fig_serv2', empresa_seleccionada)
+                if fig_serv2 is None:
+                    fig_serv2 = px.bar(
+                        serv_data,
+                        x='Valor_Por_Linea',
+                        y='SERVICIO_PAQUETE',
+                        orientation='h',
+                        title='Valor Promedio por Línea según Servicio',
+                        color='Valor_Por_Linea',
+                        color_continuous_scale='RdYlGn'
+                    )
+                    fig_serv2.update_layout(showlegend=False)
+                    fig_serv2 = figure_cache.guardar('fig_serv2', fig_serv2, empresa_seleccionada)
+                st.plotly_chart(fig_serv2, use_container_width=True)
+            
+            # Análisis individual vs empaquetado
+            st.markdown("### 📦 Individual vs Empaquetado")
+            
+            tipo_serv = perfil['tipo_servicio']
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                fig_tipo1 = figure_cache.obtener('fig_tipo1', empresa_seleccionada)
+                if fig_tipo1 is None:
+                    fig_tipo1 = px.bar(
+                        tipo_serv,
+                        x='TIPO_SERVICIO',
+                        y='CANTIDAD_LINEAS_ACCESOS',
+                        title='Líneas: Individual vs Empaquetado',
+                        color='TIPO_SERVICIO',
+                        color_discrete_map={'Individual': '#2E86AB', 'Empaquetado': '#A23B72'}
+                    )
+                    fig_tipo1 = figure_cache.guardar('fig_tipo1', fig_tipo1, empresa_seleccionada)
+                st.plotly_chart(fig_tipo1, use_container_width=True)
+            
+            with col2:
+                fig_tipo2 = figure_cache.obtener('fig_tipo2', empresa_seleccionada)
+                if fig_tipo2 is None:
+                    fig_tipo2 = px.bar(
+                        tipo_serv,
+                        x='TIPO_SERVICIO',
+                        y='VALOR_FACTURADO_O_COBRADO',
+                        title='Valor: Individual vs Empaquetado',
+                        color='TIPO_SERVICIO',
+                        color_discrete_map={'Individual': '#2E86AB', 'Empaquetado': '#A23B72'}
+                    )
+                    fig_tipo2 = figure_cache.guardar('fig_tipo2', fig_tipo2, empresa_seleccionada)
+                st.plotly_chart(fig_tipo2, use_container_width=True)
     
     with tab5:
-        # Evolución temporal
-        st.markdown("### 📈 Evolución Temporal")
-        
-        # Crear periodo
-        df_empresa['PERIODO'] = df_empresa['ANNO'].astype(str) + '-T' + df_empresa['TRIMESTRE'].astype(str)
-        
-        evol_data = df_empresa.groupby('PERIODO').agg({
-            'CANTIDAD_LINEAS_ACCESOS': 'sum',
-            'VALOR_FACTURADO_O_COBRADO': 'sum'
-        }).reset_index()
-        
-        # Ordenar por periodo
-        evol_data = evol_data.sort_values('PERIODO')
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Evolución de líneas
-            fig_evol1 = px.line(
-                evol_data,
-                x='PERIODO',
-                y='CANTIDAD_LINEAS_ACCESOS',
-                title='Evolución de Líneas por Trimestre',
-                markers=True,
-                line_shape='spline'
-            )
-            fig_evol1.update_traces(line_color='#2E86AB', line_width=3)
-            fig_evol1.update_layout(height=400)
-            st.plotly_chart(fig_evol1, use_container_width=True)
-        
-        with col2:
-            # Evolución de valor
-            fig_evol2 = px.line(
-                evol_data,
-                x='PERIODO',
-                y='VALOR_FACTURADO_O_COBRADO',
-                title='Evolución de Valor Facturado por Trimestre',
-                markers=True,
-                line_shape='spline'
-            )
-            fig_evol2.update_traces(line_color='#A23B72', line_width=3)
-            fig_evol2.update_layout(height=400)
-            st.plotly_chart(fig_evol2, use_container_width=True)
-        
-        # Crecimiento trimestral
-        if len(evol_data) > 1:
-            evol_data['Crecimiento_Lineas'] = evol_data['CANTIDAD_LINEAS_ACCESOS'].pct_change() * 100
-            evol_data['Crecimiento_Valor'] = evol_data['VALOR_FACTURADO_O_COBRADO'].pct_change() * 100
+        if tab5.open:
+            # Evolución temporal
+            st.markdown("### 📈 Evolución Temporal")
             
-            st.markdown("### 📊 Tasa de Crecimiento Trimestral (%)")
+            # Evolución por periodo (ya ordenada por año y trimestre)
+            evol_data = perfil['periodo'].copy()
             
-            fig_crec = go.Figure()
+            col1, col2 = st.columns(2)
             
-            fig_crec.add_trace(go.Bar(
-                x=evol_data['PERIODO'],
-                y=evol_data['Crecimiento_Lineas'],
-                name='Crecimiento Líneas',
-                marker_color='#2E86AB'
-            ))
-            
-            fig_crec.add_trace(go.Bar(
-                x=evol_data['PERIODO'],
-                y=evol_data['Crecimiento_Valor'],
-                name='Crecimiento Valor',
-                marker_color='#A23B72'
-            ))
+            with col1:
+                # Evolución de líneas
+                fig_evol1 = figure_cache.obtener('fig_evol1', empresa_seleccionada)
+                if fig_evol1 is None:
+                    fig_evol1 = px.line(
+                        evol_data,
+                        x='PERIODO',
+                        y='CANTIDAD_LINEAS_ACCESOS',
+                        title='Evolución de Líneas por Trimestre',
+                        markers=True,
+                        line_shape='spline'
+                    )
+                    fig_evol1.update_traces(line_color='#2E86AB', line_width=3)
+                    fig_evol1.update_layout(height=400)
+                    fig_evol1 = figure_cache.guardar('fig_evol1', fig_evol1, empresa_seleccionada)
+                st.plotly_chart(fig_evol1, use_container_width=True)
             
-            fig_crec.update_layout(
-                barmode='group',
-                title='Crecimiento Trimestral',
-                yaxis_title='% Crecimiento',
-                height=400
-            )
+            with col2:
+                # Evolución de valor
+                fig_evol2 = figure_cache.obtener('fig_evol2', empresa_seleccionada)
+                if fig_evol2 is None:
+                    fig_evol2 = px.line(
+                        evol_data,
+                        x='PERIODO',
+                        y='VALOR_FACTURADO_O_COBRADO',
+                        title='Evolución de Valor Facturado por Trimestre',
+                        markers=True,
+                        line_shape='spline'
+                    )
+                    fig_evol2.update_traces(line_color='#A23B72', line_width=3)
+                    fig_evol2.update_layout(height=400)
+                    fig_evol2 = figure_cache.guardar('fig_evol2', fig_evol2, empresa_seleccionada)
+                st.plotly_chart(fig_evol2, use_container_width=True)
             
-            st.plotly_chart(fig_crec, use_container_width=True)
+            # Crecimiento trimestral
+            if len(evol_data) > 1:
+                evol_data['Crecimiento_Lineas'] = evol_data['CANTIDAD_LINEAS_ACCESOS'].pct_change() * 100
+                evol_data['Crecimiento_Valor'] = evol_data['VALOR_FACTURADO_O_COBRADO'].pct_change() * 100
+                
+                st.markdown("### 📊 Tasa de Crecimiento Trimestral (%)")
+                
+                fig_crec = figure_cache.obtener('fig_crec', empresa_seleccionada)
+                if fig_crec is None:
+                    fig_crec = go.Figure()
+                    
+                    fig_crec.add_trace(go.Bar(
+                        x=evol_data['PERIODO'],
+                        y=evol_data['Crecimiento_Lineas'],
+                        name='Crecimiento Líneas',
+                        marker_color='#2E86AB'
+                    ))
+                    
+                    fig_crec.add_trace(go.Bar(
+                        x=evol_data['PERIODO'],
+                        y=evol_data['Crecimiento_Valor'],
+                        name='Crecimiento Valor',
+                        marker_color='#A23B72'
+                    ))
+                    
+                    fig_crec.update_layout(
+                        barmode='group',
+                        title='Crecimiento Trimestral',
+                        yaxis_title='% Crecimiento',
+                        height=400
+                    )
+                    fig_crec = figure_cache.guardar('fig_crec', fig_crec, empresa_seleccionada)
+                st.plotly_chart(fig_crec, use_container_width=True)
 
 def show_comparacion_empresas(df):
     """8.2 Comparación entre múltiples empresas"""
@@ -478,12 +455,12 @@ def show_comparacion_empresas(df):
     Seleccione hasta 5 empresas para comparar sus métricas lado a lado.
     """)
     
-    # Obtener top 100 empresas por valor facturado (ordenadas de mayor a menor)
-    top_empresas_por_valor = df.groupby('EMPRESA')['VALOR_FACTURADO_O_COBRADO'].sum().nlargest(100)
-    empresas_top_100 = top_empresas_por_valor.index.tolist()  # Ya vienen ordenadas
+    # Índice de búsqueda de todas las empresas (ordenadas de mayor a menor valor facturado)
+    indice = company_search.obtener_indice(df)
+    empresas_top_100 = indice.empresas[:100]
     
     # Selector múltiple de empresas
-    total_empresas = df['EMPRESA'].nunique()
+    total_empresas = len(indice)
     
     col1, col2 = st.columns([3, 1])
     
@@ -492,20 +469,28 @@ def show_comparacion_empresas(df):
         busqueda = st.text_input(
             "🔍 Filtrar empresas:",
             placeholder="Buscar...",
-            help="Filtre la lista antes de seleccionar (búsqueda en Top 100 por valor facturado)"
+            help="Filtre la lista antes de seleccionar (búsqueda en todas las empresas por nombre o ID)"
         )
         
         # Filtrar
         if busqueda:
-            empresas_filtradas = [e for e in empresas_top_100 if busqueda.upper() in e.upper()]
+            empresas_filtradas = indice.buscar(busqueda)
         else:
             empresas_filtradas = empresas_top_100
         
+        # Las ya seleccionadas se conservan aunque no coincidan con la nueva búsqueda,
+        # salvo las que no tienen datos en el periodo actual. Se reasignan en cada
+        # ejecución porque el multiselect reinicia su selección cuando cambian sus opciones
+        previas = [e for e in st.session_state.get('empresas_comparacion', []) if e in indice.empresas]
+        st.session_state['empresas_comparacion'] = previas
+        empresas_filtradas = previas + [e for e in empresas_filtradas if e not in previas]
+        
         empresas_seleccionadas = st.multiselect(
-            f"Seleccione empresas a comparar (máx 5) - Top 100 ordenadas por valor:",
+            "Seleccione empresas a comparar (máx 5) - ordenadas por valor:",
             empresas_filtradas,
             max_selections=5,
-            help="Las empresas están ordenadas de mayor a menor valor facturado"
+            help="Las empresas están ordenadas de mayor a menor valor facturado",
+            key='empresas_comparacion'
         )
     
     with col2:
@@ -516,6 +501,8 @@ def show_comparacion_empresas(df):
     
     if len(empresas_seleccionadas) < 2:
         st.info("ℹ️ Seleccione al menos 2 empresas para comparar")
+        if empresas_seleccionadas:
+            _mostrar_similares(df, empresas_seleccionadas)
         return
     
     # Filtrar datos
@@ -557,40 +544,46 @@ def show_comparacion_empresas(df):
     st.markdown("---")
     
     # Gráficos comparativos
-    tab1, tab2, tab3 = st.tabs(["📊 Volumen", "💰 Financiero", "🌐 Cobertura"])
+    tab1, tab2, tab3, tab4 = st.tabs(["📊 Volumen", "💰 Financiero", "🌐 Cobertura", "🔗 Similitud"])
     
     with tab1:
         # Comparación de líneas
-        fig1 = px.bar(
-            metricas,
-            x='Empresa',
-            y='Total_Lineas',
-            title='Comparación de Total de Líneas',
-            color='Total_Lineas',
-            color_continuous_scale='Blues'
-        )
-        fig1.update_layout(showlegend=False, height=400)
+        fig1 = figure_cache.obtener('fig1', empresas_seleccionadas)
+        if fig1 is None:
+            fig1 = px.bar(
+                metricas,
+                x='Empresa',
+                y='Total_Lineas',
+                title='Comparación de Total de Líneas',
+                color='Total_Lineas',
+                color_continuous_scale='Blues'
+            )
+            fig1.update_layout(showlegend=False, height=400)
+            fig1 = figure_cache.guardar('fig1', fig1, empresas_seleccionadas)
         st.plotly_chart(fig1, use_container_width=True)
         
         # Comparación de velocidades
-        fig2 = go.Figure()
-        fig2.add_trace(go.Bar(
-            x=metricas['Empresa'],
-            y=metricas['Vel_Bajada'],
-            name='Velocidad Bajada',
-            marker_color='#2E86AB'
-        ))
-        fig2.add_trace(go.Bar(
-            x=metricas['Empresa'],
-            y=metricas['Vel_Subida'],
-            name='Velocidad Subida',
-            marker_color='#A23B72'
-        ))
-        fig2.update_layout(
-            barmode='group',
-            title='Comparación de Velocidades Promedio (Mbps)',
-            height=400
-        )
+        fig2 = figure_cache.obtener('fig2', empresas_seleccionadas)
+        if fig2 is None:
+            fig2 = go.Figure()
+            fig2.add_trace(go.Bar(
+                x=metricas['Empresa'],
+                y=metricas['Vel_Bajada'],
+                name='Velocidad Bajada',
+                marker_color='#2E86AB'
+            ))
+            fig2.add_trace(go.Bar(
+                x=metricas['Empresa'],
+                y=metricas['Vel_Subida'],
+                name='Velocidad Subida',
+                marker_color='#A23B72'
+            ))
+            fig2.update_layout(
+                barmode='group',
+                title='Comparación de Velocidades Promedio (Mbps)',
+                height=400
+            )
+            fig2 = figure_cache.guardar('fig2', fig2, empresas_seleccionadas)
         st.plotly_chart(fig2, use_container_width=True)
     
     with tab2:
@@ -598,28 +591,34 @@ def show_comparacion_empresas(df):
         
         with col1:
             # Valor total
-            fig3 = px.bar(
-                metricas,
-                x='Empresa',
-                y='Total_Valor',
-                title='Comparación de Valor Total Facturado',
-                color='Total_Valor',
-                color_continuous_scale='Greens'
-            )
-            fig3.update_layout(showlegend=False, height=400)
+            fig3 = figure_cache.obtener('fig3', empresas_seleccionadas)
+            if fig3 is None:
+                fig3 = px.bar(
+                    metricas,
+                    x='Empresa',
+                    y='Total_Valor',
+                    title='Comparación de Valor Total Facturado',
+                    color='Total_Valor',
+                    color_continuous_scale='Greens'
+                )
+                fig3.update_layout(showlegend=False, height=400)
+                fig3 = figure_cache.guardar('fig3', fig3, empresas_seleccionadas)
             st.plotly_chart(fig3, use_container_width=True)
         
         with col2:
             # Valor por línea
-            fig4 = px.bar(
-                metricas,
-                x='Empresa',
-                y='Valor_Por_Linea',
-                title='Valor Promedio por Línea',
-                color='Valor_Por_Linea',
-                color_continuous_scale='RdYlGn'
-            )
-            fig4.update_layout(showlegend=False, height=400)
+            fig4 = figure_cache.obtener('fig4', empresas_seleccionadas)
+            if fig4 is None:
+                fig4 = px.bar(
+                    metricas,
+                    x='Empresa',
+                    y='Valor_Por_Linea',
+                    title='Valor Promedio por Línea',
+                    color='Valor_Por_Linea',
+                    color_continuous_scale='RdYlGn'
+                )
+                fig4.update_layout(showlegend=False, height=400)
+                fig4 = figure_cache.guardar('fig4', fig4, empresas_seleccionadas)
             st.plotly_chart(fig4, use_container_width=True)
     
     with tab3:
@@ -627,29 +626,81 @@ def show_comparacion_empresas(df):
         
         with col1:
             # Cobertura departamental
-            fig5 = px.bar(
-                metricas,
-                x='Empresa',
-                y='N_Deptos',
-                title='Número de Departamentos',
-                color='N_Deptos',
-                color_continuous_scale='Oranges'
-            )
-            fig5.update_layout(showlegend=False, height=400)
+            fig5 = figure_cache.obtener('fig5', empresas_seleccionadas)
+            if fig5 is None:
+                fig5 = px.bar(
+                    metricas,
+                    x='Empresa',
+                    y='N_Deptos',
+                    title='Número de Departamentos',
+                    color='N_Deptos',
+                    color_continuous_scale='Oranges'
+                )
+                fig5.update_layout(showlegend=False, height=400)
+                fig5 = figure_cache.guardar('fig5', fig5, empresas_seleccionadas)
             st.plotly_chart(fig5, use_container_width=True)
         
         with col2:
             # Cobertura municipal
-            fig6 = px.bar(
-                metricas,
-                x='Empresa',
-                y='N_Munis',
-                title='Número de Municipios',
-                color='N_Munis',
-                color_continuous_scale='Purples'
-            )
-            fig6.update_layout(showlegend=False, height=400)
+            fig6 = figure_cache.obtener('fig6', empresas_seleccionadas)
+            if fig6 is None:
+                fig6 = px.bar(
+                    metricas,
+                    x='Empresa',
+                    y='N_Munis',
+                    title='Número de Municipios',
+                    color='N_Munis',
+                    color_continuous_scale='Purples'
+                )
+                fig6.update_layout(showlegend=False, height=400)
+                fig6 = figure_cache.guardar('fig6', fig6, empresas_seleccionadas)
             st.plotly_chart(fig6, use_container_width=True)
+    
+    with tab4:
+        # Similitud entre las empresas seleccionadas
+        fig7 = figure_cache.obtener('fig7', empresas_seleccionadas)
+        if fig7 is None:
+            matriz = company_similarity.obtener_similitud(df).submatriz(empresas_seleccionadas)
+            matriz.index = matriz.columns = [e[:30] for e in matriz.columns]
+            fig7 = px.imshow(
+                matriz * 100,
+                labels=dict(color="Similitud (%)"),
+                title="Similitud entre las Empresas Seleccionadas",
+                color_continuous_scale='YlGnBu',
+                zmin=0,
+                zmax=100,
+                text_auto='.0f',
+                aspect='auto'
+            )
+            fig7 = figure_cache.guardar('fig7', fig7, empresas_seleccionadas)
+        st.plotly_chart(fig7, use_container_width=True)
+        
+        _mostrar_similares(df, empresas_seleccionadas)
+
+def _mostrar_similares(df, empresas_seleccionadas):
+    """Operadores de todo el mercado más parecidos a una de las empresas seleccionadas"""
+    st.markdown("### 🔗 Operadores Similares")
+    
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        referencia = st.selectbox("Empresa de referencia:", empresas_seleccionadas, key='referencia_similares')
+    
+    with col2:
+        n_similares = st.number_input("Cantidad:", min_value=5, max_value=50, value=10, step=5,
+                                      key='cantidad_similares')
+    
+    similares = company_similarity.obtener_similitud(df).similares(referencia, n_similares)
+    columnas_similitud = [c for c in similares.columns if c != 'Empresa']
+    
+    st.dataframe(similares.style.format({c: '{:.1%}' for c in columnas_similitud})
+                 .background_gradient(cmap='YlGnBu', subset=['Similitud']),
+                 use_container_width=True, hide_index=True)
+    
+    st.caption(
+        "💡 La similitud combina, con igual peso, la mezcla de servicios, la mezcla de tecnologías "
+        "y la huella departamental (participación de líneas) con el ARPU y las velocidades promedio"
+    )
 
 def show_ranking_empresas(df):
     """8.3 Ranking de empresas por diferentes métricas"""
@@ -681,16 +732,10 @@ def show_ranking_empresas(df):
     with col3:
         mostrar_valores = st.checkbox("Mostrar valores", value=True)
     
-    # Calcular métricas
-    ranking_data = df.groupby('EMPRESA').agg({
-        'CANTIDAD_LINEAS_ACCESOS': 'sum',
-        'VALOR_FACTURADO_O_COBRADO': 'sum',
-        'DEPARTAMENTO': 'nunique',
-        'MUNICIPIO': 'nunique',
-        'VELOCIDAD_EFECTIVA_DOWNSTREAM': 'mean'
-    }).reset_index()
-    
-    ranking_data['Valor_Por_Linea'] = ranking_data['VALOR_FACTURADO_O_COBRADO'] / ranking_data['CANTIDAD_LINEAS_ACCESOS']
+    # Rankings precalculados por trimestre; se consultan para el periodo seleccionado
+    rankings = company_ranks.obtener_rankings()
+    periodos = df['ANNO'] * 10 + df['TRIMESTRE']
+    periodo_inicio, periodo_fin = int(periodos.min()), int(periodos.max())
     
     # Seleccionar columna según métrica
     metrica_map = {
@@ -705,8 +750,7 @@ def show_ranking_empresas(df):
     col_name, formato, color_scale = metrica_map[metrica_ranking]
     
     # Ordenar y tomar top N
-    ranking_top = ranking_data.nlargest(top_n, col_name).copy()
-    ranking_top['Ranking'] = range(1, len(ranking_top) + 1)
+    ranking_top = rankings.ranking(col_name, periodo_inicio, periodo_fin).head(top_n).copy()
     
     # Acortar nombres largos
     ranking_top['Empresa_Display'] = ranking_top['EMPRESA'].apply(lambda x: x[:40] + '...' if len(x) > 40 else x)
@@ -714,24 +758,26 @@ def show_ranking_empresas(df):
     st.markdown("---")
     
     # Gráfico de ranking
-    fig = px.bar(
-        ranking_top,
-        y='Empresa_Display',
-        x=col_name,
-        orientation='h',
-        title=f'Top {top_n} Empresas por {metrica_ranking}',
-        color=col_name,
-        color_continuous_scale=color_scale,
-        text=col_name if mostrar_valores else None
-    )
-    
-    fig.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
-    fig.update_layout(
-        showlegend=False,
-        height=max(500, top_n * 25),
-        yaxis={'categoryorder': 'total ascending'}
-    )
-    
+    fig = figure_cache.obtener('fig', metrica_ranking, top_n, mostrar_valores)
+    if fig is None:
+        fig = px.bar(
+            ranking_top,
+            y='Empresa_Display',
+            x=col_name,
+            orientation='h',
+            title=f'Top {top_n} Empresas por {metrica_ranking}',
+            color=col_name,
+            color_continuous_scale=color_scale,
+            text=col_name if mostrar_valores else None
+        )
+        
+        fig.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+        fig.update_layout(
+            showlegend=False,
+            height=max(500, top_n * 25),
+            yaxis={'categoryorder': 'total ascending'}
+        )
+        fig = figure_cache.guardar('fig', fig, metrica_ranking, top_n, mostrar_valores)
     st.plotly_chart(fig, use_container_width=True)
     
     # Tabla detallada
@@ -782,4 +828,66 @@ def show_ranking_empresas(df):
     
     with col4:
         concentracion = (ranking_top.head(5)[col_name].sum() / ranking_top[col_name].sum() * 100)
-        st.metric("Concentración Top 5", f"{concentracion:.1f}%")
\ No newline at end of file
+        st.metric("Concentración Top 5", f"{concentracion:.1f}%")
+    
+    # Evolución del ranking por trimestre
+    st.markdown("---")
+    st.markdown(f"### 📈 Evolución del Ranking por {metrica_ranking}")
+    
+    if rankings.periodos[(rankings.periodos >= periodo_inicio) & (rankings.periodos <= periodo_fin)].size < 2:
+        st.info("ℹ️ Seleccione un periodo de al menos 2 trimestres para ver la evolución del ranking")
+        return
+    
+    tab1, tab2, tab3 = st.tabs(["📈 Trayectoria", "🚀 Mayores Cambios", "⚖️ Estabilidad"])
+    
+    with tab1:
+        # Posición trimestral de los 10 primeros del ranking
+        fig_tray = figure_cache.obtener('fig_tray', metrica_ranking, top_n)
+        if fig_tray is None:
+            trayectoria = rankings.trayectoria(ranking_top['EMPRESA'].head(10), col_name, periodo_inicio, periodo_fin)
+            trayectoria['EMPRESA'] = trayectoria['EMPRESA'].str[:30]
+            fig_tray = px.line(
+                trayectoria,
+                x='PERIODO',
+                y='Ranking',
+                color='EMPRESA',
+                markers=True,
+                title=f'Posición Trimestral del Top 10 por {metrica_ranking}'
+            )
+            fig_tray.update_yaxes(autorange='reversed', dtick=1)
+            fig_tray.update_layout(height=500)
+            fig_tray = figure_cache.guardar('fig_tray', fig_tray, metrica_ranking, top_n)
+        st.plotly_chart(fig_tray, use_container_width=True)
+    
+    with tab2:
+        # Mayores subidas y caídas entre el primer y el último trimestre
+        cambios = rankings.mayores_cambios(col_name, periodo_inicio, periodo_fin)
+        cambios['EMPRESA'] = cambios['EMPRESA'].str[:40]
+        cambios.columns = ['Empresa', 'Posición Inicial', 'Posición Final', 'Cambio']
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("#### 🚀 Mayores Subidas")
+            st.dataframe(cambios[cambios['Cambio'] > 0].head(10), use_container_width=True, hide_index=True)
+        
+        with col2:
+            st.markdown("#### 📉 Mayores Caídas")
+            st.dataframe(cambios[cambios['Cambio'] < 0].sort_values('Cambio').head(10),
+                         use_container_width=True, hide_index=True)
+        
+        st.caption(f"💡 Posiciones en {company_ranks.etiqueta_periodo(periodo_inicio)} y "
+                   f"{company_ranks.etiqueta_periodo(periodo_fin)}; solo empresas que reportan en ambos trimestres")
+    
+    with tab3:
+        # Variabilidad de la posición de las empresas del top N
+        estabilidad = rankings.estabilidad(col_name, periodo_inicio, periodo_fin).head(top_n)
+        estabilidad.columns = ['Empresa', 'Posición Promedio', 'Desviación', 'Mejor', 'Peor', 'Trimestres']
+        
+        st.dataframe(estabilidad.style.format({
+            'Posición Promedio': '{:.1f}',
+            'Desviación': '{:.2f}'
+        }).background_gradient(cmap='RdYlGn_r', subset=['Desviación']),
+        use_container_width=True, hide_index=True, height=400)
+        
+        st.caption("💡 Una desviación baja indica una posición estable entre trimestres")
\ No newline at end of file
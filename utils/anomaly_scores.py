@@ -0,0 +1,228 @@
+"""
+Módulo para calcular y persistir puntajes de anomalía por registro
+"""
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from sklearn.ensemble import IsolationForest
+
+# Columnas generadas por la etapa de puntuación
+COLUMNAS_ANOMALIA = [
+    'ANOM_IQR_SERVICIO',
+    'ANOM_IQR_VPL',
+    'ANOM_IQR_VPL_PERIODO',
+    'ANOM_ZSCORE_ROBUSTO',
+    'ANOM_ISOFOREST',
+    'ANOM_SCORE'
+]
+
+# |z| robusto a partir del cual un registro se considera atípico
+UMBRAL_ZSCORE_ROBUSTO = 3.5
+
+# Marcas y dimensiones del índice de registros atípicos
+FLAGS_INDICE = ['ANOM_IQR_SERVICIO', 'ANOM_IQR_VPL', 'ANOM_IQR_VPL_PERIODO']
+DIMENSIONES_INDICE = ['ID_SERVICIO_PAQUETE', 'PERIODO', 'ID_MUNICIPIO']
+
+def _limites_iqr(serie, grupos=None):
+    """
+    Calcula los límites [Q1 - 1.5×IQR, Q3 + 1.5×IQR] para cada registro.
+    
+    Args:
+        serie: Serie numérica
+        grupos: Columnas (lista de Series) por las que se agrupa, o None para límites globales
+    
+    Returns:
+        tuple: (limite_inf, limite_sup) alineados con el índice de la serie
+    """
+    if grupos is None:
+        q1 = serie.quantile(0.25)
+        q3 = serie.quantile(0.75)
+    else:
+        agrupado = serie.groupby(grupos)
+        q1 = agrupado.transform('quantile', 0.25)
+        q3 = agrupado.transform('quantile', 0.75)
+    
+    iqr = q3 - q1
+    return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+def _zscore_robusto(serie, grupos):
+    """
+    Z-score robusto (mediana/MAD) de una serie dentro de cada grupo.
+    
+    Cuando el MAD del grupo es cero se usa la desviación absoluta media
+    escalada, y si también es cero el puntaje queda en 0.
+    """
+    mediana = serie.groupby(grupos).transform('median')
+    desviacion = (serie - mediana).abs()
+    mad = desviacion.groupby(grupos).transform('median')
+    mean_ad = desviacion.groupby(grupos).transform('mean')
+    
+    escala = (mad / 0.6745).where(mad > 0, mean_ad * 1.253314)
+    z = (serie - mediana) / escala.replace(0, np.nan)
+    
+    return z.fillna(0)
+
+def compute_anomaly_scores(df, random_state=42):
+    """
+    Calcula puntajes de anomalía por registro sobre el dataset limpio.
+    
+    Columnas generadas:
+        - ANOM_IQR_SERVICIO: valor facturado fuera del rango IQR de su servicio
+        - ANOM_IQR_VPL: valor por línea fuera del rango IQR global
+        - ANOM_IQR_VPL_PERIODO: valor por línea fuera del rango IQR de su trimestre
+        - ANOM_ZSCORE_ROBUSTO: z-score robusto del valor por línea dentro de (servicio, departamento)
+        - ANOM_ISOFOREST: puntaje de Isolation Forest (mayor = más anómalo)
+        - ANOM_SCORE: puntaje combinado entre 0 y 1 para ordenar registros
+    
+    Args:
+        df: DataFrame limpio (salida de generate_clean_dataset)
+        random_state: Semilla del Isolation Forest
+    
+    Returns:
+        pd.DataFrame: Copia del dataset con las columnas de anomalía agregadas
+    """
+    df_scores = df.drop(columns=COLUMNAS_ANOMALIA, errors='ignore').copy()
+    
+    lineas = df_scores['CANTIDAD_LINEAS_ACCESOS'].astype(float)
+    valor = df_scores['VALOR_FACTURADO_O_COBRADO'].astype(float)
+    
+    # IQR del valor facturado por servicio (solo valores positivos)
+    con_valor = valor > 0
+    valor_pos = valor[con_valor]
+    limite_inf, limite_sup = _limites_iqr(valor_pos, df_scores.loc[con_valor, 'ID_SERVICIO_PAQUETE'])
+    df_scores['ANOM_IQR_SERVICIO'] = False
+    df_scores.loc[con_valor, 'ANOM_IQR_SERVICIO'] = (valor_pos < limite_inf) | (valor_pos > limite_sup)
+    
+    # Valor por línea para registros con líneas y valor
+    con_vpl = con_valor & (lineas > 0)
+    vpl = (valor / lineas)[con_vpl]
+    
+    # IQR del valor por línea: global y por trimestre
+    limite_inf, limite_sup = _limites_iqr(vpl)
+    df_scores['ANOM_IQR_VPL'] = False
+    df_scores.loc[con_vpl, 'ANOM_IQR_VPL'] = (vpl < limite_inf) | (vpl > limite_sup)
+    
+    periodo = df_scores.loc[con_vpl, 'ANNO'] * 10 + df_scores.loc[con_vpl, 'TRIMESTRE']
+    limite_inf, limite_sup = _limites_iqr(vpl, periodo)
+    df_scores['ANOM_IQR_VPL_PERIODO'] = False
+    df_scores.loc[con_vpl, 'ANOM_IQR_VPL_PERIODO'] = (vpl < limite_inf) | (vpl > limite_sup)
+    
+    # Z-score robusto dentro de (servicio, departamento)
+    grupos = [
+        df_scores.loc[con_vpl, 'ID_SERVICIO_PAQUETE'],
+        df_scores.loc[con_vpl, 'ID_DEPARTAMENTO']
+    ]
+    df_scores['ANOM_ZSCORE_ROBUSTO'] = 0.0
+    df_scores.loc[con_vpl, 'ANOM_ZSCORE_ROBUSTO'] = _zscore_robusto(vpl, grupos)
+    
+    # Isolation Forest sobre volumen, valor y velocidades (escala logarítmica)
+    features = np.column_stack([
+        np.log1p(lineas.clip(lower=0)),
+        np.log1p(valor.clip(lower=0)),
+        np.log1p((valor / lineas.replace(0, np.nan)).fillna(0).clip(lower=0)),
+        np.log1p(df_scores['VELOCIDAD_EFECTIVA_DOWNSTREAM'].fillna(0).clip(lower=0)),
+        np.log1p(df_scores['VELOCIDAD_EFECTIVA_UPSTREAM'].fillna(0).clip(lower=0))
+    ])
+    
+    iso = IsolationForest(n_estimators=100, random_state=random_state, n_jobs=-1)
+    iso.fit(features)
+    df_scores['ANOM_ISOFOREST'] = -iso.score_samples(features)
+    
+    # Puntaje combinado: promedio de rangos percentiles
+    rango_z = df_scores['ANOM_ZSCORE_ROBUSTO'].abs().rank(pct=True)
+    rango_iso = df_scores['ANOM_ISOFOREST'].rank(pct=True)
+    df_scores['ANOM_SCORE'] = (rango_z + rango_iso) / 2
+    
+    for col in ['ANOM_ZSCORE_ROBUSTO', 'ANOM_ISOFOREST', 'ANOM_SCORE']:
+        df_scores[col] = df_scores[col].round(4)
+    
+    return df_scores
+
+def build_anomaly_index(df, flags=FLAGS_INDICE, dimensiones=DIMENSIONES_INDICE):
+    """
+    Construye un índice compacto de posiciones de registros atípicos.
+    
+    Para cada marca se guardan las posiciones (iloc) de todos los registros
+    marcados y, para cada dimensión, las de cada valor del grupo, como arrays
+    enteros ordenados. Así se obtienen los registros de un grupo en O(k) sin
+    volver a filtrar el DataFrame.
+    
+    Args:
+        df: DataFrame con las columnas de anomalía (puede estar filtrado)
+        flags: Columnas booleanas a indexar
+        dimensiones: Columnas de agrupación (PERIODO se calcula si no existe)
+    
+    Returns:
+        dict: {(flag, None, None): posiciones, (flag, dimension, valor): posiciones}
+    """
+    indice = {}
+    
+    for flag in flags:
+        posiciones = np.flatnonzero(df[flag].to_numpy(dtype=bool)).astype(np.int32)
+        indice[(flag, None, None)] = posiciones
+        
+        for dimension in dimensiones:
+            if dimension == 'PERIODO' and dimension not in df.columns:
+                claves = (df['ANNO'].to_numpy() * 10 + df['TRIMESTRE'].to_numpy())[posiciones]
+            else:
+                claves = df[dimension].to_numpy()[posiciones]
+            
+            # Orden estable: las posiciones quedan ordenadas dentro de cada grupo
+            orden = np.argsort(claves, kind='stable')
+            valores, inicios = np.unique(claves[orden], return_index=True)
+            for valor, grupo in zip(valores, np.split(posiciones[orden], inicios[1:])):
+                indice[(flag, dimension, valor.item())] = grupo
+    
+    return indice
+
+def lookup_anomaly_rows(df, indice, flag, dimension=None, valor=None):
+    """
+    Registros atípicos de un grupo a partir del índice.
+    
+    Args:
+        df: DataFrame con el que se construyó el índice
+        indice: Salida de build_anomaly_index
+        flag: Marca de anomalía
+        dimension: Dimensión del grupo, o None para todos los registros marcados
+        valor: Valor de la dimensión
+    
+    Returns:
+        pd.DataFrame: Registros del grupo (vacío si el grupo no tiene outliers)
+    """
+    posiciones = indice.get((flag, dimension, valor), np.empty(0, dtype=np.int32))
+    return df.iloc[posiciones]
+
+def score_clean_dataset(data_path="data/empaquetamiento_fijo_limpio_2023_2024.csv"):
+    """
+    Etapa de puntuación offline: agrega los puntajes de anomalía al dataset
+    limpio y lo guarda en el mismo archivo.
+    
+    Args:
+        data_path: Ruta del CSV limpio
+    
+    Returns:
+        bool: True si se generaron los puntajes, False en caso contrario
+    """
+    try:
+        data_path = Path(data_path)
+        
+        print("\nCalculando puntajes de anomalía...")
+        df = pd.read_csv(data_path)
+        df_scores = compute_anomaly_scores(df)
+        df_scores.to_csv(data_path, index=False, encoding='utf-8')
+        
+        print(f"   ✓ Outliers IQR por servicio: {df_scores['ANOM_IQR_SERVICIO'].sum():,}")
+        print(f"   ✓ Outliers IQR valor/línea: {df_scores['ANOM_IQR_VPL'].sum():,}")
+        n_z = (df_scores['ANOM_ZSCORE_ROBUSTO'].abs() > UMBRAL_ZSCORE_ROBUSTO).sum()
+        print(f"   ✓ |z| robusto > {UMBRAL_ZSCORE_ROBUSTO}: {n_z:,}")
+        
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Error al calcular puntajes de anomalía: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    score_clean_dataset()
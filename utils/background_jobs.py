@@ -0,0 +1,137 @@
+"""
+Módulo de trabajos en segundo plano: ejecuta cálculos costosos (barridos y
+ajustes de clustering) en un pool local de hilos, con progreso, resultados
+parciales y cancelación, sin bloquear la interfaz
+"""
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Trabajos terminados que se conservan en memoria para recoger su resultado
+MAX_TERMINADOS = 20
+
+ESTADOS_ACTIVOS = ('pendiente', 'ejecutando')
+
+class Cancelado(Exception):
+    """Se lanza dentro de un trabajo cuando se solicitó su cancelación"""
+
+class Trabajo:
+    """
+    Estado de un trabajo en segundo plano.
+    
+    La función del trabajo recibe esta instancia y llama a reportar() para
+    publicar su avance; reportar() lanza Cancelado si se pidió cancelarlo.
+    """
+    
+    def __init__(self, tipo, clave=None):
+        self.id = uuid.uuid4().hex[:8]
+        self.tipo = tipo
+        self.clave = clave
+        self.estado = 'pendiente'
+        self.progreso = 0.0
+        self.mensaje = "En cola..."
+        self.parciales = {}
+        self.resultado = None
+        self.error = None
+        self.creado = datetime.now()
+        self._cancelar = threading.Event()
+    
+    def reportar(self, progreso=None, mensaje=None):
+        """Actualiza el avance y comprueba si el trabajo fue cancelado"""
+        if progreso is not None:
+            self.progreso = float(progreso)
+        if mensaje is not None:
+            self.mensaje = mensaje
+        if self._cancelar.is_set():
+            raise Cancelado()
+    
+    @property
+    def activo(self):
+        return self.estado in ESTADOS_ACTIVOS
+
+class GestorTrabajos:
+    """Pool de hilos y registro de trabajos (una instancia por proceso del servidor)"""
+    
+    def __init__(self, max_workers=2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='trabajo')
+        self._trabajos = {}
+        self._lock = threading.Lock()
+    
+    def enviar(self, tipo, funcion, clave=None):
+        """
+        Envía un trabajo al pool.
+        
+        Si ya hay un trabajo activo o terminado con la misma clave se reutiliza
+        en lugar de calcularlo de nuevo.
+        
+        Args:
+            tipo: Nombre del tipo de trabajo (p. ej. 'barrido_k')
+            funcion: Callable que recibe el Trabajo y devuelve el resultado
+            clave: Identificador del cálculo para evitar duplicados
+        
+        Returns:
+            str: Id del trabajo
+        """
+        with self._lock:
+            if clave is not None:
+                for trabajo in self._trabajos.values():
+                    if trabajo.clave == clave and trabajo.estado in ESTADOS_ACTIVOS + ('terminado',):
+                        return trabajo.id
+            
+            trabajo = Trabajo(tipo, clave)
+            self._trabajos[trabajo.id] = trabajo
+            self._limpiar()
+        
+        self._pool.submit(self._ejecutar, trabajo, funcion)
+        return trabajo.id
+    
+    def _ejecutar(self, trabajo, funcion):
+        if trabajo._cancelar.is_set():
+            trabajo.estado = 'cancelado'
+            return
+        
+        trabajo.estado = 'ejecutando'
+        trabajo.mensaje = "Ejecutando..."
+        try:
+            trabajo.resultado = funcion(trabajo)
+            trabajo.progreso = 1.0
+            trabajo.estado = 'terminado'
+        except Cancelado:
+            trabajo.estado = 'cancelado'
+        except Exception as e:
+            trabajo.error = f"{type(e).__name__}: {e}"
+            trabajo.estado = 'error'
+    
+    def buscar(self, clave):
+        """Devuelve el trabajo más reciente con esa clave (en cualquier estado), o None"""
+        with self._lock:
+            candidatos = [t for t in self._trabajos.values() if t.clave == clave]
+        return max(candidatos, key=lambda t: t.creado) if candidatos else None
+    
+    def obtener(self, id_trabajo):
+        """Devuelve el trabajo con ese id, o None si no existe (o ya se descartó)"""
+        with self._lock:
+            return self._trabajos.get(id_trabajo)
+    
+    def cancelar(self, id_trabajo):
+        """
+        Solicita la cancelación de un trabajo. Los pendientes no llegan a
+        ejecutarse; los que están en curso se detienen en su próximo reporte.
+        """
+        with self._lock:
+            trabajo = self._trabajos.get(id_trabajo)
+        if trabajo is not None and trabajo.activo:
+            trabajo._cancelar.set()
+            trabajo.mensaje = "Cancelando..."
+    
+    def listar(self):
+        """Trabajos registrados, del más reciente al más antiguo"""
+        with self._lock:
+            return sorted(self._trabajos.values(), key=lambda t: t.creado, reverse=True)
+    
+    def _limpiar(self):
+        """Descarta los trabajos terminados más antiguos por encima de MAX_TERMINADOS"""
+        inactivos = sorted((t for t in self._trabajos.values() if not t.activo), key=lambda t: t.creado)
+        for trabajo in inactivos[:max(len(inactivos) - MAX_TERMINADOS, 0)]:
+            del self._trabajos[trabajo.id]
@@ -0,0 +1,109 @@
+"""
+Módulo de motores de clustering: interfaz común para crear y ajustar K-means,
+MiniBatch K-means, mezclas gaussianas y DBSCAN
+"""
+import numpy as np
+from sklearn.cluster import KMeans, MiniBatchKMeans, DBSCAN
+from sklearn.mixture import GaussianMixture
+from sklearn.neighbors import NearestNeighbors
+
+# Motores disponibles:
+#   - usa_k: el número de clusters es un parámetro (DBSCAN lo determina la densidad)
+#   - predice: el modelo asigna clusters a datos nuevos (necesario para el registro)
+#   - max_filas: límite de filas (DBSCAN puede requerir memoria cuadrática)
+MOTORES = {
+    'kmeans': {
+        'nombre': 'K-means',
+        'usa_k': True,
+        'predice': True,
+        'max_filas': None
+    },
+    'minibatch_kmeans': {
+        'nombre': 'MiniBatch K-means',
+        'usa_k': True,
+        'predice': True,
+        'max_filas': None
+    },
+    'gmm': {
+        'nombre': 'Mezcla Gaussiana (GMM)',
+        'usa_k': True,
+        'predice': True,
+        'max_filas': None
+    },
+    'dbscan': {
+        'nombre': 'DBSCAN (densidad)',
+        'usa_k': False,
+        'predice': False,
+        'max_filas': 20000
+    }
+}
+
+# eps de DBSCAN: percentil de la distancia al min_samples-ésimo vecino, sobre una muestra
+PERCENTIL_EPS = 90
+MUESTRA_EPS = 2000
+
+def estimar_eps(X, min_samples, random_state=42):
+    """
+    Estima el radio eps de DBSCAN con la curva de k-distancias.
+    
+    Args:
+        X: Matriz escalada
+        min_samples: Vecinos mínimos de un punto núcleo
+        random_state: Semilla de la muestra
+    
+    Returns:
+        float: eps
+    """
+    rng = np.random.default_rng(random_state)
+    muestra = X if len(X) <= MUESTRA_EPS else X[rng.choice(len(X), MUESTRA_EPS, replace=False)]
+    
+    vecinos = NearestNeighbors(n_neighbors=min(min_samples, len(muestra))).fit(muestra)
+    distancias, _ = vecinos.kneighbors(muestra)
+    
+    return max(float(np.percentile(distancias[:, -1], PERCENTIL_EPS)), 1e-6)
+
+def crear_motor(motor, k, X=None, random_state=42):
+    """
+    Crea el estimador de un motor de clustering.
+    
+    Args:
+        motor: Clave de MOTORES
+        k: Número de clusters (ignorado por DBSCAN)
+        X: Matriz escalada (DBSCAN la usa para estimar eps)
+        random_state: Semilla
+    
+    Returns:
+        Estimador de scikit-learn sin ajustar
+    """
+    if motor == 'kmeans':
+        return KMeans(n_clusters=k, random_state=random_state, n_init=10)
+    if motor == 'minibatch_kmeans':
+        return MiniBatchKMeans(n_clusters=k, random_state=random_state, n_init=3, batch_size=4096)
+    if motor == 'gmm':
+        return GaussianMixture(n_components=k, covariance_type='full', random_state=random_state)
+    if motor == 'dbscan':
+        min_samples = 2 * X.shape[1]
+        return DBSCAN(eps=estimar_eps(X, min_samples, random_state), min_samples=min_samples)
+    
+    raise ValueError(f"Motor de clustering desconocido: {motor}")
+
+def ajustar_motor(motor, X, k, random_state=42):
+    """
+    Ajusta un motor de clustering sobre la matriz escalada.
+    
+    Args:
+        motor: Clave de MOTORES
+        X: Matriz escalada
+        k: Número de clusters (ignorado por DBSCAN)
+        random_state: Semilla
+    
+    Returns:
+        tuple: (modelo ajustado, labels); en DBSCAN el ruido tiene label -1
+    """
+    modelo = crear_motor(motor, k, X, random_state)
+    labels = modelo.fit_predict(X)
+    return modelo, labels
+
+def n_clusters_modelo(modelo):
+    """Número de clusters de un modelo ajustado (K-means o mezcla gaussiana)"""
+    return int(getattr(modelo, 'n_clusters', None) or modelo.n_components)
@@ -0,0 +1,127 @@
+"""
+Módulo de perfiles de empresas: precalcula en una pasada por dimensión los
+desgloses de todas las empresas (departamentos, municipios, regiones,
+tecnologías, servicios y evolución trimestral) y los guarda indexados por
+ID_EMPRESA, de modo que abrir una empresa sea una búsqueda en un diccionario
+"""
+import numpy as np
+import streamlit as st
+from utils.data_loader import get_dataset_version
+
+LINEAS = 'CANTIDAD_LINEAS_ACCESOS'
+VALOR = 'VALOR_FACTURADO_O_COBRADO'
+
+# Desgloses del perfil: columnas de agrupación y agregaciones
+DIMENSIONES_PERFIL = {
+    'departamento': {
+        'columnas': ['ID_DEPARTAMENTO', 'DEPARTAMENTO'],
+        'agregaciones': {LINEAS: 'sum', VALOR: 'sum', 'MUNICIPIO': 'nunique'}
+    },
+    'municipio': {
+        'columnas': ['MUNICIPIO'],
+        'agregaciones': {LINEAS: 'sum'}
+    },
+    'region': {
+        'columnas': ['REGION'],
+        'agregaciones': {LINEAS: 'sum', VALOR: 'sum'}
+    },
+    'tecnologia': {
+        'columnas': ['TECNOLOGIA'],
+        'agregaciones': {
+            LINEAS: 'sum',
+            'VELOCIDAD_EFECTIVA_DOWNSTREAM': 'mean',
+            'VELOCIDAD_EFECTIVA_UPSTREAM': 'mean'
+        }
+    },
+    'servicio': {
+        'columnas': ['SERVICIO_PAQUETE'],
+        'agregaciones': {LINEAS: 'sum', VALOR: 'sum'}
+    },
+    'tipo_servicio': {
+        'columnas': ['TIPO_SERVICIO'],
+        'agregaciones': {LINEAS: 'sum', VALOR: 'sum'}
+    },
+    'periodo': {
+        'columnas': ['ANNO', 'TRIMESTRE'],
+        'agregaciones': {LINEAS: 'sum', VALOR: 'sum'}
+    }
+}
+
+def _rangos(ids):
+    """Diccionario ID_EMPRESA -> (inicio, fin) de un arreglo de ids ordenado"""
+    unicos, inicios = np.unique(ids, return_index=True)
+    fines = np.append(inicios[1:], len(ids))
+    return dict(zip(unicos.tolist(), zip(inicios.tolist(), fines.tolist())))
+
+class PerfilesEmpresas:
+    """Desgloses precalculados de todas las empresas de un dataset"""
+    
+    def __init__(self, df):
+        empresas = df.drop_duplicates('EMPRESA')
+        self.ids = dict(zip(empresas['EMPRESA'], empresas['ID_EMPRESA']))
+        self._tablas = {}
+        self._rangos = {}
+        
+        for dimension, config in DIMENSIONES_PERFIL.items():
+            # groupby deja las filas de cada empresa contiguas (ID_EMPRESA es la primera clave)
+            tabla = (df.groupby(['ID_EMPRESA'] + config['columnas'], observed=True)
+                       .agg(config['agregaciones'])
+                       .reset_index())
+            if dimension == 'periodo':
+                tabla['PERIODO'] = tabla['ANNO'].astype(str) + '-T' + tabla['TRIMESTRE'].astype(str)
+            
+            self._rangos[dimension] = _rangos(tabla['ID_EMPRESA'].to_numpy())
+            self._tablas[dimension] = tabla.drop(columns='ID_EMPRESA')
+    
+    def __contains__(self, id_empresa):
+        return id_empresa in self._rangos['periodo']
+    
+    def perfil(self, id_empresa):
+        """
+        Desgloses de una empresa.
+        
+        Args:
+            id_empresa: ID_EMPRESA
+        
+        Returns:
+            dict: dimensión (clave de DIMENSIONES_PERFIL) -> DataFrame, más
+                  'metricas' con los totales de la empresa
+        """
+        perfil = {}
+        for dimension, tabla in self._tablas.items():
+            inicio, fin = self._rangos[dimension].get(id_empresa, (0, 0))
+            perfil[dimension] = tabla.iloc[inicio:fin].reset_index(drop=True)
+        
+        total_lineas = perfil['periodo'][LINEAS].sum()
+        total_valor = perfil['periodo'][VALOR].sum()
+        perfil['metricas'] = {
+            'departamentos': len(perfil['departamento']),
+            'municipios': len(perfil['municipio']),
+            'total_lineas': total_lineas,
+            'total_valor': total_valor,
+            'valor_por_linea': total_valor / total_lineas if total_lineas > 0 else 0
+        }
+        return perfil
+    
+    def perfil_por_nombre(self, empresa):
+        """Desgloses de una empresa a partir de su nombre (EMPRESA)"""
+        return self.perfil(self.ids.get(empresa))
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _perfiles_cacheados(_df, version, periodo_inicio, periodo_fin):
+    """Perfiles de empresas, en caché por versión del dataset y rango de periodos"""
+    return PerfilesEmpresas(_df)
+
+def obtener_perfiles(df):
+    """
+    Perfiles de las empresas del dataset filtrado (se calculan una vez por
+    versión y rango de periodos).
+    
+    Args:
+        df: Dataset filtrado por periodo
+    
+    Returns:
+        PerfilesEmpresas: Perfiles de todas las empresas
+    """
+    periodos = df['ANNO'] * 10 + df['TRIMESTRE']
+    return _perfiles_cacheados(df, get_dataset_version(), int(periodos.min()), int(periodos.max()))
@@ -0,0 +1,208 @@
+"""
+Módulo de rankings de empresas: precalcula en una pasada vectorizada los
+agregados y la posición de cada operador en cada trimestre para todas las
+métricas de ranking, y responde consultas de ranking, trayectoria, mayores
+cambios y estabilidad sobre cualquier rango de periodos
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils import data_loader
+
+LINEAS = 'CANTIDAD_LINEAS_ACCESOS'
+VALOR = 'VALOR_FACTURADO_O_COBRADO'
+VELOCIDAD = 'VELOCIDAD_EFECTIVA_DOWNSTREAM'
+
+# Métricas de ranking (mismos nombres de columna que usa la página 8.3)
+METRICAS_RANKING = [LINEAS, VALOR, 'Valor_Por_Linea', 'DEPARTAMENTO', 'MUNICIPIO', VELOCIDAD]
+
+# Métricas de cobertura: número de departamentos o municipios distintos
+COBERTURAS = ['DEPARTAMENTO', 'MUNICIPIO']
+
+def etiqueta_periodo(periodo):
+    """Etiqueta 'AAAA-Tn' de un periodo codificado como ANNO * 10 + TRIMESTRE"""
+    return f"{periodo // 10}-T{periodo % 10}"
+
+class RankingsEmpresas:
+    """Agregados y posiciones por operador y trimestre para todas las métricas"""
+    
+    def __init__(self, df):
+        periodo = (df['ANNO'] * 10 + df['TRIMESTRE']).to_numpy()
+        self.periodos = np.unique(periodo)
+        columna_periodo = np.searchsorted(self.periodos, periodo)
+        
+        codigos, empresas = pd.factorize(df['EMPRESA'], sort=True)
+        self.empresas = np.asarray(empresas, dtype=object)
+        n_empresas, n_periodos = len(self.empresas), len(self.periodos)
+        
+        # Sumas por (empresa, periodo) en una matriz densa
+        celda = codigos * n_periodos + columna_periodo
+        velocidad = df[VELOCIDAD].to_numpy(dtype=float)
+        
+        def acumular(pesos=None):
+            return np.bincount(celda, weights=pesos, minlength=n_empresas * n_periodos).reshape(n_empresas, n_periodos)
+        
+        self._sumas = {
+            'registros': acumular(),
+            LINEAS: acumular(df[LINEAS].to_numpy(dtype=float)),
+            VALOR: acumular(df[VALOR].to_numpy(dtype=float)),
+            'velocidad_suma': acumular(np.nan_to_num(velocidad)),
+            'velocidad_n': acumular(~np.isnan(velocidad))
+        }
+        
+        # Cobertura: tripletas únicas (empresa, zona, periodo) codificadas en un entero
+        self._presencia = {}
+        for columna in COBERTURAS:
+            zonas, categorias = pd.factorize(df[columna])
+            validos = zonas >= 0
+            tripletas = np.unique((codigos[validos].astype(np.int64) * len(categorias) + zonas[validos])
+                                  * n_periodos + columna_periodo[validos])
+            self._presencia[columna] = {
+                'pares': tripletas // n_periodos,
+                'periodo': tripletas % n_periodos,
+                'n_zonas': len(categorias)
+            }
+            self._sumas[columna] = np.bincount(
+                (tripletas // n_periodos // len(categorias)) * n_periodos + tripletas % n_periodos,
+                minlength=n_empresas * n_periodos
+            ).reshape(n_empresas, n_periodos)
+        
+        # Posición por trimestre de cada métrica (1 = mayor valor)
+        por_periodo = self._metricas(self._sumas)
+        self.rangos = {
+            metrica: pd.DataFrame(valores).rank(ascending=False, method='min').to_numpy()
+            for metrica, valores in por_periodo.items()
+        }
+    
+    @staticmethod
+    def _metricas(sumas):
+        """Métricas de ranking a partir de sumas (por periodo o de un rango); NaN sin registros"""
+        sin_registros = sumas['registros'] == 0
+        lineas = sumas[LINEAS]
+        metricas = {
+            LINEAS: lineas,
+            VALOR: sumas[VALOR],
+            'Valor_Por_Linea': np.divide(sumas[VALOR], lineas, out=np.full(lineas.shape, np.nan), where=lineas > 0),
+            'DEPARTAMENTO': sumas['DEPARTAMENTO'].astype(float),
+            'MUNICIPIO': sumas['MUNICIPIO'].astype(float),
+            VELOCIDAD: np.divide(sumas['velocidad_suma'], sumas['velocidad_n'],
+                                 out=np.full(lineas.shape, np.nan), where=sumas['velocidad_n'] > 0)
+        }
+        return {m: np.where(sin_registros, np.nan, v) for m, v in metricas.items()}
+    
+    def _columnas(self, inicio, fin):
+        """Índices de columna de los periodos entre inicio y fin (incluidos)"""
+        return slice(np.searchsorted(self.periodos, inicio), np.searchsorted(self.periodos, fin, side='right'))
+    
+    def metricas(self, inicio, fin):
+        """
+        Métricas de ranking de cada empresa agregadas sobre un rango de periodos.
+        
+        Args:
+            inicio: Periodo inicial (ANNO * 10 + TRIMESTRE)
+            fin: Periodo final
+        
+        Returns:
+            pd.DataFrame: EMPRESA y una columna por métrica de METRICAS_RANKING
+        """
+        columnas = self._columnas(inicio, fin)
+        sumas = {clave: matriz[:, columnas].sum(axis=1) for clave, matriz in self._sumas.items()
+                 if clave not in COBERTURAS}
+        
+        # La cobertura de un rango son las zonas distintas, no la suma por periodo
+        for columna, presencia in self._presencia.items():
+            en_rango = (presencia['periodo'] >= columnas.start) & (presencia['periodo'] < columnas.stop)
+            pares = np.unique(presencia['pares'][en_rango])
+            sumas[columna] = np.bincount(pares // presencia['n_zonas'], minlength=len(self.empresas))
+        
+        resultado = pd.DataFrame({'EMPRESA': self.empresas, **self._metricas(sumas)})
+        return resultado[sumas['registros'] > 0].reset_index(drop=True)
+    
+    def ranking(self, metrica, inicio, fin):
+        """
+        Ranking de empresas por una métrica sobre un rango de periodos.
+        
+        Returns:
+            pd.DataFrame: metricas() ordenado de mayor a menor con la columna Ranking
+        """
+        datos = self.metricas(inicio, fin).dropna(subset=[metrica])
+        datos = datos.sort_values(metrica, ascending=False, kind='stable').reset_index(drop=True)
+        datos.insert(0, 'Ranking', datos[metrica].rank(ascending=False, method='min').astype(int))
+        return datos
+    
+    def trayectoria(self, empresas, metrica, inicio, fin):
+        """
+        Posición trimestral de un grupo de empresas.
+        
+        Returns:
+            pd.DataFrame: EMPRESA, PERIODO ('AAAA-Tn') y Ranking, sin los
+                          trimestres en que la empresa no reporta
+        """
+        columnas = self._columnas(inicio, fin)
+        filas = np.searchsorted(self.empresas, empresas)
+        rangos = pd.DataFrame(self.rangos[metrica][filas, columnas], index=list(empresas),
+                              columns=[etiqueta_periodo(p) for p in self.periodos[columnas]])
+        return (rangos.rename_axis(index='EMPRESA', columns='PERIODO')
+                      .stack(future_stack=True).dropna().rename('Ranking').astype(int).reset_index())
+    
+    def mayores_cambios(self, metrica, inicio, fin):
+        """
+        Cambio de posición entre el primer y el último trimestre del rango.
+        
+        Returns:
+            pd.DataFrame: EMPRESA, Ranking_Inicio, Ranking_Fin y Cambio (positivo
+                          = subió), de mayor subida a mayor caída; solo empresas
+                          presentes en ambos trimestres
+        """
+        columnas = self._columnas(inicio, fin)
+        rangos = self.rangos[metrica][:, columnas]
+        if rangos.shape[1] < 2:
+            return pd.DataFrame(columns=['EMPRESA', 'Ranking_Inicio', 'Ranking_Fin', 'Cambio'])
+        
+        cambios = pd.DataFrame({
+            'EMPRESA': self.empresas,
+            'Ranking_Inicio': rangos[:, 0],
+            'Ranking_Fin': rangos[:, -1]
+        }).dropna()
+        cambios['Cambio'] = cambios['Ranking_Inicio'] - cambios['Ranking_Fin']
+        return (cambios.astype({'Ranking_Inicio': int, 'Ranking_Fin': int, 'Cambio': int})
+                       .sort_values('Cambio', ascending=False, kind='stable')
+                       .reset_index(drop=True))
+    
+    def estabilidad(self, metrica, inicio, fin):
+        """
+        Estabilidad de la posición de cada empresa en los trimestres del rango.
+        
+        Returns:
+            pd.DataFrame: EMPRESA, Ranking_Promedio, Desviacion, Mejor, Peor y
+                          Trimestres (en que reporta), por posición promedio
+        """
+        rangos = self.rangos[metrica][:, self._columnas(inicio, fin)]
+        presentes = (~np.isnan(rangos)).sum(axis=1)
+        validas = presentes > 0
+        rangos, presentes = rangos[validas], presentes[validas]
+        
+        estabilidad = pd.DataFrame({
+            'EMPRESA': self.empresas[validas],
+            'Ranking_Promedio': np.nanmean(rangos, axis=1),
+            'Desviacion': np.nanstd(rangos, axis=1),
+            'Mejor': np.nanmin(rangos, axis=1).astype(int),
+            'Peor': np.nanmax(rangos, axis=1).astype(int),
+            'Trimestres': presentes
+        })
+        return estabilidad.sort_values('Ranking_Promedio', kind='stable').reset_index(drop=True)
+
+@st.cache_resource(show_spinner=False)
+def _rankings_cacheados(version):
+    """Rankings de todo el dataset (una vez por versión)"""
+    return RankingsEmpresas(data_loader.load_data())
+
+def obtener_rankings():
+    """
+    Rankings por trimestre de todas las empresas del dataset; las consultas
+    reciben el rango de periodos.
+    
+    Returns:
+        RankingsEmpresas: Almacén de rankings
+    """
+    return _rankings_cacheados(data_loader.get_dataset_version())
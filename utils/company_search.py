@@ -0,0 +1,109 @@
+"""
+Módulo de búsqueda de empresas: índice de trigramas sobre todos los operadores
+(nombre e ID_EMPRESA) que no distingue mayúsculas ni tildes, tolera errores de
+escritura y ordena los resultados por valor facturado
+"""
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.data_loader import get_dataset_version
+from utils.geo_index import normalizar_nombres, normalizar_texto
+
+# Un error de escritura (cambio, omisión o inserción de una letra) altera hasta
+# 3 trigramas de la consulta; se tolera un error
+TRIGRAMAS_POR_ERROR = 3
+
+def trigramas(texto, final=True):
+    """
+    Trigramas de un texto normalizado, con un espacio al inicio para anclar los
+    comienzos de palabra. Las consultas no llevan espacio final porque la última
+    palabra puede estar incompleta.
+    """
+    texto = ' ' + texto + (' ' if final else '')
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+class IndiceEmpresas:
+    """
+    Índice de búsqueda de empresas. Las empresas se numeran de mayor a menor
+    valor facturado, así que ante igual relevancia el número menor va primero.
+    """
+    
+    def __init__(self, df):
+        resumen = (df.groupby('EMPRESA')
+                     .agg(ID_EMPRESA=('ID_EMPRESA', 'first'), VALOR=('VALOR_FACTURADO_O_COBRADO', 'sum'))
+                     .sort_values('VALOR', ascending=False))
+        
+        self.empresas = resumen.index.tolist()
+        self.valores = resumen['VALOR'].to_numpy()
+        self._por_id = {str(id_empresa): i for i, id_empresa in enumerate(resumen['ID_EMPRESA'])}
+        
+        nombres = normalizar_nombres(pd.Series(self.empresas, dtype=object)).fillna('')
+        self._nombres = nombres.to_numpy(dtype=str)
+        listas = defaultdict(list)
+        for i, nombre in enumerate(nombres):
+            for trigrama in trigramas(nombre):
+                listas[trigrama].append(i)
+        self._listas = {t: np.array(posiciones, dtype=np.int32) for t, posiciones in listas.items()}
+    
+    def __len__(self):
+        return len(self.empresas)
+    
+    def buscar(self, consulta, limite=None):
+        """
+        Busca empresas por nombre (o ID_EMPRESA si la consulta es numérica).
+        
+        Primero van las que contienen todos los trigramas de la consulta, luego
+        las que difieren en un error de escritura por número de trigramas en
+        común; dentro de cada grupo, por valor facturado. Las consultas de menos
+        de 3 caracteres no forman trigramas y se buscan como comienzo de palabra.
+        
+        Args:
+            consulta: Texto escrito por el usuario
+            limite: Número máximo de resultados (None = todos)
+        
+        Returns:
+            list: Nombres de EMPRESA ordenados por relevancia
+        """
+        normalizada = normalizar_texto(consulta)
+        if not normalizada:
+            return self.empresas[:limite]
+        
+        if len(normalizada) < 3:
+            # Nombres con alguna palabra que empieza por la consulta, por valor facturado
+            orden = np.flatnonzero(np.char.startswith(self._nombres, normalizada) |
+                                   (np.char.find(self._nombres, ' ' + normalizada) >= 0))
+        else:
+            consulta_trigramas = trigramas(normalizada, final=False)
+            listas = [self._listas[t] for t in consulta_trigramas if t in self._listas]
+            comunes = (np.bincount(np.concatenate(listas), minlength=len(self.empresas)) if listas
+                       else np.zeros(len(self.empresas), dtype=np.int64))
+            
+            minimo = max(1, len(consulta_trigramas) - TRIGRAMAS_POR_ERROR)
+            candidatos = np.flatnonzero(comunes >= minimo)
+            orden = candidatos[np.lexsort((candidatos, -comunes[candidatos]))]
+        
+        id_exacto = self._por_id.get(normalizada)
+        if id_exacto is not None:
+            orden = np.concatenate([[id_exacto], orden[orden != id_exacto]])
+        
+        return [self.empresas[i] for i in orden[:limite]]
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _indice_cacheado(_df, version, periodo_inicio, periodo_fin):
+    """Índice de empresas, en caché por versión del dataset y rango de periodos"""
+    return IndiceEmpresas(_df)
+
+def obtener_indice(df):
+    """
+    Índice de búsqueda de las empresas del dataset filtrado (se construye una
+    vez por versión y rango de periodos).
+    
+    Args:
+        df: Dataset filtrado por periodo
+    
+    Returns:
+        IndiceEmpresas: Índice de búsqueda
+    """
+    periodos = df['ANNO'] * 10 + df['TRIMESTRE']
+    return _indice_cacheado(df, get_dataset_version(), int(periodos.min()), int(periodos.max()))
@@ -0,0 +1,159 @@
+"""
+Módulo de similitud entre empresas: construye un vector de características por
+operador (mezcla de servicios, mezcla de tecnologías, huella departamental,
+ARPU y velocidades) y precalcula la matriz de similitud entre todos los
+operadores con productos dispersos por bloques de filas
+"""
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import streamlit as st
+from utils.data_loader import get_dataset_version
+
+LINEAS = 'CANTIDAD_LINEAS_ACCESOS'
+VALOR = 'VALOR_FACTURADO_O_COBRADO'
+
+# Mezclas por operador: participación de líneas por categoría, comparada con
+# similitud coseno
+BLOQUES_MEZCLA = {
+    'servicio': {'nombre': 'Servicios', 'columna': 'SERVICIO_PAQUETE', 'peso': 1.0},
+    'tecnologia': {'nombre': 'Tecnologías', 'columna': 'TECNOLOGIA', 'peso': 1.0},
+    'departamento': {'nombre': 'Departamentos', 'columna': 'ID_DEPARTAMENTO', 'peso': 1.0}
+}
+
+# Variables numéricas (en escala logarítmica y estandarizadas), comparadas con
+# un núcleo gaussiano de la distancia euclidiana
+NOMBRE_NUMERICAS = 'ARPU y velocidades'
+PESO_NUMERICAS = 1.0
+
+# Filas de la matriz de similitud que se calculan por bloque
+TAMANO_BLOQUE = 1024
+
+def _normalizar_filas(matriz):
+    """Divide cada fila de una matriz dispersa por su norma L2 (las filas vacías quedan en cero)"""
+    normas = np.sqrt(np.asarray(matriz.multiply(matriz).sum(axis=1)).ravel())
+    normas[normas == 0] = 1
+    return sp.diags(1 / normas) @ matriz
+
+class SimilitudEmpresas:
+    """Vectores de características y matriz de similitud de todos los operadores"""
+    
+    def __init__(self, df):
+        codigos, self.empresas = pd.factorize(df['EMPRESA'], sort=True)
+        self.empresas = self.empresas.tolist()
+        self._posicion = {empresa: i for i, empresa in enumerate(self.empresas)}
+        n = len(self.empresas)
+        
+        # Mezclas: matrices dispersas operador x categoría con filas de norma 1
+        self._mezclas = {}
+        for bloque, config in BLOQUES_MEZCLA.items():
+            categorias, _ = pd.factorize(df[config['columna']])
+            validos = categorias >= 0
+            lineas = sp.csr_matrix(
+                (df[LINEAS].to_numpy(dtype=float)[validos], (codigos[validos], categorias[validos])),
+                shape=(n, categorias.max() + 1)
+            )
+            self._mezclas[bloque] = _normalizar_filas(lineas)
+        
+        # Variables numéricas por operador
+        por_empresa = pd.DataFrame({
+            'lineas': np.bincount(codigos, weights=df[LINEAS], minlength=n),
+            'valor': np.bincount(codigos, weights=df[VALOR], minlength=n),
+            'bajada': df.groupby(codigos)['VELOCIDAD_EFECTIVA_DOWNSTREAM'].mean().reindex(range(n)).to_numpy(),
+            'subida': df.groupby(codigos)['VELOCIDAD_EFECTIVA_UPSTREAM'].mean().reindex(range(n)).to_numpy()
+        })
+        arpu = por_empresa['valor'] / por_empresa['lineas'].where(por_empresa['lineas'] > 0)
+        numericas = np.log1p(np.column_stack([arpu, por_empresa['bajada'], por_empresa['subida']]).clip(min=0))
+        desviacion = np.nanstd(numericas, axis=0)
+        desviacion[~(desviacion > 0)] = 1
+        self._numericas = np.nan_to_num((numericas - np.nanmean(numericas, axis=0)) / desviacion)
+        
+        self.matriz = self._calcular_matriz()
+    
+    def _similitud_numerica(self, filas, columnas=None):
+        """Núcleo gaussiano de la distancia entre variables estandarizadas"""
+        a = self._numericas[filas]
+        b = self._numericas if columnas is None else self._numericas[columnas]
+        distancia2 = (a * a).sum(axis=1)[:, None] + (b * b).sum(axis=1)[None, :] - 2 * a @ b.T
+        return np.exp(-np.maximum(distancia2, 0) / (2 * self._numericas.shape[1]))
+    
+    def _similitudes_bloque(self, filas, columnas=None):
+        """Similitud por bloque (mezclas y numéricas) entre filas y columnas"""
+        similitudes = {}
+        for bloque, mezcla in self._mezclas.items():
+            otros = mezcla if columnas is None else mezcla[columnas]
+            similitudes[bloque] = (mezcla[filas] @ otros.T).toarray()
+        similitudes['numericas'] = self._similitud_numerica(filas, columnas)
+        return similitudes
+    
+    def _calcular_matriz(self):
+        """Promedio ponderado de las similitudes por bloque, calculado por bloques de filas"""
+        n = len(self.empresas)
+        pesos = {bloque: config['peso'] for bloque, config in BLOQUES_MEZCLA.items()}
+        pesos['numericas'] = PESO_NUMERICAS
+        total_pesos = sum(pesos.values())
+        
+        matriz = np.empty((n, n), dtype=np.float32)
+        for inicio in range(0, n, TAMANO_BLOQUE):
+            filas = np.arange(inicio, min(inicio + TAMANO_BLOQUE, n))
+            similitudes = self._similitudes_bloque(filas)
+            matriz[filas] = sum(pesos[b] * s for b, s in similitudes.items()) / total_pesos
+        return matriz
+    
+    def similares(self, empresa, n=10):
+        """
+        Operadores más parecidos a una empresa según la matriz precalculada.
+        
+        Args:
+            empresa: Nombre de la empresa de referencia
+            n: Número de operadores a devolver
+        
+        Returns:
+            pd.DataFrame: Empresa, Similitud y la similitud de cada bloque,
+                          de mayor a menor similitud (vacío si la empresa no
+                          tiene datos en el periodo)
+        """
+        i = self._posicion.get(empresa)
+        n = min(n, len(self.empresas) - 1)
+        if i is None or n <= 0:
+            return pd.DataFrame(columns=['Empresa', 'Similitud'])
+        
+        fila = self.matriz[i].copy()
+        fila[i] = -np.inf
+        
+        top = np.argpartition(-fila, n - 1)[:n]
+        top = top[np.argsort(-fila[top])]
+        
+        resultado = pd.DataFrame({
+            'Empresa': [self.empresas[j] for j in top],
+            'Similitud': fila[top]
+        })
+        for bloque, similitud in self._similitudes_bloque([i], top).items():
+            nombre = BLOQUES_MEZCLA[bloque]['nombre'] if bloque in BLOQUES_MEZCLA else NOMBRE_NUMERICAS
+            resultado[nombre] = similitud[0]
+        return resultado
+    
+    def submatriz(self, empresas):
+        """Similitud entre un grupo de empresas, como DataFrame (omite las que no tienen datos en el periodo)"""
+        empresas = [e for e in empresas if e in self._posicion]
+        posiciones = [self._posicion[e] for e in empresas]
+        return pd.DataFrame(self.matriz[np.ix_(posiciones, posiciones)], index=empresas, columns=empresas)
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _similitud_cacheada(_df, version, periodo_inicio, periodo_fin):
+    """Matriz de similitud, en caché por versión del dataset y rango de periodos"""
+    return SimilitudEmpresas(_df)
+
+def obtener_similitud(df):
+    """
+    Matriz de similitud de los operadores del dataset filtrado (se calcula una
+    vez por versión y rango de periodos).
+    
+    Args:
+        df: Dataset filtrado por periodo
+    
+    Returns:
+        SimilitudEmpresas: Vectores y matriz de similitud
+    """
+    periodos = df['ANNO'] * 10 + df['TRIMESTRE']
+    return _similitud_cacheada(df, get_dataset_version(), int(periodos.min()), int(periodos.max()))
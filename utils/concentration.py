@@ -0,0 +1,130 @@
+"""
+Módulo para calcular índices de concentración (HHI, entropía, participación top-k)
+de tecnologías y operadores por zona geográfica
+"""
+import numpy as np
+
+# Columnas que identifican cada nivel geográfico (la primera es la clave)
+NIVELES_CONCENTRACION = {
+    'departamento': ['ID_DEPARTAMENTO', 'DEPARTAMENTO'],
+    'region': ['REGION'],
+    'municipio': ['ID_MUNICIPIO', 'MUNICIPIO', 'ID_DEPARTAMENTO', 'DEPARTAMENTO']
+}
+
+# Dimensiones sobre las que se mide la concentración
+DIMENSIONES_CONCENTRACION = {
+    'tecnologia': 'TECNOLOGIA',
+    'operador': 'EMPRESA'
+}
+
+# Umbrales usuales del HHI (escala 0 - 10.000)
+HHI_MODERADO = 1500
+HHI_ALTO = 2500
+
+def _cubo(df):
+    """
+    Agrega el dataset una sola vez a nivel (municipio, tecnología, operador).
+    
+    Las demás combinaciones de nivel y dimensión se obtienen sumando este cubo,
+    sin volver a recorrer los registros.
+    """
+    claves = ['ID_MUNICIPIO', 'MUNICIPIO', 'ID_DEPARTAMENTO', 'DEPARTAMENTO', 'REGION',
+              'TECNOLOGIA', 'EMPRESA']
+    
+    return df.groupby(claves, dropna=False, observed=True).agg(
+        LINEAS=('CANTIDAD_LINEAS_ACCESOS', 'sum'),
+        REGISTROS=('CANTIDAD_LINEAS_ACCESOS', 'size')
+    ).reset_index()
+
+def _indices(participaciones, zona, k):
+    """
+    Calcula los índices de concentración de cada zona.
+    
+    Args:
+        participaciones: DataFrame con columnas de zona, CATEGORIA, LINEAS y REGISTROS
+        zona: Columnas que identifican la zona
+        k: Número de categorías para la participación top-k
+    
+    Returns:
+        tuple: (resumen por zona, participaciones con PARTICIPACION y RANKING)
+    """
+    clave = zona[0]
+    
+    participaciones = participaciones.sort_values([clave, 'LINEAS'], ascending=[True, False])
+    total = participaciones.groupby(clave)['LINEAS'].transform('sum')
+    participaciones = participaciones[total > 0].copy()
+    
+    s = participaciones['LINEAS'] / total[total > 0]
+    participaciones['PARTICIPACION'] = s
+    participaciones['RANKING'] = participaciones.groupby(clave).cumcount() + 1
+    
+    # Términos de cada índice, sumados luego en una sola agregación
+    participaciones['_S2'] = s ** 2
+    participaciones['_SLOG'] = -s * np.log(s.where(s > 0, 1))
+    participaciones['_TOPK'] = s.where(participaciones['RANKING'] <= k, 0)
+    
+    resumen = participaciones.groupby(zona, observed=True).agg(
+        TOTAL_LINEAS=('LINEAS', 'sum'),
+        N_REGISTROS=('REGISTROS', 'sum'),
+        N_CATEGORIAS=('CATEGORIA', 'size'),
+        HHI=('_S2', 'sum'),
+        ENTROPIA=('_SLOG', 'sum'),
+        TOP_K=('_TOPK', 'sum'),
+        LIDER=('CATEGORIA', 'first'),
+        PARTICIPACION_LIDER=('PARTICIPACION', 'first')
+    ).reset_index()
+    
+    resumen['HHI'] = (resumen['HHI'] * 10000).round(0)
+    resumen['ENTROPIA_NORM'] = np.where(
+        resumen['N_CATEGORIAS'] > 1,
+        resumen['ENTROPIA'] / np.log(resumen['N_CATEGORIAS'].clip(lower=2)),
+        0.0
+    )
+    resumen[['ENTROPIA', 'ENTROPIA_NORM']] = resumen[['ENTROPIA', 'ENTROPIA_NORM']].round(4)
+    resumen[['TOP_K', 'PARTICIPACION_LIDER']] = (resumen[['TOP_K', 'PARTICIPACION_LIDER']] * 100).round(2)
+    
+    participaciones = participaciones.drop(columns=['_S2', '_SLOG', '_TOPK'])
+    
+    return resumen, participaciones
+
+def compute_concentration(df, k=3):
+    """
+    Calcula HHI, entropía de Shannon y participación top-k de tecnologías y
+    operadores (ponderados por líneas) para cada departamento, región y municipio.
+    
+    Columnas del resumen:
+        - TOTAL_LINEAS / N_REGISTROS: volumen de la zona
+        - N_CATEGORIAS: tecnologías u operadores distintos con presencia
+        - HHI: índice Herfindahl-Hirschman (0 - 10.000)
+        - ENTROPIA / ENTROPIA_NORM: entropía de Shannon y su versión normalizada (0 - 1)
+        - TOP_K: participación (%) de las k categorías principales
+        - LIDER / PARTICIPACION_LIDER: categoría principal y su participación (%)
+    
+    Args:
+        df: DataFrame (puede estar filtrado por periodo)
+        k: Número de categorías para la participación top-k
+    
+    Returns:
+        dict: {(dimension, nivel): {'resumen': DataFrame, 'participaciones': DataFrame}}
+              con las claves de NIVELES_CONCENTRACION y DIMENSIONES_CONCENTRACION
+    """
+    cubo = _cubo(df)
+    resultados = {}
+    
+    for dimension, columna in DIMENSIONES_CONCENTRACION.items():
+        datos = cubo
+        if dimension == 'tecnologia':
+            # Registros sin tecnología definida no cuentan para la concentración tecnológica
+            datos = cubo[cubo['TECNOLOGIA'].notna() & (cubo['TECNOLOGIA'] != 'NA')]
+        
+        for nivel, zona in NIVELES_CONCENTRACION.items():
+            participaciones = datos.groupby(zona + [columna], observed=True)[['LINEAS', 'REGISTROS']].sum()
+            participaciones = participaciones.reset_index().rename(columns={columna: 'CATEGORIA'})
+            
+            resumen, participaciones = _indices(participaciones, zona, k)
+            resultados[(dimension, nivel)] = {
+                'resumen': resumen,
+                'participaciones': participaciones
+            }
+    
+    return resultados
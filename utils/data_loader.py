@@ -4,6 +4,24 @@ Módulo para cargar y filtrar datos
 import pandas as pd
 import streamlit as st
 from pathlib import Path
+from utils.anomaly_scores import COLUMNAS_ANOMALIA, compute_anomaly_scores
+
+RUTA_DATASET = Path("data/empaquetamiento_fijo_limpio_2023_2024.csv")
+
+def get_dataset_version():
+    """
+    Identificador de la versión del dataset limpio, para usar como clave de caché.
+    
+    Cambia cada vez que el archivo se regenera o se le agregan trimestres.
+    
+    Returns:
+        str: Fecha de modificación y tamaño del archivo, o cadena vacía si no existe
+    """
+    if not RUTA_DATASET.exists():
+        return ""
+    
+    stat = RUTA_DATASET.stat()
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
 
 @st.cache_data
 def load_data():
@@ -13,13 +31,17 @@ def load_data():
     Returns:
         pd.DataFrame: Dataset cargado
     """
-    data_path = Path("data/empaquetamiento_fijo_limpio_2023_2024.csv")
+    data_path = RUTA_DATASET
     
     if not data_path.exists():
         raise FileNotFoundError(f"No se encontró el archivo: {data_path}")
     
     df = pd.read_csv(data_path)
     
+    # Datasets generados antes de la etapa de puntuación no traen los puntajes
+    if not set(COLUMNAS_ANOMALIA).issubset(df.columns):
+        df = compute_anomaly_scores(df)
+    
     # Agregar columnas derivadas útiles
     df['TIPO_SERVICIO'] = df['ID_SERVICIO_PAQUETE'].apply(
         lambda x: 'Individual' if x in [1, 2, 3] else 'Empaquetado'
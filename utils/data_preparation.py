@@ -113,6 +113,13 @@ def generate_clean_dataset():
                 
                 print(f"   ✓ {campo}: {nulos_antes:,} valores imputados")
         
+        # Calcular puntajes de anomalía por registro
+        print("\n6. Calculando puntajes de anomalía...")
+        from utils.anomaly_scores import compute_anomaly_scores
+        df_analisis = compute_anomaly_scores(df_analisis)
+        print(f"   ✓ Outliers IQR por servicio: {df_analisis['ANOM_IQR_SERVICIO'].sum():,}")
+        print(f"   ✓ Outliers IQR valor/línea: {df_analisis['ANOM_IQR_VPL'].sum():,}")
+        
         # Crear directorio data si no existe
         data_dir = Path("data")
         data_dir.mkdir(exist_ok=True)
@@ -121,6 +128,13 @@ def generate_clean_dataset():
         output_path = data_dir / "empaquetamiento_fijo_limpio_2023_2024.csv"
         df_analisis.to_csv(output_path, index=False, encoding='utf-8')
         
+        # Líneas base históricas para la detección incremental de anomalías
+        print("\n7. Construyendo líneas base históricas...")
+        from utils.quarter_alerts import build_baselines, save_baselines
+        baselines, baselines_mun = build_baselines(df_analisis)
+        save_baselines(baselines, baselines_mun)
+        print(f"   ✓ {len(baselines):,} combinaciones empresa-municipio-servicio")
+        
         print("\n" + "="*80)
         print("DATASET GENERADO EXITOSAMENTE")
         print("="*80)
@@ -131,7 +145,7 @@ def generate_clean_dataset():
         print("="*80)
         
         return True
-        
+    
     except Exception as e:
         print(f"\n❌ Error al generar dataset: {str(e)}")
         import traceback
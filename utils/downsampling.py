@@ -0,0 +1,113 @@
+"""
+Módulo para reducir el número de puntos de los gráficos de dispersión
+conservando outliers y valores extremos
+"""
+import pandas as pd
+import numpy as np
+
+# Presupuesto de puntos por defecto para un scatter
+MAX_PUNTOS_SCATTER = 5000
+
+# Percentil (por cada cola) a partir del cual un punto se considera extremo
+PERCENTIL_EXTREMO = 0.001
+
+def _prioridad_extremos(valores):
+    """Qué tan lejos de la mediana está cada punto, en rango percentil (0 a 0.5)"""
+    rangos = pd.DataFrame(valores).rank(pct=True).values
+    return np.abs(rangos - 0.5).max(axis=1)
+
+def _celdas_grilla(valores, n_bins):
+    """Asigna cada punto a una celda de una grilla regular de n_bins por eje"""
+    minimos = np.nanmin(valores, axis=0)
+    rangos = np.nanmax(valores, axis=0) - minimos
+    rangos[rangos == 0] = 1
+    
+    idx = ((valores - minimos) / rangos * n_bins).astype(np.int64)
+    idx = np.clip(idx, 0, n_bins - 1)
+    
+    celda = np.zeros(len(valores), dtype=np.int64)
+    for d in range(valores.shape[1]):
+        celda = celda * n_bins + idx[:, d]
+    
+    return np.unique(celda, return_inverse=True)[1]
+
+def _tope_por_celda(conteos, presupuesto):
+    """Mayor número de puntos por celda tal que el total no excede el presupuesto"""
+    bajo, alto = 0, int(conteos.max())
+    while bajo < alto:
+        medio = (bajo + alto + 1) // 2
+        if np.minimum(conteos, medio).sum() <= presupuesto:
+            bajo = medio
+        else:
+            alto = medio - 1
+    return bajo
+
+def downsample_scatter(df, columnas, flag=None, max_points=MAX_PUNTOS_SCATTER,
+                       log=False, random_state=42):
+    """
+    Reduce un DataFrame a un máximo de puntos para graficarlo como scatter.
+    
+    Se conservan siempre los puntos marcados como outlier y los extremos de
+    cada eje; el resto del presupuesto se reparte con una grilla regular,
+    adelgazando las celdas densas y conservando completas las dispersas.
+    
+    Args:
+        df: DataFrame a graficar
+        columnas: Columnas de los ejes (2 o 3)
+        flag: Columna booleana con los puntos que deben conservarse
+        max_points: Presupuesto máximo de puntos
+        log: Construir la grilla en escala logarítmica (datos muy asimétricos)
+        random_state: Semilla para elegir los puntos dentro de cada celda
+    
+    Returns:
+        pd.DataFrame: Subconjunto de df con a lo sumo max_points filas
+    """
+    if len(df) <= max_points:
+        return df
+    
+    valores = df[columnas].to_numpy(dtype=float)
+    if log:
+        valores = np.log10(np.clip(valores, 0, None) + 1)
+    
+    # Puntos obligatorios: outliers marcados y extremos por eje
+    prioridad = _prioridad_extremos(valores)
+    obligatorios = prioridad >= 0.5 - PERCENTIL_EXTREMO
+    for d in range(valores.shape[1]):
+        obligatorios[np.nanargmin(valores[:, d])] = True
+        obligatorios[np.nanargmax(valores[:, d])] = True
+    if flag is not None:
+        obligatorios |= df[flag].to_numpy(dtype=bool)
+    
+    idx_obligatorios = np.flatnonzero(obligatorios)
+    if len(idx_obligatorios) >= max_points:
+        # Si no caben todos, quedan los más alejados de la mediana
+        orden = np.argsort(-prioridad[idx_obligatorios], kind='stable')
+        return df.iloc[np.sort(idx_obligatorios[orden[:max_points]])]
+    
+    # Resto del presupuesto: muestreo por grilla sobre los puntos no obligatorios
+    presupuesto = max_points - len(idx_obligatorios)
+    idx_resto = np.flatnonzero(~obligatorios)
+    
+    n_bins = max(2, int(np.ceil(presupuesto ** (1 / valores.shape[1]))))
+    celdas = _celdas_grilla(valores[idx_resto], n_bins)
+    conteos = np.bincount(celdas)
+    tope = _tope_por_celda(conteos, presupuesto)
+    
+    # Orden aleatorio dentro de cada celda y se toman los primeros `tope`
+    rng = np.random.default_rng(random_state)
+    orden = np.lexsort((rng.random(len(celdas)), celdas))
+    inicio_celda = np.concatenate([[0], np.cumsum(conteos)[:-1]])
+    posicion = np.empty(len(celdas), dtype=np.int64)
+    posicion[orden] = np.arange(len(celdas)) - inicio_celda[celdas[orden]]
+    
+    seleccion = posicion < tope
+    
+    # El sobrante se completa con un punto más en algunas celdas densas
+    sobrante = presupuesto - int(seleccion.sum())
+    candidatos = np.flatnonzero(posicion == tope)
+    if sobrante > 0 and len(candidatos) > 0:
+        seleccion[rng.choice(candidatos, min(sobrante, len(candidatos)), replace=False)] = True
+    
+    idx_grilla = idx_resto[seleccion]
+    
+    return df.iloc[np.sort(np.concatenate([idx_obligatorios, idx_grilla]))]
@@ -0,0 +1,131 @@
+"""
+Módulo de caché de figuras: conserva en memoria las especificaciones JSON de
+las figuras de Plotly ya construidas, indexadas por submódulo, versión del
+dataset, rango de periodos y estado de los widgets, con expulsión LRU por
+tamaño. Una vista idéntica se dibuja sin volver a agregar ni construir.
+
+Uso en una página:
+    fig = figure_cache.obtener('top_10', opcion)
+    if fig is None:
+        ... agregación y construcción ...
+        fig = figure_cache.guardar('top_10', fig, opcion)
+    st.plotly_chart(fig, use_container_width=True)
+"""
+import json
+import threading
+from collections import OrderedDict
+from utils.data_loader import get_dataset_version
+from utils.result_cache import clave_cache
+
+# Tamaño máximo de las especificaciones guardadas (compartido entre sesiones)
+MAX_BYTES_FIGURAS = 128 * 1024 * 1024
+
+class CacheFiguras:
+    """Especificaciones JSON de figuras con expulsión LRU por tamaño total"""
+    
+    def __init__(self, max_bytes=MAX_BYTES_FIGURAS):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._especificaciones = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def obtener(self, clave):
+        """Especificación guardada (y marcada como reciente), o None"""
+        with self._lock:
+            especificacion = self._especificaciones.get(clave)
+            if especificacion is None:
+                self.fallos += 1
+                return None
+            self._especificaciones.move_to_end(clave)
+            self.aciertos += 1
+            return especificacion
+    
+    def guardar(self, clave, especificacion):
+        """Guarda una especificación y expulsa las menos recientes si se supera el tamaño"""
+        tamano = len(especificacion)
+        if tamano > self.max_bytes:
+            return
+        
+        with self._lock:
+            anterior = self._especificaciones.pop(clave, None)
+            if anterior is not None:
+                self.bytes -= len(anterior)
+            
+            self._especificaciones[clave] = especificacion
+            self.bytes += tamano
+            
+            while self.bytes > self.max_bytes:
+                _, expulsada = self._especificaciones.popitem(last=False)
+                self.bytes -= len(expulsada)
+    
+    def limpiar(self):
+        with self._lock:
+            self._especificaciones.clear()
+            self.bytes = 0
+    
+    def __len__(self):
+        return len(self._especificaciones)
+
+CACHE = CacheFiguras()
+
+# Página activa de la ejecución del script (cada sesión corre en su propio hilo)
+_pagina = threading.local()
+
+def fijar_pagina(submodulo, df):
+    """
+    Fija el submódulo y el rango de periodos de las figuras que se dibujen a
+    continuación en esta ejecución.
+    
+    Args:
+        submodulo: Nombre del submódulo activo
+        df: Dataset filtrado por periodo que recibe la página
+    """
+    if len(df) == 0:
+        _pagina.contexto = None
+        return
+    
+    periodos = df['ANNO'] * 10 + df['TRIMESTRE']
+    _pagina.contexto = (submodulo, get_dataset_version(), int(periodos.min()), int(periodos.max()))
+
+def _clave(nombre, estado):
+    contexto = getattr(_pagina, 'contexto', None)
+    if contexto is None:
+        return None
+    return clave_cache(*contexto, nombre, *estado)
+
+def obtener(nombre, *estado):
+    """
+    Busca una figura de la página activa.
+    
+    Args:
+        nombre: Identificador de la figura dentro del submódulo
+        *estado: Valores de los widgets de los que depende la figura
+    
+    Returns:
+        dict: Especificación de la figura (se pasa tal cual a st.plotly_chart), o None
+    """
+    clave = _clave(nombre, estado)
+    if clave is None:
+        return None
+    
+    especificacion = CACHE.obtener(clave)
+    return json.loads(especificacion) if especificacion is not None else None
+
+def guardar(nombre, fig, *estado):
+    """
+    Guarda una figura recién construida de la página activa.
+    
+    Args:
+        nombre: Identificador de la figura dentro del submódulo
+        fig: Figura de Plotly terminada
+        *estado: Valores de los widgets de los que depende la figura
+    
+    Returns:
+        go.Figure: La misma figura, para dibujarla
+    """
+    clave = _clave(nombre, estado)
+    if clave is not None:
+        CACHE.guardar(clave, fig.to_json())
+    return fig
@@ -0,0 +1,295 @@
+"""
+Módulo de límites geográficos: convierte los límites de departamentos y
+municipios (GeoJSON) a un formato compacto con varias resoluciones
+simplificadas, y los entrega como GeoJSON para mapas coropléticos sin
+conexión a servicios externos.
+
+Los límites no se incluyen en el repositorio: se toman del Marco Geoestadístico
+Nacional del DANE (u otra fuente con el código DIVIPOLA en sus propiedades),
+guardado como data/geo/departamentos.geojson y data/geo/municipios.geojson.
+
+Los coropléticos se activan al encontrar esos archivos; sin ellos los mapas
+usan burbujas.
+
+Uso (opcional, se hace automáticamente la primera vez que se usan):
+    python -m utils.geo_boundaries
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+
+RUTA_LIMITES = Path("data/geo")
+
+# Archivo fuente y propiedades candidatas con el código DIVIPOLA, por nivel
+NIVELES_LIMITES = {
+    'departamento': {
+        'fuente': 'departamentos.geojson',
+        'campos_codigo': ['DPTO_CCDGO', 'DPTO', 'COD_DPTO', 'ID_DEPARTAMENTO', 'CODIGO']
+    },
+    'municipio': {
+        'fuente': 'municipios.geojson',
+        'campos_codigo': ['MPIO_CDPMP', 'MPIO_CCNCT', 'COD_MPIO', 'ID_MUNICIPIO', 'CODIGO']
+    }
+}
+
+# Tolerancias de simplificación (Douglas-Peucker, en grados), de más a menos detalle
+RESOLUCIONES = {
+    'alta': 0.001,
+    'media': 0.005,
+    'baja': 0.02
+}
+
+# Puntos máximos de los polígonos de una vista; se usa la resolución más
+# detallada que no lo supere
+PRESUPUESTO_PUNTOS = 60000
+
+# Cuantización de coordenadas: 1e-4 grados (~11 m)
+ESCALA_COORDENADAS = 10000
+
+def ruta_fuente(nivel):
+    """GeoJSON fuente de un nivel"""
+    return RUTA_LIMITES / NIVELES_LIMITES[nivel]['fuente']
+
+def ruta_compacta(nivel):
+    """Archivo compacto (.npz) con todas las resoluciones de un nivel"""
+    return RUTA_LIMITES / f"limites_{nivel}.npz"
+
+def disponible(nivel):
+    """Indica si hay límites (fuente o compactos) para el nivel"""
+    return ruta_compacta(nivel).exists() or ruta_fuente(nivel).exists()
+
+def _codigo_feature(propiedades, campos):
+    """Código DIVIPOLA entero de un feature (primera propiedad candidata válida)"""
+    for campo in campos:
+        valor = propiedades.get(campo)
+        if valor not in (None, ''):
+            try:
+                return int(str(valor).strip())
+            except ValueError:
+                continue
+    return None
+
+def _douglas_peucker(puntos, tolerancia):
+    """Índices de los puntos que conserva la simplificación Douglas-Peucker"""
+    conservar = np.zeros(len(puntos), dtype=bool)
+    conservar[[0, -1]] = True
+    pila = [(0, len(puntos) - 1)]
+    
+    while pila:
+        inicio, fin = pila.pop()
+        if fin - inicio < 2:
+            continue
+        
+        a, b = puntos[inicio], puntos[fin]
+        segmento = puntos[inicio + 1:fin]
+        direccion = b - a
+        largo = np.hypot(*direccion)
+        if largo == 0:
+            distancias = np.hypot(*(segmento - a).T)
+        else:
+            distancias = np.abs(direccion[0] * (segmento[:, 1] - a[1]) - direccion[1] * (segmento[:, 0] - a[0])) / largo
+        
+        mayor = int(np.argmax(distancias))
+        if distancias[mayor] > tolerancia:
+            medio = inicio + 1 + mayor
+            conservar[medio] = True
+            pila.extend([(inicio, medio), (medio, fin)])
+    
+    return np.flatnonzero(conservar)
+
+def _simplificar_anillo(anillo, tolerancia, exterior):
+    """
+    Simplifica un anillo cerrado. Los huecos degenerados se descartan; los
+    anillos exteriores conservan al menos un triángulo.
+    """
+    anillo = np.asarray(anillo, dtype=float)[:, :2]
+    if len(anillo) < 4:
+        return None
+    
+    # Se parte el anillo en el punto más lejano al inicio para que la
+    # simplificación no colapse el anillo cerrado a un segmento
+    lejano = int(np.argmax(np.hypot(*(anillo - anillo[0]).T)))
+    indices = np.concatenate([
+        _douglas_peucker(anillo[:lejano + 1], tolerancia),
+        lejano + _douglas_peucker(anillo[lejano:], tolerancia)[1:]
+    ])
+    
+    if len(indices) < 4:
+        if not exterior:
+            return None
+        n = len(anillo) - 1
+        indices = np.array([0, n // 3, 2 * n // 3, n])
+    
+    return anillo[indices]
+
+def _poligonos(geometria):
+    """Lista de polígonos (listas de anillos) de un Polygon o MultiPolygon"""
+    if geometria is None:
+        return []
+    if geometria['type'] == 'Polygon':
+        return [geometria['coordinates']]
+    if geometria['type'] == 'MultiPolygon':
+        return geometria['coordinates']
+    return []
+
+def compactar_limites(nivel):
+    """
+    Lee el GeoJSON fuente de un nivel, lo simplifica en todas las resoluciones
+    y lo guarda cuantizado y codificado por diferencias en un .npz comprimido.
+    
+    Args:
+        nivel: Clave de NIVELES_LIMITES
+    
+    Returns:
+        Path: Ruta del archivo compacto
+    """
+    with open(ruta_fuente(nivel), 'r', encoding='utf-8') as f:
+        fuente = json.load(f)
+    
+    campos = NIVELES_LIMITES[nivel]['campos_codigo']
+    features = [(_codigo_feature(ft.get('properties') or {}, campos), ft.get('geometry'))
+                for ft in fuente['features']]
+    features = [(codigo, geometria) for codigo, geometria in features if codigo is not None]
+    if not features:
+        raise ValueError(f"Ninguna geometría tiene código DIVIPOLA en {', '.join(campos)}")
+    
+    arreglos = {'codigos': np.array([codigo for codigo, _ in features], dtype=np.int32)}
+    
+    for resolucion, tolerancia in RESOLUCIONES.items():
+        # Por feature: número de anillos; por anillo: número de puntos y si abre un polígono
+        anillos_por_feature, puntos_por_anillo, es_exterior, coordenadas = [], [], [], []
+        
+        for _, geometria in features:
+            n_anillos = 0
+            for poligono in _poligonos(geometria):
+                for i, anillo in enumerate(poligono):
+                    simplificado = _simplificar_anillo(anillo, tolerancia, exterior=(i == 0))
+                    if simplificado is None:
+                        if i == 0:
+                            break
+                        continue
+                    cuantizado = np.round(simplificado * ESCALA_COORDENADAS).astype(np.int64)
+                    coordenadas.append(np.diff(cuantizado, axis=0, prepend=[[0, 0]]))
+                    puntos_por_anillo.append(len(cuantizado))
+                    es_exterior.append(i == 0)
+                    n_anillos += 1
+            anillos_por_feature.append(n_anillos)
+        
+        # Las diferencias se reinician en cada anillo (el primer punto es absoluto)
+        arreglos[f'{resolucion}_anillos'] = np.array(anillos_por_feature, dtype=np.int32)
+        arreglos[f'{resolucion}_puntos'] = np.array(puntos_por_anillo, dtype=np.int32)
+        arreglos[f'{resolucion}_exterior'] = np.array(es_exterior, dtype=bool)
+        arreglos[f'{resolucion}_xy'] = (np.concatenate(coordenadas) if coordenadas
+                                        else np.zeros((0, 2))).astype(np.int32)
+    
+    destino = ruta_compacta(nivel)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(destino, **arreglos)
+    return destino
+
+def _asegurar_compacto(nivel):
+    """Genera el archivo compacto si falta o si la fuente es más reciente"""
+    compacto, fuente = ruta_compacta(nivel), ruta_fuente(nivel)
+    if fuente.exists() and (not compacto.exists() or fuente.stat().st_mtime > compacto.stat().st_mtime):
+        compactar_limites(nivel)
+    return compacto
+
+@lru_cache(maxsize=16)
+def _geojson_cacheado(nivel, resolucion, modificado):
+    """Decodifica el archivo compacto; modificado invalida la caché si el archivo cambia"""
+    datos = np.load(ruta_compacta(nivel))
+    codigos = datos['codigos']
+    anillos = datos[f'{resolucion}_anillos']
+    puntos = datos[f'{resolucion}_puntos']
+    exterior = datos[f'{resolucion}_exterior']
+    
+    # Reconstruye las coordenadas absolutas: suma acumulada de las diferencias
+    # menos lo acumulado antes de cada anillo
+    inicio_anillo = np.concatenate([[0], np.cumsum(puntos)])
+    acumulado = np.cumsum(datos[f'{resolucion}_xy'].astype(np.int64), axis=0)
+    previo = np.vstack([[0, 0], acumulado])[inicio_anillo[:-1]]
+    coordenadas = np.round((acumulado - np.repeat(previo, puntos, axis=0)) / ESCALA_COORDENADAS, 4)
+    
+    features = []
+    anillo = 0
+    for codigo, n_anillos in zip(codigos, anillos):
+        poligonos = []
+        for _ in range(n_anillos):
+            ring = coordenadas[inicio_anillo[anillo]:inicio_anillo[anillo + 1]].tolist()
+            if exterior[anillo]:
+                poligonos.append([ring])
+            else:
+                poligonos[-1].append(ring)
+            anillo += 1
+        if poligonos:
+            features.append({
+                'type': 'Feature',
+                'id': int(codigo),
+                'properties': {},
+                'geometry': {'type': 'MultiPolygon', 'coordinates': poligonos}
+            })
+    
+    # Puntos por código para elegir la resolución de cada vista
+    feature_de_anillo = np.repeat(np.arange(len(codigos)), anillos)
+    puntos_feature = np.bincount(feature_de_anillo, weights=puntos, minlength=len(codigos)).astype(np.int64)
+    
+    return {'type': 'FeatureCollection', 'features': features}, dict(zip(codigos.tolist(), puntos_feature.tolist()))
+
+def cargar_limites(nivel, resolucion):
+    """
+    GeoJSON de un nivel y resolución, con el código DIVIPOLA en el id de cada
+    feature. Se parsea una sola vez por proceso (compartido entre sesiones).
+    
+    Args:
+        nivel: Clave de NIVELES_LIMITES
+        resolucion: Clave de RESOLUCIONES
+    
+    Returns:
+        tuple: (GeoJSON, diccionario código -> número de puntos)
+    """
+    compacto = _asegurar_compacto(nivel)
+    return _geojson_cacheado(nivel, resolucion, compacto.stat().st_mtime)
+
+def elegir_resolucion(nivel, codigos):
+    """
+    Elige la resolución más detallada cuyos polígonos para los códigos de la
+    vista no superen PRESUPUESTO_PUNTOS.
+    
+    Args:
+        nivel: Clave de NIVELES_LIMITES
+        codigos: Códigos DIVIPOLA que se van a dibujar
+    
+    Returns:
+        str: Clave de RESOLUCIONES
+    """
+    codigos = set(int(c) for c in codigos)
+    for resolucion in RESOLUCIONES:
+        _, puntos = cargar_limites(nivel, resolucion)
+        if sum(puntos.get(c, 0) for c in codigos) <= PRESUPUESTO_PUNTOS:
+            return resolucion
+    return resolucion
+
+def limites_vista(nivel, codigos):
+    """
+    GeoJSON con solo los polígonos de los códigos de una vista, en la resolución
+    que elige elegir_resolucion para esos códigos.
+    
+    Args:
+        nivel: Clave de NIVELES_LIMITES
+        codigos: Códigos DIVIPOLA que se van a dibujar
+    
+    Returns:
+        dict: FeatureCollection con los features de la vista
+    """
+    codigos = set(int(c) for c in codigos)
+    limites, _ = cargar_limites(nivel, elegir_resolucion(nivel, codigos))
+    return {'type': 'FeatureCollection', 'features': [f for f in limites['features'] if f['id'] in codigos]}
+
+if __name__ == "__main__":
+    for nivel in NIVELES_LIMITES:
+        if ruta_fuente(nivel).exists():
+            destino = compactar_limites(nivel)
+            print(f"{nivel}: {ruta_fuente(nivel)} -> {destino} ({destino.stat().st_size / 1024:,.0f} KB)")
+        else:
+            print(f"{nivel}: no se encontró {ruta_fuente(nivel)}")
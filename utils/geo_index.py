@@ -0,0 +1,249 @@
+"""
+Módulo de índice geográfico: centroides de departamentos y municipios de
+Colombia indexados por código DIVIPOLA (ID_DEPARTAMENTO / ID_MUNICIPIO), con
+búsquedas vectorizadas por código entero.
+
+Tablas incluidas en utils/geo_data (sin conexión a internet):
+    - departamentos.csv: centroide de los 33 departamentos
+    - lugares_geonames.csv: nomenclátor de poblaciones de Colombia de GeoNames
+      (https://www.geonames.org, licencia CC-BY 4.0) con su departamento DIVIPOLA
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+RUTA_GEO = Path(__file__).parent / "geo_data"
+ARCHIVO_DEPARTAMENTOS = RUTA_GEO / "departamentos.csv"
+ARCHIVO_LUGARES = RUTA_GEO / "lugares_geonames.csv"
+
+# Tabla oficial opcional (p. ej. centroides DIVIPOLA del DANE) con columnas
+# ID_MUNICIPIO, LAT, LON; si existe tiene prioridad sobre el nomenclátor
+ARCHIVO_MUNICIPIOS_DIVIPOLA = Path("data/geo/municipios_divipola.csv")
+
+# Los códigos DIVIPOLA de municipio tienen 5 dígitos (2 de departamento + 3)
+MAX_CODIGO_DEPARTAMENTO = 100
+MAX_CODIGO_MUNICIPIO = 100000
+
+# Recuadro plausible de cada departamento: percentiles 5 y 95 de sus lugares
+# ampliados en FRACCION_MARGEN de ese rango (mínimo MARGEN_MINIMO_GRADOS); los
+# lugares del nomenclátor fuera de su recuadro se descartan por mal asignados
+FRACCION_MARGEN = 0.75
+MARGEN_MINIMO_GRADOS = 0.5
+
+# Origen de las coordenadas de cada municipio, de más a menos preciso
+PRECISIONES = {
+    'divipola': 'Tabla DIVIPOLA',
+    'municipio': 'Cabecera municipal (GeoNames)',
+    'departamento': 'Centroide del departamento'
+}
+
+def normalizar_texto(texto):
+    """Normaliza un texto para compararlo: sin tildes, en mayúsculas y sin signos"""
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode().upper()
+    return ' '.join(re.sub(r'[^A-Z0-9 ]', ' ', texto).split())
+
+def normalizar_nombres(nombres):
+    """
+    Normaliza nombres para compararlos (ver normalizar_texto).
+    
+    Args:
+        nombres: Serie de textos
+    
+    Returns:
+        pd.Series: Nombres normalizados
+    """
+    unicos = nombres.dropna().unique()
+    return nombres.map({nombre: normalizar_texto(nombre) for nombre in unicos})
+
+@lru_cache(maxsize=1)
+def cargar_departamentos():
+    """Centroides de departamentos indexados por ID_DEPARTAMENTO"""
+    return pd.read_csv(ARCHIVO_DEPARTAMENTOS, index_col='ID_DEPARTAMENTO')
+
+@lru_cache(maxsize=1)
+def recuadros_departamentos():
+    """
+    Recuadro plausible de cada departamento (LAT_MIN, LAT_MAX, LON_MIN, LON_MAX)
+    a partir de los percentiles 5 y 95 de sus lugares; es robusto a los pocos
+    lugares que GeoNames asigna a un departamento vecino.
+    """
+    lugares = pd.read_csv(ARCHIVO_LUGARES, usecols=['ID_DEPARTAMENTO', 'LAT', 'LON'])
+    por_departamento = lugares.groupby('ID_DEPARTAMENTO')[['LAT', 'LON']]
+    inferior = por_departamento.quantile(0.05)
+    superior = por_departamento.quantile(0.95)
+    margen = ((superior - inferior) * FRACCION_MARGEN).clip(lower=MARGEN_MINIMO_GRADOS)
+    inferior, superior = inferior - margen, superior + margen
+    return pd.DataFrame({
+        'LAT_MIN': inferior['LAT'], 'LAT_MAX': superior['LAT'],
+        'LON_MIN': inferior['LON'], 'LON_MAX': superior['LON']
+    })
+
+def _dentro_del_departamento(candidatos):
+    """
+    Máscara de los candidatos (ID_DEPARTAMENTO, LAT, LON) que caen dentro del
+    recuadro de su departamento (ver recuadros_departamentos).
+    """
+    departamento = candidatos['ID_DEPARTAMENTO']
+    recuadros = recuadros_departamentos()
+    return (candidatos['LAT'].between(departamento.map(recuadros['LAT_MIN']), departamento.map(recuadros['LAT_MAX'])) &
+            candidatos['LON'].between(departamento.map(recuadros['LON_MIN']), departamento.map(recuadros['LON_MAX'])))
+
+@lru_cache(maxsize=1)
+def cargar_lugares():
+    """
+    Nomenclátor de GeoNames con una fila por nombre normalizado (oficial o
+    alterno) y departamento; descarta los lugares fuera del recuadro de su
+    departamento y ante homónimos se queda la población mayor.
+    """
+    lugares = pd.read_csv(ARCHIVO_LUGARES, keep_default_na=False)
+    
+    nombres = pd.concat([
+        lugares[['ID_DEPARTAMENTO', 'NOMBRE', 'LAT', 'LON', 'POBLACION']],
+        lugares.assign(NOMBRE=lugares['ALTERNOS'].str.split('|'))
+               .explode('NOMBRE')[['ID_DEPARTAMENTO', 'NOMBRE', 'LAT', 'LON', 'POBLACION']]
+    ], ignore_index=True)
+    nombres = nombres[(nombres['NOMBRE'] != '') & _dentro_del_departamento(nombres)]
+    nombres['NOMBRE_NORM'] = normalizar_nombres(nombres['NOMBRE'])
+    
+    return (nombres.sort_values('POBLACION', ascending=False)
+                   .drop_duplicates(['ID_DEPARTAMENTO', 'NOMBRE_NORM'])
+                   .reset_index(drop=True))
+
+def _tabla_densa(codigos, valores, tamano):
+    """Arreglo indexado directamente por código entero (NaN donde no hay dato)"""
+    tabla = np.full(tamano, np.nan)
+    tabla[np.asarray(codigos, dtype=np.int64)] = np.asarray(valores, dtype=float)
+    return tabla
+
+def _buscar(tabla, codigos):
+    """Búsqueda vectorizada de códigos enteros; los códigos inválidos devuelven NaN"""
+    codigos = pd.to_numeric(codigos, errors='coerce').to_numpy(dtype=float)
+    validos = np.isfinite(codigos) & (codigos >= 0) & (codigos < len(tabla))
+    
+    resultado = np.full(len(codigos), np.nan)
+    resultado[validos] = tabla[codigos[validos].astype(np.int64)]
+    return resultado
+
+def _coincidencias_parciales(pendientes, lugares):
+    """
+    Cruza los municipios pendientes con los lugares de su departamento cuyo
+    nombre aparece como palabras completas dentro del nombre del municipio
+    (p. ej. 'SAN JOSE DE CUCUTA' contiene 'CUCUTA'). Se queda, por municipio,
+    con el nombre más largo y, a igual longitud, con la población mayor, para
+    que nombres alternos cortos ('CARMEN') no ganen a los completos.
+    
+    Args:
+        pendientes: Municipios indexados por ID_MUNICIPIO con ID_DEPARTAMENTO y NOMBRE_NORM
+        lugares: Salida de cargar_lugares
+    
+    Returns:
+        pd.DataFrame: Indexado por ID_MUNICIPIO con LAT y LON
+    """
+    pares = (pendientes[pendientes['NOMBRE_NORM'].fillna('') != ''][['ID_DEPARTAMENTO', 'NOMBRE_NORM']]
+             .reset_index()
+             .merge(lugares[['ID_DEPARTAMENTO', 'NOMBRE_NORM', 'LAT', 'LON', 'POBLACION']],
+                    on='ID_DEPARTAMENTO', suffixes=('', '_LUGAR')))
+    
+    # Los nombres normalizados solo tienen palabras separadas por un espacio,
+    # así que contener palabras completas equivale a contener ' nombre '
+    municipio = ' ' + pares['NOMBRE_NORM'].to_numpy(dtype=str) + ' '
+    lugar = ' ' + pares['NOMBRE_NORM_LUGAR'].to_numpy(dtype=str) + ' '
+    pares = pares[np.char.find(municipio, lugar) >= 0]
+    
+    return (pares.assign(LONGITUD=pares['NOMBRE_NORM_LUGAR'].str.len())
+                 .sort_values(['LONGITUD', 'POBLACION'], ascending=False)
+                 .drop_duplicates('ID_MUNICIPIO')
+                 .set_index('ID_MUNICIPIO')[['LAT', 'LON']])
+
+def construir_indice_municipios(df):
+    """
+    Construye el índice de centroides de los municipios presentes en el dataset.
+    
+    Cada ID_MUNICIPIO se ubica, en orden de prioridad, con la tabla DIVIPOLA
+    opcional, con la cabecera municipal del nomenclátor (mismo departamento y
+    nombre normalizado, exacto o contenido) o con el centroide de su departamento.
+    
+    Args:
+        df: Dataset con ID_MUNICIPIO, MUNICIPIO e ID_DEPARTAMENTO
+    
+    Returns:
+        pd.DataFrame: Indexado por ID_MUNICIPIO con ID_DEPARTAMENTO, MUNICIPIO,
+                      LAT, LON y PRECISION (clave de PRECISIONES)
+    """
+    municipios = (df[['ID_MUNICIPIO', 'ID_DEPARTAMENTO', 'MUNICIPIO']]
+                  .drop_duplicates('ID_MUNICIPIO')
+                  .set_index('ID_MUNICIPIO')
+                  .sort_index())
+    municipios['LAT'] = np.nan
+    municipios['LON'] = np.nan
+    municipios['PRECISION'] = None
+    
+    # 1. Tabla DIVIPOLA suministrada por el usuario
+    if ARCHIVO_MUNICIPIOS_DIVIPOLA.exists():
+        divipola = pd.read_csv(ARCHIVO_MUNICIPIOS_DIVIPOLA, index_col='ID_MUNICIPIO')
+        comunes = municipios.index.intersection(divipola.index)
+        municipios.loc[comunes, ['LAT', 'LON']] = divipola.loc[comunes, ['LAT', 'LON']].to_numpy()
+        municipios.loc[comunes, 'PRECISION'] = 'divipola'
+    
+    # 2. Nomenclátor: nombre exacto dentro del mismo departamento
+    lugares = cargar_lugares()
+    pendientes = municipios[municipios['PRECISION'].isna()].copy()
+    pendientes['NOMBRE_NORM'] = normalizar_nombres(pendientes['MUNICIPIO'].astype(str))
+    
+    exactos = (pendientes.reset_index()
+               .merge(lugares[['ID_DEPARTAMENTO', 'NOMBRE_NORM', 'LAT', 'LON']],
+                      on=['ID_DEPARTAMENTO', 'NOMBRE_NORM'], suffixes=('_', ''))
+               .set_index('ID_MUNICIPIO'))
+    municipios.loc[exactos.index, ['LAT', 'LON']] = exactos[['LAT', 'LON']].to_numpy()
+    municipios.loc[exactos.index, 'PRECISION'] = 'municipio'
+    
+    # 3. Nomenclátor: nombre contenido (nombres largos u oficiales)
+    parciales = _coincidencias_parciales(pendientes.drop(exactos.index), lugares)
+    municipios.loc[parciales.index, ['LAT', 'LON']] = parciales[['LAT', 'LON']].to_numpy()
+    municipios.loc[parciales.index, 'PRECISION'] = 'municipio'
+    
+    # 4. Centroide del departamento
+    sin_ubicar = municipios['PRECISION'].isna()
+    departamentos = cargar_departamentos()
+    municipios.loc[sin_ubicar, 'LAT'] = municipios.loc[sin_ubicar, 'ID_DEPARTAMENTO'].map(departamentos['LAT'])
+    municipios.loc[sin_ubicar, 'LON'] = municipios.loc[sin_ubicar, 'ID_DEPARTAMENTO'].map(departamentos['LON'])
+    municipios.loc[sin_ubicar & municipios['LAT'].notna(), 'PRECISION'] = 'departamento'
+    
+    return municipios
+
+def agregar_coordenadas(df, nivel='departamento', indice_municipios=None):
+    """
+    Agrega las columnas lat y lon por código DIVIPOLA con una búsqueda
+    vectorizada; las filas con códigos desconocidos se excluyen y se cuentan.
+    
+    Args:
+        df: DataFrame con ID_DEPARTAMENTO (o ID_MUNICIPIO si nivel='municipio')
+        nivel: 'departamento' o 'municipio'
+        indice_municipios: Salida de construir_indice_municipios (nivel 'municipio')
+    
+    Returns:
+        tuple: (DataFrame con lat y lon, número de filas sin coordenadas)
+    """
+    if nivel == 'departamento':
+        departamentos = cargar_departamentos()
+        clave = 'ID_DEPARTAMENTO'
+        tabla_lat = _tabla_densa(departamentos.index, departamentos['LAT'], MAX_CODIGO_DEPARTAMENTO)
+        tabla_lon = _tabla_densa(departamentos.index, departamentos['LON'], MAX_CODIGO_DEPARTAMENTO)
+    elif nivel == 'municipio':
+        if indice_municipios is None:
+            indice_municipios = construir_indice_municipios(df)
+        clave = 'ID_MUNICIPIO'
+        tabla_lat = _tabla_densa(indice_municipios.index, indice_municipios['LAT'], MAX_CODIGO_MUNICIPIO)
+        tabla_lon = _tabla_densa(indice_municipios.index, indice_municipios['LON'], MAX_CODIGO_MUNICIPIO)
+    else:
+        raise ValueError(f"Nivel geográfico desconocido: {nivel}")
+    
+    df_map = df.copy()
+    df_map['lat'] = _buscar(tabla_lat, df_map[clave])
+    df_map['lon'] = _buscar(tabla_lon, df_map[clave])
+    
+    con_coordenadas = df_map['lat'].notna() & df_map['lon'].notna()
+    return df_map[con_coordenadas], int((~con_coordenadas).sum())
@@ -0,0 +1,159 @@
+"""
+Módulo para calcular métricas de crecimiento multi-periodo por municipio
+"""
+import pandas as pd
+import numpy as np
+
+# |z| frente al departamento a partir del cual un municipio se considera inusual
+UMBRAL_ZSCORE_DEPTO = 2.0
+
+def build_growth_matrix(df, valor='CANTIDAD_LINEAS_ACCESOS'):
+    """
+    Construye la matriz densa (municipio × trimestre) de un valor.
+    
+    Los trimestres van del primero al último presente en df sin saltos;
+    los trimestres sin registros de un municipio quedan en 0.
+    
+    Args:
+        df: DataFrame (puede estar filtrado por periodo)
+        valor: Columna a sumar
+    
+    Returns:
+        tuple: (municipios, periodos, matriz) donde municipios es un DataFrame
+               alineado con las filas de la matriz y periodos un array ANNO*10+TRIMESTRE
+    """
+    codigos_mun, ids_mun = pd.factorize(df['ID_MUNICIPIO'], sort=True)
+    
+    # Índice de trimestre continuo para que los huecos cuenten como periodos
+    trimestre_abs = df['ANNO'].to_numpy() * 4 + df['TRIMESTRE'].to_numpy() - 1
+    inicio = trimestre_abs.min()
+    n_periodos = trimestre_abs.max() - inicio + 1
+    col = trimestre_abs - inicio
+    
+    matriz = np.bincount(
+        codigos_mun * n_periodos + col,
+        weights=df[valor].to_numpy(dtype=float),
+        minlength=len(ids_mun) * n_periodos
+    ).reshape(len(ids_mun), n_periodos)
+    
+    trimestres = np.arange(inicio, inicio + n_periodos)
+    periodos = (trimestres // 4) * 10 + trimestres % 4 + 1
+    
+    municipios = (
+        df[['ID_MUNICIPIO', 'MUNICIPIO', 'ID_DEPARTAMENTO', 'DEPARTAMENTO']]
+        .drop_duplicates('ID_MUNICIPIO')
+        .set_index('ID_MUNICIPIO')
+        .loc[ids_mun]
+        .rename_axis('ID_MUNICIPIO')
+        .reset_index()
+    )
+    
+    return municipios, periodos, matriz
+
+def _rachas(mascara):
+    """
+    Racha final y racha máxima de valores True consecutivos por fila.
+    
+    Args:
+        mascara: Array booleano (filas × periodos)
+    
+    Returns:
+        tuple: (racha_actual, racha_maxima) como arrays enteros por fila
+    """
+    if mascara.shape[1] == 0:
+        ceros = np.zeros(mascara.shape[0], dtype=np.int64)
+        return ceros, ceros
+    
+    acumulado = np.cumsum(mascara, axis=1)
+    # Valor del acumulado en el último False de cada fila (reinicio de la racha)
+    reinicio = np.maximum.accumulate(np.where(~mascara, acumulado, 0), axis=1)
+    longitud = acumulado - reinicio
+    
+    return longitud[:, -1], longitud.max(axis=1)
+
+def _zscore_por_grupo(valores, grupos):
+    """Z-score de cada valor frente a la media y desviación de su grupo (ignora NaN)"""
+    validos = ~np.isnan(valores)
+    n_grupos = grupos.max() + 1
+    
+    n = np.bincount(grupos[validos], minlength=n_grupos)
+    suma = np.bincount(grupos[validos], weights=valores[validos], minlength=n_grupos)
+    suma2 = np.bincount(grupos[validos], weights=valores[validos] ** 2, minlength=n_grupos)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = suma / n
+        desviacion = np.sqrt(np.maximum(suma2 / n - media ** 2, 0) * n / (n - 1))
+        z = (valores - media[grupos]) / desviacion[grupos]
+    
+    z[~np.isfinite(z)] = np.nan
+    return z
+
+def compute_growth_metrics(df):
+    """
+    Calcula métricas de crecimiento de líneas para todos los municipios a la vez.
+    
+    Columnas del resumen:
+        - LINEAS_INICIO / LINEAS_FIN: líneas en el primer y último trimestre
+        - VAR_PCT: variación porcentual entre el primer y el último trimestre
+        - QOQ_MEDIO_PCT / QOQ_ULTIMO_PCT: crecimiento trimestral medio y del último trimestre
+        - CAGR_PCT: tasa de crecimiento anual compuesta entre el primer y el último trimestre
+        - RACHA_ACTUAL: trimestres consecutivos creciendo (+) o decreciendo (-) al final del rango
+        - RACHA_MAX_CRECIMIENTO / RACHA_MAX_DECRECIMIENTO: rachas más largas del rango
+        - ZSCORE_DEPTO: z-score del CAGR frente a los municipios de su departamento
+    
+    Args:
+        df: DataFrame (puede estar filtrado por periodo)
+    
+    Returns:
+        dict: {'resumen': DataFrame por municipio, 'periodos': array de periodos,
+               'lineas': matriz municipio × periodo, 'qoq_pct': matriz de crecimiento trimestral}
+    """
+    municipios, periodos, lineas = build_growth_matrix(df)
+    n_periodos = len(periodos)
+    
+    anterior = lineas[:, :-1]
+    siguiente = lineas[:, 1:]
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        qoq = np.where(anterior > 0, (siguiente - anterior) / anterior, np.nan)
+        
+        inicio = lineas[:, 0]
+        fin = lineas[:, -1]
+        var_pct = np.where(inicio > 0, (fin - inicio) / inicio * 100, np.nan)
+        
+        n_qoq = (~np.isnan(qoq)).sum(axis=1)
+        qoq_medio = np.where(n_qoq > 0, np.nansum(qoq, axis=1) / n_qoq, np.nan)
+        qoq_ultimo = qoq[:, -1] if n_periodos > 1 else np.full(len(lineas), np.nan)
+        
+        años = (n_periodos - 1) / 4
+        if años > 0:
+            cagr = np.where((inicio > 0) & (fin > 0), (fin / inicio) ** (1 / años) - 1, np.nan)
+        else:
+            cagr = np.full(len(lineas), np.nan)
+    
+    racha_crec, racha_max_crec = _rachas(siguiente > anterior)
+    racha_decrec, racha_max_decrec = _rachas(siguiente < anterior)
+    
+    codigos_depto = pd.factorize(municipios['ID_DEPARTAMENTO'])[0]
+    
+    resumen = municipios.copy()
+    resumen['LINEAS_INICIO'] = inicio
+    resumen['LINEAS_FIN'] = fin
+    resumen['VAR_PCT'] = var_pct
+    resumen['QOQ_MEDIO_PCT'] = qoq_medio * 100
+    resumen['QOQ_ULTIMO_PCT'] = qoq_ultimo * 100
+    resumen['CAGR_PCT'] = cagr * 100
+    resumen['RACHA_ACTUAL'] = np.where(racha_crec > 0, racha_crec, -racha_decrec)
+    resumen['RACHA_MAX_CRECIMIENTO'] = racha_max_crec
+    resumen['RACHA_MAX_DECRECIMIENTO'] = racha_max_decrec
+    resumen['ZSCORE_DEPTO'] = _zscore_por_grupo(cagr, codigos_depto)
+    
+    columnas_pct = ['VAR_PCT', 'QOQ_MEDIO_PCT', 'QOQ_ULTIMO_PCT', 'CAGR_PCT', 'ZSCORE_DEPTO']
+    resumen[columnas_pct] = resumen[columnas_pct].round(2)
+    
+    return {
+        'resumen': resumen,
+        'periodos': periodos,
+        'lineas': lineas,
+        'qoq_pct': qoq * 100
+    }
@@ -0,0 +1,143 @@
+"""
+Módulo de agregación en grillas hexagonales: agrupa municipios en celdas de
+varios tamaños (uno por nivel de detalle del mapa) para dibujar mapas
+municipales con pocos puntos
+"""
+import numpy as np
+import pandas as pd
+
+# Niveles de detalle del mapa municipal: radio de la celda (None = un punto
+# por municipio) y zoom inicial del mapa
+NIVELES_DETALLE = {
+    'nacional': {
+        'nombre': 'Nacional (hexágonos de 60 km)',
+        'radio_km': 60,
+        'zoom': 4.3
+    },
+    'regional': {
+        'nombre': 'Regional (hexágonos de 25 km)',
+        'radio_km': 25,
+        'zoom': 5.3
+    },
+    'local': {
+        'nombre': 'Local (hexágonos de 10 km)',
+        'radio_km': 10,
+        'zoom': 6.3
+    },
+    'municipio': {
+        'nombre': 'Municipios (sin agrupar)',
+        'radio_km': None,
+        'zoom': 6.3
+    }
+}
+
+# Proyección equirectangular centrada en la latitud media de Colombia
+LATITUD_REFERENCIA = 4.5
+KM_POR_GRADO_LAT = 110.57
+KM_POR_GRADO_LON = 111.32 * np.cos(np.radians(LATITUD_REFERENCIA))
+
+# Desplazamiento para codificar las coordenadas axiales (q, r) en un solo entero
+_DESPLAZAMIENTO = 100000
+
+def celdas_hexagonales(lat, lon, radio_km):
+    """
+    Asigna puntos a celdas de una grilla hexagonal (hexágonos con vértice
+    arriba) con redondeo en coordenadas cúbicas.
+    
+    Args:
+        lat: Arreglo de latitudes
+        lon: Arreglo de longitudes
+        radio_km: Radio (centro a vértice) de cada hexágono en km
+    
+    Returns:
+        tuple: (id de celda int64, latitud del centro, longitud del centro)
+    """
+    x = np.asarray(lon, dtype=float) * KM_POR_GRADO_LON
+    y = np.asarray(lat, dtype=float) * KM_POR_GRADO_LAT
+    
+    q = (np.sqrt(3) / 3 * x - y / 3) / radio_km
+    r = (2 / 3 * y) / radio_km
+    s = -q - r
+    
+    q_r, r_r, s_r = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(q_r - q), np.abs(r_r - r), np.abs(s_r - s)
+    
+    corregir_q = (dq > dr) & (dq > ds)
+    corregir_r = ~corregir_q & (dr > ds)
+    q_r = np.where(corregir_q, -r_r - s_r, q_r)
+    r_r = np.where(corregir_r, -q_r - s_r, r_r)
+    
+    q_i, r_i = q_r.astype(np.int64), r_r.astype(np.int64)
+    ids = (q_i + _DESPLAZAMIENTO) * (2 * _DESPLAZAMIENTO) + (r_i + _DESPLAZAMIENTO)
+    
+    lon_centro = radio_km * np.sqrt(3) * (q_i + r_i / 2) / KM_POR_GRADO_LON
+    lat_centro = radio_km * 1.5 * r_i / KM_POR_GRADO_LAT
+    
+    return ids, lat_centro, lon_centro
+
+def asignar_celdas(indice_municipios):
+    """
+    Precalcula la celda de cada municipio en todos los niveles de detalle.
+    
+    Args:
+        indice_municipios: Salida de geo_index.construir_indice_municipios
+    
+    Returns:
+        dict: nivel -> DataFrame indexado por ID_MUNICIPIO con CELDA, lat y lon
+              (centro de la celda; en 'municipio' la celda es el propio municipio)
+    """
+    ubicados = indice_municipios.dropna(subset=['LAT', 'LON'])
+    celdas = {}
+    
+    for nivel, config in NIVELES_DETALLE.items():
+        if config['radio_km'] is None:
+            ids = ubicados.index.to_numpy(dtype=np.int64)
+            lat, lon = ubicados['LAT'].to_numpy(), ubicados['LON'].to_numpy()
+        else:
+            ids, lat, lon = celdas_hexagonales(ubicados['LAT'], ubicados['LON'], config['radio_km'])
+        
+        celdas[nivel] = pd.DataFrame({
+            'CELDA': ids,
+            'lat': np.round(lat, 4).astype(np.float32),
+            'lon': np.round(lon, 4).astype(np.float32)
+        }, index=ubicados.index)
+    
+    return celdas
+
+def agregar_por_celda(df, celdas_nivel, agregaciones, columna_lineas='CANTIDAD_LINEAS_ACCESOS',
+                      dominante=None):
+    """
+    Agrega registros por celda hexagonal de un nivel de detalle.
+    
+    Args:
+        df: Registros con ID_MUNICIPIO, MUNICIPIO y las columnas a agregar
+        celdas_nivel: Una entrada de asignar_celdas
+        agregaciones: Diccionario columna -> función para groupby.agg
+        columna_lineas: Columna con la que se elige el municipio principal de la celda
+        dominante: Columna categórica (p. ej. TECNOLOGIA) cuyo valor con más
+                   líneas se reporta por celda en Dominante y Porcentaje_Dominante
+    
+    Returns:
+        pd.DataFrame: Una fila por celda con lat, lon, las agregaciones,
+                      N_Municipios y Municipio_Principal
+    """
+    celda = celdas_nivel['CELDA'].reindex(df['ID_MUNICIPIO'].to_numpy()).to_numpy()
+    validos = ~np.isnan(celda)
+    df_ubicado = df.loc[validos].assign(CELDA=celda[validos].astype(np.int64))
+    
+    agregado = df_ubicado.groupby('CELDA').agg(agregaciones)
+    agregado['N_Municipios'] = df_ubicado.groupby('CELDA')['ID_MUNICIPIO'].nunique()
+    
+    lineas_municipio = df_ubicado.groupby(['CELDA', 'MUNICIPIO'])[columna_lineas].sum().reset_index()
+    principal = lineas_municipio.loc[lineas_municipio.groupby('CELDA')[columna_lineas].idxmax()]
+    agregado['Municipio_Principal'] = principal.set_index('CELDA')['MUNICIPIO']
+    
+    if dominante is not None:
+        lineas_categoria = df_ubicado.groupby(['CELDA', dominante])[columna_lineas].sum().reset_index()
+        mayor = lineas_categoria.loc[lineas_categoria.groupby('CELDA')[columna_lineas].idxmax()].set_index('CELDA')
+        agregado['Dominante'] = mayor[dominante]
+        total = lineas_categoria.groupby('CELDA')[columna_lineas].sum()
+        agregado['Porcentaje_Dominante'] = (mayor[columna_lineas] / total * 100).round(2)
+    
+    centros = celdas_nivel.drop_duplicates('CELDA').set_index('CELDA')[['lat', 'lon']]
+    return agregado.join(centros).reset_index()
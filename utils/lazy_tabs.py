@@ -0,0 +1,50 @@
+"""
+Módulo de pestañas diferidas: un selector horizontal con el aspecto de unas
+pestañas que guarda la activa en session_state, para que una página solo
+calcule y dibuje el contenido de la pestaña visible. Al cambiar de pestaña la
+página se vuelve a ejecutar y se calcula la nueva; lo ya calculado se reutiliza
+desde las cachés de la página (figure_cache, st.cache_data o los almacenes
+precalculados). st.tabs dibuja todas las pestañas en cada ejecución y no
+informa cuál está abierta.
+
+Uso en una página:
+    tab1, tab2 = lazy_tabs.pestanas_diferidas(["📊 A", "📈 B"], 'tabs_pagina')
+    
+    with tab1:
+        if tab1.open:
+            ... contenido de la pestaña ...
+"""
+from contextlib import nullcontext
+import streamlit as st
+
+class Pestana:
+    """Pestaña diferida: la activa dibuja en su contenedor, las demás no dibujan nada"""
+    
+    def __init__(self, contenedor=None):
+        self.open = contenedor is not None
+        self._contexto = contenedor if contenedor is not None else nullcontext()
+    
+    def __enter__(self):
+        return self._contexto.__enter__()
+    
+    def __exit__(self, *excepcion):
+        return self._contexto.__exit__(*excepcion)
+
+def pestanas_diferidas(nombres, clave):
+    """
+    Crea pestañas que registran la activa (tab.open es True solo en ella).
+    
+    Args:
+        nombres: Etiquetas de las pestañas
+        clave: Clave única del grupo de pestañas (conserva la pestaña activa
+               entre ejecuciones en st.session_state[clave])
+    
+    Returns:
+        list: Una Pestana por etiqueta, usadas como los contenedores de st.tabs
+    """
+    if st.session_state.get(clave) not in nombres:
+        st.session_state.pop(clave, None)
+    
+    activa = st.radio("Pestaña", nombres, horizontal=True, key=clave, label_visibility='collapsed')
+    contenedor = st.container()
+    return [Pestana(contenedor if nombre == activa else None) for nombre in nombres]
@@ -0,0 +1,181 @@
+"""
+Módulo de registro de modelos de clustering: guarda scaler + PCA + KMeans
+entrenados y asigna clusters a datos nuevos sin reentrenar
+"""
+import json
+import uuid
+import joblib
+import pandas as pd
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from utils.clustering_engines import n_clusters_modelo
+
+RUTA_MODELOS = Path("data/modelos_clustering")
+RUTA_REGISTRO = RUTA_MODELOS / "registro.json"
+
+def _leer_registro():
+    """Lee la lista de modelos registrados (vacía si no existe el registro)"""
+    if not RUTA_REGISTRO.exists():
+        return []
+    
+    with open(RUTA_REGISTRO, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _escribir_registro(entradas):
+    """Escribe el registro de forma atómica"""
+    RUTA_MODELOS.mkdir(parents=True, exist_ok=True)
+    temporal = RUTA_REGISTRO.with_suffix('.tmp')
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(entradas, f, ensure_ascii=False, indent=2)
+    temporal.replace(RUTA_REGISTRO)
+
+def save_model(scaler, pca, kmeans, variables, periodo_inicio, periodo_fin,
+               metricas=None, nombre=None, version_dataset="",
+               granularidad='operador_tecnologia_servicio'):
+    """
+    Guarda un modelo de clustering entrenado en el registro.
+    
+    Args:
+        scaler: StandardScaler ajustado sobre las variables
+        pca: PCA ajustado sobre los datos escalados (para proyectar datos nuevos)
+        kmeans: Modelo ajustado con predict (KMeans, MiniBatchKMeans o GaussianMixture)
+        variables: Lista de variables usadas, en el orden del entrenamiento
+        periodo_inicio: Primer periodo de entrenamiento (ANNO*10+TRIMESTRE)
+        periodo_fin: Último periodo de entrenamiento (ANNO*10+TRIMESTRE)
+        metricas: Diccionario con métricas de evaluación (silhouette, etc.)
+        nombre: Nombre descriptivo del modelo
+        version_dataset: Versión del dataset con que se entrenó
+        granularidad: Nivel de agregación de las unidades (clave de GRANULARIDADES)
+    
+    Returns:
+        str: Identificador del modelo
+    """
+    id_modelo = datetime.now().strftime('%Y%m%d%H%M%S') + '_' + uuid.uuid4().hex[:6]
+    archivo = f"modelo_{id_modelo}.joblib"
+    
+    RUTA_MODELOS.mkdir(parents=True, exist_ok=True)
+    joblib.dump({
+        'scaler': scaler,
+        'pca': pca,
+        'kmeans': kmeans,
+        'variables': list(variables)
+    }, RUTA_MODELOS / archivo)
+    
+    entrada = {
+        'id': id_modelo,
+        'nombre': nombre or f"K-means {n_clusters_modelo(kmeans)} clusters",
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'archivo': archivo,
+        'variables': list(variables),
+        'n_clusters': n_clusters_modelo(kmeans),
+        'periodo_inicio': int(periodo_inicio),
+        'periodo_fin': int(periodo_fin),
+        'version_dataset': version_dataset,
+        'granularidad': granularidad,
+        'metricas': {k: float(v) for k, v in (metricas or {}).items()}
+    }
+    
+    entradas = _leer_registro()
+    entradas.append(entrada)
+    _escribir_registro(entradas)
+    
+    return id_modelo
+
+def list_models():
+    """
+    Lista los modelos registrados, del más reciente al más antiguo.
+    
+    Returns:
+        list: Entradas del registro (diccionarios)
+    """
+    return sorted(_leer_registro(), key=lambda e: e['fecha'], reverse=True)
+
+def load_model(id_modelo):
+    """
+    Carga el bundle (scaler, pca, kmeans, variables) de un modelo registrado.
+    
+    Args:
+        id_modelo: Identificador devuelto por save_model
+    
+    Returns:
+        dict: Bundle del modelo con su entrada del registro en 'registro'
+    """
+    entrada = next((e for e in _leer_registro() if e['id'] == id_modelo), None)
+    if entrada is None:
+        raise KeyError(f"No existe el modelo: {id_modelo}")
+    
+    bundle = joblib.load(RUTA_MODELOS / entrada['archivo'])
+    bundle['registro'] = entrada
+    return bundle
+
+def delete_model(id_modelo):
+    """
+    Elimina un modelo del registro y su archivo.
+    
+    Args:
+        id_modelo: Identificador del modelo
+    """
+    entradas = _leer_registro()
+    for entrada in entradas:
+        if entrada['id'] == id_modelo:
+            (RUTA_MODELOS / entrada['archivo']).unlink(missing_ok=True)
+    _escribir_registro([e for e in entradas if e['id'] != id_modelo])
+
+def score(bundle, df_agg):
+    """
+    Asigna clusters a datos nuevos con un modelo registrado, sin reentrenar.
+    
+    Args:
+        bundle: Salida de load_model
+        df_agg: Datos con las variables del modelo (salida de preparar_datos_clustering)
+    
+    Returns:
+        pd.DataFrame: Copia de df_agg con las columnas Cluster, PCA1 y PCA2
+    """
+    faltantes = [v for v in bundle['variables'] if v not in df_agg.columns]
+    if faltantes:
+        raise ValueError(f"Faltan variables del modelo: {', '.join(faltantes)}")
+    
+    X = bundle['scaler'].transform(df_agg[bundle['variables']].to_numpy(dtype=float))
+    
+    df_scored = df_agg.copy()
+    df_scored['Cluster'] = bundle['kmeans'].predict(X)
+    if bundle.get('pca') is not None:
+        X_pca = bundle['pca'].transform(X)
+        df_scored['PCA1'] = X_pca[:, 0]
+        df_scored['PCA2'] = X_pca[:, 1]
+    
+    return df_scored
+
+def cluster_migration(bundle, df, preparar, clave=('EMPRESA', 'TECNOLOGIA', 'SERVICIO_PAQUETE')):
+    """
+    Asigna clusters trimestre a trimestre con un mismo modelo, para seguir la
+    migración de cada unidad entre clusters.
+    
+    Args:
+        bundle: Salida de load_model
+        df: Dataset a nivel registro (puede estar filtrado por periodo)
+        preparar: Función que agrega un trimestre al nivel del modelo
+                  (p. ej. preparar_datos_clustering)
+        clave: Columnas que identifican la unidad a seguir
+    
+    Returns:
+        pd.DataFrame: Columnas de clave, PERIODO, Cluster y CANTIDAD_LINEAS_ACCESOS
+    """
+    periodos = df['ANNO'] * 10 + df['TRIMESTRE']
+    asignaciones = []
+    
+    for periodo in np.sort(periodos.unique()):
+        df_agg = preparar(df[periodos == periodo])
+        if len(df_agg) == 0:
+            continue
+        
+        df_scored = score(bundle, df_agg)
+        df_scored['PERIODO'] = periodo
+        asignaciones.append(df_scored[list(clave) + ['PERIODO', 'Cluster', 'CANTIDAD_LINEAS_ACCESOS']])
+    
+    if not asignaciones:
+        return pd.DataFrame(columns=list(clave) + ['PERIODO', 'Cluster', 'CANTIDAD_LINEAS_ACCESOS'])
+    
+    return pd.concat(asignaciones, ignore_index=True)
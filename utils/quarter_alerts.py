@@ -0,0 +1,302 @@
+"""
+Módulo para detectar anomalías en trimestres nuevos contra líneas base históricas
+"""
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+RUTA_BASELINES = Path("data/baselines_anomalias.parquet")
+RUTA_BASELINES_MUNICIPIO = Path("data/baselines_municipios.parquet")
+RUTA_ALERTAS = Path("data/alertas_anomalias.csv")
+
+CLAVE_BASELINE = ['ID_EMPRESA', 'ID_MUNICIPIO', 'ID_SERVICIO_PAQUETE']
+
+# Columnas de la tabla de alertas (fijas, para que los anexos al CSV coincidan con el encabezado)
+COLUMNAS_ALERTAS = (['PERIODO', 'NIVEL', 'METRICA'] + CLAVE_BASELINE + ['VALOR', 'ESPERADO', 'ZSCORE']
+                    + ['EMPRESA', 'MUNICIPIO', 'DEPARTAMENTO'])
+
+# Parámetros de detección
+UMBRAL_ZSCORE = 3.0
+MIN_TRIMESTRES_HISTORIA = 3
+
+def _agregar_por_trimestre(df, clave):
+    """
+    Agrega líneas y valor facturado por clave y trimestre.
+    
+    Returns:
+        pd.DataFrame: Una fila por (clave, PERIODO) con LINEAS, VALOR y
+        las métricas logarítmicas usadas por el detector
+    """
+    df_agg = df.assign(PERIODO=df['ANNO'] * 10 + df['TRIMESTRE']).groupby(
+        clave + ['PERIODO'], sort=False
+    ).agg(
+        LINEAS=('CANTIDAD_LINEAS_ACCESOS', 'sum'),
+        VALOR=('VALOR_FACTURADO_O_COBRADO', 'sum')
+    ).reset_index()
+    
+    df_agg['LOG_LINEAS'] = np.log1p(df_agg['LINEAS'].clip(lower=0))
+    vpl = df_agg['VALOR'] / df_agg['LINEAS'].where(df_agg['LINEAS'] > 0)
+    df_agg['LOG_VPL'] = np.log(vpl.where(vpl > 0))
+    
+    return df_agg
+
+def _estadisticos(df_agg, clave, columnas):
+    """
+    Resume la historia de cada clave en (n, media, M2) por métrica más el
+    último trimestre observado. M2 es la suma de cuadrados de desviaciones
+    (Welford), lo que permite actualizar la línea base sin releer la historia.
+    """
+    df_agg = df_agg.sort_values('PERIODO')
+    agrupado = df_agg.groupby(clave, sort=False)
+    
+    base = agrupado.agg(
+        ULTIMO_PERIODO=('PERIODO', 'last'),
+        ULTIMAS_LINEAS=('LINEAS', 'last')
+    )
+    
+    for col in columnas:
+        n = agrupado[col].count()
+        base[f'N_{col}'] = n
+        base[f'MEDIA_{col}'] = agrupado[col].mean()
+        base[f'M2_{col}'] = agrupado[col].var(ddof=0).fillna(0) * n
+    
+    return base.reset_index()
+
+def _compactar(base):
+    """Reduce tipos numéricos para guardar la línea base en poco espacio"""
+    for col in base.columns:
+        if col.startswith(('MEDIA_', 'M2_')):
+            base[col] = base[col].astype('float32')
+        elif col.startswith('N_') or col == 'ULTIMO_PERIODO' or col in CLAVE_BASELINE:
+            base[col] = pd.to_numeric(base[col], downcast='integer')
+    return base
+
+def _crecimiento_municipal(df_mun):
+    """Agrega la variación logarítmica trimestral por municipio"""
+    df_mun = df_mun.sort_values(['ID_MUNICIPIO', 'PERIODO'])
+    df_mun['LOG_CRECIMIENTO'] = df_mun.groupby('ID_MUNICIPIO')['LOG_LINEAS'].diff()
+    return df_mun
+
+def build_baselines(df):
+    """
+    Construye las líneas base históricas a partir del dataset completo.
+    
+    Args:
+        df: DataFrame limpio con todos los trimestres históricos
+    
+    Returns:
+        tuple: (baselines por (empresa, municipio, servicio), baselines por municipio)
+    """
+    df_agg = _agregar_por_trimestre(df, CLAVE_BASELINE)
+    baselines = _compactar(_estadisticos(df_agg, CLAVE_BASELINE, ['LOG_LINEAS', 'LOG_VPL']))
+    
+    df_mun = _crecimiento_municipal(_agregar_por_trimestre(df, ['ID_MUNICIPIO']))
+    baselines_mun = _compactar(_estadisticos(df_mun, ['ID_MUNICIPIO'], ['LOG_CRECIMIENTO']))
+    
+    return baselines, baselines_mun
+
+def _actualizar(base, nuevo, clave, columnas):
+    """
+    Incorpora un trimestre a la línea base con la actualización de Welford.
+    
+    Solo toca las claves presentes en el trimestre nuevo; las claves cuyo
+    último periodo ya es igual o posterior se dejan intactas.
+    """
+    base = base.set_index(clave)
+    nuevo = nuevo.set_index(clave)
+    
+    existentes = nuevo.index.intersection(base.index)
+    previas = base.loc[existentes, 'ULTIMO_PERIODO']
+    existentes = previas.index[previas.values < nuevo.loc[previas.index, 'PERIODO'].values]
+    nuevas = nuevo.index.difference(base.index)
+    
+    actualizados = base.loc[existentes].copy()
+    obs = nuevo.loc[existentes]
+    
+    for col in columnas:
+        x = obs[col]
+        valido = x.notna()
+        n = actualizados[f'N_{col}'] + valido
+        delta = (x - actualizados[f'MEDIA_{col}']).where(valido, 0)
+        media = actualizados[f'MEDIA_{col}'] + delta / n.where(n > 0, 1)
+        m2 = actualizados[f'M2_{col}'] + (delta * (x - media)).where(valido, 0)
+        actualizados[f'N_{col}'] = n
+        actualizados[f'MEDIA_{col}'] = media
+        actualizados[f'M2_{col}'] = m2
+    
+    actualizados['ULTIMO_PERIODO'] = obs['PERIODO']
+    actualizados['ULTIMAS_LINEAS'] = obs['LINEAS']
+    
+    agregados = pd.DataFrame(index=nuevas)
+    agregados['ULTIMO_PERIODO'] = nuevo.loc[nuevas, 'PERIODO']
+    agregados['ULTIMAS_LINEAS'] = nuevo.loc[nuevas, 'LINEAS']
+    for col in columnas:
+        x = nuevo.loc[nuevas, col]
+        agregados[f'N_{col}'] = x.notna().astype(int)
+        agregados[f'MEDIA_{col}'] = x.fillna(0)
+        agregados[f'M2_{col}'] = 0.0
+    
+    sin_cambios = base.drop(index=existentes)
+    base = pd.concat([sin_cambios, actualizados[base.columns], agregados[base.columns]])
+    
+    return _compactar(base.reset_index())
+
+def _zscore(x, n, media, m2):
+    """Z-score contra una línea base (n, media, M2); NaN si no hay historia suficiente"""
+    std = np.sqrt(m2 / (n - 1).where(n > 1))
+    z = (x - media) / std.where(std > 0)
+    return z.where(n >= MIN_TRIMESTRES_HISTORIA)
+
+def detect_quarter(df_nuevo, baselines, baselines_mun):
+    """
+    Compara un trimestre nuevo con las líneas base históricas.
+    
+    Solo se consultan las claves presentes en el trimestre nuevo, por lo que
+    el costo es proporcional a los registros nuevos y no a la historia.
+    
+    Args:
+        df_nuevo: Registros limpios del trimestre recién llegado
+        baselines: Líneas base por (empresa, municipio, servicio)
+        baselines_mun: Líneas base de crecimiento por municipio
+    
+    Returns:
+        pd.DataFrame: Tabla de alertas
+    """
+    alertas = []
+    
+    # Nivel registro: (empresa, municipio, servicio) contra su propia historia
+    nuevo = _agregar_por_trimestre(df_nuevo, CLAVE_BASELINE)
+    base = baselines.set_index(CLAVE_BASELINE).reindex(pd.MultiIndex.from_frame(nuevo[CLAVE_BASELINE]))
+    base.index = nuevo.index
+    
+    for col, metrica in [('LOG_LINEAS', 'LINEAS'), ('LOG_VPL', 'VALOR_POR_LINEA')]:
+        z = _zscore(nuevo[col], base[f'N_{col}'], base[f'MEDIA_{col}'], base[f'M2_{col}'])
+        marcados = z.abs() > UMBRAL_ZSCORE
+        if marcados.any():
+            df_alerta = nuevo.loc[marcados, CLAVE_BASELINE + ['PERIODO']].copy()
+            df_alerta['NIVEL'] = 'REGISTRO'
+            df_alerta['METRICA'] = metrica
+            valor = nuevo.loc[marcados, 'LINEAS'] if metrica == 'LINEAS' else np.exp(nuevo.loc[marcados, col])
+            esperado = np.expm1(base.loc[marcados, f'MEDIA_{col}']) if metrica == 'LINEAS' else np.exp(base.loc[marcados, f'MEDIA_{col}'])
+            df_alerta['VALOR'] = valor.values
+            df_alerta['ESPERADO'] = esperado.values
+            df_alerta['ZSCORE'] = z[marcados].values
+            alertas.append(df_alerta)
+    
+    # Nivel municipio: crecimiento trimestral contra su crecimiento histórico
+    nuevo_mun = _agregar_por_trimestre(df_nuevo, ['ID_MUNICIPIO'])
+    base_mun = baselines_mun.set_index('ID_MUNICIPIO').reindex(nuevo_mun['ID_MUNICIPIO'])
+    base_mun.index = nuevo_mun.index
+    
+    crecimiento = nuevo_mun['LOG_LINEAS'] - np.log1p(base_mun['ULTIMAS_LINEAS'])
+    z = _zscore(crecimiento, base_mun['N_LOG_CRECIMIENTO'],
+                base_mun['MEDIA_LOG_CRECIMIENTO'], base_mun['M2_LOG_CRECIMIENTO'])
+    marcados = z.abs() > UMBRAL_ZSCORE
+    if marcados.any():
+        df_alerta = nuevo_mun.loc[marcados, ['ID_MUNICIPIO', 'PERIODO']].copy()
+        df_alerta['NIVEL'] = 'MUNICIPIO'
+        df_alerta['METRICA'] = 'CRECIMIENTO_PCT'
+        df_alerta['VALOR'] = (np.expm1(crecimiento[marcados]) * 100).values
+        df_alerta['ESPERADO'] = (np.expm1(base_mun.loc[marcados, 'MEDIA_LOG_CRECIMIENTO']) * 100).values
+        df_alerta['ZSCORE'] = z[marcados].values
+        alertas.append(df_alerta)
+    
+    if not alertas:
+        return pd.DataFrame(columns=COLUMNAS_ALERTAS)
+    
+    df_alertas = pd.concat(alertas, ignore_index=True).reindex(columns=COLUMNAS_ALERTAS)
+    df_alertas[CLAVE_BASELINE] = df_alertas[CLAVE_BASELINE].astype('Int64')
+    
+    # Nombres legibles desde el trimestre nuevo
+    nombres_emp = df_nuevo.drop_duplicates('ID_EMPRESA').set_index('ID_EMPRESA')['EMPRESA']
+    nombres_mun = df_nuevo.drop_duplicates('ID_MUNICIPIO').set_index('ID_MUNICIPIO')[['MUNICIPIO', 'DEPARTAMENTO']]
+    df_alertas['EMPRESA'] = df_alertas['ID_EMPRESA'].map(nombres_emp)
+    df_alertas['MUNICIPIO'] = df_alertas['ID_MUNICIPIO'].map(nombres_mun['MUNICIPIO'])
+    df_alertas['DEPARTAMENTO'] = df_alertas['ID_MUNICIPIO'].map(nombres_mun['DEPARTAMENTO'])
+    
+    return df_alertas.sort_values('ZSCORE', key=np.abs, ascending=False)
+
+def update_baselines(df_nuevo, baselines, baselines_mun):
+    """
+    Incorpora un trimestre nuevo a las líneas base sin recorrer la historia.
+    
+    Returns:
+        tuple: (baselines, baselines_mun) actualizadas
+    """
+    nuevo = _agregar_por_trimestre(df_nuevo, CLAVE_BASELINE)
+    baselines = _actualizar(baselines, nuevo, CLAVE_BASELINE, ['LOG_LINEAS', 'LOG_VPL'])
+    
+    nuevo_mun = _agregar_por_trimestre(df_nuevo, ['ID_MUNICIPIO'])
+    previas = baselines_mun.set_index('ID_MUNICIPIO')['ULTIMAS_LINEAS'].reindex(nuevo_mun['ID_MUNICIPIO'])
+    nuevo_mun['LOG_CRECIMIENTO'] = nuevo_mun['LOG_LINEAS'].values - np.log1p(previas.values)
+    baselines_mun = _actualizar(baselines_mun, nuevo_mun, ['ID_MUNICIPIO'], ['LOG_CRECIMIENTO'])
+    
+    return baselines, baselines_mun
+
+def save_baselines(baselines, baselines_mun):
+    """Guarda las líneas base en formato parquet"""
+    RUTA_BASELINES.parent.mkdir(exist_ok=True)
+    baselines.to_parquet(RUTA_BASELINES, index=False)
+    baselines_mun.to_parquet(RUTA_BASELINES_MUNICIPIO, index=False)
+
+def load_alerts():
+    """
+    Carga la tabla de alertas generada por la ingesta.
+    
+    Returns:
+        pd.DataFrame: Alertas, o None si aún no se ha ingerido ningún trimestre
+    """
+    if not RUTA_ALERTAS.exists():
+        return None
+    return pd.read_csv(RUTA_ALERTAS)
+
+def ingest_quarter(df_nuevo):
+    """
+    Ingesta de un trimestre nuevo: detecta anomalías contra la historia,
+    agrega las alertas a la tabla de alertas y actualiza las líneas base.
+    
+    Args:
+        df_nuevo: Registros limpios del trimestre recién llegado
+    
+    Returns:
+        pd.DataFrame: Alertas generadas para el trimestre
+    """
+    if not RUTA_BASELINES.exists() or not RUTA_BASELINES_MUNICIPIO.exists():
+        raise FileNotFoundError(
+            f"No se encontraron líneas base en {RUTA_BASELINES.parent}. Genere el dataset limpio primero."
+        )
+    
+    baselines = pd.read_parquet(RUTA_BASELINES)
+    baselines_mun = pd.read_parquet(RUTA_BASELINES_MUNICIPIO)
+    
+    # Si llegan varios trimestres juntos se procesan en orden cronológico
+    periodos = df_nuevo['ANNO'] * 10 + df_nuevo['TRIMESTRE']
+    alertas = []
+    for periodo in sorted(periodos.unique()):
+        df_periodo = df_nuevo[periodos == periodo]
+        alertas.append(detect_quarter(df_periodo, baselines, baselines_mun))
+        baselines, baselines_mun = update_baselines(df_periodo, baselines, baselines_mun)
+    
+    df_alertas = pd.concat(alertas, ignore_index=True).reindex(columns=COLUMNAS_ALERTAS)
+    df_alertas.to_csv(RUTA_ALERTAS, mode='a', header=not RUTA_ALERTAS.exists(), index=False, encoding='utf-8')
+    save_baselines(baselines, baselines_mun)
+    
+    return df_alertas
+
+if __name__ == "__main__":
+    import sys
+    
+    if len(sys.argv) != 2:
+        print("Uso: python -m utils.quarter_alerts <trimestre_nuevo.csv | --baselines>")
+        sys.exit(1)
+    
+    if sys.argv[1] == '--baselines':
+        # Construir líneas base desde un dataset limpio ya existente
+        df_historico = pd.read_csv("data/empaquetamiento_fijo_limpio_2023_2024.csv")
+        save_baselines(*build_baselines(df_historico))
+        print(f"✓ Líneas base guardadas en {RUTA_BASELINES}")
+        sys.exit(0)
+    
+    df_trimestre = pd.read_csv(sys.argv[1])
+    alertas = ingest_quarter(df_trimestre)
+    print(f"✓ {len(alertas):,} alertas generadas ({RUTA_ALERTAS})")
@@ -0,0 +1,113 @@
+"""
+Módulo de caché persistente en disco para resultados costosos (barridos y
+ajustes de clustering), con expulsión LRU
+"""
+import os
+import hashlib
+import json
+import uuid
+import joblib
+from pathlib import Path
+
+RUTA_CACHE = Path(".cache/resultados")
+
+# Número máximo de entradas que se conservan en disco
+MAX_ENTRADAS = 64
+
+def clave_cache(*partes):
+    """
+    Construye una clave estable a partir de valores simples (str, números, listas, tuplas).
+    
+    Args:
+        *partes: Componentes de la clave (versión del dataset, rango, variables, etc.)
+    
+    Returns:
+        str: Hash hexadecimal de la clave
+    """
+    texto = json.dumps(partes, sort_keys=True, default=str)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+def _ruta(espacio, clave):
+    return RUTA_CACHE / espacio / f"{clave}.joblib"
+
+def cargar(espacio, clave):
+    """
+    Lee un resultado de la caché y lo marca como usado recientemente.
+    
+    Args:
+        espacio: Nombre del grupo de resultados (p. ej. 'barrido_k')
+        clave: Salida de clave_cache
+    
+    Returns:
+        object: Resultado guardado, o None si no existe o no se puede leer
+    """
+    ruta = _ruta(espacio, clave)
+    if not ruta.exists():
+        return None
+    
+    try:
+        valor = joblib.load(ruta)
+    except Exception:
+        # Archivo corrupto o de una versión incompatible: se recalcula
+        ruta.unlink(missing_ok=True)
+        return None
+    
+    # Otro proceso pudo expulsar el archivo después de leerlo
+    try:
+        os.utime(ruta)
+    except FileNotFoundError:
+        pass
+    return valor
+
+def _expulsar():
+    """Elimina las entradas usadas hace más tiempo si se supera MAX_ENTRADAS"""
+    # Otros escritores pueden expulsar entradas a la vez: se omiten las que ya no existen
+    entradas = []
+    for ruta in RUTA_CACHE.glob("*/*.joblib"):
+        try:
+            entradas.append((ruta.stat().st_mtime, ruta))
+        except FileNotFoundError:
+            continue
+    
+    entradas.sort()
+    for _, ruta in entradas[:max(len(entradas) - MAX_ENTRADAS, 0)]:
+        ruta.unlink(missing_ok=True)
+
+def guardar(espacio, clave, valor):
+    """
+    Guarda un resultado en la caché (escritura atómica) y aplica la expulsión LRU.
+    
+    Args:
+        espacio: Nombre del grupo de resultados
+        clave: Salida de clave_cache
+        valor: Objeto serializable con joblib
+    """
+    ruta = _ruta(espacio, clave)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    
+    # Nombre temporal único: varios hilos del mismo proceso pueden guardar la misma clave
+    temporal = ruta.with_name(f"{ruta.stem}.{uuid.uuid4().hex}.tmp")
+    joblib.dump(valor, temporal)
+    os.replace(temporal, ruta)
+    
+    _expulsar()
+
+def memoizar(espacio, clave, funcion):
+    """
+    Devuelve el resultado en caché o lo calcula con funcion() y lo guarda.
+    
+    Args:
+        espacio: Nombre del grupo de resultados
+        clave: Salida de clave_cache
+        funcion: Callable sin argumentos que calcula el resultado
+    
+    Returns:
+        tuple: (resultado, desde_cache)
+    """
+    valor = cargar(espacio, clave)
+    if valor is not None:
+        return valor, True
+    
+    valor = funcion()
+    guardar(espacio, clave, valor)
+    return valor, False
@@ -0,0 +1,278 @@
+"""
+Módulo de clustering por bloques (out-of-core): agregación por granularidad
+y ajuste incremental con partial_fit sin materializar la matriz escalada completa
+"""
+import argparse
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from sklearn.preprocessing import StandardScaler
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import IncrementalPCA
+
+# Filas por bloque al recorrer el dataset
+TAMANO_BLOQUE = 50000
+
+# Granularidades de clustering: columnas que identifican cada unidad y
+# variables de cobertura (conteos de valores distintos) que se calculan
+GRANULARIDADES = {
+    'operador_tecnologia_servicio': {
+        'nombre': 'Operador - Tecnología - Servicio',
+        'claves': ['EMPRESA', 'TECNOLOGIA', 'SERVICIO_PAQUETE'],
+        'conteos': {'N_DEPARTAMENTOS': 'DEPARTAMENTO', 'N_MUNICIPIOS': 'MUNICIPIO'}
+    },
+    'municipio': {
+        'nombre': 'Municipio',
+        'claves': ['ID_MUNICIPIO', 'MUNICIPIO', 'DEPARTAMENTO'],
+        'conteos': {'N_OPERADORES': 'EMPRESA', 'N_TECNOLOGIAS': 'TECNOLOGIA', 'N_SERVICIOS': 'SERVICIO_PAQUETE'}
+    },
+    'operador_municipio': {
+        'nombre': 'Operador - Municipio',
+        'claves': ['EMPRESA', 'ID_MUNICIPIO', 'MUNICIPIO', 'DEPARTAMENTO'],
+        'conteos': {'N_TECNOLOGIAS': 'TECNOLOGIA', 'N_SERVICIOS': 'SERVICIO_PAQUETE'}
+    },
+    'registro': {
+        'nombre': 'Registro individual',
+        'claves': ['EMPRESA', 'TECNOLOGIA', 'SERVICIO_PAQUETE', 'MUNICIPIO', 'DEPARTAMENTO'],
+        'conteos': {}
+    }
+}
+
+VARIABLES_BASE = [
+    'CANTIDAD_LINEAS_ACCESOS',
+    'VALOR_FACTURADO_O_COBRADO',
+    'VELOCIDAD_EFECTIVA_DOWNSTREAM',
+    'VELOCIDAD_EFECTIVA_UPSTREAM'
+]
+
+VELOCIDADES = ['VELOCIDAD_EFECTIVA_DOWNSTREAM', 'VELOCIDAD_EFECTIVA_UPSTREAM']
+
+def variables_granularidad(granularidad):
+    """Variables numéricas disponibles para una granularidad"""
+    conteos = list(GRANULARIDADES[granularidad]['conteos'].keys())
+    return VARIABLES_BASE + conteos + ['VALOR_POR_LINEA', 'RATIO_VELOCIDAD']
+
+def _derivadas(df):
+    """Agrega VALOR_POR_LINEA y RATIO_VELOCIDAD y limpia infinitos/nulos de las variables"""
+    df['VALOR_POR_LINEA'] = df['VALOR_FACTURADO_O_COBRADO'] / df['CANTIDAD_LINEAS_ACCESOS']
+    df['RATIO_VELOCIDAD'] = df['VELOCIDAD_EFECTIVA_DOWNSTREAM'] / (df['VELOCIDAD_EFECTIVA_UPSTREAM'] + 1)
+    
+    numericas = df.select_dtypes(include=[np.number]).columns
+    df[numericas] = df[numericas].replace([np.inf, -np.inf], np.nan).fillna(0)
+    
+    return df
+
+def _agregar_bloque(bloque, granularidad):
+    """
+    Agregado parcial de un bloque: sumas, conteos de velocidades no nulas y
+    pares distintos (clave, valor) para los conteos de cobertura.
+    """
+    config = GRANULARIDADES[granularidad]
+    claves = config['claves']
+    
+    parcial = bloque.groupby(claves).agg(
+        CANTIDAD_LINEAS_ACCESOS=('CANTIDAD_LINEAS_ACCESOS', 'sum'),
+        VALOR_FACTURADO_O_COBRADO=('VALOR_FACTURADO_O_COBRADO', 'sum'),
+        _SUMA_DOWN=('VELOCIDAD_EFECTIVA_DOWNSTREAM', 'sum'),
+        _N_DOWN=('VELOCIDAD_EFECTIVA_DOWNSTREAM', 'count'),
+        _SUMA_UP=('VELOCIDAD_EFECTIVA_UPSTREAM', 'sum'),
+        _N_UP=('VELOCIDAD_EFECTIVA_UPSTREAM', 'count')
+    )
+    
+    distintos = {
+        variable: bloque[claves + [columna]].dropna().drop_duplicates()
+        for variable, columna in config['conteos'].items()
+    }
+    
+    return parcial, distintos
+
+def _combinar(parciales, granularidad):
+    """Combina los agregados parciales de todos los bloques en el resultado final"""
+    config = GRANULARIDADES[granularidad]
+    claves = config['claves']
+    
+    df_agg = pd.concat([p for p, _ in parciales]).groupby(level=claves).sum()
+    
+    df_agg['VELOCIDAD_EFECTIVA_DOWNSTREAM'] = df_agg['_SUMA_DOWN'] / df_agg['_N_DOWN']
+    df_agg['VELOCIDAD_EFECTIVA_UPSTREAM'] = df_agg['_SUMA_UP'] / df_agg['_N_UP']
+    df_agg = df_agg.drop(columns=['_SUMA_DOWN', '_N_DOWN', '_SUMA_UP', '_N_UP'])
+    
+    for variable, columna in config['conteos'].items():
+        distintos = pd.concat([d[variable] for _, d in parciales]).drop_duplicates()
+        df_agg[variable] = distintos.groupby(claves).size().reindex(df_agg.index, fill_value=0)
+    
+    return _derivadas(df_agg.reset_index())
+
+def preparar_granularidad(df, granularidad):
+    """
+    Prepara las unidades de clustering de una granularidad a partir de un
+    DataFrame en memoria.
+    
+    Args:
+        df: DataFrame a nivel registro
+        granularidad: Clave de GRANULARIDADES
+    
+    Returns:
+        pd.DataFrame: Una fila por unidad con las columnas de clave y las variables
+    """
+    # load_data lee la tecnología 'NA' como nulo; se restaura para que coincida
+    # con iterar_bloques_csv y el groupby no descarte esos registros
+    if 'TECNOLOGIA' in df.columns and df['TECNOLOGIA'].isna().any():
+        df = df.assign(TECNOLOGIA=df['TECNOLOGIA'].fillna('NA'))
+    
+    if granularidad == 'registro':
+        columnas = GRANULARIDADES['registro']['claves'] + VARIABLES_BASE
+        df_reg = df[columnas].reset_index(drop=True)
+        df_reg[VELOCIDADES] = df_reg[VELOCIDADES].astype(float)
+        return _derivadas(df_reg)
+    
+    return _combinar([_agregar_bloque(df, granularidad)], granularidad)
+
+def iterar_bloques_csv(ruta, periodo_inicio=None, periodo_fin=None, tamano=TAMANO_BLOQUE):
+    """
+    Recorre el CSV limpio por bloques, opcionalmente filtrado por periodo.
+    
+    Args:
+        ruta: Ruta del CSV limpio
+        periodo_inicio: Primer periodo (ANNO*10+TRIMESTRE) o None
+        periodo_fin: Último periodo (ANNO*10+TRIMESTRE) o None
+        tamano: Filas por bloque
+    
+    Yields:
+        pd.DataFrame: Bloque de registros
+    """
+    # keep_default_na=False: 'NA' es un valor válido de TECNOLOGIA
+    for bloque in pd.read_csv(ruta, chunksize=tamano, keep_default_na=False, na_values=['']):
+        periodo = bloque['ANNO'] * 10 + bloque['TRIMESTRE']
+        if periodo_inicio is not None:
+            bloque = bloque[periodo >= periodo_inicio]
+        if periodo_fin is not None:
+            bloque = bloque[periodo.loc[bloque.index] <= periodo_fin]
+        if len(bloque) > 0:
+            yield bloque
+
+def preparar_granularidad_por_bloques(ruta, granularidad, periodo_inicio=None, periodo_fin=None,
+                                      tamano=TAMANO_BLOQUE):
+    """
+    Igual que preparar_granularidad, pero leyendo el CSV por bloques para
+    datasets que no caben en memoria (solo granularidades agregadas).
+    
+    Returns:
+        pd.DataFrame: Una fila por unidad con las columnas de clave y las variables
+    """
+    if granularidad == 'registro':
+        raise ValueError("La granularidad 'registro' no se agrega; use ajustar_por_bloques")
+    
+    parciales = [
+        _agregar_bloque(bloque, granularidad)
+        for bloque in iterar_bloques_csv(ruta, periodo_inicio, periodo_fin, tamano)
+    ]
+    return _combinar(parciales, granularidad)
+
+def ajustar_scaler_por_bloques(fabrica_bloques, variables):
+    """Pasada de media y varianza de las variables con StandardScaler.partial_fit"""
+    scaler = StandardScaler()
+    for bloque in fabrica_bloques():
+        scaler.partial_fit(bloque[variables].to_numpy(dtype=float))
+    return scaler
+
+def ajustar_por_bloques(fabrica_bloques, variables, n_clusters, random_state=42,
+                        n_componentes=3, epocas=1, scaler=None):
+    """
+    Ajusta StandardScaler, MiniBatchKMeans e IncrementalPCA con partial_fit,
+    bloque a bloque, sin construir la matriz escalada completa.
+    
+    Args:
+        fabrica_bloques: Callable sin argumentos que devuelve un iterador nuevo de
+                         DataFrames con las variables (se recorre varias veces)
+        variables: Columnas usadas para el clustering
+        n_clusters: Número de clusters
+        random_state: Semilla
+        n_componentes: Componentes de la PCA incremental
+        epocas: Pasadas de MiniBatchKMeans sobre los datos
+        scaler: StandardScaler ya ajustado (si es None se ajusta en una primera pasada)
+    
+    Returns:
+        tuple: (scaler, kmeans, pca)
+    """
+    if scaler is None:
+        scaler = ajustar_scaler_por_bloques(fabrica_bloques, variables)
+    
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, batch_size=4096, n_init=3)
+    pca = IncrementalPCA(n_components=min(n_componentes, len(variables)))
+    
+    # Pasadas siguientes: centroides y componentes principales
+    for epoca in range(epocas):
+        for bloque in fabrica_bloques():
+            X = scaler.transform(bloque[variables].to_numpy(dtype=float))
+            if len(X) >= n_clusters:
+                kmeans.partial_fit(X)
+            if epoca == 0 and len(X) >= pca.n_components:
+                pca.partial_fit(X)
+    
+    return scaler, kmeans, pca
+
+def predecir_por_bloques(fabrica_bloques, variables, scaler, kmeans, pca=None):
+    """
+    Asigna clusters (y proyección PCA) bloque a bloque.
+    
+    Returns:
+        tuple: (labels, proyecciones) como arrays; proyecciones es None sin PCA
+    """
+    labels = []
+    proyecciones = []
+    
+    for bloque in fabrica_bloques():
+        X = scaler.transform(bloque[variables].to_numpy(dtype=float))
+        labels.append(kmeans.predict(X))
+        if pca is not None:
+            proyecciones.append(pca.transform(X).astype(np.float32))
+    
+    labels = np.concatenate(labels) if labels else np.empty(0, dtype=np.int32)
+    proyecciones = np.vstack(proyecciones) if proyecciones else None
+    
+    return labels, proyecciones
+
+def bloques_de_dataframe(df, tamano=TAMANO_BLOQUE):
+    """Fábrica de bloques sobre un DataFrame en memoria (vistas por posición)"""
+    def fabrica():
+        for inicio in range(0, len(df), tamano):
+            yield df.iloc[inicio:inicio + tamano]
+    return fabrica
+
+def cluster_csv(ruta, variables, n_clusters, salida, periodo_inicio=None, periodo_fin=None,
+                tamano=TAMANO_BLOQUE):
+    """
+    Clustering a nivel registro de un CSV que no cabe en memoria: ajusta por
+    bloques y escribe los clusters asignados en otro CSV, también por bloques.
+    
+    Returns:
+        tuple: (scaler, kmeans, pca)
+    """
+    def fabrica():
+        for bloque in iterar_bloques_csv(ruta, periodo_inicio, periodo_fin, tamano):
+            yield preparar_granularidad(bloque, 'registro')
+    
+    scaler, kmeans, pca = ajustar_por_bloques(fabrica, variables, n_clusters)
+    
+    salida = Path(salida)
+    primero = True
+    for bloque in fabrica():
+        X = scaler.transform(bloque[variables].to_numpy(dtype=float))
+        bloque['Cluster'] = kmeans.predict(X)
+        bloque.to_csv(salida, mode='w' if primero else 'a', header=primero, index=False, encoding='utf-8')
+        primero = False
+    
+    return scaler, kmeans, pca
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clustering por bloques de registros individuales")
+    parser.add_argument('--ruta', default="data/empaquetamiento_fijo_limpio_2023_2024.csv")
+    parser.add_argument('--salida', default="data/clusters_registros.csv")
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--variables', nargs='+', default=VARIABLES_BASE)
+    args = parser.parse_args()
+    
+    print(f"\nClustering por bloques de {args.ruta} (k = {args.k})...")
+    cluster_csv(args.ruta, args.variables, args.k, args.salida)
+    print(f"   ✓ Clusters guardados en {args.salida}")